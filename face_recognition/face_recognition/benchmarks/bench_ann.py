@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""Compare the IVF gallery index with exact search.
+
+For each gallery size, builds an IVF index and reports build time, recall@1
+against exact search and per-call query latency for several nprobe values.
+Synthetic embeddings are drawn around random identities in a low-dimensional
+subspace (face embeddings have a much lower intrinsic dimension than their
+size); pass --latent-dim equal to --dimension for the uniform worst case.
+
+Usage:
+    python benchmarks/bench_ann.py [--sizes 1000 10000 100000] [--nprobe 4 8 16]
+        [--dimension 512] [--latent-dim 32] [--queries 200] [--batch 4]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add add-on directory to path for imports
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from face_recognition_addon.ann import IVFIndex
+from face_recognition_addon.gallery import Gallery
+
+EMBEDDINGS_PER_PERSON = 5
+NOISE = 0.3  # norm of the per-embedding noise relative to the identity vector
+
+
+def unit(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalize rows."""
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def make_data(size: int, dimension: int, latent_dim: int, queries: int, seed: int = 0):
+    """Synthetic gallery and queries (new photos of enrolled people)."""
+    rng = np.random.default_rng(seed)
+    people = max(1, size // EMBEDDINGS_PER_PERSON)
+    basis = rng.standard_normal((latent_dim, dimension)).astype(np.float32)
+    centers = unit(rng.standard_normal((people, latent_dim)).astype(np.float32) @ basis)
+
+    def noisy(vectors):
+        noise = rng.standard_normal(vectors.shape).astype(np.float32)
+        return unit(vectors + NOISE * noise / np.sqrt(dimension))
+
+    gallery = noisy(np.repeat(centers, EMBEDDINGS_PER_PERSON, axis=0)[:size])
+    query = noisy(centers[rng.choice(people, queries)])
+    return gallery, query
+
+
+def per_call_ms(search, queries: np.ndarray, batch: int) -> float:
+    """Median latency of one search call over batches of queries."""
+    samples = []
+    for i in range(0, len(queries), batch):
+        start = time.perf_counter()
+        search(queries[i:i + batch])
+        samples.append(time.perf_counter() - start)
+    return float(np.median(samples)) * 1000
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[4, 8, 16])
+    parser.add_argument("--dimension", type=int, default=512)
+    parser.add_argument("--latent-dim", type=int, default=32)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--batch", type=int, default=4, help="query faces per call")
+    args = parser.parse_args()
+
+    print(
+        f"dimension {args.dimension} (latent {args.latent_dim}), "
+        f"{args.queries} queries in calls of {args.batch}"
+    )
+    print(f"{'embeddings':>10}  {'search':>12}  {'build s':>7}  {'recall@1':>8}  {'ms/call':>8}")
+    for size in args.sizes:
+        matrix, queries = make_data(size, args.dimension, args.latent_dim, args.queries)
+        person_ids = [str(i) for i in range(size)]
+        gallery = Gallery.from_arrays(matrix, person_ids)
+
+        exact_rows, _ = gallery.search(queries, k=1)
+        exact_ms = per_call_ms(lambda q: gallery.search(q, k=1), queries, args.batch)
+        print(f"{size:10d}  {'exact':>12}  {'-':>7}  {1.0:8.3f}  {exact_ms:8.2f}")
+
+        start = time.perf_counter()
+        index = IVFIndex.build(gallery.matrix)
+        build_s = time.perf_counter() - start
+        for nprobe in args.nprobe:
+            rows, _ = index.search(gallery.matrix, queries, 1, nprobe)
+            recall = float(np.mean(rows[:, 0] == exact_rows[:, 0]))
+            ivf_ms = per_call_ms(
+                lambda q: index.search(gallery.matrix, q, 1, nprobe), queries, args.batch
+            )
+            label = f"ivf/{nprobe}of{index.nlist}"
+            print(f"{size:10d}  {label:>12}  {build_s:7.2f}  {recall:8.3f}  {ivf_ms:8.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""Benchmark event clip frame extraction: ffmpeg subprocess vs in-process PyAV.
+
+Encodes a synthetic H.264 clip the size of a Nest event clip, then extracts
+frames from it repeatedly:
+
+- ffmpeg: one ``ffmpeg -ss 0.5 ... -frames:v 1`` subprocess per event, like
+  the integration's filesystem fallback (skipped if ffmpeg is not on PATH)
+- pyav-1: in-process decode of a single frame
+- pyav-best: in-process decode of --samples frames, scored with the Haar
+  detector and sharpness, best --best frames JPEG-encoded for recognition
+
+and reports events/sec and CPU per event (the subprocess's CPU included).
+
+Usage:
+    python benchmarks/bench_clip_decoder.py [--seconds 4] [--width 1280]
+                                            [--iterations 20] [--samples 6]
+                                            [--min-face-size 40]
+"""
+
+import argparse
+import logging
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import av
+import cv2
+import numpy as np
+
+# Add add-on directory to path for imports
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from face_recognition_addon.clip_decoder import ClipDecoder
+from face_recognition_addon.config import Config
+from face_recognition_addon.detection import create_detector
+
+
+def make_clip(path: Path, seconds: float, width: int, fps: int = 15):
+    """Encode a synthetic clip: textured background with a moving bright blob."""
+    height = width * 9 // 16
+    rng = np.random.default_rng(0)
+    background = cv2.GaussianBlur(rng.integers(0, 255, (height, width, 3), dtype=np.uint8), (0, 0), 2)
+    with av.open(str(path), mode="w") as container:
+        stream = container.add_stream("libx264", rate=fps)
+        stream.width, stream.height, stream.pix_fmt = width, height, "yuv420p"
+        for i in range(int(seconds * fps)):
+            frame = background.copy()
+            x = int((width - height // 3) * i / (seconds * fps))
+            cv2.circle(frame, (x + height // 6, height // 2), height // 6, (200, 190, 180), -1)
+            for packet in stream.encode(av.VideoFrame.from_ndarray(frame, format="bgr24")):
+                container.mux(packet)
+        for packet in stream.encode():
+            container.mux(packet)
+
+
+def cpu_seconds() -> float:
+    """CPU time of this process and its finished children."""
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+
+def extract_ffmpeg(clip: Path) -> list:
+    """One frame at 0.5 s through an ffmpeg subprocess, as JPEG."""
+    jpeg = subprocess.run(
+        ["ffmpeg", "-v", "error", "-ss", "0.5", "-i", str(clip), "-frames:v", "1",
+         "-f", "image2pipe", "-vcodec", "mjpeg", "-"],
+        check=True, capture_output=True,
+    ).stdout
+    return [jpeg]
+
+
+def run_mode(extract, clip: Path, iterations: int) -> dict:
+    """Time `iterations` extractions."""
+    extract(clip)  # warm-up
+    cpu_start = cpu_seconds()
+    wall_start = time.perf_counter()
+    frames = 0
+    for _ in range(iterations):
+        frames = len(extract(clip))
+    wall = time.perf_counter() - wall_start
+    return {
+        "events_per_sec": iterations / wall,
+        "ms_per_event": wall / iterations * 1000,
+        "cpu_ms_per_event": (cpu_seconds() - cpu_start) / iterations * 1000,
+        "frames": frames,
+    }
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=4.0, help="Clip length")
+    parser.add_argument("--width", type=int, default=1280, help="Clip width (16:9)")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--samples", type=int, default=6, help="Frames scored per clip")
+    parser.add_argument("--best", type=int, default=2, help="Frames sent to recognition")
+    parser.add_argument("--min-face-size", type=int, default=40, help="Detector min_face_size")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    detector = create_detector(Config(detector_backend="haar", min_face_size=args.min_face_size))
+    single = ClipDecoder(samples=1, best_frames=1)
+    best = ClipDecoder(detector, samples=args.samples, best_frames=args.best)
+
+    modes = {
+        "pyav-1": lambda clip: [f.to_jpeg() for f in single.decode(clip)[0]],
+        "pyav-best": lambda clip: [f.to_jpeg() for f in best.decode(clip)[0]],
+    }
+    if shutil.which("ffmpeg"):
+        modes = {"ffmpeg": extract_ffmpeg, **modes}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        clip = Path(tmp) / "clip.mp4"
+        make_clip(clip, args.seconds, args.width)
+        print(f"{args.seconds:.0f}s {args.width}x{args.width * 9 // 16} H.264 clip "
+              f"({clip.stat().st_size // 1024} KB), {args.iterations} events")
+        if "ffmpeg" not in modes:
+            print("ffmpeg not found on PATH, subprocess mode skipped")
+        print(f"{'mode':<10} {'frames':>7} {'events/s':>9} {'ms/event':>9} {'CPU ms/event':>13}")
+        for name, extract in modes.items():
+            r = run_mode(extract, clip, args.iterations)
+            print(f"{name:<10} {r['frames']:>7} {r['events_per_sec']:>9.1f} "
+                  f"{r['ms_per_event']:>9.1f} {r['cpu_ms_per_event']:>13.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
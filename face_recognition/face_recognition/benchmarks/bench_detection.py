@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""Measure face detection throughput and recall on local doorbell frames.
+
+Runs each detector backend over a fixture directory of 1080p and 4K frames
+and reports, per resolution, images/sec (decode + detect) and recall of the
+labelled faces at IoU >= 0.5.
+
+Fixtures are not shipped (they are pictures of people). Put frames in
+benchmarks/fixtures/detection/ next to a labels.json mapping each file name
+to its face boxes in full-frame pixels:
+
+    {"front_door_0001.jpg": [[812, 233, 140, 168]], "empty_0002.jpg": []}
+
+Usage:
+    python benchmarks/bench_detection.py [--fixtures DIR] [--backend haar yunet]
+        [--min-face-size 40] [--pyramid-levels 1] [--repeat 3]
+"""
+
+import argparse
+import json
+import logging
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+# Add add-on directory to path for imports
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from face_recognition_addon.config import Config
+from face_recognition_addon.detection import create_detector, decode_image
+
+DEFAULT_FIXTURES = Path(__file__).resolve().parent / "fixtures" / "detection"
+IOU_THRESHOLD = 0.5
+
+
+def iou(a: Sequence[float], b: Sequence[float]) -> float:
+    """Intersection over union of two (x, y, w, h) boxes."""
+    x0, y0 = max(a[0], b[0]), max(a[1], b[1])
+    x1, y1 = min(a[0] + a[2], b[0] + b[2]), min(a[1] + a[3], b[1] + b[3])
+    inter = max(0.0, x1 - x0) * max(0.0, y1 - y0)
+    union = a[2] * a[3] + b[2] * b[3] - inter
+    return inter / union if union else 0.0
+
+
+def matched_faces(truth: List[List[float]], found: List[Sequence[float]]) -> int:
+    """Count labelled faces matched by a detection (each detection used once)."""
+    unused = list(found)
+    matched = 0
+    for box in truth:
+        best = max(unused, key=lambda d: iou(box, d), default=None)
+        if best is not None and iou(box, best) >= IOU_THRESHOLD:
+            unused.remove(best)
+            matched += 1
+    return matched
+
+
+def resolution_label(image: np.ndarray) -> str:
+    """Bucket a frame as 1080p, 4K or other by its height."""
+    height = image.shape[0]
+    if height >= 2000:
+        return "4K"
+    if height >= 1000:
+        return "1080p"
+    return f"{height}p"
+
+
+def run_backend(backend: str, fixtures: Dict[str, bytes], labels: Dict[str, list],
+                config: Config, repeat: int):
+    """Benchmark one backend and print a row per resolution."""
+    try:
+        detector = create_detector(config, backend=backend)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"{backend:6} skipped: {e}")
+        return
+
+    stats = defaultdict(lambda: {"images": 0, "seconds": 0.0, "faces": 0,
+                                 "matched": 0, "detections": 0})
+    for name, data in fixtures.items():
+        label = resolution_label(decode_image(data))
+        row = stats[label]
+        for i in range(repeat):
+            start = time.perf_counter()
+            detections = detector.detect(decode_image(data))
+            row["seconds"] += time.perf_counter() - start
+        row["images"] += repeat
+        row["faces"] += len(labels[name])
+        row["detections"] += len(detections)
+        row["matched"] += matched_faces(labels[name], [d.box for d in detections])
+
+    for label, row in sorted(stats.items()):
+        recall = row["matched"] / row["faces"] if row["faces"] else float("nan")
+        print(
+            f"{backend:6} {label:>6}  {row['images'] // repeat:5d} frames  "
+            f"{row['images'] / row['seconds']:7.1f} images/s  "
+            f"{row['seconds'] / row['images'] * 1000:7.1f} ms/image  "
+            f"recall {recall:6.1%}  "
+            f"({row['matched']}/{row['faces']} faces, {row['detections']} detections)"
+        )
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fixtures", type=Path, default=DEFAULT_FIXTURES)
+    parser.add_argument("--backend", nargs="+", default=["haar", "yunet"])
+    parser.add_argument("--model-path", default="", help="YuNet ONNX model")
+    parser.add_argument("--min-face-size", type=int, default=40)
+    parser.add_argument("--pyramid-levels", type=int, default=1)
+    parser.add_argument("--score-threshold", type=float, default=0.6)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    labels_path = args.fixtures / "labels.json"
+    if not labels_path.exists():
+        print(f"No fixtures: expected {labels_path} (see the docstring of this script)")
+        return 1
+
+    logging.basicConfig(level=logging.WARNING)
+    with open(labels_path) as f:
+        labels = json.load(f)
+    fixtures = {name: (args.fixtures / name).read_bytes() for name in labels}
+
+    config = Config(
+        detector_model_path=args.model_path,
+        min_face_size=args.min_face_size,
+        detector_pyramid_levels=args.pyramid_levels,
+        detector_score_threshold=args.score_threshold,
+    )
+    print(
+        f"{len(fixtures)} frames, min face {args.min_face_size}px, "
+        f"{args.pyramid_levels} pyramid level(s), IoU >= {IOU_THRESHOLD}"
+    )
+    for backend in args.backend:
+        run_backend(backend, fixtures, labels, config, args.repeat)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
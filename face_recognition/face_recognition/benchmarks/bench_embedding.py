@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""Measure embedding cost per face for each model precision and batch size.
+
+Reports ms/face at batch sizes 1, 4 and 16 for the fp32, fp16 and int8
+variants. Missing fp16/int8 variants are created next to a copy of the
+model in a temporary directory (int8 calibrated on random crops, so use a
+properly calibrated variant when checking accuracy). Without --model a synthetic MobileFaceNet-
+sized network (112x112 input, 512-d output) is generated, which is useful
+for comparing precisions and thread counts but not for absolute numbers.
+
+Usage:
+    python benchmarks/bench_embedding.py [--model embedding.onnx] [--threads 0]
+        [--batch-sizes 1 4 16] [--iterations 20]
+"""
+
+import argparse
+import logging
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add add-on directory to path for imports
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from face_recognition_addon.embedding import EmbeddingEngine, quantize_model, variant_path
+
+PRECISIONS = ("fp32", "fp16", "int8")
+
+
+def build_synthetic_model(path: Path, dimension: int = 512):
+    """Write a random conv net with roughly the cost of MobileFaceNet."""
+    import onnx
+    from onnx import TensorProto, helper, numpy_helper
+
+    rng = np.random.default_rng(0)
+    nodes, initializers = [], []
+    previous, channels = "input", 3
+    # 112 -> 56 -> 28 -> 14 -> 7
+    for i, out_channels in enumerate((32, 64, 128, 256)):
+        for j, stride in enumerate((2, 1)):
+            name = f"conv{i}_{j}"
+            weight = rng.standard_normal((out_channels, channels, 3, 3)).astype(np.float32)
+            weight *= np.sqrt(2.0 / (channels * 9))
+            initializers.append(numpy_helper.from_array(weight, f"{name}_w"))
+            nodes.append(helper.make_node(
+                "Conv", [previous, f"{name}_w"], [name],
+                strides=[stride, stride], pads=[1, 1, 1, 1],
+            ))
+            nodes.append(helper.make_node("Relu", [name], [f"{name}_relu"]))
+            previous, channels = f"{name}_relu", out_channels
+
+    nodes.append(helper.make_node("GlobalAveragePool", [previous], ["pool"]))
+    nodes.append(helper.make_node("Flatten", ["pool"], ["flat"]))
+    initializers.append(numpy_helper.from_array(
+        rng.standard_normal((channels, dimension)).astype(np.float32), "fc_w"))
+    initializers.append(numpy_helper.from_array(np.zeros(dimension, dtype=np.float32), "fc_b"))
+    nodes.append(helper.make_node("Gemm", ["flat", "fc_w", "fc_b"], ["embedding"]))
+
+    graph = helper.make_graph(
+        nodes, "synthetic_embedding",
+        [helper.make_tensor_value_info("input", TensorProto.FLOAT, ["N", 3, 112, 112])],
+        [helper.make_tensor_value_info("embedding", TensorProto.FLOAT, ["N", dimension])],
+        initializers,
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 13)])
+    model.ir_version = 8
+    onnx.save(model, str(path))
+
+
+def time_batch(engine: EmbeddingEngine, batch_size: int, iterations: int) -> float:
+    """Median ms per face for one batch size (crops -> normalized vectors)."""
+    rng = np.random.default_rng(batch_size)
+    crops = [rng.integers(0, 255, (140, 120, 3), dtype=np.uint8) for _ in range(batch_size)]
+    engine.embed(crops)  # warm-up
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        engine.embed(crops)
+        samples.append(time.perf_counter() - start)
+    return float(np.median(samples)) * 1000 / batch_size
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", type=Path, help="float32 ONNX embedding model")
+    parser.add_argument("--threads", type=int, default=0, help="intra-op threads (0 = default)")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+    with tempfile.TemporaryDirectory() as tmp:
+        model_path = Path(tmp) / "embedding.onnx"
+        if args.model:
+            shutil.copy(args.model, model_path)
+            for precision in ("fp16", "int8"):
+                existing = variant_path(args.model, precision)
+                if existing.exists():
+                    shutil.copy(existing, variant_path(model_path, precision))
+        else:
+            print("No --model given, using a synthetic MobileFaceNet-sized network")
+            build_synthetic_model(model_path)
+
+        # int8 calibration: random crops stand in for real faces here
+        reference = EmbeddingEngine(model_path, intra_op_threads=args.threads)
+        rng = np.random.default_rng(0)
+        calibration = reference.preprocess(
+            [rng.integers(0, 255, (140, 120, 3), dtype=np.uint8) for _ in range(16)]
+        )
+
+        header = "precision  size MB " + "".join(f"  batch {b:>2} ms/face" for b in args.batch_sizes)
+        print(header)
+        for precision in PRECISIONS:
+            path = variant_path(model_path, precision)
+            if not path.exists():
+                quantize_model(model_path, precision, calibration)
+            engine = EmbeddingEngine(model_path, precision=precision,
+                                     intra_op_threads=args.threads)
+            row = [time_batch(engine, b, args.iterations) for b in args.batch_sizes]
+            size_mb = path.stat().st_size / 1e6
+            print(f"{precision:9} {size_mb:8.2f}" + "".join(f"  {ms:17.2f}" for ms in row))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""Measure gallery startup time from the memory-mapped embedding store.
+
+Compares opening a store file and building a Gallery on it (mmap, no
+copy) with re-reading the same embeddings into memory (np.load + Gallery
+build), and shows the first match on the mapped gallery (which faults
+pages in).
+
+Usage:
+    python benchmarks/bench_embedding_store.py [--sizes 1000 10000 100000]
+        [--dimension 512]
+"""
+
+import argparse
+import logging
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add add-on directory to path for imports
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from face_recognition_addon.embedding_store import EmbeddingStore, save_gallery
+from face_recognition_addon.gallery import Gallery
+
+EMBEDDINGS_PER_PERSON = 5
+
+
+def elapsed_ms(start: float) -> float:
+    """Milliseconds since start."""
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--dimension", type=int, default=512)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    rng = np.random.default_rng(0)
+    print(f"{'embeddings':>10}  {'file MB':>7}  {'mmap open ms':>12}  "
+          f"{'first match ms':>14}  {'np.load ms':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            embeddings = rng.standard_normal((size, args.dimension)).astype(np.float32)
+            person_ids = [f"person_{i // EMBEDDINGS_PER_PERSON}" for i in range(size)]
+            source = Gallery.from_arrays(embeddings, person_ids)
+            path = save_gallery(source, tmp, f"bench-{size}")
+            npy = Path(tmp) / f"bench-{size}.npz"
+            np.savez(npy, matrix=source.matrix, ids=np.array(person_ids))
+            query = source.matrix[:1]
+
+            start = time.perf_counter()
+            gallery = Gallery.from_store(EmbeddingStore(path))
+            open_ms = elapsed_ms(start)
+            start = time.perf_counter()
+            gallery.match(query)
+            match_ms = elapsed_ms(start)
+
+            start = time.perf_counter()
+            with np.load(npy) as data:
+                Gallery.from_arrays(data["matrix"], data["ids"].tolist())
+            load_ms = elapsed_ms(start)
+
+            size_mb = path.stat().st_size / 1e6
+            print(f"{size:10d}  {size_mb:7.1f}  {open_ms:12.2f}  {match_ms:14.2f}  {load_ms:10.1f}")
+    print("(files are in the page cache here; a cold start adds disk reads "
+          "to the first match only)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
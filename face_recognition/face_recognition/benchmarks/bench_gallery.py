@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""Measure gallery match latency as the number of enrolled embeddings grows.
+
+Compares the vectorized Gallery (one matmul + argpartition per batch)
+with a per-person, per-embedding Python loop for a batch of query faces.
+
+Usage:
+    python benchmarks/bench_gallery.py [--sizes 50 500 5000 20000]
+        [--dimension 512] [--batch 4] [--iterations 50]
+"""
+
+import argparse
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import numpy as np
+
+# Add add-on directory to path for imports
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from face_recognition_addon.gallery import Gallery
+
+EMBEDDINGS_PER_PERSON = 5
+# The Python loop is only timed up to this size (it gets very slow)
+LOOP_MAX_SIZE = 5000
+
+
+def naive_match(people, queries):
+    """Per-person loop matching, the way it would be written without NumPy."""
+    results = []
+    for query in queries:
+        best_person, best_score = None, -1.0
+        for person_id, embeddings in people.items():
+            for embedding in embeddings:
+                score = float(np.dot(query, embedding))
+                if score > best_score:
+                    best_person, best_score = person_id, score
+        results.append((best_person, best_score))
+    return results
+
+
+def median_ms(fn, iterations: int) -> float:
+    """Median wall time of fn() in milliseconds."""
+    fn()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return float(np.median(samples)) * 1000
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 500, 5000, 20000])
+    parser.add_argument("--dimension", type=int, default=512)
+    parser.add_argument("--batch", type=int, default=4, help="query faces per match call")
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    queries = rng.standard_normal((args.batch, args.dimension)).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+    print(f"dimension {args.dimension}, {args.batch} query faces per call")
+    print(f"{'embeddings':>10}  {'gallery ms':>10}  {'loop ms':>10}  {'memory MB':>9}")
+    for size in args.sizes:
+        embeddings = rng.standard_normal((size, args.dimension)).astype(np.float32)
+        person_ids = [f"person_{i // EMBEDDINGS_PER_PERSON}" for i in range(size)]
+        gallery = Gallery.from_arrays(embeddings, person_ids)
+
+        gallery_ms = median_ms(lambda: gallery.match(queries), args.iterations)
+
+        loop = "-"
+        if size <= LOOP_MAX_SIZE:
+            people = defaultdict(list)
+            for person_id, embedding in zip(person_ids, gallery.matrix):
+                people[person_id].append(embedding)
+            loop = f"{median_ms(lambda: naive_match(people, queries), 3):.2f}"
+
+        memory = gallery.stats()["memory_mb"]
+        print(f"{size:10d}  {gallery_ms:10.3f}  {loop:>10}  {memory:9.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
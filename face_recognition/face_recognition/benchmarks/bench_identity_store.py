@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""Measure identity lookups/sec with concurrent request threads and a writer.
+
+Each reader thread stands in for a Flask request thread (gthread worker)
+resolving the people matched in one image, i.e. a get_many() of a few ids
+drawn from a skewed distribution (household members are seen far more
+often than visitors). Runs every combination of cache on/off and an idle
+or active writer thread doing bulk upserts.
+
+Usage:
+    python benchmarks/bench_identity_store.py [--identities 5000]
+        [--threads 1 4 8] [--seconds 3] [--faces 2] [--write-interval 0.05]
+"""
+
+import argparse
+import logging
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add add-on directory to path for imports
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from face_recognition_addon.identity_store import Identity, IdentityStore
+
+WRITE_BATCH = 50
+
+
+def run(store: IdentityStore, threads: int, seconds: float, faces: int,
+        identities: int, write_interval: float) -> dict:
+    """Run readers (and optionally a writer) for a fixed time.
+
+    Returns:
+        Lookups/sec and the number of write transactions
+    """
+    stop = threading.Event()
+    lookups = [0] * threads
+
+    def reader(slot: int):
+        rng = np.random.default_rng(slot)
+        ids = [f"person_{i}" for i in range(identities)]
+        while not stop.is_set():
+            # Zipf-like popularity: a few people account for most lookups
+            picks = np.minimum(rng.zipf(1.5, faces) - 1, identities - 1)
+            store.get_many([ids[i] for i in picks])
+            lookups[slot] += faces
+
+    writes = [0]
+
+    def writer():
+        rng = np.random.default_rng(1000)
+        while not stop.is_set():
+            picks = rng.integers(0, identities, WRITE_BATCH)
+            store.upsert_many([Identity(f"person_{i}", f"Person {i} ({writes[0]})") for i in picks])
+            writes[0] += 1
+            stop.wait(write_interval)
+
+    workers = [threading.Thread(target=reader, args=(slot,)) for slot in range(threads)]
+    if write_interval > 0:
+        workers.append(threading.Thread(target=writer))
+    for worker in workers:
+        worker.start()
+    time.sleep(seconds)
+    stop.set()
+    for worker in workers:
+        worker.join()
+    return {"lookups_per_sec": sum(lookups) / seconds, "writes": writes[0]}
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--identities", type=int, default=5000)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--faces", type=int, default=2, help="ids per get_many() call")
+    parser.add_argument("--write-interval", type=float, default=0.05,
+                        help="seconds between writer transactions")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    print(f"{'cache':>5}  {'writer':>6}  {'threads':>7}  {'lookups/sec':>12}  {'writes':>6}")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "identities.db"
+        IdentityStore(path).upsert_many(
+            [Identity(f"person_{i}", f"Person {i}") for i in range(args.identities)]
+        )
+        for cache in (False, True):
+            for write_interval in (0, args.write_interval):
+                for threads in args.threads:
+                    store = IdentityStore(path, cache=cache)
+                    result = run(store, threads, args.seconds, args.faces,
+                                 args.identities, write_interval)
+                    print(f"{'on' if cache else 'off':>5}  {'on' if write_interval else 'off':>6}  "
+                          f"{threads:>7}  {result['lookups_per_sec']:>12,.0f}  {result['writes']:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""Benchmark image ingest: base64-in-JSON POST /event vs raw POST /recognize.
+
+Each mode runs in a fresh subprocess so peak RSS is measured independently.
+The client side (encoding the request the way the integration does) and the
+server side (Flask parsing and decoding) are both included in the CPU time.
+
+Usage:
+    python benchmarks/bench_ingest.py [--sizes 2 5] [--iterations 20]
+"""
+
+import argparse
+import base64
+import io
+import json
+import logging
+import os
+import resource
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+# Add add-on directory to path for imports
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+MODES = ("json", "raw", "multipart")
+
+
+def make_image(size_mb: float) -> bytes:
+    """Build a pseudo-JPEG payload of the given size (incompressible)."""
+    size = int(size_mb * 1024 * 1024)
+    return b"\xff\xd8\xff\xe0" + os.urandom(size - 4)
+
+
+def run_mode(mode: str, size_mb: float, iterations: int) -> dict:
+    """Run one ingest mode in this process and return its measurements."""
+    logging.disable(logging.CRITICAL)
+
+    from face_recognition_addon.api import FaceRecognitionAPI
+    from face_recognition_addon.config import Config
+
+    api = FaceRecognitionAPI(Config(api_token="bench", detector_backend="none"))
+    client = api.app.test_client()
+    auth = {"Authorization": "Bearer bench"}
+
+    image_bytes = make_image(size_mb)
+    rss_before_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    wire_bytes = 0
+
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    for _ in range(iterations):
+        if mode == "json":
+            # What the integration used to do: base64 + json.dumps
+            body = json.dumps({
+                "event_type": "recognition_request",
+                "camera": "bench",
+                "image_data": base64.b64encode(image_bytes).decode("utf-8"),
+                "image_size": len(image_bytes),
+                "source": "benchmark",
+            }).encode("utf-8")
+            response = client.post(
+                "/event", data=body,
+                headers={**auth, "Content-Type": "application/json"},
+            )
+            wire_bytes = len(body)
+        elif mode == "raw":
+            response = client.post(
+                "/recognize", data=image_bytes,
+                headers={**auth, "Content-Type": "image/jpeg", "X-Camera": "bench"},
+            )
+            wire_bytes = len(image_bytes)
+        else:
+            response = client.post(
+                "/recognize",
+                data={"camera": "bench", "image": (io.BytesIO(image_bytes), "frame.jpg")},
+                headers=auth,
+                content_type="multipart/form-data",
+            )
+            wire_bytes = response.request.content_length or len(image_bytes)
+        assert response.status_code == 200, response.get_data(as_text=True)
+    cpu_s = time.process_time() - cpu_start
+    wall_s = time.perf_counter() - wall_start
+
+    rss_after_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {
+        "mode": mode,
+        "size_mb": size_mb,
+        "wire_bytes": wire_bytes,
+        "cpu_ms_per_request": cpu_s / iterations * 1000,
+        "wall_ms_per_request": wall_s / iterations * 1000,
+        "peak_rss_mb": rss_after_kb / 1024,
+        "rss_growth_mb": (rss_after_kb - rss_before_kb) / 1024,
+    }
+
+
+def main():
+    """Run all modes in subprocesses and print a comparison table."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=float, nargs="+", default=[2.0, 5.0],
+                        help="Image sizes in MB")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--worker", nargs=2, metavar=("MODE", "SIZE"),
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        mode, size = args.worker
+        print(json.dumps(run_mode(mode, float(size), args.iterations)))
+        return 0
+
+    print(f"{'mode':<10} {'size':>6} {'wire bytes':>12} {'cpu ms/req':>11} "
+          f"{'wall ms/req':>12} {'peak RSS MB':>12} {'RSS growth MB':>14}")
+    for size in args.sizes:
+        for mode in MODES:
+            output = subprocess.run(
+                [sys.executable, __file__, "--iterations", str(args.iterations),
+                 "--worker", mode, str(size)],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            r = json.loads(output.strip().splitlines()[-1])
+            print(f"{r['mode']:<10} {r['size_mb']:>5}M {r['wire_bytes']:>12} "
+                  f"{r['cpu_ms_per_request']:>11.2f} {r['wall_ms_per_request']:>12.2f} "
+                  f"{r['peak_rss_mb']:>12.1f} {r['rss_growth_mb']:>14.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""Measure the per-request cost of metrics recording.
+
+Records everything one recognition request records (request counters and
+histogram, four pipeline stages, queue wait/service, image/face counters)
+and compares it with the time of a real POST /recognize round trip through
+the Flask test client.
+
+Usage:
+    python benchmarks/bench_metrics.py [--iterations 100000]
+"""
+
+import argparse
+import logging
+import sys
+import time
+from pathlib import Path
+
+# Add add-on directory to path for imports
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from face_recognition_addon.api import FaceRecognitionAPI
+from face_recognition_addon.config import Config
+from face_recognition_addon.metrics import AddonMetrics
+
+
+def record_one_request(metrics: AddonMetrics):
+    """Everything the add-on records for one recognition request."""
+    timer = metrics.stage_timer()
+    for stage in ("decode", "detection", "embedding", "matching"):
+        with timer.stage(stage):
+            pass
+    metrics.images.inc()
+    metrics.faces.inc()
+    metrics.observe_job(0.001, 0.1)
+    metrics.observe_request("/recognize", 200, 0.1, 2_000_000, 400)
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=100_000)
+    args = parser.parse_args()
+
+    metrics = AddonMetrics()
+    start = time.perf_counter()
+    for _ in range(args.iterations):
+        record_one_request(metrics)
+    per_request_us = (time.perf_counter() - start) / args.iterations * 1e6
+
+    start = time.perf_counter()
+    for _ in range(100):
+        metrics.render()
+    render_ms = (time.perf_counter() - start) / 100 * 1000
+
+    logging.disable(logging.CRITICAL)
+    client = FaceRecognitionAPI(Config(api_token="", detector_backend="none")).app.test_client()
+    image = b"\xff\xd8\xff\xe0" + b"\x00" * 200_000
+    headers = {"Content-Type": "image/jpeg", "X-Camera": "bench"}
+    n = 200
+    start = time.perf_counter()
+    for _ in range(n):
+        client.post("/recognize", data=image, headers=headers)
+    request_us = (time.perf_counter() - start) / n * 1e6
+
+    print(f"metrics per request:        {per_request_us:8.1f} us")
+    print(f"/recognize round trip:      {request_us:8.1f} us (simulated pipeline)")
+    print(f"overhead vs round trip:     {per_request_us / request_us * 100:8.2f} %")
+    print(f"overhead vs 100 ms request: {per_request_us / 100_000 * 100:8.3f} %")
+    print(f"GET /metrics render:        {render_ms:8.2f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""Measure request latency around a model hot reload.
+
+A client thread runs the embedding + matching stage of the pipeline (one
+batch of face crops per request) in a closed loop while the model is
+reloaded halfway through. Latency percentiles are reported for the
+requests before, during (loading/warming) and after the reload, for:
+
+- double-buffered: ModelManager.reload() (background load, warm-up, swap)
+- stop-the-world: the new model is loaded under the lock requests use,
+  i.e. a naive reload in the request path
+
+Without --model a synthetic MobileFaceNet-sized network is generated (see
+bench_embedding.py). On a single core the background load still competes
+with requests for the CPU, so compare the two modes rather than expecting
+identical numbers before and during the reload.
+
+Usage:
+    python benchmarks/bench_model_reload.py [--model embedding.onnx]
+        [--gallery 50000] [--faces 4] [--seconds 6] [--threads 0]
+"""
+
+import argparse
+import logging
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add add-on directory to path for imports
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench_embedding import build_synthetic_model
+from face_recognition_addon.config import Config
+from face_recognition_addon.embedding import EmbeddingEngine
+from face_recognition_addon.embedding_store import save_gallery
+from face_recognition_addon.gallery import Gallery, load_gallery
+from face_recognition_addon.model_manager import STATE_ACTIVE, ModelSet
+from face_recognition_addon.pipeline import RecognitionPipeline
+
+EMBEDDINGS_PER_PERSON = 5
+
+
+def percentiles(samples) -> str:
+    """p50 / p99 / max of latencies in ms."""
+    if not samples:
+        return f"{'-':>8}  {'-':>8}  {'-':>8}  {0:>5}"
+    values = np.array(samples)
+    return (f"{np.percentile(values, 50):>8.1f}  {np.percentile(values, 99):>8.1f}  "
+            f"{values.max():>8.1f}  {len(values):>5}")
+
+
+def run_client(request, stop: threading.Event, phase, latencies: dict):
+    """Closed-loop client: record each request's latency under the phase it started in."""
+    while not stop.is_set():
+        started_in = phase()
+        start = time.perf_counter()
+        request()
+        latencies.setdefault(started_in, []).append((time.perf_counter() - start) * 1000)
+
+
+def double_buffered(pipeline: RecognitionPipeline, crops, seconds: float) -> dict:
+    """Reload with the ModelManager while requests run."""
+    def request():
+        with pipeline.models.acquire() as models:
+            models.gallery.match(models.embedder.embed(crops))
+
+    def phase():
+        return "after" if reloaded.is_set() else ("during" if reloading.is_set() else "before")
+
+    reloading, reloaded, stop = threading.Event(), threading.Event(), threading.Event()
+    latencies: dict = {}
+    client = threading.Thread(target=run_client, args=(request, stop, phase, latencies))
+    client.start()
+    time.sleep(seconds / 3)
+    reloading.set()
+    start = time.perf_counter()
+    pipeline.reload_models()
+    pipeline.models.wait()
+    reload_ms = (time.perf_counter() - start) * 1000
+    reloaded.set()
+    time.sleep(seconds / 3)
+    stop.set()
+    client.join()
+    assert pipeline.models.state == STATE_ACTIVE, pipeline.models.error
+    return {"latencies": latencies, "reload_ms": reload_ms}
+
+
+def stop_the_world(pipeline: RecognitionPipeline, crops, seconds: float) -> dict:
+    """Reload by loading the new model while holding the request lock."""
+    lock = threading.Lock()
+    config = pipeline.config
+    current = [pipeline.models.active]
+
+    def request():
+        with lock:
+            current[0].gallery.match(current[0].embedder.embed(crops))
+
+    def phase():
+        return "after" if reloaded.is_set() else ("during" if reloading.is_set() else "before")
+
+    reloading, reloaded, stop = threading.Event(), threading.Event(), threading.Event()
+    latencies: dict = {}
+    client = threading.Thread(target=run_client, args=(request, stop, phase, latencies))
+    client.start()
+    time.sleep(seconds / 3)
+    reloading.set()
+    start = time.perf_counter()
+    with lock:
+        embedder = EmbeddingEngine(config.embedding_model_path, config.embedding_precision,
+                                   config.embedding_threads)
+        current[0] = ModelSet(embedder, load_gallery(pipeline.config, embedder.version))
+    reload_ms = (time.perf_counter() - start) * 1000
+    reloaded.set()
+    time.sleep(seconds / 3)
+    stop.set()
+    client.join()
+    return {"latencies": latencies, "reload_ms": reload_ms}
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", type=Path, help="float32 ONNX model (default: synthetic)")
+    parser.add_argument("--gallery", type=int, default=50000, help="enrolled embeddings")
+    parser.add_argument("--faces", type=int, default=4, help="face crops per request")
+    parser.add_argument("--seconds", type=float, default=6.0)
+    parser.add_argument("--threads", type=int, default=0, help="intra-op threads")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    with tempfile.TemporaryDirectory() as tmp:
+        model_path = Path(tmp) / "embedding.onnx"
+        if args.model:
+            model_path.write_bytes(args.model.read_bytes())
+        else:
+            build_synthetic_model(model_path)
+        config = Config(
+            detector_backend="none",
+            embedding_model_path=str(model_path),
+            embedding_threads=args.threads,
+            embeddings_dir=str(Path(tmp) / "embeddings"),
+            identity_db_path=str(Path(tmp) / "identities.db"),
+        )
+
+        pipeline = RecognitionPipeline(config)
+        if not pipeline.models.load():
+            sys.exit(f"Could not load model: {pipeline.models.error}")
+        rng = np.random.default_rng(0)
+        with pipeline.models.acquire() as models:
+            dimension, version = models.embedder.dimension, models.embedder.version
+        embeddings = rng.standard_normal((args.gallery, dimension)).astype(np.float32)
+        person_ids = [f"person_{i // EMBEDDINGS_PER_PERSON}" for i in range(args.gallery)]
+        save_gallery(Gallery.from_arrays(embeddings, person_ids), config.embeddings_dir, version)
+        # Start from a warm, store-backed gallery in both modes
+        pipeline.models.load()
+        with pipeline.models.acquire() as models:
+            width, height = models.embedder.input_size
+        crops = [rng.integers(0, 255, (height, width, 3), dtype=np.uint8) for _ in range(args.faces)]
+
+        print(f"gallery {args.gallery} embeddings, {args.faces} faces/request")
+        print(f"{'mode':<16}  {'phase':<7}  {'p50 ms':>8}  {'p99 ms':>8}  {'max ms':>8}  "
+              f"{'reqs':>5}")
+        for name, mode in (("double-buffered", double_buffered), ("stop-the-world", stop_the_world)):
+            result = mode(pipeline, crops, args.seconds)
+            for phase in ("before", "during", "after"):
+                print(f"{name:<16}  {phase:<7}  {percentiles(result['latencies'].get(phase))}")
+            print(f"{name:<16}  reload took {result['reload_ms']:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
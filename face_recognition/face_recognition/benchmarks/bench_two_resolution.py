@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""Measure the time and memory saved by detecting on a downscaled frame.
+
+For each frame size (720p, 1080p, 4K synthetic scenes, or --image) runs
+decode + detect + crop the way the pipeline does:
+
+- full: detection at the frame's native resolution
+- two-res: detection downscaled by the camera's expected face size
+  (--face-size), crops cut from the full-resolution frame
+
+and, for event clips, the JPEG encode + decode round trip each selected
+frame used to take before recognition (now skipped). Reports median ms and
+peak traced memory per image, and what two-res saves over full.
+
+Usage:
+    python benchmarks/bench_two_resolution.py [--image FRAME.jpg] [--face-size 80]
+        [--backend haar] [--repeat 5]
+"""
+
+import argparse
+import logging
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+# Add add-on directory to path for imports
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from face_recognition_addon.config import Config
+from face_recognition_addon.detection import create_detector, decode_image
+
+SIZES = {"720p": (1280, 720), "1080p": (1920, 1080), "4K": (3840, 2160)}
+
+
+def synthetic_jpeg(width: int, height: int) -> bytes:
+    """A textured camera-like scene, JPEG-encoded."""
+    rng = np.random.default_rng(0)
+    coarse = rng.integers(0, 255, (height // 64, width // 64, 3), dtype=np.uint8)
+    frame = cv2.resize(coarse, (width, height), interpolation=cv2.INTER_CUBIC).astype(np.int16)
+    frame += rng.integers(-8, 8, frame.shape, dtype=np.int16)
+    return cv2.imencode(".jpg", np.clip(frame, 0, 255).astype(np.uint8))[1].tobytes()
+
+
+def measure(fn, repeat: int):
+    """Median ms and peak traced MB of fn()."""
+    times, peaks = [], []
+    for _ in range(repeat):
+        tracemalloc.start()
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+        peaks.append(tracemalloc.get_traced_memory()[1] / 2 ** 20)
+        tracemalloc.stop()
+    return float(np.median(times)), max(peaks)
+
+
+def recognize_frame(detector, data: bytes, min_face_size: int):
+    """Decode, detect and collect crops the way the pipeline does."""
+    frame = decode_image(data)
+    return [d.crop for d in detector.detect(frame, min_face_size=min_face_size)]
+
+
+def jpeg_round_trip(frame: np.ndarray):
+    """What a clip frame cost before recognition: encode to JPEG, decode again."""
+    return decode_image(cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 90])[1].tobytes())
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--image", type=Path, help="frame to use instead of the synthetic scenes")
+    parser.add_argument("--face-size", type=int, default=80, help="expected face size (px)")
+    parser.add_argument("--backend", default="haar")
+    parser.add_argument("--model-path", default="", help="YuNet ONNX model")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    detector = create_detector(Config(detector_model_path=args.model_path), backend=args.backend)
+    if args.image:
+        data = args.image.read_bytes()
+        frame = decode_image(data)
+        fixtures = {f"{frame.shape[1]}x{frame.shape[0]}": data}
+    else:
+        fixtures = {label: synthetic_jpeg(*size) for label, size in SIZES.items()}
+
+    print(f"{args.backend}, expected face {args.face_size}px, median of {args.repeat}")
+    for label, data in fixtures.items():
+        full_ms, full_mb = measure(lambda: recognize_frame(detector, data, detector.min_window), args.repeat)
+        two_ms, two_mb = measure(lambda: recognize_frame(detector, data, args.face_size), args.repeat)
+        frame = decode_image(data)
+        clip_ms, clip_mb = measure(lambda: jpeg_round_trip(frame), args.repeat)
+        print(
+            f"{label:>9}  full {full_ms:8.1f} ms {full_mb:6.1f} MB  "
+            f"two-res {two_ms:7.1f} ms {two_mb:6.1f} MB  "
+            f"saved {full_ms - two_ms:8.1f} ms {full_mb - two_mb:6.1f} MB  "
+            f"(clip frame re-encode skipped: {clip_ms:6.1f} ms {clip_mb:5.1f} MB)"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
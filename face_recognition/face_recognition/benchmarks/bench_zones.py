@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""Measure face detection on a full frame versus inside a detection zone.
+
+Detects faces in a 4K frame (a synthetic textured scene, or --image) once
+over the whole frame and once restricted to --zone the way a camera with
+``camera_zones`` is, and reports ms/frame, pixels scanned and the speedup
+for each detector backend.
+
+Usage:
+    python benchmarks/bench_zones.py [--image FRAME.jpg] [--zone 0.55,0.3,0.2,0.45]
+        [--backend haar yunet] [--min-face-size 40] [--repeat 10]
+"""
+
+import argparse
+import logging
+import sys
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+# Add add-on directory to path for imports
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from face_recognition_addon.config import Config
+from face_recognition_addon.detection import create_detector, decode_image
+from face_recognition_addon.zones import ZoneDetector, region_rects
+
+
+def synthetic_frame(width: int = 3840, height: int = 2160) -> np.ndarray:
+    """A textured camera-like scene (smooth regions plus sensor noise)."""
+    rng = np.random.default_rng(0)
+    coarse = rng.integers(0, 255, (height // 64, width // 64, 3), dtype=np.uint8)
+    frame = cv2.resize(coarse, (width, height), interpolation=cv2.INTER_CUBIC).astype(np.int16)
+    frame += rng.integers(-8, 8, frame.shape, dtype=np.int16)
+    return np.clip(frame, 0, 255).astype(np.uint8)
+
+
+def time_detect(detector, frame: np.ndarray, repeat: int):
+    """Median ms per detect() call and the detections of the last one."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        detections = detector.detect(frame)
+        times.append((time.perf_counter() - start) * 1000)
+    return float(np.median(times)), detections
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--image", type=Path, help="frame to use instead of the synthetic 4K scene")
+    parser.add_argument("--zone", default="0.55,0.3,0.2,0.45", help="camera_zones zone")
+    parser.add_argument("--backend", nargs="+", default=["haar", "yunet"])
+    parser.add_argument("--model-path", default="", help="YuNet ONNX model")
+    parser.add_argument("--min-face-size", type=int, default=40)
+    parser.add_argument("--pyramid-levels", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    frame = decode_image(args.image.read_bytes()) if args.image else synthetic_frame()
+    height, width = frame.shape[:2]
+    config = Config(
+        detector_model_path=args.model_path,
+        min_face_size=args.min_face_size,
+        detector_pyramid_levels=args.pyramid_levels,
+        camera_zones=[{"camera": "bench", "zone": args.zone}],
+    )
+    zones = config.zones.get("bench")
+    zone_pixels = sum((x1 - x0) * (y1 - y0) for x0, y0, x1, y1 in region_rects(zones, width, height))
+    print(
+        f"{width}x{height} frame, zone {args.zone} "
+        f"({zone_pixels / (width * height):.1%} of the pixels), min face {args.min_face_size}px"
+    )
+
+    for backend in args.backend:
+        try:
+            detector = create_detector(config, backend=backend)
+        except (FileNotFoundError, ValueError) as e:
+            print(f"{backend:6} skipped: {e}")
+            continue
+        full_ms, full = time_detect(detector, frame, args.repeat)
+        zone_ms, zoned = time_detect(ZoneDetector(detector, zones), frame, args.repeat)
+        print(
+            f"{backend:6} full frame {full_ms:8.2f} ms ({len(full)} faces)  "
+            f"zone {zone_ms:7.2f} ms ({len(zoned)} faces)  speedup {full_ms / zone_ms:5.1f}x"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
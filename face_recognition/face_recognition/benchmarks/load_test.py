@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""Load test the add-on HTTP API in development and production server modes.
+
+Starts the add-on server in a subprocess for each mode (or targets an
+already running add-on with --url), fires concurrent POST /recognize
+requests from several client threads using keep-alive sessions, and reports
+requests/sec and latency percentiles.
+
+Usage:
+    python benchmarks/load_test.py [--modes development production]
+                                   [--clients 16] [--duration 10]
+    python benchmarks/load_test.py --url http://homeassistant.local:8080 --token TOKEN
+"""
+
+import argparse
+import logging
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import requests
+
+# Add add-on directory to path for imports
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def serve(mode: str, port: int, workers: int):
+    """Run the add-on API server in this process (subprocess entry point)."""
+    logging.basicConfig(level=logging.WARNING)
+    logging.getLogger("face_recognition_addon").setLevel(logging.WARNING)
+
+    from face_recognition_addon.api import FaceRecognitionAPI
+    from face_recognition_addon.config import Config
+    from face_recognition_addon.server import run_production_server
+
+    config = Config(api_port=port, api_token="", server_mode=mode, server_workers=workers,
+                    detector_backend="none")
+    api = FaceRecognitionAPI(config)
+    if mode == "production":
+        run_production_server(api, config)
+    else:
+        api.run(host='127.0.0.1', port=port, debug=False, threaded=True, use_reloader=False)
+
+
+def free_port() -> int:
+    """Find a free local TCP port."""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_for_server(url: str, timeout: float = 15.0):
+    """Wait until GET /status answers."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(f"{url}/status", timeout=1).status_code == 200:
+                return
+        except requests.exceptions.ConnectionError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Server at {url} did not start")
+
+
+def run_load(url: str, token: str, clients: int, duration: float, image: bytes) -> dict:
+    """Fire requests from `clients` threads for `duration` seconds."""
+    headers = {"Content-Type": "image/jpeg", "X-Camera": "load_test"}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    stop_at = time.monotonic() + duration
+
+    def client():
+        session = requests.Session()
+        local = []
+        local_errors = 0
+        while time.monotonic() < stop_at:
+            start = time.perf_counter()
+            try:
+                response = session.post(f"{url}/recognize", data=image, headers=headers, timeout=30)
+                if response.status_code != 200:
+                    local_errors += 1
+            except requests.exceptions.RequestException:
+                local_errors += 1
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+            errors[0] += local_errors
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    wall_start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - wall_start
+
+    latencies.sort()
+
+    def percentile(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+
+    return {
+        "requests": len(latencies),
+        "errors": errors[0],
+        "rps": len(latencies) / wall,
+        "p50_ms": percentile(0.50),
+        "p99_ms": percentile(0.99),
+    }
+
+
+def main():
+    """Run the load test."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--modes", nargs="+", default=["development", "production"])
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--workers", type=int, default=2, help="gunicorn workers")
+    parser.add_argument("--image-kb", type=int, default=300, help="Request body size")
+    parser.add_argument("--url", help="Target an already running add-on instead")
+    parser.add_argument("--token", default="", help="API token for --url")
+    parser.add_argument("--serve", nargs=2, metavar=("MODE", "PORT"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve[0], int(args.serve[1]), args.workers)
+        return 0
+
+    image = b"\xff\xd8\xff\xe0" + os.urandom(args.image_kb * 1024)
+
+    targets = []
+    if args.url:
+        targets.append(("remote", args.url.rstrip("/"), None))
+    else:
+        for mode in args.modes:
+            port = free_port()
+            proc = subprocess.Popen(
+                [sys.executable, __file__, "--workers", str(args.workers),
+                 "--serve", mode, str(port)],
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            )
+            targets.append((mode, f"http://127.0.0.1:{port}", proc))
+
+    print(f"{args.clients} clients, {args.duration:.0f}s, {args.image_kb} KB bodies")
+    print(f"{'mode':<12} {'requests':>9} {'errors':>7} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8}")
+    try:
+        for mode, url, proc in targets:
+            wait_for_server(url)
+            r = run_load(url, args.token, args.clients, args.duration, image)
+            print(f"{mode:<12} {r['requests']:>9} {r['errors']:>7} {r['rps']:>9.1f} "
+                  f"{r['p50_ms']:>8.1f} {r['p99_ms']:>8.1f}")
+            if proc:
+                proc.terminate()
+                proc.wait(timeout=30)
+    finally:
+        for _, _, proc in targets:
+            if proc and proc.poll() is None:
+                proc.kill()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
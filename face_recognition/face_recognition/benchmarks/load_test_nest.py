@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""Load test Nest media fetching against a fake server with expiring URLs.
+
+Starts a local stand-in for Home Assistant's
+``/api/nest/event_media/<device>/<event>/thumbnail`` endpoint that answers
+after a fixed latency and returns 404 once an event is older than the
+expiry delay. Bursts of events (one per device) are then fetched two ways:
+
+- blocking: one event at a time with module-level ``requests.get`` (a new
+  connection per fetch, 10 s timeout), like the ingestion used to
+- async: NestMediaFetcher, started the moment each event arrives,
+  concurrent over a pooled session with a short deadline
+
+and the share of thumbnails fetched before expiry and the latency from
+event to fetch result are reported.
+
+Usage:
+    python benchmarks/load_test_nest.py [--devices 8] [--bursts 10]
+                                        [--interval 0.5] [--latency 0.15]
+                                        [--expiry 2.0]
+"""
+
+import argparse
+import logging
+import queue
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import requests
+
+# Add add-on directory to path for imports
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from face_recognition_addon.nest_ingestion import NestMediaFetcher
+
+THUMBNAIL = b"\xff\xd8\xff\xe0" + bytes(40 * 1024)
+
+
+class ExpiringMediaHandler(BaseHTTPRequestHandler):
+    """Nest event media endpoint whose URLs expire after a delay."""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        time.sleep(server.latency)
+        parts = self.path.strip("/").split("/")
+        published = server.media.get((parts[3], parts[4])) if len(parts) == 6 else None
+        expired = published is None or time.monotonic() - published > server.expiry
+        body = b"expired" if expired else THUMBNAIL
+        self.send_response(404 if expired else 200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start_server(latency: float, expiry: float) -> ThreadingHTTPServer:
+    """Start the fake media server on a free local port."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ExpiringMediaHandler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.expiry = expiry
+    server.media = {}
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def generate_events(server, devices: int, bursts: int, interval: float, run: str):
+    """Publish bursts of events, one per device; yields (device, event, time)."""
+    for burst in range(bursts):
+        start = time.monotonic()
+        for device in range(devices):
+            event = (f"{run}-dev{device}", f"evt{burst}")
+            server.media[event] = time.monotonic()
+            yield event[0], event[1], time.monotonic()
+        time.sleep(max(0.0, interval - (time.monotonic() - start)))
+
+
+def run_blocking(server, url: str, args) -> list:
+    """Handle events one at a time with a fresh blocking request each."""
+    pending = queue.Queue()
+    results = []
+
+    def consumer():
+        while True:
+            item = pending.get()
+            if item is None:
+                return
+            device_id, event_id, arrived = item
+            try:
+                response = requests.get(
+                    f"{url}/api/nest/event_media/{device_id}/{event_id}/thumbnail", timeout=10
+                )
+                ok = response.status_code == 200
+            except requests.exceptions.RequestException:
+                ok = False
+            results.append((ok, time.monotonic() - arrived))
+
+    thread = threading.Thread(target=consumer)
+    thread.start()
+    for event in generate_events(server, args.devices, args.bursts, args.interval, "blocking"):
+        pending.put(event)
+    pending.put(None)
+    thread.join()
+    return results
+
+
+def run_async(server, url: str, args) -> list:
+    """Start a pooled async fetch the moment each event arrives."""
+    fetcher = NestMediaFetcher(url, token="", deadline=args.deadline,
+                               max_connections=args.connections)
+    results = []
+    lock = threading.Lock()
+
+    def on_done(future, arrived):
+        with lock:
+            results.append((future.result() is not None, time.monotonic() - arrived))
+
+    futures = []
+    for device_id, event_id, arrived in generate_events(
+            server, args.devices, args.bursts, args.interval, "async"):
+        future = fetcher.fetch(device_id, event_id)
+        future.add_done_callback(lambda f, arrived=arrived: on_done(f, arrived))
+        futures.append(future)
+    for future in futures:
+        future.result()
+    fetcher.close()
+    return results
+
+
+def summarize(results) -> dict:
+    """Fetched share and latency percentiles."""
+    latencies = sorted(latency for _, latency in results)
+
+    def percentile(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000 if latencies else 0.0
+
+    return {
+        "events": len(results),
+        "fetched": sum(ok for ok, _ in results),
+        "p50_ms": percentile(0.50),
+        "p95_ms": percentile(0.95),
+    }
+
+
+def main():
+    """Run the load test."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, default=8, help="Cameras firing per burst")
+    parser.add_argument("--bursts", type=int, default=10)
+    parser.add_argument("--interval", type=float, default=0.5, help="Seconds between bursts")
+    parser.add_argument("--latency", type=float, default=0.15, help="Server response time (s)")
+    parser.add_argument("--expiry", type=float, default=2.0, help="Media URL lifetime (s)")
+    parser.add_argument("--deadline", type=float, default=3.0, help="Async fetch deadline (s)")
+    parser.add_argument("--connections", type=int, default=8, help="Async pool size")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.CRITICAL)
+    server = start_server(args.latency, args.expiry)
+    url = f"http://127.0.0.1:{server.server_port}"
+
+    print(f"{args.devices} devices x {args.bursts} bursts every {args.interval}s, "
+          f"server latency {args.latency * 1000:.0f} ms, media expires after {args.expiry}s")
+    print(f"{'mode':<10} {'events':>7} {'fetched':>8} {'expired':>8} {'p50 ms':>8} {'p95 ms':>8}")
+
+    blocking = summarize(run_blocking(server, url, args))
+    asynchronous = summarize(run_async(server, url, args))
+
+    for mode, r in (("blocking", blocking), ("async", asynchronous)):
+        print(f"{mode:<10} {r['events']:>7} {r['fetched']:>8} {r['events'] - r['fetched']:>8} "
+              f"{r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f}")
+    server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
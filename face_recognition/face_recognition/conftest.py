@@ -0,0 +1,50 @@
+"""Shared test helpers.
+
+The test files also run standalone (``python test_<feature>.py``), so the
+helpers are plain functions they import with ``from conftest import ...``;
+the fixtures wrap them for pytest-style tests.
+"""
+
+import sys
+from functools import partial
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+
+from face_recognition_addon.api import FaceRecognitionAPI
+from face_recognition_addon.config import Config
+
+
+def api_config(tmp: str, **options) -> Config:
+    """Config without a detector backend and with all add-on data under tmp."""
+    return Config(
+        detector_backend="none",
+        embedding_model_path=str(Path(tmp) / "embedding.onnx"),
+        embeddings_dir=str(Path(tmp) / "embeddings"),
+        identity_db_path=str(Path(tmp) / "identities.db"),
+        review_dir=str(Path(tmp) / "review"),
+        image_dir=str(Path(tmp) / "images"),
+        **options,
+    )
+
+
+def make_api(tmp: str, detector, **options) -> FaceRecognitionAPI:
+    """API with its data in tmp, running `detector` instead of a real backend.
+
+    Args:
+        tmp: Temporary directory for the add-on's data
+        detector: Object with ``detect(frame)`` returning Detections
+        **options: Config overrides
+    """
+    api = FaceRecognitionAPI(api_config(tmp, **options))
+    api.pipeline.detector = detector
+    return api
+
+
+@pytest.fixture
+def api_factory(tmp_path):
+    """make_api bound to the test's tmp_path: ``api_factory(detector, **options)``."""
+    return partial(make_api, str(tmp_path))
@@ -6,6 +6,7 @@ from pathlib import Path
 
 from face_recognition_addon.config import ConfigLoader
 from face_recognition_addon.api import FaceRecognitionAPI
+from face_recognition_addon.server import run_production_server
 
 # Configure logging
 logging.basicConfig(
@@ -29,78 +30,26 @@ def main():
         logger.info("Configuration loaded successfully")
         logger.info("Add-on ready (Chunk 3 - Nest Event Ingestion)")
         
-        # Start HTTP API server
+        # Build the API (and load models) once, before any workers fork
         api = FaceRecognitionAPI(config)
         logger.info(f"HTTP API server starting on port {config.api_port}")
         
-        # Try to use gunicorn first (production WSGI server)
-        # Falls back to Flask dev server if gunicorn fails
-        # TEMPORARILY DISABLED GUNICORN FOR TESTING - uncomment to re-enable
-        use_gunicorn = False  # Force Flask dev server for now
-        # try:
-        #     import gunicorn.app.base
-        #     logger.info("Gunicorn found! Attempting to start...")
-        #     use_gunicorn = True
-            
-            # class StandaloneApplication(gunicorn.app.base.BaseApplication):
-            #     def __init__(self, app, options=None):
-            #         self.options = options or {}
-            #         self.application = app
-            #         super().__init__()
-            #
-            #     def load_config(self):
-            #         for key, value in self.options.items():
-            #             self.cfg.set(key.lower(), value)
-            #
-            #     def load(self):
-            #         return self.application.app
-            #
-            # # Gunicorn options - simplified to avoid configuration errors
-            # options = {
-            #     'bind': f'0.0.0.0:{config.api_port}',
-            #     'workers': 1,
-            #     'worker_class': 'sync',
-            #     'timeout': 120,  # Increased timeout to 120 seconds
-            #     'keepalive': 30,  # Increased keepalive to 30 seconds
-            #     'graceful_timeout': 30,
-            #     'accesslog': '-',
-            #     'errorlog': '-',
-            #     'loglevel': 'debug',  # Increased to debug to see POST requests
-            #     'capture_output': True,  # Capture stdout/stderr
-            #     'preload_app': False,  # Don't preload app to avoid initialization issues
-            #     # Remove problematic settings that might not be supported
-            #     # 'limit_request_line': 4094,  # Might cause errors
-            #     # 'limit_request_fields': 100,  # Might cause errors
-            #     # 'limit_request_field_size': 8190,  # Might cause errors
-            #     # 'limit_request_body': 10485760,  # Causing "No configuration setting" error
-            #     # 'max_requests': 0,  # Might cause errors
-            #     # 'max_requests_jitter': 0,  # Might cause errors
-            #     # 'worker_connections': 1000,  # Might cause errors
-            #     'forwarded_allow_ips': '*',  # Allow forwarded headers (for HA proxy)
-            # }
-            #
-            # logger.info(f"Starting Gunicorn server on 0.0.0.0:{config.api_port}")
-            # StandaloneApplication(api, options).run()
-            # use_gunicorn = False  # Should never reach here
-
-        # except ImportError as e:
-        #     logger.warning(f"Gunicorn not available: {e}")
-        #     logger.warning("Falling back to Flask dev server")
-        #     use_gunicorn = False
-        # except Exception as e:
-        #     logger.error(f"Error starting Gunicorn: {e}")
-        #     logger.exception("Falling back to Flask dev server")
-        #     use_gunicorn = False
-        
-        # Fallback to Flask dev server
-        if not use_gunicorn:
+        # Production mode serves with gunicorn (preloaded, multi-worker);
+        # falls back to the Flask dev server if gunicorn is unavailable
+        if config.server_mode == "production":
             try:
-                logger.info(f"Starting Flask dev server on 0.0.0.0:{config.api_port}")
-                logger.info("Using Flask dev server (Gunicorn temporarily disabled for testing)")
-                api.run(host='0.0.0.0', port=config.api_port, debug=False, threaded=True, use_reloader=False)
-            except KeyboardInterrupt:
-                logger.info("Shutting down...")
+                run_production_server(api, config)
                 return 0
+            except ImportError as e:
+                logger.warning(f"Gunicorn not available: {e}")
+                logger.warning("Falling back to Flask dev server")
+        
+        try:
+            logger.info(f"Starting Flask dev server on 0.0.0.0:{config.api_port}")
+            api.run(host='0.0.0.0', port=config.api_port, debug=False, threaded=True, use_reloader=False)
+        except KeyboardInterrupt:
+            logger.info("Shutting down...")
+            return 0
         
     except FileNotFoundError as e:
         logger.error(f"Configuration error: {e}")
@@ -0,0 +1,201 @@
+"""Approximate nearest-neighbour index for large galleries.
+
+A pure-NumPy inverted file (IVF) index: gallery embeddings are clustered
+with spherical k-means into ``nlist`` cells, and a query only scores the
+embeddings in its ``nprobe`` closest cells instead of the whole gallery.
+Small galleries keep using the exact flat scan in Gallery.search(); the
+index is used automatically above ``Config.ann_min_gallery_size``.
+
+Indexes are saved as ``<embeddings_dir>/<model version>.ivf.npz`` together
+with a fingerprint of the embeddings they were built from, so a restart
+reuses the trained index and a new model version gets its own.
+"""
+
+import hashlib
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Optional, Tuple, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# k-means training
+KMEANS_ITERATIONS = 10
+TRAIN_POINTS_PER_CELL = 64  # training sample size per cell
+MIN_CELLS = 8
+
+# Rows scored per chunk when assigning the whole gallery to cells
+ASSIGN_CHUNK = 16384
+
+
+def fingerprint(matrix: np.ndarray) -> str:
+    """Content hash of an embedding matrix (detects a stale saved index)."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(np.asarray(matrix.shape, dtype=np.int64).tobytes())
+    digest.update(np.ascontiguousarray(matrix).data)
+    return digest.hexdigest()
+
+
+def default_cell_count(size: int) -> int:
+    """Number of IVF cells for a gallery size (about sqrt(N))."""
+    return max(MIN_CELLS, int(np.sqrt(size)))
+
+
+class IVFIndex:
+    """Inverted file index over the first ``size`` rows of a gallery matrix.
+
+    The index stores only centroids and, per cell, the gallery row numbers
+    (sorted by cell, with offsets), not a second copy of the embeddings:
+    candidate rows are gathered from the gallery matrix at query time.
+    """
+
+    def __init__(self, centroids: np.ndarray, rows: np.ndarray, offsets: np.ndarray,
+                 matrix_fingerprint: str = ""):
+        """Initialize from trained arrays (use IVFIndex.build or IVFIndex.load).
+
+        Args:
+            centroids: (nlist, D) normalized cell centroids
+            rows: (N,) gallery rows sorted by cell
+            offsets: (nlist + 1,) start of each cell in rows
+            matrix_fingerprint: fingerprint() of the indexed matrix
+        """
+        self.centroids = centroids
+        self.rows = rows
+        self.offsets = offsets
+        self.fingerprint = matrix_fingerprint
+
+    @property
+    def size(self) -> int:
+        """Number of indexed gallery rows."""
+        return len(self.rows)
+
+    @property
+    def nlist(self) -> int:
+        """Number of cells."""
+        return len(self.centroids)
+
+    @classmethod
+    def build(cls, matrix: np.ndarray, nlist: Optional[int] = None,
+              iterations: int = KMEANS_ITERATIONS, seed: int = 0) -> "IVFIndex":
+        """Train cells with spherical k-means and assign every row.
+
+        Args:
+            matrix: (N, D) L2-normalized gallery embeddings
+            nlist: Number of cells (default about sqrt(N))
+            iterations: k-means iterations
+            seed: Random seed for the training sample and initial centroids
+
+        Returns:
+            IVFIndex
+        """
+        start = time.perf_counter()
+        size = len(matrix)
+        nlist = min(nlist or default_cell_count(size), size)
+        rng = np.random.default_rng(seed)
+
+        sample_size = min(size, nlist * TRAIN_POINTS_PER_CELL)
+        sample = matrix[np.sort(rng.choice(size, sample_size, replace=False))]
+        centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+
+        for _ in range(iterations):
+            assignment = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, sample)
+            counts = np.bincount(assignment, minlength=nlist)
+            empty = counts == 0
+            if empty.any():
+                # Re-seed empty cells with random sample points
+                sums[empty] = sample[rng.choice(sample_size, int(empty.sum()), replace=False)]
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            centroids = sums / np.maximum(norms, 1e-12)
+
+        centroids = np.ascontiguousarray(centroids, dtype=np.float32)
+        assignment = np.concatenate([
+            np.argmax(matrix[i:i + ASSIGN_CHUNK] @ centroids.T, axis=1)
+            for i in range(0, size, ASSIGN_CHUNK)
+        ])
+        rows = np.argsort(assignment, kind="stable").astype(np.int32)
+        offsets = np.zeros(nlist + 1, dtype=np.int64)
+        np.cumsum(np.bincount(assignment, minlength=nlist), out=offsets[1:])
+
+        index = cls(centroids, rows, offsets, fingerprint(matrix))
+        logger.info(
+            f"Built IVF index: {size} embeddings, {nlist} cells "
+            f"in {(time.perf_counter() - start) * 1000:.0f} ms"
+        )
+        return index
+
+    def search(self, matrix: np.ndarray, queries: np.ndarray, k: int = 1,
+               nprobe: int = 8) -> Tuple[np.ndarray, np.ndarray]:
+        """Approximate top-k search.
+
+        Args:
+            matrix: Gallery matrix the index was built on (extra rows ignored)
+            queries: (Q, D) L2-normalized queries
+            k: Neighbours per query
+            nprobe: Cells scanned per query
+
+        Returns:
+            (rows (Q, k) int64, scores (Q, k) float32), best first; rows are
+            padded with -1 and scores with -inf if fewer candidates exist
+        """
+        nprobe = min(nprobe, self.nlist)
+        cell_scores = queries @ self.centroids.T
+        probes = np.argpartition(cell_scores, -nprobe, axis=1)[:, -nprobe:]
+
+        out_rows = np.full((len(queries), k), -1, dtype=np.int64)
+        out_scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        for i, query in enumerate(queries):
+            candidates = np.concatenate([
+                self.rows[self.offsets[cell]:self.offsets[cell + 1]] for cell in probes[i]
+            ])
+            if len(candidates) == 0:
+                continue
+            scores = np.take(matrix, candidates, axis=0) @ query
+            top = min(k, len(candidates))
+            best = np.argpartition(scores, -top)[-top:]
+            best = best[np.argsort(-scores[best])]
+            out_rows[i, :top] = candidates[best]
+            out_scores[i, :top] = scores[best]
+        return out_rows, out_scores
+
+    def save(self, path: Union[str, Path]):
+        """Write the index atomically (temp file + rename)."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "wb") as f:
+            np.savez(f, centroids=self.centroids, rows=self.rows, offsets=self.offsets,
+                     fingerprint=np.array(self.fingerprint))
+        os.replace(tmp, path)
+        logger.info(f"Saved IVF index to {path}")
+
+    @classmethod
+    def load(cls, path: Union[str, Path], expected_fingerprint: Optional[str] = None
+             ) -> Optional["IVFIndex"]:
+        """Load a saved index.
+
+        Args:
+            path: Index file
+            expected_fingerprint: Fingerprint of the current gallery matrix
+
+        Returns:
+            IVFIndex, or None if missing, unreadable or built from other embeddings
+        """
+        path = Path(path)
+        if not path.exists():
+            return None
+        try:
+            with np.load(path) as data:
+                index = cls(data["centroids"], data["rows"], data["offsets"],
+                            str(data["fingerprint"]))
+        except (OSError, KeyError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable IVF index {path}: {e}")
+            return None
+        if expected_fingerprint is not None and index.fingerprint != expected_fingerprint:
+            logger.info(f"IVF index {path} is stale, rebuilding")
+            return None
+        return index
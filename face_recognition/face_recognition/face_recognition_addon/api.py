@@ -1,11 +1,51 @@
 """HTTP API server for face recognition add-on."""
 
+import base64
+import binascii
+import json
 import logging
-from flask import Flask, request, jsonify
-from typing import Optional
+import time
+from datetime import datetime
+from pathlib import Path
+from flask import Flask, Response, g, request, jsonify
+from typing import Optional, Dict, Any, List
+
+from face_recognition_addon.drive_upload import create_upload_queue
+from face_recognition_addon.fs_watcher import CameraPathWatcher, WorkItem
+from face_recognition_addon.jobs import InferenceQueue, QueueFullError, JOB_FAILED
+from face_recognition_addon.metrics import AddonMetrics
+from face_recognition_addon.nest_ingestion import NestEventIngestion
+from face_recognition_addon.pipeline import PYAV_AVAILABLE, RecognitionPipeline
+from face_recognition_addon.reprocess import ReviewReprocessor
+from face_recognition_addon.singleflight import SingleFlight
 
 logger = logging.getLogger(__name__)
 
+# Content types accepted as a raw image body by POST /recognize
+RAW_IMAGE_CONTENT_TYPES = (
+    "image/jpeg",
+    "image/png",
+    "image/webp",
+    "application/octet-stream",
+)
+
+# Content types accepted as an event clip body by POST /recognize
+CLIP_CONTENT_TYPES = (
+    "video/mp4",
+    "video/quicktime",
+)
+# Watched files with these extensions are event clips
+CLIP_EXTENSIONS = (".mp4", ".mov")
+
+# Request headers carrying recognition metadata for raw image bodies
+METADATA_HEADERS = {
+    "camera": "X-Camera",
+    "entity_id": "X-Entity-Id",
+    "image_url": "X-Image-Url",
+    "timestamp": "X-Timestamp",
+    "source": "X-Source",
+}
+
 
 class FaceRecognitionAPI:
     """HTTP API server for IPC between add-on and HA integration."""
@@ -21,6 +61,41 @@ class FaceRecognitionAPI:
         self.event_callback = event_callback
         self.app = Flask(__name__)
         self.app.config['JSON_SORT_KEYS'] = False
+        # Reject oversized bodies before they are buffered (413)
+        self.app.config['MAX_CONTENT_LENGTH'] = config.max_request_body_mb * 1024 * 1024
+        
+        # All inference runs through one bounded queue
+        self.jobs = InferenceQueue(
+            max_depth=config.queue_max_depth,
+            workers=config.inference_workers,
+            job_ttl=config.job_ttl_seconds,
+        )
+        self.metrics = AddonMetrics(queue_stats=self.jobs.stats)
+        self.jobs.metrics = self.metrics
+        self.pipeline = RecognitionPipeline(config, metrics=self.metrics)
+        # Concurrent requests for one camera share a single pipeline run
+        self.flights = None
+        if config.coalesce_window_seconds > 0:
+            self.flights = SingleFlight(config.coalesce_window_seconds)
+        # Review faces are re-matched in the background whenever a model becomes active
+        self.reprocessor = ReviewReprocessor(
+            config,
+            self.pipeline.review_set,
+            Path(config.review_dir).with_name("reprocess_checkpoint.json"),
+            live_stats=self.jobs.stats,
+            on_change=self._on_review_decision_changed,
+        )
+        self.pipeline.reprocessor = self.reprocessor
+        # Review faces are uploaded to Drive in the background (if configured)
+        self.uploads = create_upload_queue(config)
+        self.pipeline.uploads = self.uploads
+        # Nest thumbnails are fetched asynchronously as soon as an event arrives
+        self.nest = NestEventIngestion(config)
+        # Snapshots and clips written to the camera_paths directories are recognized as they appear
+        self.watcher = CameraPathWatcher(config, self._recognize_watched_files) if config.camera_paths else None
+        # Load engines up front (before gunicorn forks, so workers share them)
+        self.pipeline.load_detector()
+        self.pipeline.models.load()
         
         # Register routes
         self._register_routes()
@@ -32,11 +107,35 @@ class FaceRecognitionAPI:
         # Add before_request hook to log all incoming requests
         @self.app.before_request
         def log_request_info():
+            g.request_start = time.perf_counter()
+            self.start_background_tasks()
             logger.info(f"Incoming request: {request.method} {request.path}")
             logger.info(f"Request headers: {dict(request.headers)}")
             logger.info(f"Content-Type: {request.content_type}")
             logger.info(f"Content-Length: {request.content_length}")
         
+        @self.app.after_request
+        def record_request_metrics(response):
+            start = g.get("request_start")
+            if start is not None:
+                endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+                self.metrics.observe_request(
+                    endpoint,
+                    response.status_code,
+                    time.perf_counter() - start,
+                    request.content_length or 0,
+                    response.calculate_content_length() or 0,
+                )
+            return response
+
+        @self.app.route('/metrics', methods=['GET'])
+        def get_metrics():
+            """Prometheus metrics in text exposition format."""
+            auth_error = self._check_auth()
+            if auth_error:
+                return auth_error
+            return Response(self.metrics.render(), mimetype="text/plain; version=0.0.4")
+
         @self.app.route('/status', methods=['GET'])
         def get_status():
             """Get add-on status."""
@@ -44,11 +143,66 @@ class FaceRecognitionAPI:
             response = {
                 "status": "ready",
                 "version": "0.0.1",
-                "chunk": "3"
+                "chunk": "3",
+                "queue": self.jobs.stats(),
+                "model": self.pipeline.models.status(),
+                "gallery": self.pipeline.gallery_stats(),
+                "reprocess": self.reprocessor.progress(),
+                "uploads": self.uploads.stats() if self.uploads is not None else {"enabled": False},
+                "nest": self.nest.stats(),
+                "result_cache": (self.pipeline.result_cache.stats()
+                                 if self.pipeline.result_cache is not None else {"enabled": False}),
+                "dedupe": (self.pipeline.deduplicator.stats()
+                           if self.pipeline.deduplicator is not None else {"enabled": False}),
+                "watcher": self.watcher.stats() if self.watcher is not None else {"enabled": False},
+                "coalescing": self.flights.stats() if self.flights is not None else {"enabled": False},
+                "zones": self.config.zones.stats(),
             }
+            images = self.nest.open_image_store(create=False)
+            response["images"] = images.stats() if images is not None else {"images": 0, "bytes": 0}
+            if self.pipeline.identities is not None:
+                response["identities"] = self.pipeline.identities.stats()
             logger.info(f"Returning status response: {response}")
             return jsonify(response), 200
         
+        @self.app.route('/model/reload', methods=['POST'])
+        def post_model_reload():
+            """Hot-reload the embedding model and gallery without a restart."""
+            auth_error = self._check_auth()
+            if auth_error:
+                return auth_error
+            if not self.pipeline.reload_models():
+                return jsonify({
+                    "error": "Model reload already in progress",
+                    "model": self.pipeline.models.status(),
+                }), 409
+            logger.info("Model reload started")
+            return jsonify({"status": "reloading", "model": self.pipeline.models.status()}), 202
+        
+        @self.app.route('/reprocess', methods=['GET'])
+        def get_reprocess():
+            """Progress and throughput of review face reprocessing."""
+            auth_error = self._check_auth()
+            if auth_error:
+                return auth_error
+            return jsonify(self.reprocessor.progress()), 200
+        
+        @self.app.route('/reprocess', methods=['POST'])
+        def post_reprocess():
+            """Start (or resume) reprocessing review faces with the active model."""
+            auth_error = self._check_auth()
+            if auth_error:
+                return auth_error
+            models = self.pipeline.models.active
+            if models is None:
+                return jsonify({"error": "No embedding model loaded"}), 409
+            if not self.reprocessor.start(models.version):
+                return jsonify({
+                    "error": "Reprocessing already in progress",
+                    "reprocess": self.reprocessor.progress(),
+                }), 409
+            return jsonify({"status": "reprocessing", "reprocess": self.reprocessor.progress()}), 202
+        
         @self.app.route('/event', methods=['POST'])
         def post_event():
             """Receive recognition event from add-on processing."""
@@ -91,21 +245,9 @@ class FaceRecognitionAPI:
                     return jsonify({"error": "Configuration not loaded", "status": "config_error"}), 500
 
                 # Check authentication if token is configured
-                has_api_token = hasattr(self.config, 'api_token') and self.config.api_token
-                logger.info(f"API token configured: {has_api_token}")
-
-                if has_api_token:
-                    auth_header = request.headers.get('Authorization', '')
-                    if not auth_header.startswith('Bearer '):
-                        logger.warning("Missing or invalid Authorization header")
-                        return jsonify({"error": "Missing or invalid Authorization header"}), 401
-
-                    token = auth_header.replace('Bearer ', '')
-                    if token != self.config.api_token:
-                        logger.warning("Invalid API token")
-                        return jsonify({"error": "Invalid API token"}), 401
-                else:
-                    logger.debug("No API token configured, skipping authentication")
+                auth_error = self._check_auth()
+                if auth_error:
+                    return auth_error
                 
                 # Validate request body
                 if not request.is_json:
@@ -134,14 +276,28 @@ class FaceRecognitionAPI:
                     # Nest ingestion event (Chunk 3)
                     logger.info(f"Nest event received: {data.get('event_type_nest')} on device {data.get('device_id')}")
 
-                    # For Chunk 3, just log the event
-                    # In later chunks, we'll process the image for face recognition
-                    image_size = data.get('image_size', 0)
-                    logger.info(f"Image size: {image_size} bytes")
+                    # Start the thumbnail download right away - Nest media URLs expire
+                    # within seconds. Recognition runs once the image is in.
+                    fetch = self.nest.submit_nest_event({
+                        "type": data.get('event_type_nest') or data.get('type'),
+                        "device_id": data.get('device_id'),
+                        "event_id": data.get('event_id') or data.get('nest_event_id'),
+                    })
+                    if fetch is None:
+                        image_size = data.get('image_size', 0)
+                        logger.info(f"Image size: {image_size} bytes")
+                        response = jsonify({"status": "received", "type": "nest_ingestion"})
+                        logger.info("Sending response for Nest event")
+                        return response, 200
 
-                    response = jsonify({"status": "received", "type": "nest_ingestion"})
-                    logger.info("Sending response for Nest event")
-                    return response, 200
+                    metadata = {
+                        "camera": data.get('camera') or data.get('device_id'),
+                        "entity_id": data.get('entity_id'),
+                        "timestamp": data.get('timestamp'),
+                        "source": "nest",
+                    }
+                    fetch.add_done_callback(lambda future: self._on_nest_image(future, metadata))
+                    return jsonify({"status": "fetching", "type": "nest_ingestion"}), 202
 
                 elif event_type == 'recognition_request':
                     # Service-based recognition request
@@ -157,28 +313,15 @@ class FaceRecognitionAPI:
                             "missing": missing_fields
                         }), 400
 
-                    # Log request details
-                    image_size = data.get('image_size', 0)
-                    logger.info(f"Image size: {image_size} bytes, Camera: {data.get('camera')}")
-
-                    # TODO: In future chunks, process the image_data for face recognition
-                    # For now, just acknowledge receipt and simulate a response
-
-                    # Simulate face recognition results (for testing)
-                    # In Chunk 4+, this will be replaced with actual face recognition
-                    simulated_response = {
-                        "person_id": "unknown",
-                        "display_name": "Unknown Person",
-                        "confidence": 0.0,
-                        "needs_review": True,
-                        "face_count": 1,
-                        "processing_time_ms": 50,
-                        "status": "processed",
-                        "message": "Recognition request received (simulated response for testing)"
-                    }
+                    # Legacy base64 path - prefer POST /recognize with a raw body
+                    try:
+                        image_bytes = base64.b64decode(data['image_data'])
+                    except (binascii.Error, TypeError, ValueError) as e:
+                        logger.warning(f"Invalid base64 image_data: {e}")
+                        return jsonify({"error": "Invalid base64 image_data", "message": str(e)}), 400
 
-                    logger.info(f"Sending simulated recognition response: {simulated_response}")
-                    return jsonify(simulated_response), 200
+                    metadata = {key: data.get(key) for key in METADATA_HEADERS}
+                    return self._submit_job(self._recognize_image, image_bytes, metadata)
 
                 else:
                     # Legacy recognition event (Chunk 2+)
@@ -217,6 +360,132 @@ class FaceRecognitionAPI:
                 logger.exception(traceback.format_exc())
                 return jsonify({"error": "Critical server error", "type": "outer_catch"}), 500
         
+        @self.app.route('/recognize', methods=['POST'])
+        def post_recognize():
+            """Recognize faces in a raw image body.
+
+            Accepts either a raw ``image/jpeg`` (or png/webp/octet-stream)
+            body with metadata in ``X-Camera``/``X-Entity-Id``/... headers,
+            or a ``multipart/form-data`` body with an ``image`` file part and
+            metadata as form fields (or a JSON ``metadata`` field). The image
+            bytes are never base64-encoded or JSON-parsed. A raw
+            ``video/mp4`` event clip is decoded in-process and its best
+            frames are recognized.
+            """
+            auth_error = self._check_auth()
+            if auth_error:
+                return auth_error
+
+            content_type = request.mimetype or ""
+
+            if content_type == "multipart/form-data":
+                image_file = request.files.get("image")
+                if image_file is None:
+                    return jsonify({"error": "Missing 'image' file part"}), 400
+                image_bytes = image_file.read()
+                metadata = self._metadata_from_form()
+                if metadata is None:
+                    return jsonify({"error": "Invalid JSON in 'metadata' form field"}), 400
+
+            elif content_type in RAW_IMAGE_CONTENT_TYPES or content_type in CLIP_CONTENT_TYPES:
+                # cache=False: don't keep a second copy of the body on the request
+                image_bytes = request.get_data(cache=False)
+                metadata = {
+                    key: request.headers.get(header)
+                    for key, header in METADATA_HEADERS.items()
+                }
+
+            else:
+                return jsonify({
+                    "error": "Unsupported Content-Type",
+                    "supported": (list(RAW_IMAGE_CONTENT_TYPES) + list(CLIP_CONTENT_TYPES)
+                                  + ["multipart/form-data"]),
+                }), 415
+
+            if not image_bytes:
+                return jsonify({"error": "Empty image body"}), 400
+
+            if not metadata.get("camera"):
+                return jsonify({"error": "Missing required fields", "missing": ["camera"]}), 400
+
+            if content_type in CLIP_CONTENT_TYPES and not PYAV_AVAILABLE:
+                return jsonify({
+                    "error": "Clip decoding is not available (PyAV is not installed)",
+                    "supported": list(RAW_IMAGE_CONTENT_TYPES) + ["multipart/form-data"],
+                }), 415
+
+            fn = self._recognize_clip if content_type in CLIP_CONTENT_TYPES else self._recognize_image
+            return self._submit_job(fn, image_bytes, metadata, coalesce=(metadata["camera"], fn.__name__))
+
+        @self.app.route('/event/batch', methods=['POST'])
+        def post_event_batch():
+            """Recognize faces in several images with one request.
+
+            Accepts ``multipart/form-data`` with repeated ``image`` file parts
+            and matching repeated ``camera`` fields (a single ``camera`` applies
+            to every image), or JSON ``{"images": [{"image_data": <base64>,
+            "camera": ...}, ...]}``. All images are processed as one batch and
+            the response holds one result per image, in order.
+            """
+            auth_error = self._check_auth()
+            if auth_error:
+                return auth_error
+
+            if request.mimetype == "multipart/form-data":
+                files = request.files.getlist("image")
+                cameras = request.form.getlist("camera")
+                if cameras and len(cameras) not in (1, len(files)):
+                    return jsonify({"error": "Provide one camera, or one camera per image"}), 400
+                items = []
+                for i, image_file in enumerate(files):
+                    camera = cameras[i] if len(cameras) > 1 else (cameras[0] if cameras else None)
+                    metadata = {key: request.form.get(key) for key in METADATA_HEADERS}
+                    metadata["camera"] = camera
+                    items.append((image_file.read(), metadata))
+
+            elif request.is_json:
+                data = request.get_json(silent=True) or {}
+                images = data.get("images")
+                if not isinstance(images, list):
+                    return jsonify({"error": "'images' must be a list"}), 400
+                items = []
+                for i, image in enumerate(images):
+                    try:
+                        image_bytes = base64.b64decode(image["image_data"])
+                    except (KeyError, TypeError, binascii.Error, ValueError) as e:
+                        return jsonify({"error": f"Invalid image_data for image {i}", "message": str(e)}), 400
+                    items.append((image_bytes, {key: image.get(key) for key in METADATA_HEADERS}))
+
+            else:
+                return jsonify({"error": "Request must be multipart/form-data or JSON"}), 415
+
+            if not items:
+                return jsonify({"error": "No images provided"}), 400
+            if len(items) > self.config.max_batch_size:
+                return jsonify({
+                    "error": "Too many images",
+                    "max_batch_size": self.config.max_batch_size,
+                }), 413
+
+            missing = [i for i, (image_bytes, metadata) in enumerate(items)
+                       if not image_bytes or not metadata.get("camera")]
+            if missing:
+                return jsonify({"error": "Images missing data or camera", "indexes": missing}), 400
+
+            return self._submit_job(self._recognize_batch, items)
+
+        @self.app.route('/jobs/<job_id>', methods=['GET'])
+        def get_job(job_id):
+            """Poll an inference job started with a 202 response."""
+            auth_error = self._check_auth()
+            if auth_error:
+                return auth_error
+
+            job = self.jobs.get(job_id)
+            if job is None:
+                return jsonify({"error": "Job not found or expired", "job_id": job_id}), 404
+            return jsonify(job.to_dict()), 200
+
         @self.app.errorhandler(404)
         def not_found(error):
             """Handle 404 errors."""
@@ -240,6 +509,251 @@ class FaceRecognitionAPI:
         
         logger.info("API routes registered successfully")
     
+    def _on_review_decision_changed(self, record: Dict[str, Any], previous: Dict[str, Any]):
+        """Emit an update for a review face whose decision changed after reprocessing."""
+        logger.info(
+            f"Review face {record['face_id']}: {previous.get('person_id')} -> {record['person_id']} "
+            f"(confidence {record['confidence']}, needs_review {record['needs_review']})"
+        )
+        if self.event_callback:
+            self.event_callback({"type": "review_update", **record})
+
+    def start_background_tasks(self):
+        """Start this process's background threads (no-op once started).
+
+        Called when a server worker starts and before every request, so
+        threads are (re)started in whichever process serves.
+        """
+        self.jobs.ensure_running()
+        self.metrics.ensure_running()
+        self.pipeline.models.ensure_running()
+        self.reprocessor.ensure_running()
+        if self.uploads is not None:
+            self.uploads.ensure_running()
+        self.nest.open_image_store(create=False)
+        if self.watcher is not None:
+            self.watcher.ensure_running()
+
+    def _recognize_watched_files(self, items: List[WorkItem]):
+        """Recognize a batch of watched files and wait for it (watcher callback).
+
+        Raises:
+            QueueFullError: If the inference queue is full (the watcher retries)
+            RuntimeError: If the recognition job failed (counted as failed by the watcher)
+        """
+        job = self.jobs.submit(self._recognize_files, items)
+        job.wait()
+        if job.status == JOB_FAILED:
+            raise RuntimeError(f"Recognition job {job.id} failed: {job.error}")
+
+    def _recognize_files(self, items: List[WorkItem]) -> List[Dict[str, Any]]:
+        """Recognize watched snapshots (as one batch) and clips, and emit the results (inference queue job).
+
+        A file that fails is logged and skipped; the rest of the batch is still recognized.
+        """
+        images, paths, results = [], [], []
+        for item in items:
+            try:
+                data = item.path.read_bytes()
+            except OSError as e:
+                logger.warning(f"Skipping watched file {item.path}: {e}")
+                continue
+            metadata = {
+                "camera": item.camera,
+                "source": "filesystem",
+                "timestamp": datetime.fromtimestamp(item.mtime_ns / 1e9).isoformat(),
+            }
+            if item.path.suffix.lower() in CLIP_EXTENSIONS:
+                try:
+                    results.append((item.path, self.pipeline.recognize_clip(data, metadata)))
+                except Exception as e:
+                    logger.exception(f"Recognition of watched clip {item.path} failed: {e}")
+            else:
+                images.append((data, metadata))
+                paths.append(item.path)
+        if images:
+            logger.info(f"Recognizing {len(images)} watched images")
+            try:
+                results.extend(zip(paths, self.pipeline.recognize_batch(images)))
+            except Exception as e:
+                logger.warning(f"Batch of {len(images)} watched images failed ({e}), retrying one by one")
+                for path, image in zip(paths, images):
+                    try:
+                        results.append((path, self.pipeline.recognize_batch([image])[0]))
+                    except Exception as e:
+                        logger.exception(f"Recognition of watched image {path} failed: {e}")
+        if self.event_callback:
+            for path, result in results:
+                self.event_callback({"type": "file_recognition", "path": str(path), **result})
+        return [result for _, result in results]
+
+    def _on_nest_image(self, future, metadata: Dict[str, Any]):
+        """Queue recognition of a fetched Nest thumbnail (fetch future callback)."""
+        image = future.result() if not future.cancelled() and future.exception() is None else None
+        if image is None:
+            return
+        try:
+            self.jobs.submit(self._recognize_nest_image, image.data, metadata)
+        except QueueFullError as e:
+            logger.warning(f"Dropping Nest image {image.event_id}: {e}")
+
+    def _recognize_nest_image(self, image_bytes: bytes, metadata: Dict[str, Any]) -> Dict[str, Any]:
+        """Recognize a Nest thumbnail and emit the result (inference queue job)."""
+        result = self._recognize_image(image_bytes, metadata)
+        if self.event_callback:
+            self.event_callback({"type": "nest_recognition", **result})
+        return result
+
+    def _check_auth(self):
+        """Check the Authorization header against the configured API token.
+
+        Returns:
+            None if the request is authorized, otherwise a (response, status)
+            tuple to return from the view
+        """
+        has_api_token = hasattr(self.config, 'api_token') and self.config.api_token
+        if not has_api_token:
+            logger.debug("No API token configured, skipping authentication")
+            return None
+
+        auth_header = request.headers.get('Authorization', '')
+        if not auth_header.startswith('Bearer '):
+            logger.warning("Missing or invalid Authorization header")
+            return jsonify({"error": "Missing or invalid Authorization header"}), 401
+
+        token = auth_header.replace('Bearer ', '')
+        if token != self.config.api_token:
+            logger.warning("Invalid API token")
+            return jsonify({"error": "Invalid API token"}), 401
+
+        return None
+
+    @staticmethod
+    def _metadata_from_form() -> Optional[Dict[str, Any]]:
+        """Read recognition metadata from a multipart request.
+
+        Metadata can be sent as individual form fields, as a single JSON
+        ``metadata`` field, or both (individual fields win).
+
+        Returns:
+            Metadata dictionary, or None if the ``metadata`` field is invalid JSON
+        """
+        metadata: Dict[str, Any] = {}
+        raw_metadata = request.form.get("metadata")
+        if raw_metadata:
+            try:
+                metadata.update(json.loads(raw_metadata))
+            except ValueError:
+                return None
+
+        for key in METADATA_HEADERS:
+            value = request.form.get(key)
+            if value is not None:
+                metadata[key] = value
+
+        return metadata
+
+    def _submit_job(self, fn, *args, coalesce=None):
+        """Queue a recognition job and answer synchronously or with 202.
+
+        The caller gets the result directly if the job finishes within
+        ``request_deadline_seconds``. With ``?async=1`` or a
+        ``Prefer: respond-async`` header, or when the deadline passes, the
+        response is 202 with a job id to poll at GET /jobs/<id>. A full
+        queue answers 429 with Retry-After.
+
+        Args:
+            fn: Recognition function to run on the inference queue
+            *args: Arguments for fn
+            coalesce: Key (camera, ...) under which a job still in flight
+                within ``coalesce_window_seconds`` is shared instead of
+                queueing another; responses then carry ``shared``
+
+        Returns:
+            Flask (response, status[, headers]) tuple
+        """
+        shared = None
+        try:
+            if coalesce is not None and self.flights is not None:
+                job, shared = self.flights.join(coalesce, lambda: self.jobs.submit(fn, *args),
+                                                lambda job: job.finished)
+                if shared:
+                    self.metrics.record_coalesced(coalesce[0])
+            else:
+                job = self.jobs.submit(fn, *args)
+        except QueueFullError as e:
+            logger.warning(f"Rejecting recognition request: {e}")
+            return jsonify({
+                "error": "Inference queue full",
+                "retry_after": e.retry_after,
+            }), 429, {"Retry-After": str(e.retry_after)}
+
+        respond_async = (
+            request.args.get("async", "").lower() in ("1", "true", "yes")
+            or "respond-async" in request.headers.get("Prefer", "")
+        )
+        if not respond_async and job.wait(self.config.request_deadline_seconds):
+            if job.status == JOB_FAILED:
+                return jsonify({"error": "Recognition failed", "message": job.error}), 500
+            result = job.result if shared is None else {**job.result, "shared": shared}
+            if result.get("status") == "invalid_image":
+                return jsonify(result), 422
+            return jsonify(result), 200
+
+        if not respond_async:
+            logger.warning(
+                f"Recognition job {job.id} exceeded {self.config.request_deadline_seconds}s "
+                "deadline, returning 202"
+            )
+
+        body = job.to_dict()
+        body["status_url"] = f"/jobs/{job.id}"
+        if shared is not None:
+            body["shared"] = shared
+        return jsonify(body), 202, {"Location": f"/jobs/{job.id}"}
+
+    def _recognize_image(self, image_bytes: bytes, metadata: Dict[str, Any]) -> Dict[str, Any]:
+        """Run recognition on encoded image bytes (inference queue job).
+
+        Args:
+            image_bytes: Raw encoded image (JPEG/PNG)
+            metadata: Request metadata (camera, entity_id, source, ...)
+
+        Returns:
+            Recognition response dictionary
+        """
+        logger.info(
+            f"Recognition request: {len(image_bytes)} bytes, "
+            f"camera: {metadata.get('camera')}, source: {metadata.get('source') or 'unknown'}"
+        )
+        return self.pipeline.recognize(image_bytes, metadata)
+
+    def _recognize_clip(self, clip_bytes: bytes, metadata: Dict[str, Any]) -> Dict[str, Any]:
+        """Run recognition on the best frames of an event clip (inference queue job)."""
+        logger.info(
+            f"Clip recognition request: {len(clip_bytes)} bytes, "
+            f"camera: {metadata.get('camera')}, source: {metadata.get('source') or 'unknown'}"
+        )
+        return self.pipeline.recognize_clip(clip_bytes, metadata)
+
+    def _recognize_batch(self, items) -> Dict[str, Any]:
+        """Run recognition on a batch of images (inference queue job).
+
+        Args:
+            items: (image bytes, metadata) pairs
+
+        Returns:
+            Batch response dictionary with one result per image
+        """
+        logger.info(f"Batch recognition request: {len(items)} images")
+        results = self.pipeline.recognize_batch(items)
+        return {
+            "status": "processed",
+            "count": len(results),
+            "processing_time_ms": results[0]["processing_time_ms"] if results else 0,
+            "results": results,
+        }
+
     def run(self, host='0.0.0.0', port=None, debug=False, threaded=True, use_reloader=False):
         """Run the Flask server.
         
@@ -251,9 +765,7 @@ class FaceRecognitionAPI:
             use_reloader: Enable auto-reload (disabled in add-on environment)
         """
         port = port or self.config.api_port
+        self.start_background_tasks()
         logger.info(f"Starting HTTP API server on {host}:{port}")
-        # Use threaded=True and increase request timeout
-        # Also set max_content_length to handle larger payloads
-        self.app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max
         self.app.run(host=host, port=port, debug=debug, threaded=threaded, use_reloader=use_reloader)
 
@@ -0,0 +1,269 @@
+"""In-process decoding of Nest event clips with best-frame selection.
+
+Nest ``event_media`` clips are short H.264 MP4s. Instead of spawning
+``ffmpeg -ss 0.5`` per event and taking whatever frame that lands on, the
+clip is decoded in-process with PyAV, a few frames spread over the clip are
+converted to BGR arrays, and each is scored for face presence (with the
+pipeline's detector) and sharpness. Only the best one or two frames go on
+to recognition.
+"""
+
+import io
+import logging
+import math
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Optional, Tuple, Union
+
+import cv2
+import numpy as np
+
+try:
+    import av
+    PYAV_AVAILABLE = True
+except ImportError:
+    PYAV_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Frames are scored for sharpness at this width (scale-independent, cheap)
+SHARPNESS_WIDTH = 320
+
+ClipSource = Union[bytes, str, Path]
+
+
+class ClipDecodeError(ValueError):
+    """A clip could not be opened or has no decodable video frames."""
+
+
+@dataclass
+class ClipFrame:
+    """A sampled clip frame and its selection score."""
+
+    # Seconds from the start of the clip
+    time: float
+    frame: np.ndarray = field(repr=False)
+    sharpness: float = 0.0
+    # Detections from the scoring detector (empty without one)
+    faces: list = field(default_factory=list, repr=False)
+    # Face quality (detector score x log face sharpness), 0 without faces
+    face_score: float = 0.0
+
+    @property
+    def rank(self) -> Tuple[bool, float]:
+        """Sort key: frames with faces first, then by face or frame sharpness."""
+        return bool(self.faces), self.face_score if self.faces else self.sharpness
+
+    def to_jpeg(self, quality: int = 90) -> bytes:
+        """Encode the frame as JPEG for the recognition pipeline."""
+        ok, buffer = cv2.imencode(".jpg", self.frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+        if not ok:
+            raise ValueError("Could not encode clip frame")
+        return buffer.tobytes()
+
+    def to_dict(self) -> dict:
+        """Serialize for the HTTP API (without pixel data)."""
+        return {
+            "time": round(self.time, 3),
+            "sharpness": round(self.sharpness, 1),
+            "faces": len(self.faces),
+            "face_score": round(self.face_score, 2),
+        }
+
+
+def sharpness(image: np.ndarray) -> float:
+    """Variance of the Laplacian, measured at SHARPNESS_WIDTH pixels wide.
+
+    Args:
+        image: BGR or grayscale image
+
+    Returns:
+        Sharpness score (higher is sharper; 0 for a flat image)
+    """
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+    if gray.shape[1] > SHARPNESS_WIDTH:
+        height = max(1, round(gray.shape[0] * SHARPNESS_WIDTH / gray.shape[1]))
+        gray = cv2.resize(gray, (SHARPNESS_WIDTH, height), interpolation=cv2.INTER_AREA)
+    return float(cv2.Laplacian(gray, cv2.CV_32F).var())
+
+
+def sample_frames(source: ClipSource, samples: int = 6) -> List[ClipFrame]:
+    """Decode a clip and convert `samples` frames spread evenly over it.
+
+    Reference frames are all decoded (later frames depend on them) and
+    non-reference ones skipped; only the sampled frames are converted to
+    BGR, and decoding stops after the last one.
+
+    Args:
+        source: MP4 bytes or a path to the clip
+        samples: Number of frames to return
+
+    Returns:
+        Sampled frames in clip order (fewer if the clip is shorter)
+
+    Raises:
+        ClipDecodeError: If the clip cannot be decoded
+        RuntimeError: If PyAV is not installed
+    """
+    if not PYAV_AVAILABLE:
+        raise RuntimeError("PyAV is not installed")
+    file = io.BytesIO(source) if isinstance(source, (bytes, bytearray)) else str(source)
+    try:
+        with av.open(file) as container:
+            if not container.streams.video:
+                raise ClipDecodeError("Clip has no video stream")
+            stream = container.streams.video[0]
+            stream.thread_type = "AUTO"
+            # Non-reference frames are never needed to decode others: skip them
+            stream.codec_context.skip_frame = "NONREF"
+            duration = _duration(container, stream)
+            if duration:
+                return _sample_by_time(container, stream, duration, samples)
+            return _sample_by_index(container, stream, samples)
+    except av.FFmpegError as e:
+        raise ClipDecodeError(f"Could not decode clip: {e}") from e
+
+
+def _duration(container, stream) -> Optional[float]:
+    """Clip duration in seconds, if the container knows it."""
+    if stream.duration is not None and stream.time_base is not None:
+        return float(stream.duration * stream.time_base)
+    if container.duration is not None:
+        return container.duration / av.time_base
+    return None
+
+
+def _frame_time(frame, start: float) -> float:
+    return (float(frame.time) if frame.time is not None else 0.0) - start
+
+
+def _sample_by_time(container, stream, duration: float, samples: int) -> List[ClipFrame]:
+    """Convert the frame nearest each of `samples` evenly spaced times."""
+    targets = [duration * (i + 0.5) / samples for i in range(samples)]
+    start = float(stream.start_time * stream.time_base) if stream.start_time is not None else 0.0
+    # A frame stands for the times up to half a frame interval around it
+    half_frame = 0.5 / float(stream.average_rate) if stream.average_rate else 0.0
+    frames: List[ClipFrame] = []
+    next_target = 0
+    last = None
+    for frame in container.decode(stream):
+        t = _frame_time(frame, start)
+        last = frame
+        if t + half_frame < targets[next_target]:
+            continue
+        frames.append(ClipFrame(t, frame.to_ndarray(format="bgr24")))
+        # Several targets may fall on one frame; each frame is taken once
+        while next_target < samples and targets[next_target] <= t + half_frame:
+            next_target += 1
+        if next_target == samples:
+            break
+    if not frames and last is not None:
+        # Duration overstated by the container: use the last frame there is
+        frames.append(ClipFrame(_frame_time(last, start), last.to_ndarray(format="bgr24")))
+    if not frames:
+        raise ClipDecodeError("Clip has no decodable video frames")
+    return frames
+
+
+def _sample_by_index(container, stream, samples: int) -> List[ClipFrame]:
+    """Sample evenly by frame index when the duration is unknown."""
+    start = float(stream.start_time * stream.time_base) if stream.start_time is not None else 0.0
+    decoded = list(container.decode(stream))
+    if not decoded:
+        raise ClipDecodeError("Clip has no decodable video frames")
+    count = min(samples, len(decoded))
+    indices = sorted({int(len(decoded) * (i + 0.5) / count) for i in range(count)})
+    return [
+        ClipFrame(_frame_time(decoded[i], start), decoded[i].to_ndarray(format="bgr24"))
+        for i in indices
+    ]
+
+
+def score_frames(frames: List[ClipFrame], detector=None,
+                 enough: Optional[int] = None) -> List[ClipFrame]:
+    """Score frames for sharpness and, with a detector, face presence.
+
+    A frame's face score is its best face's detector score times the log
+    sharpness of that face crop, so a blurred face loses to a sharp one.
+    Detection is the expensive part, so it runs on the sharpest frames
+    first and stops once `enough` frames with faces are found.
+
+    Args:
+        frames: Sampled frames
+        detector: Optional FaceDetector
+        enough: Stop detecting after this many frames with faces (None = all)
+
+    Returns:
+        The same frames, scored in place
+    """
+    for clip_frame in frames:
+        clip_frame.sharpness = sharpness(clip_frame.frame)
+    if detector is None:
+        return frames
+
+    found = 0
+    for clip_frame in sorted(frames, key=lambda f: f.sharpness, reverse=True):
+        clip_frame.faces = detector.detect(clip_frame.frame)
+        if clip_frame.faces:
+            clip_frame.face_score = max(
+                face.score * math.log1p(sharpness(face.crop)) for face in clip_frame.faces
+            )
+            found += 1
+            if enough is not None and found >= enough:
+                break
+    return frames
+
+
+def select_best_frames(frames: List[ClipFrame], count: int = 2) -> List[ClipFrame]:
+    """Pick the frames to recognize.
+
+    Up to `count` frames with faces, best first. If no frame has a face the
+    single sharpest frame is returned, so the caller still gets a result.
+
+    Args:
+        frames: Scored frames
+        count: Maximum number of frames to return
+
+    Returns:
+        Selected frames, best first
+    """
+    ranked = sorted(frames, key=lambda f: f.rank, reverse=True)
+    with_faces = [f for f in ranked if f.faces]
+    return with_faces[:count] if with_faces else ranked[:1]
+
+
+class ClipDecoder:
+    """Decodes event clips and picks the frames worth recognizing."""
+
+    def __init__(self, detector=None, samples: int = 6, best_frames: int = 2):
+        """Initialize clip decoder.
+
+        Args:
+            detector: FaceDetector used to score frames for face presence
+                (sharpness only without one)
+            samples: Frames sampled per clip
+            best_frames: Frames returned per clip
+        """
+        self.detector = detector
+        self.samples = samples
+        self.best_frames = best_frames
+
+    def decode(self, source: ClipSource) -> Tuple[List[ClipFrame], int]:
+        """Decode a clip and select its best frames.
+
+        Args:
+            source: MP4 bytes or a path to the clip
+
+        Returns:
+            (selected frames best first, number of frames sampled)
+
+        Raises:
+            ClipDecodeError: If the clip cannot be decoded
+        """
+        frames = score_frames(sample_frames(source, self.samples), self.detector, self.best_frames)
+        best = select_best_frames(frames, self.best_frames)
+        logger.debug(
+            f"Clip: sampled {len(frames)} frames, selected "
+            f"{[f.to_dict() for f in best]}"
+        )
+        return best, len(frames)
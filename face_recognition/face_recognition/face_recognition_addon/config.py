@@ -5,10 +5,22 @@ import yaml
 import logging
 from pathlib import Path
 from typing import Dict, Any, Optional, List
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+
+from face_recognition_addon.zones import ZoneMap
 
 logger = logging.getLogger(__name__)
 
+# Supported HTTP server modes and gunicorn worker classes
+SERVER_MODES = ("development", "production")
+SERVER_WORKER_CLASSES = ("sync", "gthread")
+
+# Face detection backends ("none" keeps the bootstrap response)
+DETECTOR_BACKENDS = ("none", "haar", "yunet")
+
+# Embedding model precision variants
+EMBEDDING_PRECISIONS = ("fp32", "fp16", "int8")
+
 
 @dataclass
 class Config:
@@ -18,8 +30,12 @@ class Config:
     confidence_threshold: float = 0.75
     review_threshold: float = 0.60
     
-    # Camera watch directories
+    # Camera watch directories (one camera per directory, watched with inotify)
     camera_paths: List[str] = None
+    watch_extensions: List[str] = None
+    watch_debounce_seconds: float = 1.0
+    watch_queue_size: int = 512
+    watch_state_path: str = "/data/watch_state.json"
     
     # Model update polling
     enable_daily_poll: bool = False
@@ -32,6 +48,85 @@ class Config:
     api_port: int = 8080
     api_token: str = ""
     
+    # HTTP server configuration
+    server_mode: str = "production"  # "production" (gunicorn) or "development" (Flask)
+    server_workers: int = 1  # jobs and the inference queue are per worker (see README)
+    server_worker_class: str = "gthread"
+    server_threads: int = 4
+    server_keepalive: int = 30
+    server_graceful_timeout: int = 30
+    server_timeout: int = 120
+    max_request_body_mb: int = 16
+    
+    # Inference queue (PRD: max inference concurrency 1, hard limit 5s)
+    inference_workers: int = 1
+    queue_max_depth: int = 8
+    request_deadline_seconds: float = 5.0
+    job_ttl_seconds: int = 300
+    max_batch_size: int = 8
+    
+    # Face detection
+    detector_backend: str = "haar"
+    detector_model_path: str = ""  # YuNet ONNX model (default /data/models/...)
+    min_face_size: int = 40  # smallest face to find, in frame pixels
+    detector_score_threshold: float = 0.6
+    detector_pyramid_levels: int = 1
+    
+    # Per-camera detection zones ({"camera": ..., "zone": "x,y,w,h" or polygon}, frame fractions)
+    camera_zones: List[Dict[str, str]] = None
+    zones: ZoneMap = field(init=False, repr=False, default=None)  # compiled from camera_zones
+    # Per-camera expected face size ({"camera": ..., "min_face_size": px}), sets the detection scale
+    camera_face_sizes: List[Dict[str, Any]] = None
+    face_sizes: Dict[str, int] = field(init=False, repr=False, default=None)  # camera -> px
+    
+    # Face embedding model (ONNX; variants embedding.fp16.onnx / embedding.int8.onnx)
+    embedding_model_path: str = "/data/models/embedding.onnx"
+    embedding_precision: str = "fp32"
+    embedding_threads: int = 0  # intra-op threads, 0 = onnxruntime default
+    
+    # Gallery search (IVF index above ann_min_gallery_size embeddings, 0 = never)
+    embeddings_dir: str = "/data/embeddings"
+    ann_min_gallery_size: int = 20000
+    ann_nprobe: int = 8
+    
+    # Identity database (person id -> display name / avatar)
+    identity_db_path: str = "/data/identities.db"
+    
+    # Review faces and their reprocessing after a model update
+    review_dir: str = "/data/review"
+    reprocess_workers: int = 1  # pool processes, 0 = run in a server thread
+    reprocess_nice: int = 10
+    reprocess_chunk_size: int = 32
+    
+    # Recognition result cache (per worker, 0 = disabled)
+    result_cache_size: int = 256
+    result_cache_ttl_seconds: float = 60.0
+    
+    # Concurrent requests per camera share one run started this recently (0 = disabled)
+    coalesce_window_seconds: float = 1.0
+    
+    # Near-duplicate frame suppression (per camera, 0 = disabled)
+    dedupe_ring_size: int = 8
+    dedupe_max_distance: int = 6  # Hamming distance of 64-bit frame hashes
+    dedupe_max_age_seconds: float = 10.0
+    
+    # Event clip decoding (frames sampled per clip, best frames recognized)
+    clip_sample_frames: int = 6
+    clip_best_frames: int = 2
+    
+    # Nest event media fetching (Supervisor API, pooled async session)
+    nest_fetch_deadline_seconds: float = 3.0
+    nest_fetch_connections: int = 8
+    
+    # Fetched event images (content-addressed store, 0 = no quota)
+    image_dir: str = "/data/images"
+    image_store_max_mb: int = 2048
+    image_store_max_age_days: int = 30
+    
+    # Drive upload queue for review faces
+    upload_db_path: str = "/data/upload_queue.db"
+    drive_upload_batch_size: int = 8
+    
     # Google Drive credentials (from HA secrets)
     drive_credentials: Optional[str] = None
     
@@ -39,6 +134,23 @@ class Config:
         """Initialize default values."""
         if self.camera_paths is None:
             self.camera_paths = []
+        if self.watch_extensions is None:
+            self.watch_extensions = [".jpg", ".jpeg", ".png", ".mp4"]
+        if self.camera_zones is None:
+            self.camera_zones = []
+        if self.camera_face_sizes is None:
+            self.camera_face_sizes = []
+        # Parsed once here so looking up a camera's settings costs nothing per request
+        self.zones = ZoneMap.from_options(self.camera_zones)
+        self.face_sizes = {}
+        for entry in self.camera_face_sizes:
+            camera = entry.get("camera") if isinstance(entry, dict) else None
+            size = int(entry.get("min_face_size") or 0) if camera else 0
+            if size < 1:
+                raise ValueError(
+                    f"camera_face_sizes entries need a camera and a min_face_size of at least 1, got {entry}"
+                )
+            self.face_sizes[camera] = size
 
 
 class ConfigLoader:
@@ -136,16 +248,199 @@ class ConfigLoader:
                 f"daily_poll_time must be in HH:MM format, got {daily_poll_time}"
             )
         
+        # Validate server settings
+        server_mode = options.get("server_mode", "production")
+        if server_mode not in SERVER_MODES:
+            raise ValueError(
+                f"server_mode must be one of {SERVER_MODES}, got {server_mode}"
+            )
+        
+        server_worker_class = options.get("server_worker_class", "gthread")
+        if server_worker_class not in SERVER_WORKER_CLASSES:
+            raise ValueError(
+                f"server_worker_class must be one of {SERVER_WORKER_CLASSES}, "
+                f"got {server_worker_class}"
+            )
+        
+        server_workers = int(options.get("server_workers", 1))
+        server_threads = int(options.get("server_threads", 4))
+        max_request_body_mb = int(options.get("max_request_body_mb", 16))
+        if server_workers < 1 or server_threads < 1 or max_request_body_mb < 1:
+            raise ValueError(
+                "server_workers, server_threads and max_request_body_mb must be at least 1"
+            )
+        if server_workers > 1:
+            logger.warning(
+                f"server_workers is {server_workers}: each worker has its own job registry and "
+                "inference queue, so GET /jobs/<id> only finds jobs of the worker that answers it "
+                "and up to one inference per worker runs at once"
+            )
+        
+        # Validate inference queue settings
+        queue_max_depth = int(options.get("queue_max_depth", 8))
+        inference_workers = int(options.get("inference_workers", 1))
+        request_deadline_seconds = float(options.get("request_deadline_seconds", 5.0))
+        job_ttl_seconds = int(options.get("job_ttl_seconds", 300))
+        max_batch_size = int(options.get("max_batch_size", 8))
+        if queue_max_depth < 1 or inference_workers < 1:
+            raise ValueError("queue_max_depth and inference_workers must be at least 1")
+        if job_ttl_seconds < 1 or max_batch_size < 1:
+            raise ValueError("job_ttl_seconds and max_batch_size must be at least 1")
+        if request_deadline_seconds <= 0:
+            raise ValueError(
+                f"request_deadline_seconds must be positive, got {request_deadline_seconds}"
+            )
+        
+        # Validate face detection settings
+        detector_backend = options.get("detector_backend", "haar")
+        if detector_backend not in DETECTOR_BACKENDS:
+            raise ValueError(
+                f"detector_backend must be one of {DETECTOR_BACKENDS}, got {detector_backend}"
+            )
+        
+        min_face_size = int(options.get("min_face_size", 40))
+        detector_pyramid_levels = int(options.get("detector_pyramid_levels", 1))
+        if min_face_size < 1 or detector_pyramid_levels < 1:
+            raise ValueError("min_face_size and detector_pyramid_levels must be at least 1")
+        
+        detector_score_threshold = float(options.get("detector_score_threshold", 0.6))
+        if not (0.0 <= detector_score_threshold <= 1.0):
+            raise ValueError(
+                f"detector_score_threshold must be between 0.0 and 1.0, got {detector_score_threshold}"
+            )
+        
+        # camera_zones and camera_face_sizes are parsed and validated when the Config is built
+        camera_zones = options.get("camera_zones") or []
+        camera_face_sizes = options.get("camera_face_sizes") or []
+        
+        # Validate embedding settings
+        embedding_precision = options.get("embedding_precision", "fp32")
+        if embedding_precision not in EMBEDDING_PRECISIONS:
+            raise ValueError(
+                f"embedding_precision must be one of {EMBEDDING_PRECISIONS}, got {embedding_precision}"
+            )
+        
+        embedding_threads = int(options.get("embedding_threads", 0))
+        if embedding_threads < 0:
+            raise ValueError(f"embedding_threads must be 0 or more, got {embedding_threads}")
+        
+        # Validate gallery search settings
+        ann_min_gallery_size = int(options.get("ann_min_gallery_size", 20000))
+        ann_nprobe = int(options.get("ann_nprobe", 8))
+        if ann_min_gallery_size < 0 or ann_nprobe < 1:
+            raise ValueError("ann_min_gallery_size must be 0 or more and ann_nprobe at least 1")
+        
+        result_cache_size = int(options.get("result_cache_size", 256))
+        result_cache_ttl_seconds = float(options.get("result_cache_ttl_seconds", 60.0))
+        if result_cache_size < 0 or result_cache_ttl_seconds <= 0:
+            raise ValueError("result_cache_size must be 0 or more and result_cache_ttl_seconds positive")
+        
+        coalesce_window_seconds = float(options.get("coalesce_window_seconds", 1.0))
+        if coalesce_window_seconds < 0:
+            raise ValueError(f"coalesce_window_seconds must be 0 or more, got {coalesce_window_seconds}")
+        
+        dedupe_ring_size = int(options.get("dedupe_ring_size", 8))
+        dedupe_max_distance = int(options.get("dedupe_max_distance", 6))
+        dedupe_max_age_seconds = float(options.get("dedupe_max_age_seconds", 10.0))
+        if dedupe_ring_size < 0 or not 0 <= dedupe_max_distance <= 64 or dedupe_max_age_seconds <= 0:
+            raise ValueError(
+                "dedupe_ring_size must be 0 or more, dedupe_max_distance 0-64 "
+                "and dedupe_max_age_seconds positive"
+            )
+        
+        clip_sample_frames = int(options.get("clip_sample_frames", 6))
+        clip_best_frames = int(options.get("clip_best_frames", 2))
+        if clip_sample_frames < 1 or not 1 <= clip_best_frames <= clip_sample_frames:
+            raise ValueError(
+                "clip_sample_frames must be at least 1 and clip_best_frames "
+                f"between 1 and clip_sample_frames, got {clip_sample_frames}/{clip_best_frames}"
+            )
+        
+        nest_fetch_deadline_seconds = float(options.get("nest_fetch_deadline_seconds", 3.0))
+        nest_fetch_connections = int(options.get("nest_fetch_connections", 8))
+        if nest_fetch_deadline_seconds <= 0 or nest_fetch_connections < 1:
+            raise ValueError(
+                "nest_fetch_deadline_seconds must be positive and nest_fetch_connections at least 1"
+            )
+        
+        watch_debounce_seconds = float(options.get("watch_debounce_seconds", 1.0))
+        watch_queue_size = int(options.get("watch_queue_size", 512))
+        if watch_debounce_seconds < 0 or watch_queue_size < 1:
+            raise ValueError("watch_debounce_seconds must be 0 or more and watch_queue_size at least 1")
+        
+        image_store_max_mb = int(options.get("image_store_max_mb", 2048))
+        image_store_max_age_days = int(options.get("image_store_max_age_days", 30))
+        if image_store_max_mb < 0 or image_store_max_age_days < 0:
+            raise ValueError("image_store_max_mb and image_store_max_age_days must be 0 or more")
+        
+        drive_upload_batch_size = int(options.get("drive_upload_batch_size", 8))
+        if drive_upload_batch_size < 1:
+            raise ValueError(f"drive_upload_batch_size must be at least 1, got {drive_upload_batch_size}")
+        
+        # Validate reprocessing settings
+        reprocess_workers = int(options.get("reprocess_workers", 1))
+        reprocess_nice = int(options.get("reprocess_nice", 10))
+        reprocess_chunk_size = int(options.get("reprocess_chunk_size", 32))
+        if reprocess_workers < 0 or not 0 <= reprocess_nice <= 19 or reprocess_chunk_size < 1:
+            raise ValueError(
+                "reprocess_workers must be 0 or more, reprocess_nice 0-19 "
+                "and reprocess_chunk_size at least 1"
+            )
+        
         # Build config object
         config = Config(
             confidence_threshold=confidence_threshold,
             review_threshold=review_threshold,
             camera_paths=options.get("camera_paths", []),
+            watch_extensions=options.get("watch_extensions") or None,
+            watch_debounce_seconds=watch_debounce_seconds,
+            watch_queue_size=watch_queue_size,
             enable_daily_poll=options.get("enable_daily_poll", False),
             daily_poll_time=daily_poll_time,
             drive_folder_id=options.get("drive_folder_id", ""),
             api_port=int(options.get("api_port", 8080)),
             api_token=api_token,
+            server_mode=server_mode,
+            server_workers=server_workers,
+            server_worker_class=server_worker_class,
+            server_threads=server_threads,
+            server_keepalive=int(options.get("server_keepalive", 30)),
+            server_graceful_timeout=int(options.get("server_graceful_timeout", 30)),
+            server_timeout=int(options.get("server_timeout", 120)),
+            max_request_body_mb=max_request_body_mb,
+            inference_workers=inference_workers,
+            queue_max_depth=queue_max_depth,
+            request_deadline_seconds=request_deadline_seconds,
+            job_ttl_seconds=job_ttl_seconds,
+            max_batch_size=max_batch_size,
+            detector_backend=detector_backend,
+            detector_model_path=options.get("detector_model_path", ""),
+            min_face_size=min_face_size,
+            detector_score_threshold=detector_score_threshold,
+            detector_pyramid_levels=detector_pyramid_levels,
+            camera_zones=camera_zones,
+            camera_face_sizes=camera_face_sizes,
+            embedding_model_path=options.get("embedding_model_path") or "/data/models/embedding.onnx",
+            embedding_precision=embedding_precision,
+            embedding_threads=embedding_threads,
+            ann_min_gallery_size=ann_min_gallery_size,
+            ann_nprobe=ann_nprobe,
+            reprocess_workers=reprocess_workers,
+            reprocess_nice=reprocess_nice,
+            reprocess_chunk_size=reprocess_chunk_size,
+            result_cache_size=result_cache_size,
+            result_cache_ttl_seconds=result_cache_ttl_seconds,
+            coalesce_window_seconds=coalesce_window_seconds,
+            dedupe_ring_size=dedupe_ring_size,
+            dedupe_max_distance=dedupe_max_distance,
+            dedupe_max_age_seconds=dedupe_max_age_seconds,
+            clip_sample_frames=clip_sample_frames,
+            clip_best_frames=clip_best_frames,
+            nest_fetch_deadline_seconds=nest_fetch_deadline_seconds,
+            nest_fetch_connections=nest_fetch_connections,
+            image_store_max_mb=image_store_max_mb,
+            image_store_max_age_days=image_store_max_age_days,
+            drive_upload_batch_size=drive_upload_batch_size,
             drive_credentials=drive_credentials,
         )
         
@@ -157,6 +452,40 @@ class ConfigLoader:
         logger.info(f"  enable_daily_poll: {config.enable_daily_poll}")
         logger.info(f"  daily_poll_time: {config.daily_poll_time}")
         logger.info(f"  api_port: {config.api_port}")
+        logger.info(f"  server_mode: {config.server_mode}")
+        if config.server_mode == "production":
+            logger.info(
+                f"  server: {config.server_workers} x {config.server_worker_class} workers, "
+                f"{config.server_threads} threads, keepalive {config.server_keepalive}s"
+            )
+        logger.info(f"  max_request_body_mb: {config.max_request_body_mb}")
+        logger.info(
+            f"  inference queue: {config.inference_workers} worker(s), depth {config.queue_max_depth}, "
+            f"deadline {config.request_deadline_seconds}s"
+        )
+        logger.info(
+            f"  detector: {config.detector_backend}, min face {config.min_face_size}px, "
+            f"score >= {config.detector_score_threshold}, {config.detector_pyramid_levels} pyramid level(s)"
+        )
+        if config.zones:
+            logger.info(f"  detection zones: {config.zones.stats()}")
+        if config.face_sizes:
+            logger.info(f"  face sizes per camera: {config.face_sizes}")
+        logger.info(
+            f"  embedding: {config.embedding_model_path} ({config.embedding_precision}), "
+            f"threads {config.embedding_threads or 'default'}"
+        )
+        if config.ann_min_gallery_size:
+            logger.info(
+                f"  gallery index: IVF above {config.ann_min_gallery_size} embeddings, "
+                f"nprobe {config.ann_nprobe}"
+            )
+        else:
+            logger.info("  gallery index: exact search only")
+        logger.info(
+            f"  review reprocessing: {config.reprocess_workers or 'in-process'} worker(s) "
+            f"at nice {config.reprocess_nice}, chunks of {config.reprocess_chunk_size}"
+        )
         logger.info(f"  drive_folder_id: {'configured' if config.drive_folder_id else 'not configured'}")
         logger.info(f"  drive_credentials: {'loaded' if config.drive_credentials else 'not found'}")
         
@@ -0,0 +1,162 @@
+"""Near-duplicate frame suppression for the face recognition add-on.
+
+Motion-triggered automations send nearly identical frames from one camera
+seconds apart. Each decoded frame gets a 64-bit difference hash (dHash) of
+a tiny grayscale thumbnail, taken from every 8th pixel so hashing costs a
+fraction of a millisecond even for 4K frames. The hash is compared with a
+short ring buffer of the camera's recently recognized frames, and a frame
+within ``max_distance`` bits of one whose result is younger than
+``max_age`` seconds reuses that result instead of running the pipeline
+(detection, embedding and matching are skipped, and its faces are not
+queued for review again).
+
+A result's age counts from when it was computed, not from when it was last
+reused, so a static scene is recognized again every ``max_age`` seconds.
+"""
+
+import copy
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# dHash thumbnail: 9x8 pixels give 8x8 horizontal gradient bits
+HASH_WIDTH = 9
+HASH_HEIGHT = 8
+# Every SUBSAMPLE-th pixel is enough to average down to 9x8
+SUBSAMPLE = 8
+
+# Result fields that belong to the request, not to the frame
+PER_REQUEST_FIELDS = ("camera", "timestamp", "processing_time_ms", "timings_ms", "batch_size",
+                      "image_size", "cached")
+
+
+def frame_hash(frame: np.ndarray) -> int:
+    """64-bit difference hash of a decoded BGR frame."""
+    step = SUBSAMPLE if min(frame.shape[:2]) >= SUBSAMPLE * HASH_WIDTH else 1
+    small = cv2.resize(frame[::step, ::step], (HASH_WIDTH, HASH_HEIGHT), interpolation=cv2.INTER_AREA)
+    gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+    bits = np.packbits(gray[:, 1:] > gray[:, :-1])
+    return int.from_bytes(bits.tobytes(), "big")
+
+
+def hamming(a: int, b: int) -> int:
+    """Number of differing bits between two hashes."""
+    return bin(a ^ b).count("1")
+
+
+@dataclass
+class RecentFrame:
+    """A recognized frame in a camera's ring buffer."""
+
+    hash: int
+    created: float
+    result: Dict[str, Any]
+    # Pipeline CPU seconds the result cost (what reusing it saves)
+    cpu_seconds: float
+
+
+class FrameDeduplicator:
+    """Per-camera ring buffers of recent frame hashes and their results."""
+
+    def __init__(self, ring_size: int = 8, max_distance: int = 6, max_age: float = 10.0):
+        """Initialize the deduplicator.
+
+        Args:
+            ring_size: Recent frames remembered per camera
+            max_distance: Largest Hamming distance (of 64 bits) that counts
+                as the same frame
+            max_age: Seconds a result can be reused after it was computed
+        """
+        self.ring_size = ring_size
+        self.max_distance = max_distance
+        self.max_age = max_age
+        self._recent: Dict[str, Deque[RecentFrame]] = {}
+        self._lock = threading.Lock()
+        self._counts: Dict[str, Dict[str, int]] = {}
+        self.cpu_saved = 0.0
+        self.metrics = None  # Optional AddonMetrics
+
+    def lookup(self, camera: str, frame: np.ndarray) -> Tuple[int, Optional[Dict[str, Any]]]:
+        """Find a fresh result for a near-duplicate of this frame.
+
+        Args:
+            camera: Camera the frame came from
+            frame: Decoded BGR frame
+
+        Returns:
+            (frame hash, reused result or None). The result is a copy
+            without per-request fields, with the match under
+            ``near_duplicate``.
+        """
+        start = time.thread_time()
+        value = frame_hash(frame)
+        hash_cpu = time.thread_time() - start
+
+        now = time.time()
+        match = None
+        with self._lock:
+            counts = self._counts.setdefault(camera, {"frames": 0, "suppressed": 0})
+            counts["frames"] += 1
+            for recent in reversed(self._recent.get(camera, ())):
+                if now - recent.created > self.max_age:
+                    continue
+                distance = hamming(value, recent.hash)
+                if distance <= self.max_distance:
+                    match = recent, distance
+                    break
+            if match is not None:
+                counts["suppressed"] += 1
+                saved = max(match[0].cpu_seconds - hash_cpu, 0.0)
+                self.cpu_saved += saved
+        if match is None:
+            return value, None
+
+        recent, distance = match
+        if self.metrics is not None:
+            self.metrics.record_suppression(camera, saved)
+        result = {
+            **copy.deepcopy(recent.result),
+            "near_duplicate": {"distance": distance, "age_seconds": round(now - recent.created, 3)},
+        }
+        return value, result
+
+    def remember(self, camera: str, value: int, result: Dict[str, Any], cpu_seconds: float):
+        """Add a recognized frame to its camera's ring buffer."""
+        kept = copy.deepcopy({k: v for k, v in result.items() if k not in PER_REQUEST_FIELDS})
+        recent = RecentFrame(value, time.time(), kept, cpu_seconds)
+        with self._lock:
+            ring = self._recent.get(camera)
+            if ring is None:
+                ring = self._recent[camera] = deque(maxlen=self.ring_size)
+            ring.append(recent)
+
+    def clear(self):
+        """Forget every remembered frame (their results are stale)."""
+        with self._lock:
+            self._recent.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Suppression counts per camera and CPU saved, for GET /status."""
+        with self._lock:
+            per_camera = {camera: dict(counts) for camera, counts in self._counts.items()}
+        frames = sum(c["frames"] for c in per_camera.values())
+        suppressed = sum(c["suppressed"] for c in per_camera.values())
+        return {
+            "ring_size": self.ring_size,
+            "max_distance": self.max_distance,
+            "max_age_seconds": self.max_age,
+            "frames": frames,
+            "suppressed": suppressed,
+            "suppressed_ratio": round(suppressed / frames, 4) if frames else 0.0,
+            "cpu_saved_seconds": round(self.cpu_saved, 3),
+            "per_camera": per_camera,
+        }
+
@@ -0,0 +1,64 @@
+"""CPU face detection backends for the face recognition add-on.
+
+Backends:
+
+- ``haar``: OpenCV Haar cascade - fast and lightweight, frontal faces only
+- ``yunet``: OpenCV YuNet CNN - accurate, with landmarks (needs the ONNX model)
+
+Every backend implements FaceDetector.detect(), which scans an image
+pyramid starting at a resolution derived from ``min_face_size`` and returns
+Detection objects with full-frame boxes and zero-copy crop views.
+"""
+
+from typing import Optional
+
+from face_recognition_addon.detection.base import Detection, FaceDetector, decode_image
+from face_recognition_addon.detection.haar import HaarCascadeDetector
+from face_recognition_addon.detection.yunet import YuNetDetector
+
+BACKENDS = {
+    HaarCascadeDetector.name: HaarCascadeDetector,
+    YuNetDetector.name: YuNetDetector,
+}
+
+
+def create_detector(config, backend: Optional[str] = None) -> FaceDetector:
+    """Create the detector configured by ``config.detector_backend``.
+
+    Args:
+        config: Config object with detector settings
+        backend: Backend name overriding config.detector_backend
+
+    Returns:
+        FaceDetector instance
+
+    Raises:
+        ValueError: If the backend is unknown
+        FileNotFoundError: If the backend's model file is missing
+    """
+    name = backend or config.detector_backend
+    detector_class = BACKENDS.get(name)
+    if detector_class is None:
+        raise ValueError(
+            f"Unknown detector backend '{name}', "
+            f"expected one of {sorted(BACKENDS)}"
+        )
+    kwargs = {
+        "min_face_size": config.min_face_size,
+        "score_threshold": config.detector_score_threshold,
+        "pyramid_levels": config.detector_pyramid_levels,
+    }
+    if detector_class is YuNetDetector:
+        kwargs["model_path"] = config.detector_model_path or None
+    return detector_class(**kwargs)
+
+
+__all__ = [
+    "BACKENDS",
+    "Detection",
+    "FaceDetector",
+    "HaarCascadeDetector",
+    "YuNetDetector",
+    "create_detector",
+    "decode_image",
+]
@@ -0,0 +1,167 @@
+"""Face detector interface and shared detection types."""
+
+import logging
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from face_recognition_addon.detection.pyramid import ImagePyramid
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Detection:
+    """A detected face in full-frame pixel coordinates."""
+
+    x: int
+    y: int
+    w: int
+    h: int
+    score: float
+    # Zero-copy view into the frame the detection was made on
+    crop: np.ndarray = field(repr=False)
+    # Optional (5, 2) facial landmarks (eyes, nose, mouth corners)
+    landmarks: Optional[np.ndarray] = field(default=None, repr=False)
+
+    @property
+    def box(self) -> Tuple[int, int, int, int]:
+        """Bounding box as (x, y, w, h)."""
+        return self.x, self.y, self.w, self.h
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize for the HTTP API (without pixel data)."""
+        return {"box": [self.x, self.y, self.w, self.h], "score": round(self.score, 3)}
+
+
+def decode_image(image_bytes: bytes) -> np.ndarray:
+    """Decode an encoded image (JPEG/PNG/WebP) to a BGR array.
+
+    Args:
+        image_bytes: Encoded image
+
+    Returns:
+        (H, W, 3) uint8 BGR array
+
+    Raises:
+        ValueError: If the bytes are not a decodable image
+    """
+    buffer = np.frombuffer(image_bytes, dtype=np.uint8)
+    image = cv2.imdecode(buffer, cv2.IMREAD_COLOR) if buffer.size else None
+    if image is None:
+        raise ValueError("Could not decode image")
+    return image
+
+
+class FaceDetector(ABC):
+    """Base class for CPU face detection backends.
+
+    Subclasses implement ``_detect_level`` for a single image at one scale.
+    The base class runs it over an image pyramid whose first level is
+    scaled so that ``min_face_size`` pixels in the frame map onto the
+    backend's smallest detectable face, so large camera frames are never
+    scanned at full resolution. Boxes are mapped back to full-frame
+    coordinates and returned with zero-copy crop views of the frame.
+    """
+
+    # Backend name used in Config.detector_backend
+    name = ""
+    # Smallest face (pixels) the backend finds at native resolution
+    min_window = 24
+
+    def __init__(self, min_face_size: int = 40, score_threshold: float = 0.6,
+                 pyramid_levels: int = 1, pyramid_scale_factor: float = 0.5):
+        """Initialize detector.
+
+        Args:
+            min_face_size: Smallest face to find, in frame pixels
+            score_threshold: Minimum detection score to keep
+            pyramid_levels: Number of pyramid levels to scan
+            pyramid_scale_factor: Scale between consecutive levels (< 1)
+        """
+        self.min_face_size = min_face_size
+        self.score_threshold = score_threshold
+        self.pyramid = ImagePyramid(
+            min_window=self.min_window,
+            levels=pyramid_levels,
+            scale_factor=pyramid_scale_factor,
+        )
+
+    def detect(self, image: np.ndarray, min_face_size: Optional[int] = None) -> List[Detection]:
+        """Detect faces in a BGR frame.
+
+        Args:
+            image: (H, W, 3) uint8 BGR frame
+            min_face_size: Override of the smallest face to find, in pixels
+
+        Returns:
+            Detections sorted by descending score
+        """
+        min_face = min_face_size or self.min_face_size
+        boxes: List[np.ndarray] = []
+        scores: List[np.ndarray] = []
+        landmarks: List[np.ndarray] = []
+
+        for level, scale in self.pyramid.levels(image, min_face):
+            level_boxes, level_scores, level_landmarks = self._detect_level(level)
+            if len(level_boxes) == 0:
+                continue
+            boxes.append(np.asarray(level_boxes, dtype=np.float32) / scale)
+            scores.append(np.asarray(level_scores, dtype=np.float32))
+            if level_landmarks is not None:
+                landmarks.append(np.asarray(level_landmarks, dtype=np.float32) / scale)
+
+        if not boxes:
+            return []
+
+        all_boxes = np.concatenate(boxes)
+        all_scores = np.concatenate(scores)
+        all_landmarks = np.concatenate(landmarks) if len(landmarks) == len(boxes) else None
+
+        keep = all_scores >= self.score_threshold
+        if len(boxes) > 1:
+            # Merge duplicates found on several pyramid levels
+            nms = cv2.dnn.NMSBoxes(all_boxes.tolist(), all_scores.tolist(), self.score_threshold, 0.3)
+            keep = np.zeros(len(all_boxes), dtype=bool)
+            keep[np.asarray(nms, dtype=np.int64).reshape(-1)] = True
+
+        return self._to_detections(image, all_boxes[keep], all_scores[keep],
+                                   all_landmarks[keep] if all_landmarks is not None else None,
+                                   min_face)
+
+    @staticmethod
+    def _to_detections(image: np.ndarray, boxes: np.ndarray, scores: np.ndarray,
+                       landmarks: Optional[np.ndarray], min_face: int) -> List[Detection]:
+        """Clip boxes to the frame and attach crop views."""
+        height, width = image.shape[:2]
+        detections = []
+        for i in np.argsort(-scores):
+            x, y, w, h = boxes[i]
+            x0 = int(max(0, round(x)))
+            y0 = int(max(0, round(y)))
+            x1 = int(min(width, round(x + w)))
+            y1 = int(min(height, round(y + h)))
+            if min(x1 - x0, y1 - y0) < min_face * 0.5:
+                continue
+            detections.append(Detection(
+                x=x0, y=y0, w=x1 - x0, h=y1 - y0,
+                score=float(scores[i]),
+                crop=image[y0:y1, x0:x1],
+                landmarks=landmarks[i].reshape(5, 2) if landmarks is not None else None,
+            ))
+        return detections
+
+    @abstractmethod
+    def _detect_level(self, image: np.ndarray) -> Tuple[np.ndarray, np.ndarray, Optional[np.ndarray]]:
+        """Detect faces in one pyramid level.
+
+        Args:
+            image: (H, W, 3) uint8 BGR image
+
+        Returns:
+            (boxes (N, 4) as x, y, w, h; scores (N,); landmarks (N, 10) or None)
+            in this level's pixel coordinates
+        """
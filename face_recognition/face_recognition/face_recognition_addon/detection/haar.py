@@ -0,0 +1,104 @@
+"""Fast Haar cascade face detector (OpenCV, no model download)."""
+
+import logging
+import threading
+from pathlib import Path
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+from face_recognition_addon.detection.base import FaceDetector
+
+logger = logging.getLogger(__name__)
+
+CASCADE_FILE = "haarcascade_frontalface_default.xml"
+
+# Where distribution packages (e.g. Alpine py3-opencv) install the cascades;
+# pip wheels expose them through cv2.data instead
+SYSTEM_CASCADE_DIRS = (
+    "/usr/share/opencv4/haarcascades",
+    "/usr/local/share/opencv4/haarcascades",
+    "/usr/share/opencv/haarcascades",
+)
+
+
+def find_cascade(filename: str = CASCADE_FILE) -> Path:
+    """Locate an OpenCV Haar cascade file.
+
+    Raises:
+        FileNotFoundError: If the cascade is not installed
+    """
+    directories = list(SYSTEM_CASCADE_DIRS)
+    data = getattr(cv2, "data", None)
+    if data is not None:
+        directories.insert(0, data.haarcascades)
+    for directory in directories:
+        path = Path(directory) / filename
+        if path.exists():
+            return path
+    raise FileNotFoundError(f"Haar cascade {filename} not found in {directories}")
+
+
+class HaarCascadeDetector(FaceDetector):
+    """Viola-Jones frontal face detector.
+
+    Fast and lightweight (a few ms per downscaled frame on one core) but
+    frontal-only and less accurate than YuNet. Haar cascades have no
+    calibrated confidence, so the score is derived from the number of
+    overlapping raw detections merged into each face.
+
+    CascadeClassifier is not safe to call from several threads at once, so
+    each thread (e.g. each inference worker) loads its own copy.
+    """
+
+    name = "haar"
+    # The default frontal cascade is trained on 24x24 windows
+    min_window = 24
+
+    def __init__(self, cascade_path: Optional[str] = None, min_neighbors: int = 4,
+                 scale_step: float = 1.1, **kwargs):
+        """Initialize detector.
+
+        Args:
+            cascade_path: Cascade XML (default: OpenCV frontal face cascade)
+            min_neighbors: Raw detections required to keep a face
+            scale_step: Window growth between internal cascade scales
+            **kwargs: FaceDetector arguments
+        """
+        super().__init__(**kwargs)
+        self.path = Path(cascade_path) if cascade_path else find_cascade()
+        self.min_neighbors = min_neighbors
+        self.scale_step = scale_step
+        self._local = threading.local()
+        self._thread_classifier()
+        logger.info(f"Haar cascade detector loaded from {self.path}")
+
+    def _thread_classifier(self) -> "cv2.CascadeClassifier":
+        """This thread's CascadeClassifier, loaded on first use.
+
+        Raises:
+            ValueError: If the cascade cannot be loaded
+        """
+        classifier = getattr(self._local, "classifier", None)
+        if classifier is None:
+            classifier = cv2.CascadeClassifier(str(self.path))
+            if classifier.empty():
+                raise ValueError(f"Could not load Haar cascade {self.path}")
+            self._local.classifier = classifier
+        return classifier
+
+    def _detect_level(self, image: np.ndarray) -> Tuple[np.ndarray, np.ndarray, None]:
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        boxes, neighbors = self._thread_classifier().detectMultiScale2(
+            gray,
+            scaleFactor=self.scale_step,
+            minNeighbors=self.min_neighbors,
+            minSize=(self.min_window, self.min_window),
+        )
+        if len(boxes) == 0:
+            return np.empty((0, 4)), np.empty(0), None
+        neighbors = np.asarray(neighbors, dtype=np.float32).reshape(-1)
+        # min_neighbors merged windows -> 0.8, saturating towards 1.0
+        scores = neighbors / (neighbors + 1.0)
+        return np.asarray(boxes, dtype=np.float32), scores, None
@@ -0,0 +1,63 @@
+"""Image pyramid for face detection on large camera frames."""
+
+from typing import Iterator, Tuple
+
+import cv2
+import numpy as np
+
+
+class ImagePyramid:
+    """Yields progressively downscaled copies of a frame.
+
+    The first level is scaled so that the smallest face we care about
+    (``min_face_size`` frame pixels) becomes the detector's smallest
+    detectable window. A 4K frame with a 60 px minimum face and a 24 px
+    detector window is therefore scanned at 0.4x, never at full size. Each
+    further level is ``scale_factor`` times the previous one and is resized
+    from it, so later levels are cheap.
+    """
+
+    def __init__(self, min_window: int, levels: int = 1, scale_factor: float = 0.5):
+        """Initialize pyramid.
+
+        Args:
+            min_window: Smallest face (pixels) the detector finds
+            levels: Number of levels to yield
+            scale_factor: Scale between consecutive levels (0 < f < 1)
+        """
+        if not 0.0 < scale_factor < 1.0:
+            raise ValueError(f"scale_factor must be between 0 and 1, got {scale_factor}")
+        self.min_window = min_window
+        self.levels_count = max(1, levels)
+        self.scale_factor = scale_factor
+
+    def base_scale(self, min_face_size: int) -> float:
+        """Scale of the first level (never upscales)."""
+        return min(1.0, self.min_window / max(1, min_face_size))
+
+    def levels(self, image: np.ndarray, min_face_size: int) -> Iterator[Tuple[np.ndarray, float]]:
+        """Yield (level image, scale relative to the frame) pairs.
+
+        Args:
+            image: Full-resolution frame
+            min_face_size: Smallest face to find, in frame pixels
+        """
+        scale = self.base_scale(min_face_size)
+        level = resize(image, scale)
+        yield level, scale
+
+        for _ in range(self.levels_count - 1):
+            scale *= self.scale_factor
+            if min(level.shape[:2]) * self.scale_factor < self.min_window:
+                return
+            level = resize(level, self.scale_factor)
+            yield level, scale
+
+
+def resize(image: np.ndarray, scale: float) -> np.ndarray:
+    """Resize by a scale factor (returns the image itself at scale 1)."""
+    if scale >= 1.0:
+        return image
+    height, width = image.shape[:2]
+    size = (max(1, int(round(width * scale))), max(1, int(round(height * scale))))
+    return cv2.resize(image, size, interpolation=cv2.INTER_AREA)
@@ -0,0 +1,85 @@
+"""Accurate YuNet CNN face detector (OpenCV DNN, ONNX model)."""
+
+import logging
+import threading
+from pathlib import Path
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+from face_recognition_addon.detection.base import FaceDetector
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL_PATH = "/data/models/face_detection_yunet_2023mar.onnx"
+
+
+class YuNetDetector(FaceDetector):
+    """YuNet face detector from the OpenCV model zoo.
+
+    Much more robust than Haar to pose, lighting and partial occlusion, with
+    calibrated scores and five facial landmarks per face (used later for
+    alignment). The ~230 KB ONNX model is not bundled; download
+    ``face_detection_yunet_2023mar.onnx`` from the OpenCV model zoo into
+    ``/data/models/`` or point ``detector_model_path`` at it.
+
+    FaceDetectorYN holds the input size it was last set to, so each thread
+    (e.g. each inference worker) gets its own instance of the model.
+    """
+
+    name = "yunet"
+    # YuNet reliably finds faces down to roughly 20 px
+    min_window = 20
+
+    def __init__(self, model_path: Optional[str] = None, nms_threshold: float = 0.3,
+                 top_k: int = 50, **kwargs):
+        """Initialize detector.
+
+        Args:
+            model_path: YuNet ONNX model (default: /data/models/...)
+            nms_threshold: IoU threshold for YuNet's internal NMS
+            top_k: Maximum faces kept per level
+            **kwargs: FaceDetector arguments
+
+        Raises:
+            FileNotFoundError: If the model file does not exist
+        """
+        super().__init__(**kwargs)
+        path = Path(model_path or DEFAULT_MODEL_PATH)
+        if not path.exists():
+            raise FileNotFoundError(f"YuNet model not found: {path}")
+        self.model_path = str(path)
+        self.nms_threshold = nms_threshold
+        self.top_k = top_k
+        self._local = threading.local()
+        self._thread_model()
+        logger.info(f"YuNet detector loaded from {path}")
+
+    def _thread_model(self):
+        """This thread's FaceDetectorYN, created on first use."""
+        model = getattr(self._local, "model", None)
+        if model is None:
+            # Raw scores are filtered by FaceDetector.score_threshold
+            model = cv2.FaceDetectorYN.create(
+                self.model_path, "", (320, 320),
+                score_threshold=self.score_threshold,
+                nms_threshold=self.nms_threshold,
+                top_k=self.top_k,
+            )
+            self._local.model = model
+            self._local.input_size = (320, 320)
+        return model
+
+    def _detect_level(self, image: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        model = self._thread_model()
+        height, width = image.shape[:2]
+        if self._local.input_size != (width, height):
+            model.setInputSize((width, height))
+            self._local.input_size = (width, height)
+
+        _, faces = model.detect(image)
+        if faces is None or len(faces) == 0:
+            return np.empty((0, 4)), np.empty(0), np.empty((0, 10))
+        # Each row: x, y, w, h, 5 landmark (x, y) pairs, score
+        return faces[:, 0:4], faces[:, 14], faces[:, 4:14]
@@ -0,0 +1,551 @@
+"""Persistent Google Drive upload queue for review faces (PRD section 9, chunk 7).
+
+Unknown and low-confidence faces are uploaded to the Drive ``review/``
+folder as ``<face_id>.jpg`` plus a ``<face_id>.json`` sidecar. Uploading
+never blocks recognition: the pipeline only inserts a row into an SQLite
+queue under ``/data``, and a background thread drains it:
+
+- rows are keyed by the blake2b hash of the crop, so the same crop is
+  queued (and uploaded) once, also across restarts
+- each batch of ``drive_upload_batch_size`` faces is uploaded over one
+  pooled HTTPS session with one access token
+- 429/5xx responses and Drive rate-limit errors back off exponentially
+  (honouring Retry-After); other errors are retried a few times, then the
+  row is marked failed
+- files carry the content hash in ``appProperties``; a row that was
+  interrupted mid-upload is looked up on Drive before it is uploaded again
+
+The Drive REST endpoints are plain HTTP, so tests run the client against a
+local stand-in server (``api_base``/``token_url``).
+"""
+
+import ast
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from collections import deque
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+try:
+    from google.auth.transport.requests import Request as GoogleAuthRequest
+    from google.oauth2 import service_account
+    GOOGLE_AUTH_AVAILABLE = True
+except ImportError:
+    GOOGLE_AUTH_AVAILABLE = False
+
+DRIVE_API_BASE = "https://www.googleapis.com"
+TOKEN_URL = "https://oauth2.googleapis.com/token"
+DRIVE_SCOPE = "https://www.googleapis.com/auth/drive.file"
+FOLDER_MIME_TYPE = "application/vnd.google-apps.folder"
+REVIEW_FOLDER = "review"
+
+# Queue row states
+UPLOAD_QUEUED = "queued"
+UPLOAD_UPLOADING = "uploading"
+UPLOAD_DONE = "done"
+UPLOAD_FAILED = "failed"
+
+# Retry policy
+MAX_ATTEMPTS = 5
+BACKOFF_BASE_SECONDS = 2.0
+BACKOFF_MAX_SECONDS = 600.0
+# Drive 403 reasons that mean "slow down" rather than "forbidden"
+RATE_LIMIT_REASONS = {"rateLimitExceeded", "userRateLimitExceeded"}
+# Seconds of uploads the throughput figures cover
+THROUGHPUT_WINDOW = 60.0
+# Idle poll interval of the worker when the queue is empty
+IDLE_POLL_SECONDS = 5.0
+REQUEST_TIMEOUT = 30.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS uploads (
+    content_hash TEXT PRIMARY KEY,
+    face_id TEXT NOT NULL,
+    crop_path TEXT NOT NULL,
+    sidecar TEXT NOT NULL,
+    state TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL DEFAULT 0,
+    crop_file_id TEXT,
+    sidecar_file_id TEXT,
+    last_error TEXT,
+    created_at REAL NOT NULL,
+    uploaded_at REAL
+);
+CREATE INDEX IF NOT EXISTS uploads_pending ON uploads (state, next_attempt_at);
+"""
+
+
+class DriveError(Exception):
+    """A failed Drive API call."""
+
+    def __init__(self, message: str, retryable: bool = False, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+
+def parse_credentials(value: Union[str, Dict[str, Any], None]) -> Optional[Dict[str, Any]]:
+    """Parse the ``face_recognition_drive_credentials`` secret.
+
+    Accepts JSON text, a path to a JSON file, or a YAML mapping (which the
+    secrets loader hands over as its Python repr).
+
+    Returns:
+        Credentials dict, or None if missing or unparseable
+    """
+    if not value:
+        return None
+    if isinstance(value, dict):
+        return value
+    text = value.strip()
+    if not text.startswith("{") and Path(text).is_file():
+        text = Path(text).read_text()
+    for parse in (json.loads, ast.literal_eval):
+        try:
+            parsed = parse(text)
+        except (ValueError, SyntaxError):
+            continue
+        if isinstance(parsed, dict):
+            return parsed
+    logger.error("Drive credentials are not valid JSON")
+    return None
+
+
+class DriveClient:
+    """Minimal Drive v3 REST client for uploading review faces."""
+
+    def __init__(self, credentials: Dict[str, Any], folder_id: str,
+                 api_base: str = DRIVE_API_BASE, token_url: str = TOKEN_URL):
+        """Initialize Drive client.
+
+        Args:
+            credentials: OAuth client credentials with a refresh token
+                (client_id, client_secret, refresh_token), a service account
+                key (needs google-auth), or a bare access_token
+            folder_id: Drive id of the faces root folder (``/faces``)
+            api_base: Drive API base URL
+            token_url: OAuth token endpoint
+        """
+        self.credentials = credentials
+        self.folder_id = folder_id
+        self.api_base = api_base.rstrip("/")
+        # OAuth client files name their own token endpoint
+        self.token_url = credentials.get("token_uri", TOKEN_URL) if token_url == TOKEN_URL else token_url
+        self.session = requests.Session()
+        self._token: Optional[str] = credentials.get("access_token")
+        self._token_expires = float("inf") if self._token and "refresh_token" not in credentials else 0.0
+        self._review_folder_id: Optional[str] = None
+        self._service_account = None
+        if credentials.get("type") == "service_account":
+            if not GOOGLE_AUTH_AVAILABLE:
+                raise ImportError("google-auth is required for service account credentials")
+            self._service_account = service_account.Credentials.from_service_account_info(
+                credentials, scopes=[DRIVE_SCOPE]
+            )
+
+    def _access_token(self) -> str:
+        """A valid access token (refreshed shortly before it expires)."""
+        if self._token and time.time() < self._token_expires - 60:
+            return self._token
+        if self._service_account is not None:
+            self._service_account.refresh(GoogleAuthRequest(self.session))
+            self._token = self._service_account.token
+            self._token_expires = time.time() + 3000
+            return self._token
+        if "refresh_token" not in self.credentials:
+            raise DriveError("Drive credentials have no refresh token")
+        try:
+            response = self.session.post(self.token_url, data={
+                "grant_type": "refresh_token",
+                "refresh_token": self.credentials["refresh_token"],
+                "client_id": self.credentials.get("client_id", ""),
+                "client_secret": self.credentials.get("client_secret", ""),
+            }, timeout=REQUEST_TIMEOUT)
+        except requests.RequestException as e:
+            raise DriveError(f"Token endpoint unreachable: {e}", retryable=True) from e
+        self._check(response, "token refresh")
+        token = response.json()
+        self._token = token["access_token"]
+        self._token_expires = time.time() + float(token.get("expires_in", 3600))
+        return self._token
+
+    def _request(self, method: str, path: str, **kwargs) -> requests.Response:
+        """Authorized request on the pooled session."""
+        headers = kwargs.pop("headers", {})
+        headers["Authorization"] = f"Bearer {self._access_token()}"
+        try:
+            response = self.session.request(method, f"{self.api_base}{path}", headers=headers,
+                                            timeout=REQUEST_TIMEOUT, **kwargs)
+        except requests.RequestException as e:
+            raise DriveError(f"Drive unreachable: {e}", retryable=True) from e
+        if response.status_code == 401:
+            # Token revoked or expired early: refresh once on the next call
+            self._token_expires = 0.0
+        self._check(response, f"{method} {path}")
+        return response
+
+    @staticmethod
+    def _check(response: requests.Response, what: str):
+        """Raise DriveError for an error response."""
+        if response.status_code < 400:
+            return
+        retry_after = response.headers.get("Retry-After")
+        retry_after = float(retry_after) if retry_after and retry_after.isdigit() else None
+        reasons = set()
+        try:
+            errors = response.json().get("error", {}).get("errors", [])
+            reasons = {e.get("reason") for e in errors}
+        except ValueError:
+            pass
+        retryable = (
+            response.status_code in (401, 408, 429)
+            or response.status_code >= 500
+            or bool(reasons & RATE_LIMIT_REASONS)
+        )
+        raise DriveError(f"{what} failed: HTTP {response.status_code} {sorted(r for r in reasons if r)}",
+                         retryable=retryable, retry_after=retry_after)
+
+    def review_folder(self) -> str:
+        """Id of the ``review/`` folder under the faces root (created if missing)."""
+        if self._review_folder_id is None:
+            query = (f"name = '{REVIEW_FOLDER}' and '{self.folder_id}' in parents "
+                     f"and mimeType = '{FOLDER_MIME_TYPE}' and trashed = false")
+            files = self._request("GET", "/drive/v3/files",
+                                  params={"q": query, "fields": "files(id)"}).json().get("files", [])
+            if files:
+                self._review_folder_id = files[0]["id"]
+            else:
+                self._review_folder_id = self._request("POST", "/drive/v3/files", json={
+                    "name": REVIEW_FOLDER, "mimeType": FOLDER_MIME_TYPE, "parents": [self.folder_id],
+                }, params={"fields": "id"}).json()["id"]
+        return self._review_folder_id
+
+    def find(self, name: str, content_hash: str) -> Optional[str]:
+        """Id of a review file uploaded earlier with this name and content hash."""
+        query = (f"name = '{name}' and '{self.review_folder()}' in parents and trashed = false "
+                 f"and appProperties has {{ key='content_hash' and value='{content_hash}' }}")
+        files = self._request("GET", "/drive/v3/files",
+                              params={"q": query, "fields": "files(id)"}).json().get("files", [])
+        return files[0]["id"] if files else None
+
+    def upload(self, name: str, data: bytes, mime_type: str, content_hash: str) -> str:
+        """Upload one file to the review folder (multipart upload).
+
+        Returns:
+            Drive file id
+        """
+        metadata = {
+            "name": name,
+            "parents": [self.review_folder()],
+            "appProperties": {"content_hash": content_hash},
+        }
+        boundary = uuid.uuid4().hex
+        body = b"".join([
+            f"--{boundary}\r\nContent-Type: application/json; charset=UTF-8\r\n\r\n".encode(),
+            json.dumps(metadata).encode(),
+            f"\r\n--{boundary}\r\nContent-Type: {mime_type}\r\n\r\n".encode(),
+            data,
+            f"\r\n--{boundary}--\r\n".encode(),
+        ])
+        response = self._request(
+            "POST", "/upload/drive/v3/files", data=body,
+            params={"uploadType": "multipart", "fields": "id"},
+            headers={"Content-Type": f"multipart/related; boundary={boundary}"},
+        )
+        return response.json()["id"]
+
+
+class UploadQueue:
+    """SQLite-backed queue of review faces drained to Drive by a background thread."""
+
+    def __init__(self, db_path: Union[str, Path] = "/data/upload_queue.db",
+                 client: Optional[DriveClient] = None, batch_size: int = 8,
+                 backoff_base: float = BACKOFF_BASE_SECONDS):
+        """Open the queue.
+
+        Args:
+            db_path: SQLite database file (a ``.lock`` file sits next to it)
+            client: DriveClient (None queues without uploading)
+            batch_size: Faces uploaded per session batch
+            backoff_base: First retry delay in seconds (doubles per attempt)
+        """
+        self.db_path = Path(db_path)
+        self.client = client
+        self.batch_size = batch_size
+        self.backoff_base = backoff_base
+        self._local = threading.local()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._uploads: deque = deque()  # (time, bytes) of recent uploads
+        self._backoff_until = 0.0
+        self.last_error: Optional[str] = None
+        self.uploaded = 0
+        self.deduplicated = 0
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._connection().executescript(SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        """This thread's connection (opened on first use)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def enqueue(self, face_id: str, crop_path: Union[str, Path], crop_jpeg: bytes,
+                record: Dict[str, Any]) -> bool:
+        """Queue a review face for upload (cheap; safe on the request path).
+
+        Args:
+            face_id: Face id (file names on Drive)
+            crop_path: Local JPEG crop (read again when uploading)
+            crop_jpeg: Crop bytes, used for the content hash
+            record: Sidecar JSON content
+
+        Returns:
+            False if the same crop was queued before
+        """
+        content_hash = hashlib.blake2b(crop_jpeg, digest_size=16).hexdigest()
+        conn = self._connection()
+        with conn:
+            inserted = conn.execute(
+                "INSERT OR IGNORE INTO uploads (content_hash, face_id, crop_path, sidecar, state, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (content_hash, face_id, str(crop_path), json.dumps(record), UPLOAD_QUEUED, time.time()),
+            ).rowcount
+        if not inserted:
+            self.deduplicated += 1
+            return False
+        self._wake.set()
+        return True
+
+    def ensure_running(self):
+        """Start the upload worker once per process (when a server worker starts, via post_worker_init)."""
+        if self._pid == os.getpid() or self.client is None:
+            return
+        self._pid = os.getpid()
+        self._local = threading.local()  # connections don't survive fork
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._worker, name="drive-upload", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stop the upload worker after its current file."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _worker(self):
+        """Drain the queue; only one process (file lock) uploads at a time."""
+        with open(self.db_path.with_suffix(".lock"), "w") as lock_file:
+            while not self._stop.is_set():
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except BlockingIOError:
+                    self._stop.wait(IDLE_POLL_SECONDS * 6)
+            else:
+                return
+            self.recover()
+            while not self._stop.is_set():
+                try:
+                    if self.drain_batch() == 0:
+                        self._wake.wait(self._next_wait())
+                        self._wake.clear()
+                except Exception as e:
+                    logger.exception(f"Drive upload worker error: {e}")
+                    self._stop.wait(IDLE_POLL_SECONDS)
+
+    def recover(self):
+        """Requeue rows a crash left mid-upload (counted as an attempt, so
+        their files are looked up on Drive before uploading again)."""
+        conn = self._connection()
+        with conn:
+            conn.execute("UPDATE uploads SET state = ?, attempts = attempts + 1 WHERE state = ?",
+                         (UPLOAD_QUEUED, UPLOAD_UPLOADING))
+
+    def _next_wait(self) -> float:
+        """Seconds until the next row is due (or the idle poll interval)."""
+        row = self._connection().execute(
+            "SELECT MIN(next_attempt_at) FROM uploads WHERE state = ?", (UPLOAD_QUEUED,)
+        ).fetchone()
+        if row[0] is None:
+            return IDLE_POLL_SECONDS
+        return min(IDLE_POLL_SECONDS, max(0.0, row[0] - time.time()))
+
+    def drain_batch(self) -> int:
+        """Upload one batch of due rows over one session.
+
+        Returns:
+            Number of rows attempted (0 if nothing is due)
+        """
+        now = time.time()
+        if now < self._backoff_until:
+            return 0
+        conn = self._connection()
+        with conn:
+            rows = conn.execute(
+                "SELECT content_hash, face_id, crop_path, sidecar, attempts, crop_file_id, sidecar_file_id "
+                "FROM uploads WHERE state = ? AND next_attempt_at <= ? ORDER BY created_at LIMIT ?",
+                (UPLOAD_QUEUED, now, self.batch_size),
+            ).fetchall()
+            conn.executemany("UPDATE uploads SET state = ? WHERE content_hash = ?",
+                             [(UPLOAD_UPLOADING, row[0]) for row in rows])
+
+        try:
+            for i, row in enumerate(rows):
+                try:
+                    self._upload_row(*row)
+                except DriveError as e:
+                    if e.retryable:
+                        # Rate limited or Drive down: the rest of the batch waits too
+                        self._retry_later(rows[i:], e)
+                        break
+                    self._retry_later([row], e)
+                except Exception as e:
+                    # Anything else (a malformed response, a local error) counts as a failed attempt
+                    logger.exception(f"Unexpected error uploading {row[1]}: {e}")
+                    self._retry_later([row], DriveError(f"{type(e).__name__}: {e}"))
+        finally:
+            # Rows not attempted (stopped by an error escaping the loop) go back to the queue
+            with conn:
+                conn.executemany(
+                    "UPDATE uploads SET state = ? WHERE content_hash = ? AND state = ?",
+                    [(UPLOAD_QUEUED, row[0], UPLOAD_UPLOADING) for row in rows],
+                )
+        return len(rows)
+
+    def _upload_row(self, content_hash: str, face_id: str, crop_path: str, sidecar: str,
+                    attempts: int, crop_file_id: Optional[str], sidecar_file_id: Optional[str]):
+        """Upload the crop and sidecar of one row (skipping parts already on Drive)."""
+        conn = self._connection()
+        try:
+            crop = Path(crop_path).read_bytes()
+        except OSError as e:
+            with conn:
+                conn.execute("UPDATE uploads SET state = ?, last_error = ? WHERE content_hash = ?",
+                             (UPLOAD_FAILED, f"crop unreadable: {e}", content_hash))
+            return
+        uploaded_bytes = 0
+        if crop_file_id is None:
+            crop_name = f"{face_id}.jpg"
+            # An earlier attempt may have uploaded the file without recording it
+            if attempts:
+                crop_file_id = self.client.find(crop_name, content_hash)
+            if crop_file_id is None:
+                crop_file_id = self.client.upload(crop_name, crop, "image/jpeg", content_hash)
+                uploaded_bytes += len(crop)
+            with conn:
+                conn.execute("UPDATE uploads SET crop_file_id = ? WHERE content_hash = ?",
+                             (crop_file_id, content_hash))
+        if sidecar_file_id is None:
+            sidecar_name = f"{face_id}.json"
+            if attempts:
+                sidecar_file_id = self.client.find(sidecar_name, content_hash)
+            if sidecar_file_id is None:
+                data = sidecar.encode("utf-8")
+                sidecar_file_id = self.client.upload(sidecar_name, data, "application/json", content_hash)
+                uploaded_bytes += len(data)
+        with conn:
+            conn.execute(
+                "UPDATE uploads SET state = ?, sidecar_file_id = ?, uploaded_at = ?, last_error = NULL "
+                "WHERE content_hash = ?",
+                (UPLOAD_DONE, sidecar_file_id, time.time(), content_hash),
+            )
+        self.uploaded += 1
+        self._uploads.append((time.monotonic(), uploaded_bytes))
+        self._trim_uploads()
+
+    def _trim_uploads(self):
+        """Forget uploads older than the throughput window."""
+        now = time.monotonic()
+        while self._uploads and now - self._uploads[0][0] > THROUGHPUT_WINDOW:
+            self._uploads.popleft()
+
+    def _retry_later(self, rows: List[tuple], error: DriveError):
+        """Requeue the failed row and the rest of its batch with backoff."""
+        failed, rest = rows[0], rows[1:]
+        attempts = failed[4] + 1
+        delay = error.retry_after or min(
+            BACKOFF_MAX_SECONDS, self.backoff_base * 2 ** (attempts - 1)
+        ) * random.uniform(0.8, 1.2)
+        give_up = not error.retryable and attempts >= MAX_ATTEMPTS
+        self.last_error = str(error)
+        logger.warning(
+            f"Drive upload of {failed[1]} failed ({error}); "
+            + ("giving up" if give_up else f"retrying in {delay:.1f}s")
+        )
+        if error.retryable:
+            # Rate limits and outages apply to every request: pause the whole queue
+            self._backoff_until = time.time() + delay
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                "UPDATE uploads SET state = ?, attempts = ?, next_attempt_at = ?, last_error = ? "
+                "WHERE content_hash = ?",
+                (UPLOAD_FAILED if give_up else UPLOAD_QUEUED, attempts, time.time() + delay,
+                 str(error), failed[0]),
+            )
+            conn.executemany("UPDATE uploads SET state = ? WHERE content_hash = ?",
+                             [(UPLOAD_QUEUED, row[0]) for row in rest])
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth and upload throughput for GET /status."""
+        counts = dict(self._connection().execute(
+            "SELECT state, COUNT(*) FROM uploads GROUP BY state"
+        ).fetchall())
+        self._trim_uploads()
+        window_bytes = sum(size for _, size in self._uploads)
+        return {
+            "enabled": self.client is not None,
+            "depth": counts.get(UPLOAD_QUEUED, 0) + counts.get(UPLOAD_UPLOADING, 0),
+            "done": counts.get(UPLOAD_DONE, 0),
+            "failed": counts.get(UPLOAD_FAILED, 0),
+            "uploaded": self.uploaded,
+            "deduplicated": self.deduplicated,
+            "faces_per_minute": len(self._uploads) * 60 / THROUGHPUT_WINDOW,
+            "kb_per_second": round(window_bytes / 1024 / THROUGHPUT_WINDOW, 2),
+            "backoff_seconds": round(max(0.0, self._backoff_until - time.time()), 1),
+            "last_error": self.last_error,
+        }
+
+
+def create_upload_queue(config) -> Optional[UploadQueue]:
+    """Build the upload queue if Drive is configured.
+
+    Args:
+        config: Config object with Drive settings
+
+    Returns:
+        UploadQueue, or None if Drive uploads are disabled (review faces
+        are still kept locally)
+    """
+    credentials = parse_credentials(config.drive_credentials)
+    if not credentials or not config.drive_folder_id:
+        logger.info("Drive not configured, review faces are kept locally only")
+        return None
+    try:
+        client = DriveClient(credentials, config.drive_folder_id)
+    except ImportError as e:
+        logger.error(f"Drive uploads disabled: {e}")
+        return None
+    return UploadQueue(config.upload_db_path, client, batch_size=config.drive_upload_batch_size)
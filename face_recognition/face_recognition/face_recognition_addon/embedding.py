@@ -0,0 +1,269 @@
+"""Face embedding engine for the face recognition add-on (PRD step 3).
+
+Runs batches of face crops through an ONNX embedding model on the CPU with
+onnxruntime. The model is trained in Colab and exported as a TensorFlow
+SavedModel; convert it once with
+``python -m tf2onnx.convert --saved-model <dir> --output embedding.onnx``
+and create reduced-precision variants with ``quantize_model``:
+
+- ``embedding.onnx`` - float32 (reference)
+- ``embedding.fp16.onnx`` - float16 weights, half the size
+- ``embedding.int8.onnx`` - int8 static quantization, fastest on ARM/x86 CPUs
+
+``Config.embedding_precision`` selects which variant is loaded.
+"""
+
+import hashlib
+import logging
+import time
+from pathlib import Path
+from typing import Optional, Sequence, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+try:
+    import onnxruntime as ort
+    ONNXRUNTIME_AVAILABLE = True
+except ImportError:
+    ONNXRUNTIME_AVAILABLE = False
+
+try:
+    import cv2
+    OPENCV_AVAILABLE = True
+except ImportError:
+    OPENCV_AVAILABLE = False
+
+# Supported model precisions and their file name suffixes
+PRECISIONS = {"fp32": "", "fp16": ".fp16", "int8": ".int8"}
+
+# Input normalisation of the embedding model: (pixel - 127.5) / 127.5, RGB
+INPUT_MEAN = 127.5
+INPUT_SCALE = 1.0 / 127.5
+
+# Default input size when the model has a dynamic spatial shape
+DEFAULT_INPUT_SIZE = 112
+
+
+def variant_path(model_path: Union[str, Path], precision: str) -> Path:
+    """Path of a precision variant, e.g. embedding.onnx -> embedding.int8.onnx.
+
+    Args:
+        model_path: Path of the float32 model
+        precision: "fp32", "fp16" or "int8"
+
+    Returns:
+        Path of the variant
+    """
+    if precision not in PRECISIONS:
+        raise ValueError(f"precision must be one of {sorted(PRECISIONS)}, got {precision}")
+    path = Path(model_path)
+    return path.with_name(f"{path.stem}{PRECISIONS[precision]}{path.suffix}")
+
+
+def quantize_model(model_path: Union[str, Path], precision: str,
+                   calibration: Optional[np.ndarray] = None) -> Path:
+    """Write a reduced-precision variant of a float32 ONNX model.
+
+    int8 uses static (QDQ) quantization calibrated on real face crops:
+    dynamic quantization turns convolutions into ConvInteger, which
+    onnxruntime runs several times slower than float32 on CPU.
+
+    Needs the ``onnx`` package (and onnxruntime's quantization tools), so it
+    is meant to run offline, e.g. next to the Colab export.
+
+    Args:
+        model_path: Path of the float32 model
+        precision: "fp16" or "int8"
+        calibration: (N, 3, H, W) float32 batch of preprocessed face crops
+            (EmbeddingEngine.preprocess), required for int8
+
+    Returns:
+        Path of the written variant
+    """
+    output = variant_path(model_path, precision)
+    if precision == "int8":
+        if calibration is None or len(calibration) == 0:
+            raise ValueError("int8 quantization needs a calibration batch of face crops")
+        from onnxruntime.quantization import (
+            CalibrationDataReader, QuantFormat, QuantType, quantize_static,
+        )
+
+        input_name = ort.InferenceSession(
+            str(model_path), providers=["CPUExecutionProvider"]
+        ).get_inputs()[0].name
+
+        class _Reader(CalibrationDataReader):
+            def __init__(self):
+                self._batches = iter(calibration[i:i + 1] for i in range(len(calibration)))
+
+            def get_next(self):
+                batch = next(self._batches, None)
+                return None if batch is None else {input_name: batch}
+
+        quantize_static(
+            str(model_path), str(output), _Reader(),
+            quant_format=QuantFormat.QDQ,
+            activation_type=QuantType.QUInt8,
+            weight_type=QuantType.QInt8,
+        )
+    elif precision == "fp16":
+        import onnx
+        from onnxruntime.transformers.float16 import convert_float_to_float16
+        model = convert_float_to_float16(onnx.load(str(model_path)), keep_io_types=True)
+        onnx.save(model, str(output))
+    else:
+        raise ValueError(f"Cannot quantize to {precision}")
+    logger.info(f"Wrote {precision} model variant to {output}")
+    return output
+
+
+def model_version(path: Union[str, Path]) -> str:
+    """Version id of a model file: its name plus a content hash prefix.
+
+    Embeddings are only comparable within one version, so stores and
+    indexes derived from them are keyed by it.
+    """
+    path = Path(path)
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return f"{path.stem}-{digest.hexdigest()[:12]}"
+
+
+def l2_normalize(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalize rows in place and return them (zero rows stay zero)."""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    np.maximum(norms, 1e-12, out=norms)
+    vectors /= norms
+    return vectors
+
+
+class EmbeddingEngine:
+    """Batched ONNX face embedding model.
+
+    ``embed`` takes either a list of face crops (any size, BGR uint8) or an
+    already prepared contiguous float32 (N, 3, H, W) batch, runs the whole
+    batch through the model in one call and returns L2-normalized float32
+    vectors, so cosine similarity is a plain dot product.
+    """
+
+    def __init__(self, model_path: Union[str, Path], precision: str = "fp32",
+                 intra_op_threads: int = 0):
+        """Load the model.
+
+        Args:
+            model_path: Path of the float32 model (variants are found next to it)
+            precision: "fp32", "fp16" or "int8"
+            intra_op_threads: Threads used inside one model call (0 = onnxruntime default)
+
+        Raises:
+            ImportError: If onnxruntime is not installed
+            FileNotFoundError: If the model variant does not exist
+        """
+        if not ONNXRUNTIME_AVAILABLE:
+            raise ImportError("onnxruntime is required for face embeddings")
+
+        self.path = variant_path(model_path, precision)
+        if not self.path.exists():
+            raise FileNotFoundError(f"Embedding model not found: {self.path}")
+        self.precision = precision
+        self.version = model_version(self.path)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        # Inference concurrency is 1 (PRD): parallelism comes from intra-op threads
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.inter_op_num_threads = 1
+        if intra_op_threads > 0:
+            options.intra_op_num_threads = intra_op_threads
+        self.session = ort.InferenceSession(
+            str(self.path), sess_options=options, providers=["CPUExecutionProvider"]
+        )
+
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        self.input_dtype = np.float16 if model_input.type == "tensor(float16)" else np.float32
+        height, width = model_input.shape[2:4]
+        self.input_size = (
+            width if isinstance(width, int) else DEFAULT_INPUT_SIZE,
+            height if isinstance(height, int) else DEFAULT_INPUT_SIZE,
+        )
+        # Models exported with a fixed batch of 1 are run one crop at a time
+        self.fixed_batch = model_input.shape[0] if isinstance(model_input.shape[0], int) else None
+        dimension = self.session.get_outputs()[0].shape[-1]
+        self.dimension = dimension if isinstance(dimension, int) else None
+
+        logger.info(
+            f"Embedding model loaded: {self.path.name} ({precision}, version {self.version}), "
+            f"input {self.input_size[0]}x{self.input_size[1]}, {self.dimension}-d, "
+            f"intra-op threads {intra_op_threads or 'default'}"
+        )
+
+    def preprocess(self, crops: Sequence[np.ndarray]) -> np.ndarray:
+        """Resize and normalize BGR crops into one contiguous float32 batch.
+
+        Args:
+            crops: BGR uint8 face crops (views into decoded frames are fine)
+
+        Returns:
+            C-contiguous float32 array of shape (N, 3, H, W)
+        """
+        if OPENCV_AVAILABLE:
+            # One native call: resize, BGR->RGB, mean/scale and NCHW packing
+            return cv2.dnn.blobFromImages(
+                list(crops), INPUT_SCALE, self.input_size,
+                (INPUT_MEAN, INPUT_MEAN, INPUT_MEAN), swapRB=True, crop=False,
+            )
+
+        width, height = self.input_size
+        batch = np.empty((len(crops), 3, height, width), dtype=np.float32)
+        for i, crop in enumerate(crops):
+            if crop.shape[:2] != (height, width):
+                raise ValueError("Crops must match the model input size without OpenCV")
+            batch[i] = crop[:, :, ::-1].transpose(2, 0, 1)
+        batch -= INPUT_MEAN
+        batch *= INPUT_SCALE
+        return batch
+
+    def embed(self, faces: Union[Sequence[np.ndarray], np.ndarray]) -> np.ndarray:
+        """Compute L2-normalized embeddings for a batch of faces.
+
+        Args:
+            faces: List of BGR uint8 crops, or a prepared (N, 3, H, W) float32 batch
+
+        Returns:
+            (N, dimension) float32 array of unit vectors
+        """
+        if len(faces) == 0:
+            return np.empty((0, self.dimension or 0), dtype=np.float32)
+        if isinstance(faces, np.ndarray) and faces.ndim == 4 and faces.dtype == np.float32:
+            batch = np.ascontiguousarray(faces)
+        else:
+            batch = self.preprocess(faces)
+        if self.input_dtype is not np.float32:
+            batch = batch.astype(self.input_dtype)
+
+        if self.fixed_batch:
+            outputs = [self._run(batch[i:i + 1]) for i in range(len(batch))]
+            embeddings = np.concatenate(outputs)
+        else:
+            embeddings = self._run(batch)
+        return l2_normalize(embeddings.astype(np.float32, copy=False).reshape(len(batch), -1))
+
+    def _run(self, batch: np.ndarray) -> np.ndarray:
+        """Run one model call."""
+        return self.session.run(None, {self.input_name: batch})[0]
+
+    def warm_up(self, batch_size: int = 1) -> float:
+        """Run a dummy batch so the first real request isn't slow.
+
+        Returns:
+            Warm-up time in milliseconds
+        """
+        width, height = self.input_size
+        start = time.perf_counter()
+        self.embed(np.zeros((batch_size, 3, height, width), dtype=np.float32))
+        return (time.perf_counter() - start) * 1000
@@ -0,0 +1,198 @@
+"""Memory-mapped, versioned on-disk store of enrolled embeddings.
+
+One file per embedding-model version, ``<embeddings_dir>/<version>.emb``,
+so the gallery of an old and a new model can coexist during a hot reload.
+Files use a fixed little-endian layout::
+
+    header        128 bytes (see HEADER)
+    matrix        count x dimension float32, L2-normalized, row-major
+    person index  count int32 (row -> person table slot)
+    person table  (people + 1) uint32 byte offsets, then UTF-8 person ids
+
+The matrix starts on a 128-byte boundary and is used in place through a
+read-only ``mmap``: opening a store only parses the header and the person
+table, pages are faulted in as they are touched, and every process that
+maps the file (e.g. gunicorn workers) shares the same page-cache pages.
+Files are written to a temporary name and renamed, so readers never see a
+partial file and existing mappings keep the previous version.
+"""
+
+import logging
+import mmap
+import os
+import struct
+import time
+from pathlib import Path
+from typing import List, Sequence, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"FREMB\x00\x00\x01"
+FORMAT_VERSION = 1
+# magic, format, dimension, count, people, person table offset, created,
+# matrix fingerprint (16 bytes), model version (64 bytes, NUL padded)
+HEADER = struct.Struct("<8sIIQQQd16s64s")
+HEADER_SIZE = 128
+FILE_SUFFIX = ".emb"
+
+
+def store_path(directory: Union[str, Path], model_version: str) -> Path:
+    """Path of the store file for an embedding-model version."""
+    return Path(directory) / f"{model_version}{FILE_SUFFIX}"
+
+
+def write_store(path: Union[str, Path], matrix: np.ndarray, person_index: np.ndarray,
+                person_ids: Sequence[str], model_version: str, fingerprint: str = "") -> Path:
+    """Write a store file atomically.
+
+    Args:
+        path: Destination file
+        matrix: (N, D) L2-normalized float32 embeddings
+        person_index: (N,) person table slot of each row
+        person_ids: Person table (slot -> person id)
+        model_version: Embedding-model version the vectors come from
+        fingerprint: 32-hex-digit content fingerprint of the matrix (ann.fingerprint)
+
+    Returns:
+        The written path
+    """
+    path = Path(path)
+    matrix = np.ascontiguousarray(matrix, dtype="<f4")
+    person_index = np.ascontiguousarray(person_index, dtype="<i4")
+    if matrix.ndim != 2 or len(person_index) != len(matrix):
+        raise ValueError("matrix must be (N, D) with one person index per row")
+
+    encoded = [pid.encode("utf-8") for pid in person_ids]
+    offsets = np.zeros(len(encoded) + 1, dtype="<u4")
+    np.cumsum([len(e) for e in encoded], out=offsets[1:])
+    table_offset = HEADER_SIZE + matrix.nbytes + person_index.nbytes
+
+    header = HEADER.pack(
+        MAGIC, FORMAT_VERSION, matrix.shape[1], len(matrix), len(encoded), table_offset,
+        time.time(), bytes.fromhex(fingerprint) if fingerprint else b"",
+        model_version.encode("utf-8")[:64],
+    )
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(header.ljust(HEADER_SIZE, b"\0"))
+        f.write(matrix.data)
+        f.write(person_index.data)
+        f.write(offsets.data)
+        f.write(b"".join(encoded))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    logger.info(f"Wrote embedding store {path}: {len(matrix)} x {matrix.shape[1]}")
+    return path
+
+
+def save_gallery(gallery, directory: Union[str, Path], model_version: str) -> Path:
+    """Write a gallery's current embeddings to its versioned store file.
+
+    Args:
+        gallery: Gallery to save
+        directory: Embeddings directory (e.g. /data/embeddings)
+        model_version: Embedding-model version
+
+    Returns:
+        The written path
+    """
+    from face_recognition_addon.ann import fingerprint
+
+    matrix, person_index = gallery.matrix, gallery.person_index
+    return write_store(
+        store_path(directory, model_version), matrix, person_index, gallery.person_ids,
+        model_version, fingerprint(matrix),
+    )
+
+
+class EmbeddingStore:
+    """A read-only, memory-mapped store file."""
+
+    def __init__(self, path: Union[str, Path]):
+        """Map a store file.
+
+        Args:
+            path: Store file
+
+        Raises:
+            FileNotFoundError: If the file does not exist
+            ValueError: If the file is not a valid store
+        """
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < HEADER_SIZE:
+                raise ValueError(f"{self.path} is not an embedding store (too small)")
+            # The mapping stays valid after the file is closed or replaced
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        (magic, file_format, dimension, count, people, table_offset, created,
+         fingerprint, model_version) = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{self.path} is not an embedding store (bad magic)")
+        if file_format != FORMAT_VERSION:
+            raise ValueError(f"{self.path} has unsupported format {file_format}")
+
+        matrix_bytes = count * dimension * 4
+        if table_offset != HEADER_SIZE + matrix_bytes + count * 4 or table_offset > size:
+            raise ValueError(f"{self.path} is truncated or corrupt")
+
+        self.dimension = dimension
+        self.count = count
+        self.created = created
+        self.fingerprint = fingerprint.hex() if fingerprint.strip(b"\0") else ""
+        self.model_version = model_version.rstrip(b"\0").decode("utf-8")
+
+        # Zero-copy, read-only views into the mapping
+        self.matrix = np.frombuffer(
+            self._mmap, dtype="<f4", count=count * dimension, offset=HEADER_SIZE
+        ).reshape(count, dimension)
+        self.person_index = np.frombuffer(
+            self._mmap, dtype="<i4", count=count, offset=HEADER_SIZE + matrix_bytes
+        )
+        offsets = np.frombuffer(self._mmap, dtype="<u4", count=people + 1, offset=table_offset)
+        names_start = table_offset + offsets.nbytes
+        if names_start + int(offsets[-1]) > size:
+            raise ValueError(f"{self.path} is truncated or corrupt")
+        names = self._mmap[names_start:names_start + int(offsets[-1])]
+        self.person_ids: List[str] = [
+            names[start:end].decode("utf-8") for start, end in zip(offsets[:-1], offsets[1:])
+        ]
+        logger.info(
+            f"Mapped embedding store {self.path.name}: {count} x {dimension}, "
+            f"{people} people, model {self.model_version}"
+        )
+
+    def __len__(self) -> int:
+        """Number of embeddings."""
+        return self.count
+
+    def advise_willneed(self):
+        """Ask the kernel to read the matrix ahead (e.g. before a model swap)."""
+        if hasattr(self._mmap, "madvise") and hasattr(mmap, "MADV_WILLNEED"):
+            self._mmap.madvise(mmap.MADV_WILLNEED)
+
+
+def open_store(directory: Union[str, Path], model_version: str):
+    """Open the store of a model version if it exists.
+
+    Args:
+        directory: Embeddings directory
+        model_version: Embedding-model version
+
+    Returns:
+        EmbeddingStore, or None if there is no (valid) store for the version
+    """
+    path = store_path(directory, model_version)
+    if not path.exists():
+        return None
+    try:
+        return EmbeddingStore(path)
+    except ValueError as e:
+        logger.error(f"Ignoring embedding store: {e}")
+        return None
@@ -0,0 +1,529 @@
+"""Filesystem camera ingestion for the face recognition add-on.
+
+Every directory in ``Config.camera_paths`` is one camera (named after the
+directory) whose snapshots and clips are recognized as they appear:
+
+- directories are watched recursively with inotify (through ctypes, no
+  extra dependency); without inotify they are rescanned every
+  POLL_SECONDS instead
+- a file counts once it was closed after writing or moved into place, and
+  has not been modified for ``watch_debounce_seconds`` (writers that
+  reopen files are waited out); only ``watch_extensions`` are considered,
+  hidden files are skipped
+- files go into a bounded queue (``watch_queue_size``) drained in batches
+  of ``max_batch_size`` by a consumer thread; when a burst overflows it,
+  the oldest files are dropped
+- the modification time of the newest file processed per directory (the
+  high-water mark) is saved in ``watch_state_path``; on startup, and when
+  the kernel's event queue overflowed, newer files are queued (catch-up)
+
+Only one server worker watches at a time (file lock next to the state file).
+"""
+
+import ctypes
+import errno
+import fcntl
+import json
+import logging
+import os
+import select
+import struct
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from face_recognition_addon.jobs import QueueFullError
+
+logger = logging.getLogger(__name__)
+
+# inotify(7) constants
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE_SELF | IN_MOVE_SELF
+EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, len
+
+try:
+    _libc = ctypes.CDLL(None, use_errno=True)
+    _libc.inotify_init1.argtypes = [ctypes.c_int]
+    _libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    INOTIFY_AVAILABLE = True
+except (OSError, AttributeError):
+    INOTIFY_AVAILABLE = False
+
+# Rescan interval without inotify, and retry interval for missing directories
+POLL_SECONDS = 10.0
+# The high-water mark is saved at most this often while files are processed
+STATE_SAVE_INTERVAL = 2.0
+# Consumer backs off this long (at least) when the inference queue is full
+BUSY_RETRY_SECONDS = 1.0
+
+
+@dataclass
+class WorkItem:
+    """A watched file ready for recognition."""
+
+    path: Path
+    camera: str
+    root: str
+    mtime_ns: int
+    size: int
+
+
+class Inotify:
+    """Minimal inotify wrapper over libc."""
+
+    def __init__(self):
+        self.fd = _libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, f"inotify_init1: {os.strerror(err)}")
+
+    def add_watch(self, path: str, mask: int = WATCH_MASK) -> int:
+        """Watch a directory.
+
+        Returns:
+            Watch descriptor
+
+        Raises:
+            OSError: If the directory cannot be watched
+        """
+        wd = _libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, f"inotify_add_watch {path}: {os.strerror(err)}")
+        return wd
+
+    def read(self, timeout: Optional[float]) -> List[Tuple[int, int, str]]:
+        """Wait up to `timeout` seconds for events.
+
+        Returns:
+            (watch descriptor, mask, name) per event
+        """
+        poller = select.poll()
+        poller.register(self.fd, select.POLLIN)
+        if not poller.poll(None if timeout is None else max(timeout, 0) * 1000):
+            return []
+        events = []
+        while True:
+            try:
+                buffer = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(buffer):
+                wd, mask, _, length = EVENT_HEADER.unpack_from(buffer, offset)
+                offset += EVENT_HEADER.size
+                name = os.fsdecode(buffer[offset:offset + length].rstrip(b"\0"))
+                offset += length
+                events.append((wd, mask, name))
+        return events
+
+    def close(self):
+        """Close the inotify descriptor (drops every watch)."""
+        os.close(self.fd)
+
+
+class WorkQueue:
+    """Bounded FIFO of WorkItems that drops the oldest item when full."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._items: "OrderedDict[Path, WorkItem]" = OrderedDict()
+        self._cond = threading.Condition()
+        self.queued = 0
+        self.dropped = 0
+
+    def put(self, item: WorkItem) -> Optional[WorkItem]:
+        """Queue an item (a path already queued is updated in place).
+
+        Returns:
+            The item dropped to make room, if any
+        """
+        dropped = None
+        with self._cond:
+            if item.path in self._items:
+                self._items[item.path] = item
+                return None
+            if len(self._items) >= self.max_size:
+                _, dropped = self._items.popitem(last=False)
+                self.dropped += 1
+            self._items[item.path] = item
+            self.queued += 1
+            self._cond.notify()
+        return dropped
+
+    def get_batch(self, max_items: int, timeout: Optional[float] = None) -> List[WorkItem]:
+        """Take up to max_items of the oldest items, waiting up to timeout for one."""
+        with self._cond:
+            if not self._items:
+                self._cond.wait(timeout)
+            batch = []
+            while self._items and len(batch) < max_items:
+                batch.append(self._items.popitem(last=False)[1])
+            return batch
+
+    def wake(self):
+        """Wake a waiting consumer."""
+        with self._cond:
+            self._cond.notify_all()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+class HighWaterMark:
+    """Newest file processed per watched directory, persisted as JSON.
+
+    Files sharing the newest modification time are remembered by name, so
+    a catch-up neither repeats nor skips them.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._marks: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._saved_at = 0.0
+        try:
+            self._marks = json.loads(path.read_text())
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable watch state {path}: {e}")
+
+    def is_new(self, root: str, mtime_ns: int, name: str) -> bool:
+        """Whether a file was not processed yet according to the mark."""
+        mark = self._marks.get(root)
+        if mark is None or mtime_ns > mark["mtime_ns"]:
+            return True
+        return mtime_ns == mark["mtime_ns"] and name not in mark["names"]
+
+    def advance(self, item: WorkItem):
+        """Record that a file was processed."""
+        name = str(item.path)
+        with self._lock:
+            mark = self._marks.get(item.root)
+            if mark is None or item.mtime_ns > mark["mtime_ns"]:
+                self._marks[item.root] = {"mtime_ns": item.mtime_ns, "names": [name]}
+            elif item.mtime_ns == mark["mtime_ns"] and name not in mark["names"]:
+                mark["names"].append(name)
+            else:
+                return
+            self._dirty = True
+
+    def save(self, force: bool = False):
+        """Write the marks atomically (throttled unless forced)."""
+        with self._lock:
+            if not self._dirty or (not force and time.monotonic() - self._saved_at < STATE_SAVE_INTERVAL):
+                return
+            data = json.dumps(self._marks)
+            self._dirty = False
+            self._saved_at = time.monotonic()
+        tmp = self.path.with_name(f".{self.path.name}.{os.getpid()}")
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp.write_text(data)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            logger.error(f"Could not save watch state {self.path}: {e}")
+            self._dirty = True
+
+    def get(self, root: str) -> Optional[int]:
+        """Modification time (ns) of the newest processed file of a directory."""
+        mark = self._marks.get(root)
+        return mark["mtime_ns"] if mark is not None else None
+
+
+class CameraPathWatcher:
+    """Watches camera directories and feeds new files to a recognition callback."""
+
+    def __init__(self, config, process: Callable[[List[WorkItem]], Any]):
+        """Initialize the watcher.
+
+        Args:
+            config: Config object (camera_paths, watch_* settings, max_batch_size)
+            process: Called from the consumer thread with each batch of
+                files; returns once they are recognized. May raise
+                QueueFullError to retry the batch later.
+        """
+        self.roots = [str(Path(p)) for p in config.camera_paths]
+        self.extensions = {e.lower() if e.startswith(".") else f".{e.lower()}" for e in config.watch_extensions}
+        self.debounce = config.watch_debounce_seconds
+        self.batch_size = config.max_batch_size
+        self.process = process
+        self.queue = WorkQueue(config.watch_queue_size)
+        self.state_path = Path(config.watch_state_path)
+        self.marks: Optional[HighWaterMark] = None
+
+        self._pid: Optional[int] = None
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._inotify: Optional[Inotify] = None
+        self._watches: Dict[int, Tuple[str, str]] = {}  # wd -> (root, directory)
+        self._watched_dirs: Dict[str, int] = {}
+        # path -> (deadline, root) of files waiting out the debounce period
+        self._pending: Dict[str, Tuple[float, str]] = {}
+        self.active = False
+
+        self.events = 0
+        self.processed = 0
+        self.failed = 0
+        self.caught_up = 0
+        self.overflows = 0
+        self.last_batch_ms: Optional[float] = None
+
+    def ensure_running(self):
+        """Start watching once per process (when a server worker starts, via post_worker_init)."""
+        if self._pid == os.getpid() or not self.roots:
+            return
+        self._pid = os.getpid()
+        self._stop.clear()
+        self._threads = [
+            threading.Thread(target=self._watch, name="camera-path-watcher", daemon=True),
+            threading.Thread(target=self._consume, name="camera-path-consumer", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stop watching and consuming (queued files are picked up again by the next catch-up)."""
+        self._stop.set()
+        self.queue.wake()
+        for thread in self._threads:
+            thread.join(timeout)
+        if self.marks is not None:
+            self.marks.save(force=True)
+
+    def stats(self) -> Dict[str, Any]:
+        """Watcher statistics for GET /status."""
+        return {
+            "active": self.active,
+            "inotify": self._inotify is not None,
+            "paths": self.roots,
+            "watched_directories": len(self._watched_dirs),
+            "events": self.events,
+            "pending": len(self._pending),
+            "depth": len(self.queue),
+            "max_depth": self.queue.max_size,
+            "queued": self.queue.queued,
+            "dropped": self.queue.dropped,
+            "processed": self.processed,
+            "failed": self.failed,
+            "caught_up": self.caught_up,
+            "overflows": self.overflows,
+            "last_batch_ms": self.last_batch_ms,
+        }
+
+    def _watch(self):
+        """Watcher thread: wait for the lock, catch up, then follow events."""
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.state_path.with_suffix(".lock"), "w") as lock_file:
+            while not self._stop.is_set():
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except BlockingIOError:
+                    self._stop.wait(POLL_SECONDS)
+            else:
+                return
+            # Another worker may have advanced the marks while this one waited
+            self.marks = HighWaterMark(self.state_path)
+            self.active = True
+            try:
+                self._run()
+            except Exception as e:
+                logger.exception(f"Camera path watcher failed: {e}")
+            finally:
+                self.active = False
+                if self._inotify is not None:
+                    self._inotify.close()
+                    self._inotify = None
+                self.queue.wake()
+
+    def _run(self):
+        """Add watches, catch up on missed files and process events until stopped."""
+        if INOTIFY_AVAILABLE:
+            try:
+                self._inotify = Inotify()
+            except OSError as e:
+                logger.warning(f"inotify unavailable ({e}), rescanning camera paths every {POLL_SECONDS:.0f}s")
+        else:
+            logger.warning(f"inotify unavailable, rescanning camera paths every {POLL_SECONDS:.0f}s")
+
+        for root in self.roots:
+            self._add_tree(root, root)
+            self._catch_up(root)
+        self.queue.wake()
+        next_retry = time.monotonic() + POLL_SECONDS
+
+        while not self._stop.is_set():
+            now = time.monotonic()
+            if now >= next_retry:
+                next_retry = now + POLL_SECONDS
+                for root in self.roots:
+                    if self._inotify is None or root not in self._watched_dirs:
+                        if self._add_tree(root, root) or self._inotify is None:
+                            self._catch_up(root)
+            timeout = min([deadline for deadline, _ in self._pending.values()] + [next_retry]) - now
+            if self._inotify is None:
+                self._stop.wait(max(timeout, 0))
+            else:
+                self._handle(self._inotify.read(min(timeout, 1.0)))
+            self._flush_pending()
+
+    def _add_tree(self, root: str, directory: str) -> bool:
+        """Watch a directory and its subdirectories.
+
+        Returns:
+            True if the directory exists
+        """
+        if not os.path.isdir(directory):
+            if directory == root:
+                logger.warning(f"Camera path {root} does not exist yet, retrying every {POLL_SECONDS:.0f}s")
+            return False
+        if self._inotify is None:
+            return True
+        for dirpath, dirnames, _ in os.walk(directory):
+            dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+            if dirpath in self._watched_dirs:
+                continue
+            try:
+                wd = self._inotify.add_watch(dirpath)
+            except OSError as e:
+                if e.errno == errno.ENOSPC:
+                    logger.error("inotify watch limit reached (raise fs.inotify.max_user_watches)")
+                else:
+                    logger.warning(f"Cannot watch {dirpath}: {e}")
+                continue
+            self._watches[wd] = (root, dirpath)
+            self._watched_dirs[dirpath] = wd
+        return True
+
+    def _handle(self, events: Sequence[Tuple[int, int, str]]):
+        """Turn inotify events into pending files and new watches."""
+        now = time.monotonic()
+        for wd, mask, name in events:
+            self.events += 1
+            if mask & IN_Q_OVERFLOW:
+                self.overflows += 1
+                logger.warning("inotify event queue overflowed, catching up from the high-water mark")
+                for root in self.roots:
+                    self._catch_up(root)
+                continue
+            watch = self._watches.get(wd)
+            if watch is None:
+                continue
+            root, directory = watch
+            if mask & (IN_IGNORED | IN_DELETE_SELF | IN_MOVE_SELF):
+                if mask & IN_IGNORED:
+                    self._watches.pop(wd, None)
+                    if self._watched_dirs.get(directory) == wd:
+                        del self._watched_dirs[directory]
+                continue
+            path = os.path.join(directory, name)
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO) and not name.startswith("."):
+                    # Files may have landed before the watch was added
+                    self._add_tree(root, path)
+                    self._catch_up(root, path)
+                continue
+            if not self._wanted(name):
+                continue
+            if mask & (IN_CLOSE_WRITE | IN_MOVED_TO) or (mask & IN_MODIFY and path in self._pending):
+                self._pending[path] = (now + self.debounce, root)
+
+    def _flush_pending(self):
+        """Queue files whose debounce period passed without further writes."""
+        now = time.monotonic()
+        for path, (deadline, root) in list(self._pending.items()):
+            if deadline > now:
+                continue
+            del self._pending[path]
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            # Written to since the last event without a new close: wait again
+            if time.time() - stat.st_mtime < self.debounce:
+                self._pending[path] = (now + self.debounce, root)
+                continue
+            self._enqueue(path, root, stat)
+
+    def _catch_up(self, root: str, directory: Optional[str] = None):
+        """Queue files newer than the root's high-water mark, oldest first."""
+        found = []
+        for dirpath, dirnames, filenames in os.walk(directory or root):
+            dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+            for name in filenames:
+                if not self._wanted(name):
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                if self.marks.is_new(root, stat.st_mtime_ns, path) and path not in self._pending:
+                    found.append((stat.st_mtime_ns, path, stat))
+        found.sort()
+        # Files still being written are left to their close event
+        cutoff = time.time_ns() - int(self.debounce * 1e9)
+        for mtime_ns, path, stat in found:
+            if mtime_ns > cutoff:
+                self._pending[path] = (time.monotonic() + self.debounce, root)
+            else:
+                self._enqueue(path, root, stat)
+                self.caught_up += 1
+        if found:
+            logger.info(f"Catching up on {len(found)} files in {directory or root}")
+
+    def _enqueue(self, path: str, root: str, stat: os.stat_result):
+        """Queue a file for recognition (dropping the oldest queued file when full)."""
+        item = WorkItem(Path(path), Path(root).name, root, stat.st_mtime_ns, stat.st_size)
+        dropped = self.queue.put(item)
+        if dropped is not None:
+            logger.warning(f"Watch queue full, dropped {dropped.path}")
+
+    def _wanted(self, name: str) -> bool:
+        """Whether a file name has a watched extension (hidden files never do)."""
+        return not name.startswith(".") and os.path.splitext(name)[1].lower() in self.extensions
+
+    def _consume(self):
+        """Consumer thread: recognize queued files in batches."""
+        while not self._stop.is_set():
+            batch = self.queue.get_batch(self.batch_size, timeout=POLL_SECONDS)
+            if not batch:
+                continue
+            start = time.perf_counter()
+            succeeded = False
+            while not self._stop.is_set():
+                try:
+                    self.process(batch)
+                    self.processed += len(batch)
+                    succeeded = True
+                    break
+                except QueueFullError as e:
+                    self._stop.wait(max(e.retry_after, BUSY_RETRY_SECONDS))
+                except Exception as e:
+                    logger.exception(f"Recognition of {len(batch)} watched files failed: {e}")
+                    self.failed += len(batch)
+                    break
+            else:
+                return
+            self.last_batch_ms = round((time.perf_counter() - start) * 1000, 1)
+            # A failed batch is left to the next catch-up
+            if self.marks is not None and succeeded:
+                for item in batch:
+                    self.marks.advance(item)
+                self.marks.save()
@@ -0,0 +1,524 @@
+"""Vectorized identity gallery for the face recognition add-on (PRD step 4).
+
+All enrolled embeddings live in one contiguous, L2-normalized float32
+matrix with a parallel array mapping each row to a person. A batch of query
+faces is matched with a single matrix multiply, top-k rows are picked with
+argpartition and the confidence/review thresholds are applied to the whole
+batch at once, so match latency stays in the low milliseconds from a few
+dozen to tens of thousands of embeddings. Above ``ann_min_size``
+embeddings an IVF index (see ann.py) is built in the background and used
+instead of the exact scan.
+"""
+
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from face_recognition_addon.ann import IVFIndex, fingerprint
+from face_recognition_addon.embedding import l2_normalize
+from face_recognition_addon.embedding_store import open_store
+
+logger = logging.getLogger(__name__)
+
+UNKNOWN_PERSON = "unknown"
+UNKNOWN_NAME = "Unknown Person"
+
+# Initial row capacity; grows by doubling so enrolment is amortized O(1)
+INITIAL_CAPACITY = 64
+
+# Rebuild the ANN index once this fraction of rows was added since the last build
+INDEX_REBUILD_FRACTION = 0.1
+
+# _publish() default: keep the current ANN index
+_KEEP_INDEX = object()
+
+
+class Gallery:
+    """Enrolled face embeddings matched by cosine similarity.
+
+    Confidence is the cosine similarity of the best matching embedding
+    (clipped to 0..1). Decisions per face:
+
+    - confidence >= confidence_threshold: recognized
+    - review_threshold <= confidence < confidence_threshold: best match,
+      flagged for review
+    - confidence < review_threshold: Unknown, flagged for review
+
+    Mutations build new arrays or append past the published rows, and the
+    published (matrix, person index, ANN index) snapshot is swapped in one
+    assignment, so matching never takes a lock. The ANN index covers the
+    first rows of the matrix; rows enrolled after it was built are scanned
+    exactly until the next rebuild.
+    """
+
+    def __init__(self, confidence_threshold: float = 0.75, review_threshold: float = 0.60,
+                 dimension: Optional[int] = None, ann_min_size: int = 0, ann_nprobe: int = 8,
+                 index_path: Optional[Path] = None):
+        """Initialize an empty gallery.
+
+        Args:
+            confidence_threshold: Minimum confidence to recognize a face
+            review_threshold: Minimum confidence to report a best match
+            dimension: Embedding size (inferred from the first enrolment if None)
+            ann_min_size: Gallery size from which an IVF index is used (0 = never)
+            ann_nprobe: IVF cells scanned per query
+            index_path: Where the IVF index is persisted (None = not persisted)
+        """
+        self.confidence_threshold = confidence_threshold
+        self.review_threshold = review_threshold
+        self.dimension = dimension
+        self.ann_min_size = ann_min_size
+        self.ann_nprobe = ann_nprobe
+        self.index_path = index_path
+
+        self._lock = threading.Lock()
+        self._buffer = np.empty((0, dimension or 0), dtype=np.float32)
+        self._buffer_index = np.empty(0, dtype=np.int32)
+        self._size = 0
+        # Person table: row person index -> person id / display name
+        self._person_ids: List[str] = []
+        self._display_names: List[Optional[str]] = []
+        self._person_lookup: Dict[str, int] = {}
+        # Published (matrix, person index, IVF index or None) snapshot read by match()
+        self._snapshot = (self._buffer[:0], self._buffer_index[:0], None)
+        # Bumped when rows are removed (row numbers change, the ANN index is void)
+        self._generation = 0
+        self._index_thread: Optional[threading.Thread] = None
+        # (rows, fingerprint) of embeddings loaded from a store, saves rehashing them
+        self._fingerprint_hint: Optional[Tuple[int, str]] = None
+
+    @classmethod
+    def from_arrays(cls, embeddings: np.ndarray, person_ids: Sequence[str],
+                    display_names: Optional[Dict[str, str]] = None, **kwargs) -> "Gallery":
+        """Build a gallery from an (N, D) matrix and one person id per row.
+
+        Args:
+            embeddings: (N, D) embeddings (normalized on load)
+            person_ids: Person id of each row
+            display_names: Optional person id -> display name
+            **kwargs: Gallery arguments (thresholds)
+
+        Returns:
+            Gallery
+        """
+        gallery = cls(dimension=embeddings.shape[1], **kwargs)
+        gallery.add_many(embeddings, person_ids, display_names)
+        return gallery
+
+    @classmethod
+    def from_store(cls, store, display_names: Optional[Dict[str, str]] = None,
+                   **kwargs) -> "Gallery":
+        """Build a gallery on top of a memory-mapped EmbeddingStore without copying.
+
+        The store's read-only matrix is used in place until the first
+        enrolment or removal, which moves the rows into private memory.
+        The kernel is asked to read the matrix ahead, so the first matches
+        after a model swap don't fault it in page by page.
+
+        Args:
+            store: EmbeddingStore
+            display_names: Optional person id -> display name
+            **kwargs: Gallery arguments (thresholds, ANN settings)
+
+        Returns:
+            Gallery
+        """
+        store.advise_willneed()
+        gallery = cls(dimension=store.dimension, **kwargs)
+        with gallery._lock:
+            for person_id in store.person_ids:
+                gallery._person_slot(person_id)
+            for person_id, name in (display_names or {}).items():
+                if person_id in gallery._person_lookup:
+                    gallery._display_names[gallery._person_lookup[person_id]] = name
+            gallery._buffer = store.matrix
+            gallery._buffer_index = store.person_index
+            gallery._size = len(store)
+            if store.fingerprint:
+                gallery._fingerprint_hint = (len(store), store.fingerprint)
+            gallery._publish()
+        gallery._schedule_index_build()
+        return gallery
+
+    def __len__(self) -> int:
+        """Number of enrolled embeddings."""
+        return len(self._snapshot[1])
+
+    @property
+    def person_count(self) -> int:
+        """Number of people with at least one embedding."""
+        return len(np.unique(self._snapshot[1]))
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """(N, D) normalized embeddings (read-only view)."""
+        view = self._snapshot[0].view()
+        view.flags.writeable = False
+        return view
+
+    @property
+    def person_index(self) -> np.ndarray:
+        """(N,) person table index of each row (read-only view)."""
+        view = self._snapshot[1].view()
+        view.flags.writeable = False
+        return view
+
+    @property
+    def person_ids(self) -> List[str]:
+        """Person table (index -> person id)."""
+        return list(self._person_ids)
+
+    def add(self, person_id: str, embeddings: np.ndarray, display_name: Optional[str] = None):
+        """Enrol one or more embeddings for a person.
+
+        Args:
+            person_id: Stable person UID
+            embeddings: (D,) or (N, D) embeddings
+            display_name: Optional display name (kept if None)
+        """
+        embeddings = np.atleast_2d(embeddings)
+        names = {person_id: display_name} if display_name is not None else None
+        self.add_many(embeddings, [person_id] * len(embeddings), names)
+
+    def add_many(self, embeddings: np.ndarray, person_ids: Sequence[str],
+                 display_names: Optional[Dict[str, str]] = None):
+        """Enrol a batch of embeddings, one person id per row.
+
+        Args:
+            embeddings: (N, D) embeddings
+            person_ids: Person id of each row
+            display_names: Optional person id -> display name
+        """
+        embeddings = np.atleast_2d(np.asarray(embeddings, dtype=np.float32))
+        if len(embeddings) != len(person_ids):
+            raise ValueError(f"{len(embeddings)} embeddings but {len(person_ids)} person ids")
+        if len(embeddings) == 0:
+            return
+
+        with self._lock:
+            if self.dimension is None:
+                self.dimension = embeddings.shape[1]
+            if embeddings.shape[1] != self.dimension:
+                raise ValueError(
+                    f"Embedding dimension {embeddings.shape[1]} != gallery dimension {self.dimension}"
+                )
+
+            rows = np.array([self._person_slot(pid) for pid in person_ids], dtype=np.int32)
+            for pid, name in (display_names or {}).items():
+                if pid in self._person_lookup:
+                    self._display_names[self._person_lookup[pid]] = name
+
+            self._reserve(self._size + len(embeddings))
+            end = self._size + len(embeddings)
+            block = self._buffer[self._size:end]
+            block[...] = embeddings
+            l2_normalize(block)
+            self._buffer_index[self._size:end] = rows
+            self._size = end
+            self._publish()
+        self._schedule_index_build()
+
+    def remove(self, person_id: str) -> int:
+        """Remove every embedding of a person.
+
+        Args:
+            person_id: Person UID
+
+        Returns:
+            Number of embeddings removed
+        """
+        with self._lock:
+            slot = self._person_lookup.get(person_id)
+            if slot is None:
+                return 0
+            keep = self._buffer_index[:self._size] != slot
+            removed = self._size - int(keep.sum())
+            if removed:
+                # New arrays: the published snapshot stays valid for readers
+                self._buffer = self._buffer[:self._size][keep]
+                self._buffer_index = self._buffer_index[:self._size][keep]
+                self._size = len(self._buffer_index)
+                self._generation += 1
+                self._publish(ann=None)
+        if removed:
+            self._schedule_index_build()
+        return removed
+
+    def search(self, queries: np.ndarray, k: int = 1,
+               snapshot: Optional[tuple] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Find the k most similar embeddings for each query.
+
+        Uses the IVF index when one is published, otherwise an exact scan.
+
+        Args:
+            queries: (Q, D) L2-normalized query embeddings
+            k: Neighbours per query
+            snapshot: Snapshot to search (default: current)
+
+        Returns:
+            (rows (Q, k) int64, scores (Q, k) float32), best first. Empty
+            (Q, 0) arrays if the gallery is empty.
+        """
+        matrix, _, ann = snapshot or self._snapshot
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        k = min(k, len(matrix))
+        if k == 0:
+            empty = np.empty((len(queries), 0))
+            return empty.astype(np.int64), empty.astype(np.float32)
+        if ann is None:
+            return self._exact_search(queries, k, matrix)
+
+        rows, scores = ann.search(matrix, queries, k, self.ann_nprobe)
+        if len(matrix) > ann.size:
+            # Rows enrolled since the index was built
+            tail = matrix[ann.size:]
+            tail_rows, tail_scores = self._exact_search(queries, min(k, len(tail)), tail)
+            rows = np.concatenate([rows, tail_rows + ann.size], axis=1)
+            scores = np.concatenate([scores, tail_scores], axis=1)
+            order = np.argsort(-scores, axis=1)[:, :k]
+            rows = np.take_along_axis(rows, order, axis=1)
+            scores = np.take_along_axis(scores, order, axis=1)
+        return rows, scores
+
+    @staticmethod
+    def _exact_search(queries: np.ndarray, k: int, matrix: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Exact top-k by one matmul and argpartition."""
+        scores = queries @ matrix.T  # (Q, N)
+        if k < scores.shape[1]:
+            top = np.argpartition(scores, -k, axis=1)[:, -k:]
+        else:
+            top = np.broadcast_to(np.arange(scores.shape[1]), scores.shape)
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        return (
+            np.take_along_axis(top, order, axis=1).astype(np.int64),
+            np.take_along_axis(top_scores, order, axis=1),
+        )
+
+    def match(self, embeddings: np.ndarray, k: int = 1) -> List[Dict[str, Any]]:
+        """Match query embeddings and route decisions (PRD steps 4-6).
+
+        Args:
+            embeddings: (Q, D) L2-normalized query embeddings
+            k: Candidates to report per face (best first)
+
+        Returns:
+            One dict per query with person_id, display_name, confidence,
+            needs_review (and candidates if k > 1)
+        """
+        snapshot = self._snapshot
+        index = snapshot[1]
+        rows, scores = self.search(embeddings, k, snapshot)
+        count = len(rows)
+        if rows.shape[1] == 0:
+            return [self._unknown(0.0) for _ in range(count)]
+
+        confidence = np.clip(scores[:, 0], 0.0, 1.0)
+        # The IVF index pads with row -1 when the probed cells are empty
+        found = rows[:, 0] >= 0
+        recognized = found & (confidence >= self.confidence_threshold)
+        matched = found & (confidence >= self.review_threshold)
+        best_person = index[np.where(found, rows[:, 0], 0)]
+
+        results = []
+        for i in range(count):
+            if not matched[i]:
+                result = self._unknown(float(confidence[i]))
+            else:
+                result = self._person(int(best_person[i]), float(confidence[i]))
+                result["needs_review"] = not bool(recognized[i])
+            if k > 1:
+                found = rows[i] >= 0
+                result["candidates"] = self._candidates(index[rows[i][found]], scores[i][found])
+            results.append(result)
+        return results
+
+    def _candidates(self, people: np.ndarray, scores: np.ndarray) -> List[Dict[str, Any]]:
+        """Distinct people among the top-k rows, best first."""
+        seen = set()
+        candidates = []
+        for slot, score in zip(people.tolist(), scores.tolist()):
+            if slot not in seen:
+                seen.add(slot)
+                candidates.append(self._person(slot, max(0.0, score)))
+        return candidates
+
+    def _person(self, slot: int, confidence: float) -> Dict[str, Any]:
+        """Match dict for a person table slot."""
+        person_id = self._person_ids[slot]
+        return {
+            "person_id": person_id,
+            "display_name": self._display_names[slot] or person_id,
+            "confidence": round(confidence, 4),
+        }
+
+    @staticmethod
+    def _unknown(confidence: float) -> Dict[str, Any]:
+        """Match dict for an unrecognized face."""
+        return {
+            "person_id": UNKNOWN_PERSON,
+            "display_name": UNKNOWN_NAME,
+            "confidence": round(max(0.0, confidence), 4),
+            "needs_review": True,
+        }
+
+    def _person_slot(self, person_id: str) -> int:
+        """Person table index of a person id, adding it if new (lock held)."""
+        slot = self._person_lookup.get(person_id)
+        if slot is None:
+            slot = len(self._person_ids)
+            self._person_lookup[person_id] = slot
+            self._person_ids.append(person_id)
+            self._display_names.append(None)
+        return slot
+
+    def _reserve(self, rows: int):
+        """Grow the buffers to hold at least `rows` rows (lock held)."""
+        capacity = len(self._buffer)
+        if rows <= capacity:
+            return
+        new_capacity = max(rows, INITIAL_CAPACITY, 2 * capacity)
+        buffer = np.empty((new_capacity, self.dimension), dtype=np.float32)
+        index = np.empty(new_capacity, dtype=np.int32)
+        if self._size:
+            buffer[:self._size] = self._buffer[:self._size]
+            index[:self._size] = self._buffer_index[:self._size]
+        self._buffer, self._buffer_index = buffer, index
+
+    def _publish(self, ann: Any = _KEEP_INDEX):
+        """Expose the first _size rows to readers (lock held).
+
+        Args:
+            ann: New IVF index (or None to drop it); keeps the current one by default
+        """
+        if ann is _KEEP_INDEX:
+            ann = self._snapshot[2]
+        self._snapshot = (self._buffer[:self._size], self._buffer_index[:self._size], ann)
+
+    def build_index(self) -> Optional[IVFIndex]:
+        """Build (or load the persisted) IVF index for the current rows and publish it.
+
+        Returns:
+            The published index, or None if the gallery is below ann_min_size
+        """
+        with self._lock:
+            matrix = self._snapshot[0]
+            generation = self._generation
+        if not self.ann_min_size or len(matrix) < self.ann_min_size:
+            return None
+
+        hint = self._fingerprint_hint
+        if hint is not None and hint[0] == len(matrix) and generation == 0:
+            matrix_fingerprint = hint[1]
+        else:
+            matrix_fingerprint = fingerprint(matrix)
+        ann = None
+        if self.index_path is not None:
+            ann = IVFIndex.load(self.index_path, matrix_fingerprint)
+        if ann is None:
+            ann = IVFIndex.build(matrix)
+            if self.index_path is not None:
+                try:
+                    ann.save(self.index_path)
+                except OSError as e:
+                    logger.warning(f"Could not save IVF index to {self.index_path}: {e}")
+
+        with self._lock:
+            if generation != self._generation:
+                # Rows were removed meanwhile; the scheduler builds again
+                return None
+            self._publish(ann=ann)
+        return ann
+
+    def _schedule_index_build(self):
+        """Rebuild the IVF index in the background if it is missing or stale."""
+        if not self.ann_min_size or len(self) < self.ann_min_size:
+            return
+        ann = self._snapshot[2]
+        if ann is not None and len(self) - ann.size <= ann.size * INDEX_REBUILD_FRACTION:
+            return
+        if self._index_thread is not None and self._index_thread.is_alive():
+            return
+        self._index_thread = threading.Thread(
+            target=self._build_index_loop, name="gallery-index", daemon=True
+        )
+        self._index_thread.start()
+
+    def _build_index_loop(self):
+        """Build until the published index covers the current generation."""
+        try:
+            while self.ann_min_size and len(self) >= self.ann_min_size:
+                if self.build_index() is not None:
+                    return
+        except Exception as e:
+            logger.exception(f"IVF index build failed: {e}")
+
+    def wait_for_index(self, timeout: Optional[float] = None) -> bool:
+        """Wait for a background index build (True if none is running afterwards)."""
+        thread = self._index_thread
+        if thread is not None:
+            thread.join(timeout)
+            return not thread.is_alive()
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        """Gallery statistics for GET /status."""
+        return {
+            "embeddings": len(self),
+            "people": self.person_count,
+            "dimension": self.dimension,
+            "memory_mb": round(self._buffer.nbytes / 1e6, 2),
+            "memory_mapped": not self._buffer.flags.writeable,
+            "index": self._index_stats(),
+        }
+
+    def _index_stats(self) -> Dict[str, Any]:
+        """Search index in use."""
+        ann = self._snapshot[2]
+        if ann is None:
+            return {"type": "flat"}
+        return {"type": "ivf", "cells": ann.nlist, "indexed": ann.size, "nprobe": self.ann_nprobe}
+
+
+def new_gallery(config, store=None, index_path: Optional[Path] = None) -> Gallery:
+    """Create a gallery with the configured thresholds and ANN settings.
+
+    Args:
+        config: Config object with matching and ANN settings
+        store: EmbeddingStore to build the gallery on (None: empty gallery)
+        index_path: Where the IVF index is persisted (None = not persisted)
+
+    Returns:
+        Gallery
+    """
+    kwargs = {
+        "confidence_threshold": config.confidence_threshold,
+        "review_threshold": config.review_threshold,
+        "ann_min_size": config.ann_min_gallery_size,
+        "ann_nprobe": config.ann_nprobe,
+        "index_path": index_path,
+    }
+    if store is not None:
+        return Gallery.from_store(store, **kwargs)
+    return Gallery(**kwargs)
+
+
+def load_gallery(config, version: str) -> Gallery:
+    """Open the enrolled embeddings of a model version.
+
+    Embeddings (and the IVF index built on them) are only valid for the
+    model version that produced them, so both are keyed by it.
+
+    Args:
+        config: Config object with embeddings_dir and matching settings
+        version: Embedding-model version
+
+    Returns:
+        Gallery backed by the version's memory-mapped store (empty if none)
+    """
+    store = open_store(config.embeddings_dir, version)
+    index_path = Path(config.embeddings_dir) / f"{version}.ivf.npz"
+    return new_gallery(config, store, index_path)
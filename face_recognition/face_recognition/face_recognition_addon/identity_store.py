@@ -0,0 +1,274 @@
+"""SQLite identity repository for the face recognition add-on (PRD section 6).
+
+Each person has a stable UID; names are labels only. Every recognition
+turns matched person ids into display names and avatars, so lookups are
+served from an in-memory read-through cache, and the database is set up for
+many concurrent readers next to an occasional writer:
+
+- WAL journal mode, so readers never block on the writer (or vice versa)
+- one connection per thread (sqlite3 connections are not shared across
+  threads), each with its own prepared-statement cache; the SQL below is
+  constant so statements are compiled once per connection
+- bulk upsert/delete in a single transaction
+- writes invalidate the cache; writes from other processes (other gunicorn
+  workers) are noticed through ``PRAGMA data_version``
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Union
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS persons (
+    person_id TEXT PRIMARY KEY,
+    display_name TEXT NOT NULL,
+    avatar TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+) WITHOUT ROWID
+"""
+
+SELECT_ONE = "SELECT person_id, display_name, avatar FROM persons WHERE person_id = ?"
+SELECT_ALL = "SELECT person_id, display_name, avatar FROM persons ORDER BY person_id"
+UPSERT = """
+INSERT INTO persons (person_id, display_name, avatar, created_at, updated_at)
+VALUES (?, ?, ?, ?, ?)
+ON CONFLICT(person_id) DO UPDATE SET
+    display_name = excluded.display_name,
+    avatar = excluded.avatar,
+    updated_at = excluded.updated_at
+"""
+DELETE = "DELETE FROM persons WHERE person_id = ?"
+
+# Per-connection prepared statement cache size
+STATEMENT_CACHE_SIZE = 64
+# Seconds to wait for the write lock
+BUSY_TIMEOUT = 5.0
+# How often a thread checks for writes by other processes
+EXTERNAL_CHECK_INTERVAL = 1.0
+
+# Cached marker for ids known not to exist
+_MISSING = object()
+
+
+@dataclass(frozen=True)
+class Identity:
+    """A person known to the add-on."""
+
+    person_id: str
+    display_name: str
+    avatar: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize for the HTTP API."""
+        return asdict(self)
+
+
+class IdentityStore:
+    """Thread-safe identity repository with a read-through cache."""
+
+    def __init__(self, path: Union[str, Path] = "/data/identities.db", cache: bool = True):
+        """Open (and create if needed) the identity database.
+
+        Args:
+            path: SQLite database file
+            cache: Keep looked-up identities in memory
+        """
+        self.path = Path(path)
+        self.cache_enabled = cache
+        self._local = threading.local()
+        self._cache: Dict[str, Any] = {}
+        self._cache_lock = threading.Lock()
+        # Bumped on every invalidation; a lookup that raced a write doesn't fill the cache
+        self._cache_generation = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.metrics = None  # Optional AddonMetrics
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = self._connection()
+        conn.execute(SCHEMA)
+        conn.commit()
+        logger.info(f"Identity store ready at {self.path} ({self.count()} identities)")
+
+    def _connection(self) -> sqlite3.Connection:
+        """This thread's connection (opened on first use)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(
+                str(self.path),
+                timeout=BUSY_TIMEOUT,
+                cached_statements=STATEMENT_CACHE_SIZE,
+                check_same_thread=True,
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            # WAL makes NORMAL durable against application crashes
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA temp_store=MEMORY")
+            self._local.conn = conn
+            self._local.data_version = self._data_version(conn)
+            self._local.checked_at = time.monotonic()
+        return conn
+
+    @staticmethod
+    def _data_version(conn: sqlite3.Connection) -> int:
+        """Changes when another connection commits to the database."""
+        return conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def _check_external_writes(self, conn: sqlite3.Connection):
+        """Drop the cache if another connection wrote since this thread last checked."""
+        now = time.monotonic()
+        if now - self._local.checked_at < EXTERNAL_CHECK_INTERVAL:
+            return
+        self._local.checked_at = now
+        version = self._data_version(conn)
+        if version != self._local.data_version:
+            self._local.data_version = version
+            self.invalidate()
+
+    def get(self, person_id: str) -> Optional[Identity]:
+        """Look up one identity.
+
+        Args:
+            person_id: Person UID
+
+        Returns:
+            Identity, or None if unknown
+        """
+        return self.get_many([person_id]).get(person_id)
+
+    def get_many(self, person_ids: Iterable[str]) -> Dict[str, Identity]:
+        """Look up several identities (cache first, then one query per miss).
+
+        Args:
+            person_ids: Person UIDs
+
+        Returns:
+            Dict of the person ids that exist
+        """
+        conn = self._connection()
+        found: Dict[str, Identity] = {}
+        missing: List[str] = []
+
+        if self.cache_enabled:
+            self._check_external_writes(conn)
+            cache = self._cache
+            hits = 0
+            for person_id in person_ids:
+                cached = cache.get(person_id)
+                if cached is None:
+                    missing.append(person_id)
+                    continue
+                hits += 1
+                if cached is not _MISSING:
+                    found[person_id] = cached
+            self._record_lookups(hits=hits, misses=len(missing))
+        else:
+            missing = list(person_ids)
+
+        if missing:
+            generation = self._cache_generation
+            loaded = {}
+            for person_id in missing:
+                row = conn.execute(SELECT_ONE, (person_id,)).fetchone()
+                loaded[person_id] = Identity(*row) if row else _MISSING
+            if self.cache_enabled:
+                with self._cache_lock:
+                    if generation == self._cache_generation:
+                        self._cache.update(loaded)
+            found.update({pid: ident for pid, ident in loaded.items() if ident is not _MISSING})
+        return found
+
+    def all(self) -> List[Identity]:
+        """Every identity, ordered by person id."""
+        return [Identity(*row) for row in self._connection().execute(SELECT_ALL)]
+
+    def count(self) -> int:
+        """Number of identities."""
+        return self._connection().execute("SELECT COUNT(*) FROM persons").fetchone()[0]
+
+    def upsert(self, person_id: str, display_name: str, avatar: Optional[str] = None):
+        """Create or update one identity."""
+        self.upsert_many([Identity(person_id, display_name, avatar)])
+
+    def upsert_many(self, identities: Sequence[Identity]) -> int:
+        """Create or update identities in one transaction.
+
+        Args:
+            identities: Identities to write
+
+        Returns:
+            Number of identities written
+        """
+        now = time.time()
+        rows = [(i.person_id, i.display_name, i.avatar, now, now) for i in identities]
+        return self._write(UPSERT, rows, [i.person_id for i in identities])
+
+    def delete_many(self, person_ids: Sequence[str]) -> int:
+        """Delete identities in one transaction.
+
+        Args:
+            person_ids: Person UIDs
+
+        Returns:
+            Number of identities deleted
+        """
+        return self._write(DELETE, [(pid,) for pid in person_ids], person_ids)
+
+    def _write(self, sql: str, rows: List[tuple], person_ids: Sequence[str]) -> int:
+        """Run a bulk write in one transaction and invalidate cached entries."""
+        if not rows:
+            return 0
+        conn = self._connection()
+        with conn:
+            changed = conn.executemany(sql, rows).rowcount
+        # Our own commits don't count as external writes
+        self._local.data_version = self._data_version(conn)
+        self.writes += 1
+        self.invalidate(person_ids)
+        return changed
+
+    def invalidate(self, person_ids: Optional[Iterable[str]] = None):
+        """Drop cached identities (all if person_ids is None)."""
+        with self._cache_lock:
+            self._cache_generation += 1
+            if person_ids is None:
+                self._cache = {}
+            else:
+                for person_id in person_ids:
+                    self._cache.pop(person_id, None)
+
+    def _record_lookups(self, hits: int, misses: int):
+        """Count cache hits and misses."""
+        self.hits += hits
+        self.misses += misses
+        if self.metrics is not None:
+            if hits:
+                self.metrics.cache_lookups.labels("identity", "hit").inc(hits)
+            if misses:
+                self.metrics.cache_lookups.labels("identity", "miss").inc(misses)
+
+    def stats(self) -> Dict[str, Any]:
+        """Store statistics for GET /status."""
+        lookups = self.hits + self.misses
+        return {
+            "identities": self.count(),
+            "cached": len(self._cache),
+            "cache_hit_ratio": round(self.hits / lookups, 3) if lookups else None,
+            "writes": self.writes,
+        }
+
+    def close(self):
+        """Close this thread's connection."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
@@ -0,0 +1,357 @@
+"""Content-addressed image store for fetched event images.
+
+Images are stored once per content (blake2b hash) under
+``<directory>/blobs/<first two hex digits>/<hash>.jpg``, so re-fetching the
+same thumbnail costs no disk space and no directory grows without bound. A
+SQLite index next to the blobs records each blob's size and last access and
+which camera events reference it, so usage per camera is one query and no
+directory scan is ever needed.
+
+Byte and age quotas are enforced by a background evictor thread (never on
+the request path): blobs not stored or read within the age limit go first,
+then least recently used blobs until usage is back under the low-water
+mark. Files are
+deleted inside the index transaction that drops their rows, and put()
+indexes before it writes, so a blob stored again while it is being evicted
+is either kept or written back.
+"""
+
+import fcntl
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    hash TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    last_access REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS blobs_by_access ON blobs (last_access);
+CREATE TABLE IF NOT EXISTS refs (
+    hash TEXT NOT NULL REFERENCES blobs (hash) ON DELETE CASCADE,
+    camera TEXT NOT NULL,
+    ref TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (hash, camera, ref)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS refs_by_camera ON refs (camera);
+"""
+
+INSERT_BLOB = """
+INSERT INTO blobs (hash, size, created_at, last_access) VALUES (?, ?, ?, ?)
+ON CONFLICT(hash) DO UPDATE SET last_access = excluded.last_access
+"""
+INSERT_REF = "INSERT OR IGNORE INTO refs (hash, camera, ref, created_at) VALUES (?, ?, ?, ?)"
+TOUCH = "UPDATE blobs SET last_access = ? WHERE hash = ?"
+TOTAL = "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM blobs"
+USAGE_BY_CAMERA = """
+SELECT camera, COUNT(*), SUM(size), SUM(events) FROM (
+    SELECT refs.camera AS camera, blobs.size AS size, COUNT(*) AS events
+    FROM refs JOIN blobs ON blobs.hash = refs.hash
+    GROUP BY refs.camera, refs.hash
+) GROUP BY camera ORDER BY camera
+"""
+
+# Blobs are written with this suffix (all stored images are JPEG)
+BLOB_SUFFIX = ".jpg"
+# Eviction brings usage down to this fraction of max_bytes (hysteresis)
+LOW_WATER = 0.9
+# Blobs removed per eviction transaction
+EVICTION_BATCH = 256
+# How often the evictor wakes up without new writes (age quota)
+EVICTION_INTERVAL = 300.0
+# last_access is rewritten on reads at most this often per blob
+TOUCH_INTERVAL = 60.0
+
+
+@dataclass
+class StoredImage:
+    """Where an image was stored."""
+
+    hash: str
+    path: Path
+    size: int
+    # False if the same content was already stored
+    new: bool
+
+
+class ImageStore:
+    """Content-addressed blob store with an SQLite index and quotas."""
+
+    def __init__(self, directory: Union[str, Path] = "/data/images",
+                 max_bytes: Optional[int] = None, max_age: Optional[float] = None):
+        """Open (and create if needed) the store.
+
+        Args:
+            directory: Store directory (blobs and index.db)
+            max_bytes: Byte quota (None = unlimited)
+            max_age: Seconds a blob is kept after it was last stored or read
+                (None = forever)
+        """
+        self.directory = Path(directory)
+        self.blob_dir = self.directory / "blobs"
+        self.index_path = self.directory / "index.db"
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._local = threading.local()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        # Approximate bytes stored, kept current by this process's writes
+        self._bytes = 0
+
+        self.puts = 0
+        self.deduplicated = 0
+        self.evicted = 0
+        self.evicted_bytes = 0
+        self.last_eviction: Optional[float] = None
+
+        self.blob_dir.mkdir(parents=True, exist_ok=True)
+        conn = self._connection()
+        conn.executescript(SCHEMA)
+        blobs, self._bytes = conn.execute(TOTAL).fetchone()
+        logger.info(f"Image store ready at {self.directory} ({blobs} images, {self._bytes} bytes)")
+
+    def _connection(self) -> sqlite3.Connection:
+        """This thread's connection (opened on first use)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.index_path), timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+            self._local.touched = {}
+        return conn
+
+    @staticmethod
+    def content_hash(data: bytes) -> str:
+        """Content address of an image."""
+        return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+    def blob_path(self, content_hash: str) -> Path:
+        """File of a blob (whether or not it exists)."""
+        return self.blob_dir / content_hash[:2] / f"{content_hash}{BLOB_SUFFIX}"
+
+    def put(self, data: bytes, camera: str, ref: str) -> StoredImage:
+        """Store an image and record that `camera`'s event `ref` uses it.
+
+        Storing content that is already there only adds the reference.
+
+        Args:
+            data: Encoded image
+            camera: Camera or device the image came from
+            ref: What references the image (e.g. ``nest:<event id>``)
+
+        Returns:
+            StoredImage
+        """
+        content_hash = self.content_hash(data)
+        path = self.blob_path(content_hash)
+        now = time.time()
+        # Index first: a fresh last_access keeps the evictor off this blob,
+        # and a blob it already removed is written again below
+        conn = self._connection()
+        with conn:
+            conn.execute(INSERT_BLOB, (content_hash, len(data), now, now))
+            conn.execute(INSERT_REF, (content_hash, camera, ref, now))
+        new = not path.exists()
+        if new:
+            path.parent.mkdir(exist_ok=True)
+            tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}")
+            tmp.write_bytes(data)
+            os.replace(tmp, path)
+
+        self.puts += 1
+        if new:
+            self._bytes += len(data)
+            if self.max_bytes is not None and self._bytes > self.max_bytes:
+                self._wake.set()
+        else:
+            self.deduplicated += 1
+        return StoredImage(content_hash, path, len(data), new)
+
+    def get(self, content_hash: str) -> Optional[bytes]:
+        """Read an image and mark it as recently used.
+
+        Returns:
+            Image bytes, or None if it is not stored (or was evicted)
+        """
+        try:
+            data = self.blob_path(content_hash).read_bytes()
+        except FileNotFoundError:
+            return None
+        self._touch(content_hash)
+        return data
+
+    def refs(self, content_hash: str) -> List[Dict[str, Any]]:
+        """References to an image (camera, ref, created_at)."""
+        rows = self._connection().execute(
+            "SELECT camera, ref, created_at FROM refs WHERE hash = ? ORDER BY created_at",
+            (content_hash,),
+        ).fetchall()
+        return [{"camera": camera, "ref": ref, "created_at": created} for camera, ref, created in rows]
+
+    def _touch(self, content_hash: str):
+        """Update last_access (throttled per blob, reads stay cheap)."""
+        now = time.time()
+        conn = self._connection()
+        if now - self._local.touched.get(content_hash, 0.0) < TOUCH_INTERVAL:
+            return
+        self._local.touched[content_hash] = now
+        with conn:
+            conn.execute(TOUCH, (now, content_hash))
+
+    def usage(self) -> Dict[str, Any]:
+        """Disk usage in total and per camera.
+
+        A blob shared by several cameras counts towards each of them.
+        """
+        conn = self._connection()
+        blobs, total = conn.execute(TOTAL).fetchone()
+        self._bytes = total
+        per_camera = {
+            camera: {"images": images, "bytes": size, "events": events}
+            for camera, images, size, events in conn.execute(USAGE_BY_CAMERA)
+        }
+        return {"images": blobs, "bytes": total, "per_camera": per_camera}
+
+    def stats(self) -> Dict[str, Any]:
+        """Usage, quotas and eviction counters for GET /status."""
+        return {
+            **self.usage(),
+            "max_bytes": self.max_bytes,
+            "max_age_seconds": self.max_age,
+            "puts": self.puts,
+            "deduplicated": self.deduplicated,
+            "evicted": self.evicted,
+            "evicted_bytes": self.evicted_bytes,
+            "last_eviction": self.last_eviction,
+        }
+
+    def ensure_running(self):
+        """Start the evictor once per process (when a server worker starts, via post_worker_init)."""
+        if self._pid == os.getpid() or (self.max_bytes is None and self.max_age is None):
+            return
+        self._pid = os.getpid()
+        self._local = threading.local()  # connections don't survive fork
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._evictor, name="image-evictor", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stop the evictor."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _evictor(self):
+        """Enforce the quotas whenever woken, and every EVICTION_INTERVAL."""
+        while not self._stop.is_set():
+            try:
+                self.evict()
+            except Exception as e:
+                logger.exception(f"Image eviction failed: {e}")
+            self._wake.wait(EVICTION_INTERVAL)
+            self._wake.clear()
+
+    def evict(self) -> int:
+        """Remove blobs unused for max_age, then least recently used ones over max_bytes.
+
+        Only one process evicts at a time; if another one is, this returns 0.
+
+        Returns:
+            Number of blobs removed
+        """
+        with open(self.index_path.with_suffix(".lock"), "w") as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return 0
+
+            conn = self._connection()
+            removed = 0
+            if self.max_age is not None:
+                cutoff = time.time() - self.max_age
+                while True:
+                    rows = conn.execute(
+                        "SELECT hash, size, last_access FROM blobs WHERE last_access < ? LIMIT ?",
+                        (cutoff, EVICTION_BATCH),
+                    ).fetchall()
+                    count = self._remove(conn, rows) if rows else 0
+                    if not count:
+                        break
+                    removed += count
+
+            if self.max_bytes is not None:
+                _, total = conn.execute(TOTAL).fetchone()
+                if total > self.max_bytes:
+                    target = self.max_bytes * LOW_WATER
+                    while total > target:
+                        rows = conn.execute(
+                            "SELECT hash, size, last_access FROM blobs ORDER BY last_access LIMIT ?",
+                            (EVICTION_BATCH,),
+                        ).fetchall()
+                        batch = []
+                        for row in rows:
+                            if total <= target:
+                                break
+                            batch.append(row)
+                            total -= row[1]
+                        if not batch:
+                            break
+                        removed += self._remove(conn, batch)
+
+            self._bytes = conn.execute(TOTAL).fetchone()[1]
+            self.last_eviction = time.time()
+            if removed:
+                logger.info(f"Evicted {removed} images, {self._bytes} bytes stored")
+            return removed
+
+    def _remove(self, conn: sqlite3.Connection, rows) -> int:
+        """Drop blobs from the index (with their refs) and delete their files.
+
+        A blob stored again since it was selected (newer last_access) is
+        kept. Files are deleted inside the write transaction, so a
+        concurrent put() of the same content waits and then rewrites it.
+
+        Returns:
+            Number of blobs removed
+        """
+        removed = 0
+        with conn:
+            for content_hash, size, last_access in rows:
+                deleted = conn.execute(
+                    "DELETE FROM blobs WHERE hash = ? AND last_access <= ?",
+                    (content_hash, last_access),
+                ).rowcount
+                if not deleted:
+                    continue
+                try:
+                    self.blob_path(content_hash).unlink()
+                except FileNotFoundError:
+                    pass
+                removed += 1
+                self.evicted += 1
+                self.evicted_bytes += size
+        return removed
+
+    def close(self):
+        """Stop the evictor and close this thread's connection."""
+        self.stop(5)
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
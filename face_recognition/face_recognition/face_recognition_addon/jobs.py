@@ -0,0 +1,286 @@
+"""Bounded in-process inference job queue for the face recognition add-on."""
+
+import logging
+import math
+import os
+import queue
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Job states
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+# Weight of the newest sample in the moving averages
+EWMA_ALPHA = 0.2
+
+
+class QueueFullError(Exception):
+    """Raised when the inference queue cannot accept more work."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Inference queue full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+@dataclass
+class Job:
+    """A unit of inference work and its outcome."""
+
+    id: str
+    fn: Callable[..., Any]
+    args: tuple = ()
+    kwargs: Dict[str, Any] = field(default_factory=dict)
+    status: str = JOB_QUEUED
+    result: Any = None
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.monotonic)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    _done: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    @property
+    def finished(self) -> bool:
+        """Whether the job has completed (successfully or not)."""
+        return self._done.is_set()
+
+    @property
+    def wait_ms(self) -> Optional[float]:
+        """Time spent queued before a worker picked the job up."""
+        if self.started_at is None:
+            return None
+        return (self.started_at - self.created_at) * 1000
+
+    @property
+    def service_ms(self) -> Optional[float]:
+        """Time spent running."""
+        if self.started_at is None or self.finished_at is None:
+            return None
+        return (self.finished_at - self.started_at) * 1000
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the job finishes.
+
+        Args:
+            timeout: Maximum seconds to wait (None waits forever)
+
+        Returns:
+            True if the job finished within the timeout
+        """
+        return self._done.wait(timeout)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize the job for the HTTP API."""
+        data = {
+            "job_id": self.id,
+            "status": self.status,
+            "queue_wait_ms": _round(self.wait_ms),
+            "service_time_ms": _round(self.service_ms),
+        }
+        if self.status == JOB_DONE:
+            data["result"] = self.result
+        elif self.status == JOB_FAILED:
+            data["error"] = self.error
+        return data
+
+
+class InferenceQueue:
+    """Bounded FIFO of inference jobs served by a fixed number of threads.
+
+    The PRD caps inference concurrency at 1, so by default a single worker
+    thread runs jobs one at a time. Submissions beyond ``max_depth`` waiting
+    jobs are rejected with QueueFullError rather than piling up threads.
+
+    Worker threads are started once per process (when a server worker
+    starts, via post_worker_init, or on first submit), so a queue built in
+    the gunicorn master works in every worker.
+    """
+
+    def __init__(self, max_depth: int = 8, workers: int = 1, job_ttl: float = 300.0,
+                 metrics=None):
+        """Initialize the queue.
+
+        Args:
+            max_depth: Maximum number of jobs waiting to run
+            workers: Number of jobs run concurrently
+            job_ttl: Seconds finished jobs stay retrievable by id
+            metrics: Optional AddonMetrics to record wait/service times on
+        """
+        self.max_depth = max_depth
+        self.workers = workers
+        self.job_ttl = job_ttl
+        self.metrics = metrics
+
+        self._pid = None
+        self._queue: "queue.Queue[Job]" = None
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, Job] = {}
+        self._running = 0
+
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._avg_wait_ms = 0.0
+        self._avg_service_ms = 0.0
+        self._max_wait_ms = 0.0
+        self._max_service_ms = 0.0
+
+    def submit(self, fn: Callable[..., Any], *args, **kwargs) -> Job:
+        """Queue a job.
+
+        Args:
+            fn: Callable to run on a worker thread
+            *args: Positional arguments for fn
+            **kwargs: Keyword arguments for fn
+
+        Returns:
+            The queued Job
+
+        Raises:
+            QueueFullError: If max_depth jobs are already waiting
+        """
+        self.ensure_running()
+        job = Job(id=uuid.uuid4().hex, fn=fn, args=args, kwargs=kwargs)
+
+        with self._lock:
+            self._prune()
+            try:
+                self._queue.put_nowait(job)
+            except queue.Full:
+                self._rejected += 1
+                raise QueueFullError(self._retry_after())
+            self._jobs[job.id] = job
+            self._submitted += 1
+
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Look up a job by id (None if unknown or expired)."""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    @property
+    def depth(self) -> int:
+        """Number of jobs waiting to run."""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    @property
+    def running(self) -> int:
+        """Number of jobs currently running."""
+        return self._running
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue statistics for GET /status."""
+        return {
+            "depth": self.depth,
+            "max_depth": self.max_depth,
+            "running": self._running,
+            "workers": self.workers,
+            "submitted": self._submitted,
+            "completed": self._completed,
+            "failed": self._failed,
+            "rejected": self._rejected,
+            "avg_wait_ms": round(self._avg_wait_ms, 1),
+            "max_wait_ms": round(self._max_wait_ms, 1),
+            "avg_service_ms": round(self._avg_service_ms, 1),
+            "max_service_ms": round(self._max_service_ms, 1),
+        }
+
+    def _retry_after(self) -> int:
+        """Estimate seconds until a queue slot frees up."""
+        service_s = max(self._avg_service_ms, 100.0) / 1000
+        return max(1, math.ceil(self.depth * service_s / self.workers))
+
+    def ensure_running(self):
+        """Start worker threads in the current process if needed (thread-safe)."""
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+
+        with self._lock:
+            if self._pid == pid:
+                return
+            # First use, or first use after fork: threads don't survive fork
+            self._queue = queue.Queue(maxsize=self.max_depth)
+            self._jobs = {}
+            self._running = 0
+            for i in range(self.workers):
+                thread = threading.Thread(
+                    target=self._worker, name=f"inference-{i}", daemon=True
+                )
+                thread.start()
+            # Set last: other threads skip the lock only once the queue is ready
+            self._pid = pid
+        logger.info(
+            f"Inference queue started: {self.workers} worker(s), max depth {self.max_depth}"
+        )
+
+    def _worker(self):
+        """Run queued jobs forever."""
+        while True:
+            job = self._queue.get()
+            job.started_at = time.monotonic()
+            job.status = JOB_RUNNING
+            with self._lock:
+                self._running += 1
+
+            try:
+                job.result = job.fn(*job.args, **job.kwargs)
+                job.status = JOB_DONE
+            except Exception as e:
+                logger.exception(f"Inference job {job.id} failed: {e}")
+                job.error = str(e)
+                job.status = JOB_FAILED
+            finally:
+                job.finished_at = time.monotonic()
+                # Drop references to the (possibly large) inputs
+                job.args = ()
+                job.kwargs = {}
+                with self._lock:
+                    self._running -= 1
+                    self._record(job)
+                job._done.set()
+
+    def _record(self, job: Job):
+        """Update counters and moving averages (lock held)."""
+        if job.status == JOB_DONE:
+            self._completed += 1
+        else:
+            self._failed += 1
+
+        wait_ms = job.wait_ms
+        service_ms = job.service_ms
+        if self._completed + self._failed == 1:
+            self._avg_wait_ms = wait_ms
+            self._avg_service_ms = service_ms
+        else:
+            self._avg_wait_ms += EWMA_ALPHA * (wait_ms - self._avg_wait_ms)
+            self._avg_service_ms += EWMA_ALPHA * (service_ms - self._avg_service_ms)
+        self._max_wait_ms = max(self._max_wait_ms, wait_ms)
+        self._max_service_ms = max(self._max_service_ms, service_ms)
+
+        if self.metrics is not None:
+            self.metrics.observe_job(wait_ms / 1000, service_ms / 1000)
+
+    def _prune(self):
+        """Forget finished jobs older than job_ttl (lock held)."""
+        cutoff = time.monotonic() - self.job_ttl
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.finished_at is not None and job.finished_at < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    """Round a millisecond value for JSON output."""
+    return round(value, 1) if value is not None else None
@@ -0,0 +1,563 @@
+"""Low-overhead metrics for the face recognition add-on.
+
+Counters, gauges and fixed-bucket histograms rendered in the Prometheus
+text exposition format at GET /metrics. Recording a value is a dictionary
+lookup, a bisect and a few integer additions under a lock, i.e. on the
+order of a microsecond, so metrics can sit on every request.
+
+Metrics are recorded per process. With several gunicorn workers, each
+worker writes a snapshot of its values to a shared directory every few
+seconds (and whenever it serves /metrics), and /metrics renders the sum
+over all workers' snapshots, so any worker answers for the whole server.
+The counters and histograms of exited workers are folded into one
+cumulative snapshot (their gauges are dropped).
+"""
+
+import json
+import logging
+import math
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Latency buckets in seconds (1 ms .. 10 s; the PRD hard limit is 5 s)
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# How often a server worker writes its metrics snapshot for the other workers
+SNAPSHOT_INTERVAL_SECONDS = 5.0
+
+# Snapshot holding the summed counters and histograms of all exited workers
+EXITED_SNAPSHOT = "exited.json"
+
+# Camera label values come from the X-Camera header: past this many distinct
+# cameras, new ones are counted under "other"
+MAX_CAMERA_LABELS = 32
+OTHER_CAMERA = "other"
+
+
+class _Metric:
+    """Base class for a metric family with optional labels."""
+
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._children: Dict[Tuple[str, ...], object] = {}
+
+    def labels(self, *values: str):
+        """Get the child metric for the given label values (in labelnames order)."""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(
+                    f"{self.name} expects labels {self.labelnames}, got {values}"
+                )
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def clear(self):
+        """Remove all label sets."""
+        with self._lock:
+            self._children.clear()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _collect(self):
+        """Refresh values that are computed at render time."""
+
+    def snapshot(self) -> List[list]:
+        """JSON-serialisable ``[label values, value]`` pairs of all label sets."""
+        self._collect()
+        with self._lock:
+            items = list(self._children.items())
+        return [[list(values), self._dump(child)] for values, child in items]
+
+    def _dump(self, child) -> Any:
+        return child.value
+
+    def _merge(self, children: Dict[Tuple[str, ...], object], values: Tuple[str, ...], dumped: Any):
+        """Add one worker's dumped value into merged children."""
+        child = children.setdefault(values, self._new_child())
+        child.value += dumped
+
+    def _label_str(self, values: Tuple[str, ...], extra: str = "") -> str:
+        """Format a Prometheus label set."""
+        pairs = [f'{k}="{_escape(v)}"' for k, v in zip(self.labelnames, values)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def render(self, children: Optional[Dict[Tuple[str, ...], object]] = None) -> List[str]:
+        """Render HELP/TYPE lines and samples.
+
+        Args:
+            children: Label sets to render instead of this process's own
+                (merged from worker snapshots)
+        """
+        if children is None:
+            self._collect()
+            children = self._children
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_name}",
+        ]
+        for values, child in sorted(children.items()):
+            lines.extend(self._render_child(values, child))
+        return lines
+
+    def _render_child(self, values, child) -> List[str]:
+        return [f"{self.name}{self._label_str(values)} {_format_value(child.value)}"]
+
+
+class _Value:
+    """A single float value guarded by a lock."""
+
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+    def set(self, value: float):
+        self.value = value
+
+
+class Counter(_Metric):
+    """Monotonically increasing counter."""
+
+    type_name = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1.0):
+        """Increment the unlabelled counter."""
+        self.labels().inc(amount)
+
+
+class Gauge(_Metric):
+    """Value that can go up and down, or be read from a callback at render time.
+
+    Across server workers the values are summed, or with ``multiprocess_mode``
+    "max" the largest is kept (e.g. info gauges that are always 1).
+    """
+
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 callback: Optional[Callable[[], float]] = None, multiprocess_mode: str = "sum"):
+        super().__init__(name, documentation, labelnames)
+        self._callback = callback
+        self.multiprocess_mode = multiprocess_mode
+
+    def _new_child(self):
+        return _Value()
+
+    def set(self, value: float):
+        """Set the unlabelled gauge."""
+        self.labels().set(value)
+
+    def _collect(self):
+        if self._callback is not None:
+            self.labels().set(self._callback())
+
+    def _merge(self, children, values, dumped):
+        if self.multiprocess_mode == "max" and values in children:
+            children[values].value = max(children[values].value, dumped)
+        else:
+            super()._merge(children, values, dumped)
+
+
+class _HistogramChild:
+    """Bucket counts, sum and count for one label set."""
+
+    __slots__ = ("bounds", "counts", "sum", "count", "_lock")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+
+class Histogram(_Metric):
+    """Histogram with fixed bucket upper bounds."""
+
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float):
+        """Observe a value on the unlabelled histogram."""
+        self.labels().observe(value)
+
+    def _dump(self, child) -> Any:
+        with child._lock:
+            return [list(child.counts), child.sum, child.count]
+
+    def _merge(self, children, values, dumped):
+        counts, total, count = dumped
+        child = children.setdefault(values, self._new_child())
+        child.counts = [a + b for a, b in zip(child.counts, counts)]
+        child.sum += total
+        child.count += count
+
+    def _render_child(self, values, child) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), child.counts):
+            cumulative += count
+            le = _format_value(bound)
+            labels = self._label_str(values, 'le="' + le + '"')
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        lines.append(f"{self.name}_sum{self._label_str(values)} {_format_value(child.sum)}")
+        lines.append(f"{self.name}_count{self._label_str(values)} {child.count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Collection of metric families rendered together."""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        """Add a metric family to the registry."""
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Render all metrics in Prometheus text format."""
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def write_snapshot(self, directory: str, pid: Optional[int] = None):
+        """Write this process's values to ``<directory>/<pid>.json`` (atomically).
+
+        Args:
+            directory: Directory shared by the server workers
+            pid: Process id to write as (default: this process)
+        """
+        snapshot = {
+            metric.name: {"type": metric.type_name, "samples": metric.snapshot()}
+            for metric in self._metrics
+        }
+        _write_json(Path(directory) / f"{pid or os.getpid()}.json", snapshot)
+
+    def fold_exited(self, directory: str, pid: int):
+        """Add an exited worker's counters and histograms to the exited snapshot.
+
+        The worker's own snapshot is removed, so the directory holds one
+        file per live worker plus ``EXITED_SNAPSHOT`` however many workers
+        have been replaced.
+
+        Args:
+            directory: Directory shared by the server workers
+            pid: Process id of the exited worker
+        """
+        path = Path(directory) / f"{pid}.json"
+        exited = Path(directory) / EXITED_SNAPSHOT
+        try:
+            snapshots = [json.loads(path.read_text())]
+        except (OSError, ValueError):
+            return
+        try:
+            snapshots.append(json.loads(exited.read_text()))
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logger.warning(f"Discarding unreadable metrics snapshot {exited.name}: {e}")
+
+        folded = {
+            metric.name: {
+                "type": metric.type_name,
+                "samples": [[list(values), metric._dump(child)] for values, child in children.items()],
+            }
+            for metric, children in self._merge_snapshots(snapshots)
+            if metric.type_name != "gauge"
+        }
+        _write_json(exited, folded)
+        path.unlink()
+
+    def render_shared(self, directory: str) -> str:
+        """Render the sum of all workers' snapshots in Prometheus text format.
+
+        Args:
+            directory: Directory shared by the server workers
+        """
+        snapshots = []
+        for path in sorted(Path(directory).glob("*.json")):
+            try:
+                snapshots.append(json.loads(path.read_text()))
+            except (OSError, ValueError) as e:
+                logger.warning(f"Skipping metrics snapshot {path.name}: {e}")
+
+        lines: List[str] = []
+        for metric, children in self._merge_snapshots(snapshots):
+            lines.extend(metric.render(children))
+        return "\n".join(lines) + "\n"
+
+    def _merge_snapshots(self, snapshots: List[dict]) -> List[Tuple[_Metric, Dict[Tuple[str, ...], object]]]:
+        """Sum the label sets of several snapshots, per metric family."""
+        merged = []
+        for metric in self._metrics:
+            children: Dict[Tuple[str, ...], object] = {}
+            for snapshot in snapshots:
+                for values, dumped in snapshot.get(metric.name, {}).get("samples", []):
+                    metric._merge(children, tuple(values), dumped)
+            merged.append((metric, children))
+        return merged
+
+
+class StageTimer:
+    """Times pipeline stages for one request or batch.
+
+    Each stage is observed on the stage histogram and kept in ``timings_ms``
+    so the real per-stage timings can be returned in the response.
+    """
+
+    def __init__(self, histogram: Histogram):
+        self._histogram = histogram
+        self.timings_ms: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time the enclosed block as pipeline stage `name`."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self._histogram.labels(name).observe(elapsed)
+            self.timings_ms[name] = round(self.timings_ms.get(name, 0.0) + elapsed * 1000, 2)
+
+
+class AddonMetrics:
+    """The add-on's metric families and helpers to record them."""
+
+    def __init__(self, queue_stats: Optional[Callable[[], dict]] = None):
+        """Initialize metrics.
+
+        Args:
+            queue_stats: Optional callable returning InferenceQueue.stats()
+        """
+        self.registry = MetricsRegistry()
+        register = self.registry.register
+
+        self.requests = register(Counter(
+            "face_recognition_http_requests_total",
+            "HTTP requests by endpoint and status code.",
+            ("endpoint", "status")))
+        self.request_latency = register(Histogram(
+            "face_recognition_http_request_duration_seconds",
+            "HTTP request latency by endpoint.",
+            ("endpoint",)))
+        self.bytes_in = register(Counter(
+            "face_recognition_http_request_bytes_total",
+            "Request body bytes received by endpoint.",
+            ("endpoint",)))
+        self.bytes_out = register(Counter(
+            "face_recognition_http_response_bytes_total",
+            "Response body bytes sent by endpoint.",
+            ("endpoint",)))
+        self.stage_latency = register(Histogram(
+            "face_recognition_stage_duration_seconds",
+            "Recognition pipeline stage latency (decode, detection, embedding, matching).",
+            ("stage",)))
+        self.images = register(Counter(
+            "face_recognition_images_total",
+            "Images run through the recognition pipeline."))
+        self.faces = register(Counter(
+            "face_recognition_faces_total",
+            "Faces detected by the recognition pipeline."))
+        self.queue_wait = register(Histogram(
+            "face_recognition_queue_wait_seconds",
+            "Time inference jobs wait in the queue before running."))
+        self.queue_service = register(Histogram(
+            "face_recognition_queue_service_seconds",
+            "Time inference jobs take to run."))
+        self.cache_lookups = register(Counter(
+            "face_recognition_cache_lookups_total",
+            "Cache lookups by cache and result (hit or miss).",
+            ("cache", "result")))
+        self.frames_suppressed = register(Counter(
+            "face_recognition_frames_suppressed_total",
+            "Frames answered with a recent near-duplicate's result, by camera.",
+            ("camera",)))
+        self.suppression_cpu_saved = register(Counter(
+            "face_recognition_suppression_cpu_saved_seconds_total",
+            "Estimated pipeline CPU time saved by near-duplicate suppression."))
+        self.requests_coalesced = register(Counter(
+            "face_recognition_requests_coalesced_total",
+            "Recognition requests answered by another in-flight run for the same camera.",
+            ("camera",)))
+        self.model_info = register(Gauge(
+            "face_recognition_model_info",
+            "Active embedding model version (value is always 1).",
+            ("version",),
+            multiprocess_mode="max"))
+
+        if queue_stats is not None:
+            register(Gauge(
+                "face_recognition_queue_depth",
+                "Inference jobs waiting to run.",
+                callback=lambda: queue_stats()["depth"]))
+            register(Gauge(
+                "face_recognition_queue_running",
+                "Inference jobs currently running.",
+                callback=lambda: queue_stats()["running"]))
+
+        self.set_model_version("none")
+
+        # Shared by all server workers when there are several (see share_across_workers)
+        self.shared_dir: Optional[str] = None
+        self._pid: Optional[int] = None
+        self._cameras: set = set()
+        self._cameras_lock = threading.Lock()
+
+    def share_across_workers(self, directory: str):
+        """Aggregate the metrics of all server workers through snapshot files.
+
+        Call in the gunicorn master before the workers are forked.
+
+        Args:
+            directory: Directory for the per-worker snapshots (created if missing)
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.shared_dir = directory
+
+    def ensure_running(self):
+        """Start this worker's periodic snapshot writer (no-op if not shared)."""
+        if self.shared_dir is None or self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        threading.Thread(target=self._write_snapshots, name="metrics-snapshot", daemon=True).start()
+
+    def _write_snapshots(self):
+        """Write this worker's snapshot every SNAPSHOT_INTERVAL_SECONDS."""
+        while True:
+            time.sleep(SNAPSHOT_INTERVAL_SECONDS)
+            try:
+                self.registry.write_snapshot(self.shared_dir)
+            except OSError as e:
+                logger.warning(f"Could not write metrics snapshot: {e}")
+
+    def mark_worker_dead(self, pid: int):
+        """Keep an exited worker's counters and histograms, drop its gauges.
+
+        Called in the gunicorn master when a worker exits.
+
+        Args:
+            pid: Process id of the exited worker
+        """
+        if self.shared_dir is None:
+            return
+        self.registry.fold_exited(self.shared_dir, pid)
+
+    def observe_request(self, endpoint: str, status: int, seconds: float,
+                        bytes_in: int, bytes_out: int):
+        """Record one HTTP request."""
+        self.requests.labels(endpoint, str(status)).inc()
+        self.request_latency.labels(endpoint).observe(seconds)
+        if bytes_in:
+            self.bytes_in.labels(endpoint).inc(bytes_in)
+        if bytes_out:
+            self.bytes_out.labels(endpoint).inc(bytes_out)
+
+    def observe_job(self, wait_seconds: float, service_seconds: float):
+        """Record queue wait and service time of a finished inference job."""
+        self.queue_wait.observe(wait_seconds)
+        self.queue_service.observe(service_seconds)
+
+    def record_cache(self, cache: str, hit: bool):
+        """Record a cache lookup."""
+        self.cache_lookups.labels(cache, "hit" if hit else "miss").inc()
+
+    def camera_label(self, camera: str) -> str:
+        """Label value for a camera, capped at MAX_CAMERA_LABELS distinct cameras."""
+        if camera in self._cameras:
+            return camera
+        with self._cameras_lock:
+            if len(self._cameras) >= MAX_CAMERA_LABELS:
+                return OTHER_CAMERA
+            self._cameras.add(camera)
+        return camera
+
+    def record_suppression(self, camera: str, cpu_saved_seconds: float):
+        """Record a frame suppressed as a near-duplicate."""
+        self.frames_suppressed.labels(self.camera_label(camera)).inc()
+        self.suppression_cpu_saved.inc(cpu_saved_seconds)
+
+    def record_coalesced(self, camera: str):
+        """Record a request that shared another request's run."""
+        self.requests_coalesced.labels(self.camera_label(camera)).inc()
+
+    def set_model_version(self, version: str):
+        """Set the active model version label."""
+        self.model_info.clear()
+        self.model_info.labels(version).set(1)
+
+    def stage_timer(self) -> StageTimer:
+        """Create a timer for the stages of one pipeline run."""
+        return StageTimer(self.stage_latency)
+
+    def render(self) -> str:
+        """Render all metrics in Prometheus text format (summed over workers if shared)."""
+        if self.shared_dir is None:
+            return self.registry.render()
+        self.registry.write_snapshot(self.shared_dir)
+        return self.registry.render_shared(self.shared_dir)
+
+
+def _escape(value: str) -> str:
+    """Escape a label value."""
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    """Format a sample value."""
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if value == int(value):
+        return str(int(value))
+    return repr(float(value))
+
+
+def _write_json(path: Path, data: Any):
+    """Write JSON to path atomically (readers never see a partial file)."""
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(data))
+    os.replace(tmp, path)
@@ -0,0 +1,302 @@
+"""Double-buffered embedding model hot reload for the face recognition add-on.
+
+A reload builds a complete ModelSet (embedding engine + the gallery of its
+model version) next to the active one, in a background thread:
+
+1. loading - the ONNX session is created and the versioned gallery opened
+2. warming - warm-up batches run through the new engine and gallery, so
+   the first real request doesn't pay for lazy allocations or page faults
+3. active  - one reference assignment swaps it in
+
+Requests pin the set they started with (``ModelManager.acquire``), so
+in-flight recognitions finish on the old model; the old set is released as
+soon as its last request completes. A failed reload leaves the active set
+untouched.
+
+Every server worker holds its own model sets. A reload requested in one
+worker writes a new generation to a marker file next to the model, which
+the other workers poll and answer with their own reload.
+"""
+
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional
+
+import numpy as np
+
+from face_recognition_addon.embedding import EmbeddingEngine
+
+logger = logging.getLogger(__name__)
+
+# Reload states
+STATE_EMPTY = "empty"  # no model installed (bootstrap mode)
+STATE_LOADING = "loading"
+STATE_WARMING = "warming"
+STATE_ACTIVE = "active"
+STATE_FAILED = "failed"
+
+# Warm-up runs per batch size before a swap
+WARM_UP_ROUNDS = 2
+# Longest wait for a new gallery's IVF index before swapping anyway (seconds)
+INDEX_WAIT_SECONDS = 60.0
+# Marker file (next to the model) whose content changes with every requested reload
+RELOAD_MARKER = "reload_generation"
+# How often each server worker checks the marker (seconds)
+RELOAD_POLL_SECONDS = 1.0
+
+
+class ModelSet:
+    """An embedding engine and the gallery enrolled with that model version."""
+
+    def __init__(self, embedder: EmbeddingEngine, gallery):
+        """Initialize model set.
+
+        Args:
+            embedder: Loaded embedding engine
+            gallery: Gallery for embedder.version
+        """
+        self.embedder = embedder
+        self.gallery = gallery
+        self.version = embedder.version
+        self.activated_at: Optional[float] = None
+        self._users = 0
+        self._retired = False
+        self._lock = threading.Lock()
+
+    def _enter(self):
+        with self._lock:
+            self._users += 1
+
+    def _exit(self):
+        with self._lock:
+            self._users -= 1
+            release = self._retired and self._users == 0
+        if release:
+            self._release()
+
+    def retire(self):
+        """Mark as replaced; released once the last in-flight request exits."""
+        with self._lock:
+            self._retired = True
+            release = self._users == 0
+        if release:
+            self._release()
+
+    def _release(self):
+        """Drop the ONNX session and gallery (memory is freed with the last reference)."""
+        logger.info(f"Releasing model {self.version}")
+        self.embedder = None
+        self.gallery = None
+
+
+class ModelManager:
+    """Holds the active ModelSet and swaps in reloaded ones without downtime."""
+
+    def __init__(self, config, load_gallery: Callable[[str], Any],
+                 on_swap: Optional[Callable[[ModelSet], None]] = None):
+        """Initialize model manager.
+
+        Args:
+            config: Config object with embedding settings
+            load_gallery: Returns the Gallery for a model version
+            on_swap: Called with the new set right after it becomes active
+        """
+        self.config = config
+        self.load_gallery = load_gallery
+        self.on_swap = on_swap
+        self.state = STATE_EMPTY
+        self.error: Optional[str] = None
+        self.pending_version: Optional[str] = None
+        self.last_reload_ms: Optional[float] = None
+        self.reloads = 0
+        self._active: Optional[ModelSet] = None
+        self._lock = threading.Lock()
+        self._reload_thread: Optional[threading.Thread] = None
+        self.marker_path = Path(config.embedding_model_path).with_name(RELOAD_MARKER)
+        # Generation this process has reloaded for (inherited by forked workers)
+        self._generation = self._read_generation()
+        self._pid: Optional[int] = None
+
+    @property
+    def active(self) -> Optional[ModelSet]:
+        """The set new requests use (None in bootstrap mode)."""
+        return self._active
+
+    @contextmanager
+    def acquire(self) -> Iterator[Optional[ModelSet]]:
+        """Pin the active set for the duration of one request."""
+        with self._lock:
+            models = self._active
+            if models is not None:
+                models._enter()
+        try:
+            yield models
+        finally:
+            if models is not None:
+                models._exit()
+
+    def load(self) -> bool:
+        """Load the configured model in the calling thread (used at startup).
+
+        Returns:
+            True if a model is active afterwards
+        """
+        self._reload()
+        return self._active is not None
+
+    def reload(self) -> bool:
+        """Start a background reload of the configured model.
+
+        Returns:
+            False if a reload is already in progress
+        """
+        with self._lock:
+            if self._reload_thread is not None and self._reload_thread.is_alive():
+                return False
+            self.state = STATE_LOADING
+            self._reload_thread = threading.Thread(
+                target=self._reload, name="model-reload", daemon=True
+            )
+            self._reload_thread.start()
+        return True
+
+    def request_reload(self) -> bool:
+        """Reload in this process and have every other server worker reload too.
+
+        Returns:
+            False if a reload is already in progress in this process
+        """
+        if not self.reload():
+            return False
+        generation = f"{os.getpid()}-{time.time_ns()}"
+        try:
+            self.marker_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.marker_path.with_suffix(".tmp")
+            tmp.write_text(generation)
+            os.replace(tmp, self.marker_path)
+        except OSError as e:
+            logger.warning(f"Could not signal the reload to other server workers: {e}")
+        else:
+            self._generation = generation
+        return True
+
+    def ensure_running(self):
+        """Start watching for reloads requested by other server workers (once per process)."""
+        if self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        threading.Thread(target=self._watch_reloads, name="model-reload-watch", daemon=True).start()
+
+    def _watch_reloads(self):
+        """Reload whenever the marker's generation changes."""
+        while True:
+            time.sleep(RELOAD_POLL_SECONDS)
+            generation = self._read_generation()
+            # Retried on the next poll if a reload is still running here
+            if generation != self._generation and self.reload():
+                logger.info(f"Model reload requested by another server worker ({generation})")
+                self._generation = generation
+
+    def _read_generation(self) -> Optional[str]:
+        """Current reload generation (None if no reload was ever requested)."""
+        try:
+            return self.marker_path.read_text()
+        except OSError:
+            return None
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait for a background reload (True if none is running afterwards)."""
+        thread = self._reload_thread
+        if thread is not None:
+            thread.join(timeout)
+            return not thread.is_alive()
+        return True
+
+    def _reload(self):
+        """Load, warm up and swap in a new model set."""
+        start = time.perf_counter()
+        self.state = STATE_LOADING
+        self.error = None
+        try:
+            embedder = EmbeddingEngine(
+                self.config.embedding_model_path,
+                precision=self.config.embedding_precision,
+                intra_op_threads=self.config.embedding_threads,
+            )
+            self.pending_version = embedder.version
+            models = ModelSet(embedder, self.load_gallery(embedder.version))
+
+            self.state = STATE_WARMING
+            warm_up_ms = self._warm_up(models)
+        except (ImportError, FileNotFoundError) as e:
+            self._fail(str(e), logging.INFO if self._active is None else logging.ERROR)
+            return
+        except Exception as e:
+            logger.exception(f"Model reload failed: {e}")
+            self._fail(str(e), logging.ERROR)
+            return
+
+        with self._lock:
+            previous = self._active
+            models.activated_at = time.time()
+            self._active = models
+            self.state = STATE_ACTIVE
+            self.pending_version = None
+            self.reloads += 1
+        if previous is not None:
+            previous.retire()
+        if self.on_swap is not None:
+            self.on_swap(models)
+
+        self.last_reload_ms = round((time.perf_counter() - start) * 1000, 1)
+        logger.info(
+            f"Model {models.version} active after {self.last_reload_ms:.0f} ms "
+            f"(warm-up {warm_up_ms:.0f} ms)"
+            + (f", replacing {previous.version}" if previous is not None else "")
+        )
+
+    def _warm_up(self, models: ModelSet) -> float:
+        """Run warm-up batches through the engine and the gallery.
+
+        Returns:
+            Warm-up time in milliseconds
+        """
+        start = time.perf_counter()
+        embedder, gallery = models.embedder, models.gallery
+        for batch_size in sorted({1, self.config.max_batch_size}):
+            for _ in range(WARM_UP_ROUNDS):
+                embedder.warm_up(batch_size)
+        if len(gallery):
+            # Touches every gallery row once (faults in a memory-mapped store)
+            query = np.ascontiguousarray(gallery.matrix[:1])
+            gallery.match(query)
+            if not gallery.wait_for_index(INDEX_WAIT_SECONDS):
+                logger.warning("IVF index still building, swapping in with exact search")
+        return (time.perf_counter() - start) * 1000
+
+    def _fail(self, error: str, level: int):
+        """Record a failed reload; the active set (if any) keeps serving."""
+        self.error = error
+        self.pending_version = None
+        self.state = STATE_ACTIVE if self._active is not None else (
+            STATE_EMPTY if level == logging.INFO else STATE_FAILED
+        )
+        logger.log(level, f"Model not loaded: {error}")
+
+    def status(self) -> Dict[str, Any]:
+        """Model state for GET /status."""
+        models = self._active
+        return {
+            "state": self.state,
+            "active_version": models.version if models is not None else None,
+            "pending_version": self.pending_version,
+            "activated_at": models.activated_at if models is not None else None,
+            "precision": models.embedder.precision if models is not None and models.embedder else None,
+            "last_reload_ms": self.last_reload_ms,
+            "reloads": self.reloads,
+            "error": self.error,
+        }
@@ -1,128 +1,441 @@
-"""Nest event ingestion for face recognition add-on."""
+"""Nest event ingestion for face recognition add-on.
 
+Nest event media URLs expire within seconds, so thumbnails are fetched the
+moment an event arrives: on a background asyncio loop with one pooled
+aiohttp session to the Supervisor API, concurrently across devices and
+with a short deadline per fetch.
+"""
+
+import asyncio
 import logging
-import requests
-from typing import Optional, Dict, Any
-from pathlib import Path
+import os
+import sqlite3
+import threading
 import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Coroutine, Dict, Optional, Tuple
+
+import requests
+
+from .image_store import ImageStore
+
+try:
+    import aiohttp
+    AIOHTTP_AVAILABLE = True
+except ImportError:
+    AIOHTTP_AVAILABLE = False
 
 logger = logging.getLogger(__name__)
 
+SUPERVISOR_URL = "http://supervisor/core"  # HA Supervisor API URL
+# Format: /api/nest/event_media/<device_id>/<event_id>/thumbnail
+NEST_MEDIA_PATH = "/api/nest/event_media/{device_id}/{event_id}/thumbnail"
+
+# Event types with a person in view (HA fires camera_* types, older payloads the short ones)
+NEST_EVENT_TYPES = ("motion", "person", "camera_motion", "camera_person")
+
+# Connection setup gets a fixed slice of the fetch deadline
+CONNECT_TIMEOUT_SECONDS = 1.0
+# Idle pooled connections to the Supervisor are kept this long
+KEEPALIVE_SECONDS = 60.0
+# Fetch latencies kept for the percentiles in stats()
+LATENCY_WINDOW = 256
+
+
+@dataclass
+class NestImage:
+    """A fetched Nest event thumbnail."""
+
+    event_type: str
+    device_id: str
+    event_id: str
+    data: bytes
+    path: Optional[Path] = None
+    fetch_ms: float = 0.0
+
+
+class NestMediaFetcher:
+    """Fetches Nest event media over a pooled aiohttp session.
+
+    The session lives on a private event loop in a daemon thread, so any
+    server thread can start a fetch without blocking on it. The loop is
+    created lazily in the process that first fetches (gunicorn forks after
+    the API is built, and threads do not survive a fork).
+    """
+
+    def __init__(self, base_url: str = SUPERVISOR_URL, token: Optional[str] = None,
+                 deadline: float = 3.0, max_connections: int = 8):
+        """Initialize the fetcher.
+
+        Args:
+            base_url: Home Assistant API base URL
+            token: Bearer token (defaults to SUPERVISOR_TOKEN)
+            deadline: Seconds allowed per fetch, connection setup included
+            max_connections: Size of the connection pool
+        """
+        if not AIOHTTP_AVAILABLE:
+            raise RuntimeError("aiohttp is not installed")
+        self.base_url = base_url.rstrip("/")
+        self.token = token if token is not None else os.environ.get("SUPERVISOR_TOKEN", "")
+        self.deadline = deadline
+        self.max_connections = max_connections
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._session: Optional["aiohttp.ClientSession"] = None
+        self._pid: Optional[int] = None
+        self._counts = {"fetched": 0, "expired": 0, "timeouts": 0, "errors": 0}
+        self._in_flight = 0
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+
+    def media_url(self, device_id: str, event_id: str) -> str:
+        """URL of an event's thumbnail."""
+        return self.base_url + NEST_MEDIA_PATH.format(device_id=device_id, event_id=event_id)
+
+    def submit(self, coro: Coroutine) -> Future:
+        """Run a coroutine on the fetcher's loop.
+
+        Returns:
+            concurrent.futures.Future with the coroutine's result
+        """
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+
+    def fetch(self, device_id: str, event_id: str) -> Future:
+        """Start fetching an event thumbnail.
+
+        Returns:
+            Future resolving to the image bytes, or None if it could not be fetched
+        """
+        return self.submit(self.fetch_async(device_id, event_id))
+
+    async def fetch_async(self, device_id: str, event_id: str) -> Optional[bytes]:
+        """Fetch an event thumbnail (on the fetcher's loop).
+
+        Args:
+            device_id: Nest device ID
+            event_id: Nest event ID
+
+        Returns:
+            Image bytes, or None if the media expired, failed or missed the deadline
+        """
+        url = self.media_url(device_id, event_id)
+        logger.debug(f"Fetching Nest image from: {url}")
+        outcome = "errors"
+        start = time.perf_counter()
+        self._in_flight += 1
+        try:
+            status, body = await asyncio.wait_for(self._get(url), self.deadline)
+            if status == 200:
+                outcome = "fetched"
+                return body
+            if status == 404:
+                outcome = "expired"
+                logger.warning(f"Nest media expired or not found: {event_id}")
+            else:
+                logger.error(f"Failed to fetch Nest image: {status}")
+            return None
+        except asyncio.TimeoutError:
+            outcome = "timeouts"
+            logger.error(f"Timeout fetching Nest image after {self.deadline}s (URL may have expired)")
+            return None
+        except aiohttp.ClientError as e:
+            logger.error(f"Error fetching Nest image: {e}")
+            return None
+        finally:
+            self._in_flight -= 1
+            self._counts[outcome] += 1
+            self._latencies.append(time.perf_counter() - start)
+
+    def stats(self) -> Dict[str, Any]:
+        """Fetch counts and latency of the recent fetches."""
+        latencies = sorted(self._latencies)
+
+        def percentile(p):
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000, 1)
+
+        return {
+            **self._counts,
+            "in_flight": self._in_flight,
+            "deadline_seconds": self.deadline,
+            "p50_ms": percentile(0.50),
+            "p95_ms": percentile(0.95),
+        }
+
+    def close(self, timeout: float = 5.0):
+        """Close the session and stop the loop."""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            if loop is None or self._pid != os.getpid():
+                return
+            self._loop = self._thread = None
+        try:
+            asyncio.run_coroutine_threadsafe(self._close_session(), loop).result(timeout)
+        finally:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(timeout)
+            loop.close()
+
+    async def _get(self, url: str) -> Tuple[int, bytes]:
+        """GET a URL over the pooled session."""
+        async with self._get_session().get(url) as response:
+            return response.status, await response.read()
+
+    def _get_session(self) -> "aiohttp.ClientSession":
+        """The pooled session, created on first use (on the loop)."""
+        if self._session is None:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_connections,
+                keepalive_timeout=KEEPALIVE_SECONDS,
+                ttl_dns_cache=300,
+            )
+            headers = {"Authorization": f"Bearer {self.token}"} if self.token else {}
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                headers=headers,
+                timeout=aiohttp.ClientTimeout(sock_connect=min(CONNECT_TIMEOUT_SECONDS, self.deadline)),
+            )
+        return self._session
+
+    async def _close_session(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        """Start the event loop thread in this process if needed."""
+        with self._lock:
+            if self._loop is None or self._pid != os.getpid():
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(
+                    target=self._run_loop, args=(loop,), name="nest-fetcher", daemon=True
+                )
+                thread.start()
+                self._loop, self._thread, self._pid = loop, thread, os.getpid()
+                # A session inherited over fork belongs to the parent's loop
+                self._session = None
+            return self._loop
+
+    @staticmethod
+    def _run_loop(loop: asyncio.AbstractEventLoop):
+        asyncio.set_event_loop(loop)
+        loop.run_forever()
+
 
 class NestEventIngestion:
     """Handles ingestion of Nest camera events."""
-    
-    def __init__(self, config, api_client):
+
+    def __init__(self, config, api_client=None, fetcher: Optional[NestMediaFetcher] = None,
+                 image_store: Optional[ImageStore] = None):
         """Initialize Nest event ingestion.
-        
+
         Args:
             config: Config object
-            api_client: HTTP client for fetching images
+            api_client: HTTP client for blocking fetches when aiohttp is not
+                installed (defaults to a requests.Session)
+            fetcher: Media fetcher (defaults to one for the Supervisor API)
+            image_store: Store for fetched thumbnails (defaults to one in
+                config.image_dir, opened on first use)
         """
         self.config = config
-        self.api_client = api_client
-        self.ha_url = "http://supervisor/core"  # HA Supervisor API URL
-        self.image_storage = Path("/data/images")
-        self.image_storage.mkdir(parents=True, exist_ok=True)
-        
+        self.api_client = api_client or requests.Session()
+        self.ha_url = SUPERVISOR_URL
+        self._image_store = image_store
+        self._image_store_lock = threading.Lock()
+        self.deadline = config.nest_fetch_deadline_seconds
+
+        if fetcher is None and AIOHTTP_AVAILABLE:
+            fetcher = NestMediaFetcher(
+                self.ha_url, self._get_supervisor_token(),
+                deadline=self.deadline, max_connections=config.nest_fetch_connections,
+            )
+        self.fetcher = fetcher
+        self._executor = None
+        if fetcher is None:
+            logger.warning("aiohttp not installed, fetching Nest media with blocking requests")
+            self._executor = ThreadPoolExecutor(
+                max_workers=config.nest_fetch_connections, thread_name_prefix="nest-fetch"
+            )
+
+    def submit_nest_event(self, event_data: Dict[str, Any]) -> Optional[Future]:
+        """Start fetching the image of a Nest event without waiting for it.
+
+        Args:
+            event_data: Nest event data dictionary
+
+        Returns:
+            Future resolving to a NestImage (or None if the fetch failed), or
+            None if the event has no image to fetch
+        """
+        event = self._parse_event(event_data)
+        if event is None:
+            return None
+        logger.info(f"Processing Nest event: {event[0]} on device {event[1]}")
+        if self.fetcher is not None:
+            return self.fetcher.submit(self._ingest(*event))
+        return self._executor.submit(self._ingest_blocking, *event)
+
     def process_nest_event(self, event_data: Dict[str, Any]) -> Optional[str]:
         """Process a Nest event and fetch the image.
-        
+
         Args:
             event_data: Nest event data dictionary
-            
+
         Returns:
             Path to saved image, or None if failed
         """
         try:
-            # Extract event information
-            event_type = event_data.get("type")
-            device_id = event_data.get("device_id")
-            event_id = event_data.get("event_id")
-            
-            if not all([event_type, device_id, event_id]):
-                logger.warning(f"Incomplete Nest event data: {event_data}")
-                return None
-            
-            # Only process motion/person events
-            if event_type not in ["motion", "person"]:
-                logger.debug(f"Skipping Nest event type: {event_type}")
+            future = self.submit_nest_event(event_data)
+            if future is None:
                 return None
-            
-            logger.info(f"Processing Nest event: {event_type} on device {device_id}")
-            
-            # Fetch image from Nest API
-            image_path = self._fetch_nest_image(device_id, event_id)
-            
-            if image_path:
-                logger.info(f"Successfully fetched Nest image: {image_path}")
-                return str(image_path)
-            else:
-                logger.warning(f"Failed to fetch Nest image for event {event_id}")
-                return None
-                
+            image = future.result()
+            if image and image.path:
+                logger.info(f"Successfully fetched Nest image: {image.path}")
+                return str(image.path)
+            logger.warning(f"Failed to fetch Nest image for event {event_data.get('event_id')}")
+            return None
+
         except Exception as e:
             logger.exception(f"Error processing Nest event: {e}")
             return None
-    
-    def _fetch_nest_image(self, device_id: str, event_id: str) -> Optional[Path]:
-        """Fetch image from Nest event media API.
-        
+
+    def open_image_store(self, create: bool = True) -> Optional[ImageStore]:
+        """The image store, opened on first use, with its evictor running.
+
+        Args:
+            create: Whether to create the store if config.image_dir does not
+                exist yet (False when only reporting or enforcing quotas)
+
+        Returns:
+            ImageStore, or None if it does not exist and create is False
+        """
+        with self._image_store_lock:
+            if self._image_store is None:
+                if not create and not Path(self.config.image_dir).is_dir():
+                    return None
+                self._image_store = ImageStore(
+                    self.config.image_dir,
+                    max_bytes=self.config.image_store_max_mb * 1024 * 1024 or None,
+                    max_age=self.config.image_store_max_age_days * 86400 or None,
+                )
+        self._image_store.ensure_running()
+        return self._image_store
+
+    def stats(self) -> Dict[str, Any]:
+        """Fetch statistics for GET /status."""
+        if self.fetcher is None:
+            return {"async": False, "deadline_seconds": self.deadline}
+        return {"async": True, **self.fetcher.stats()}
+
+    def close(self):
+        """Stop the fetcher loop or thread pool and the image evictor."""
+        if self.fetcher is not None:
+            self.fetcher.close()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+        if self._image_store is not None:
+            self._image_store.close()
+
+    @staticmethod
+    def _parse_event(event_data: Dict[str, Any]) -> Optional[Tuple[str, str, str]]:
+        """Extract (event type, device id, event id) from an event to fetch."""
+        event_type = event_data.get("type")
+        device_id = event_data.get("device_id")
+        event_id = event_data.get("event_id") or event_data.get("nest_event_id")
+
+        if not all([event_type, device_id, event_id]):
+            logger.warning(f"Incomplete Nest event data: {event_data}")
+            return None
+
+        # Only process motion/person events
+        if event_type not in NEST_EVENT_TYPES:
+            logger.debug(f"Skipping Nest event type: {event_type}")
+            return None
+
+        return event_type, device_id, event_id
+
+    async def _ingest(self, event_type: str, device_id: str, event_id: str) -> Optional[NestImage]:
+        """Fetch and save an event thumbnail (on the fetcher's loop)."""
+        start = time.perf_counter()
+        data = await self.fetcher.fetch_async(device_id, event_id)
+        if data is None:
+            return None
+        fetch_ms = (time.perf_counter() - start) * 1000
+        path = await asyncio.get_running_loop().run_in_executor(
+            None, self._save_image, device_id, event_id, data
+        )
+        return NestImage(event_type, device_id, event_id, data, path, fetch_ms)
+
+    def _ingest_blocking(self, event_type: str, device_id: str, event_id: str) -> Optional[NestImage]:
+        """Fetch and save an event thumbnail without aiohttp (thread pool)."""
+        start = time.perf_counter()
+        data = self._fetch_nest_image(device_id, event_id)
+        if data is None:
+            return None
+        fetch_ms = (time.perf_counter() - start) * 1000
+        path = self._save_image(device_id, event_id, data)
+        return NestImage(event_type, device_id, event_id, data, path, fetch_ms)
+
+    def _fetch_nest_image(self, device_id: str, event_id: str) -> Optional[bytes]:
+        """Fetch image from Nest event media API with a blocking request.
+
         Args:
             device_id: Nest device ID
             event_id: Nest event ID
-            
+
         Returns:
-            Path to saved image, or None if failed
+            Image bytes, or None if failed
         """
         try:
-            # Construct Nest API URL
-            # Format: /api/nest/event_media/<device_id>/<event_id>/thumbnail
-            api_url = f"{self.ha_url}/api/nest/event_media/{device_id}/{event_id}/thumbnail"
-            
+            api_url = self.ha_url + NEST_MEDIA_PATH.format(device_id=device_id, event_id=event_id)
             logger.debug(f"Fetching Nest image from: {api_url}")
-            
-            # Fetch image (with timeout - Nest URLs expire quickly)
+
+            # Short timeout - Nest URLs expire quickly
             response = self.api_client.get(
                 api_url,
-                timeout=10,
+                timeout=self.deadline,
                 headers={"Authorization": f"Bearer {self._get_supervisor_token()}"}
             )
-            
+
             if response.status_code == 200:
-                # Generate filename
-                timestamp = int(time.time())
-                filename = f"nest_{device_id}_{event_id}_{timestamp}.jpg"
-                image_path = self.image_storage / filename
-                
-                # Save image
-                with open(image_path, 'wb') as f:
-                    f.write(response.content)
-                
-                logger.info(f"Saved Nest image: {image_path}")
-                return image_path
-                
+                return response.content
             elif response.status_code == 404:
                 logger.warning(f"Nest media expired or not found: {event_id}")
                 return None
             else:
                 logger.error(f"Failed to fetch Nest image: {response.status_code}")
                 return None
-                
+
         except requests.exceptions.Timeout:
             logger.error(f"Timeout fetching Nest image (URL may have expired)")
             return None
         except Exception as e:
             logger.exception(f"Error fetching Nest image: {e}")
             return None
-    
+
+    def _save_image(self, device_id: str, event_id: str, data: bytes) -> Optional[Path]:
+        """Store a fetched thumbnail in the image store.
+
+        Returns:
+            Path of the stored image, or None if it could not be written
+        """
+        try:
+            stored = self.open_image_store().put(data, camera=device_id, ref=f"nest:{event_id}")
+        except (OSError, sqlite3.Error) as e:
+            logger.error(f"Failed to store Nest image for event {event_id}: {e}")
+            return None
+        logger.info(f"Stored Nest image: {stored.path}{'' if stored.new else ' (duplicate)'}")
+        return stored.path
+
     def _get_supervisor_token(self) -> str:
         """Get Supervisor API token.
-        
+
         Returns:
             Supervisor token or empty string
         """
         # Supervisor token is available via environment variable
-        import os
         return os.environ.get("SUPERVISOR_TOKEN", "")
-
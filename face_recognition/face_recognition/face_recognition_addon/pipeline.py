@@ -0,0 +1,513 @@
+"""Face recognition pipeline for the face recognition add-on.
+
+For every image (PRD section 5):
+
+1. Face detection
+2. Face crop
+3. Embedding generation
+4. Identity matching (if model exists)
+5. Confidence scoring
+6. Decision routing
+
+Images are processed in batches: decoding and detection run per image, then the face
+crops of every image in the batch are embedded in one stacked model call
+and matched against the gallery in one call, and the results are split back
+per image.
+"""
+
+import hashlib
+import logging
+import sqlite3
+import time
+from datetime import datetime
+from functools import partial
+from itertools import zip_longest
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Tuple
+
+from face_recognition_addon.metrics import AddonMetrics, StageTimer
+
+if TYPE_CHECKING:
+    from face_recognition_addon.dedupe import FrameDeduplicator
+    from face_recognition_addon.detection import Detection
+
+logger = logging.getLogger(__name__)
+
+try:
+    import cv2
+    from face_recognition_addon.clip_decoder import PYAV_AVAILABLE, ClipDecodeError, ClipDecoder
+    from face_recognition_addon.dedupe import FrameDeduplicator
+    from face_recognition_addon.detection import create_detector, decode_image
+    DETECTION_AVAILABLE = True
+except ImportError:
+    DETECTION_AVAILABLE = False
+    PYAV_AVAILABLE = False
+
+from face_recognition_addon.gallery import UNKNOWN_PERSON, load_gallery, new_gallery
+from face_recognition_addon.identity_store import IdentityStore
+from face_recognition_addon.model_manager import ModelManager, ModelSet
+from face_recognition_addon.result_cache import ResultCache
+from face_recognition_addon.review import ReviewSet
+from face_recognition_addon.zones import ZoneDetector
+
+# (image bytes, request metadata)
+RecognitionItem = Tuple[bytes, Dict[str, Any]]
+# (full-resolution BGR frame, its Detections)
+DecodedFrame = Tuple[Any, List["Detection"]]
+
+
+class RecognitionPipeline:
+    """Runs detection, embedding and matching over batches of images.
+
+    Engines are attached as they become available:
+
+    - ``detector.detect(image)`` returns Detections for a decoded BGR frame
+    - ``embedder.embed(crops)`` returns one embedding per crop
+    - ``gallery.match(embeddings)`` returns one match dict per embedding
+      (an empty Gallery until identities are enrolled)
+    - ``identities.get_many(person_ids)`` resolves display names and avatars
+
+    The embedder and gallery come as one ModelSet from the ModelManager,
+    which hot-swaps them on reload; a batch keeps the set it started with.
+
+    Each frame is decoded once. The detector scans it downscaled (by the
+    camera's ``camera_face_sizes`` entry or ``min_face_size``), only inside
+    the camera's ``camera_zones`` if it has any, and faces are cropped from
+    the full-resolution frame as views for embedding and review.
+
+    Until a detector is loaded every image gets the bootstrap response
+    (all faces treated as Unknown).
+    """
+
+    def __init__(self, config, metrics: AddonMetrics = None):
+        """Initialize pipeline.
+
+        Args:
+            config: Config object with recognition thresholds
+            metrics: AddonMetrics to record stage timings on
+        """
+        self.config = config
+        self.metrics = metrics or AddonMetrics()
+        self.detector = None
+        self.models = ModelManager(config, partial(load_gallery, config), on_swap=self._on_models_swapped)
+        self.identities = None
+        self.review_set = ReviewSet(config.review_dir)
+        self.reprocessor = None  # ReviewReprocessor, attached by the API
+        self.uploads = None  # Drive UploadQueue, attached by the API if configured
+        self.result_cache = None
+        if config.result_cache_size > 0:
+            self.result_cache = ResultCache(config.result_cache_size, config.result_cache_ttl_seconds)
+            self.result_cache.metrics = self.metrics
+        self.deduplicator = None
+        if DETECTION_AVAILABLE and config.dedupe_ring_size > 0:
+            self.deduplicator = FrameDeduplicator(
+                config.dedupe_ring_size, config.dedupe_max_distance, config.dedupe_max_age_seconds
+            )
+            self.deduplicator.metrics = self.metrics
+        self._empty_gallery = new_gallery(config)
+
+    def gallery_stats(self) -> Dict[str, Any]:
+        """Stats of the active model set's gallery (empty in bootstrap mode), for GET /status."""
+        with self.models.acquire() as models:
+            gallery = models.gallery if models is not None else self._empty_gallery
+            return gallery.stats()
+
+    def load_detector(self):
+        """Create the configured face detector.
+
+        Falls back to the Haar backend if the configured one cannot be
+        loaded (e.g. the YuNet model has not been downloaded), and stays in
+        bootstrap mode if OpenCV is not installed.
+        """
+        backend = self.config.detector_backend
+        if backend == "none":
+            logger.info("Face detection disabled, using bootstrap responses")
+            return
+        if not DETECTION_AVAILABLE:
+            logger.warning("OpenCV not installed, face detection disabled")
+            return
+
+        try:
+            self.detector = create_detector(self.config)
+        except (FileNotFoundError, ValueError) as e:
+            if backend == "haar":
+                logger.error(f"Could not load face detector: {e}")
+                return
+            logger.warning(f"Could not load {backend} face detector ({e}), falling back to haar")
+            self.detector = create_detector(self.config, backend="haar")
+
+    def reload_models(self) -> bool:
+        """Hot-reload the embedding model and gallery in the background.
+
+        Every server worker reloads (see ModelManager.request_reload).
+
+        Returns:
+            False if a reload is already in progress
+        """
+        return self.models.request_reload()
+
+    def _on_models_swapped(self, models: ModelSet):
+        """Start using a newly activated model set."""
+        self.metrics.set_model_version(models.version)
+        if self.result_cache is not None:
+            self.result_cache.clear()
+        if self.deduplicator is not None:
+            self.deduplicator.clear()
+        if self.identities is None:
+            self.load_identities()
+        if self.reprocessor is not None:
+            self.reprocessor.schedule(models.version)
+
+    def load_identities(self):
+        """Open the identity database used to name matched people."""
+        try:
+            self.identities = IdentityStore(self.config.identity_db_path)
+        except (OSError, sqlite3.Error) as e:
+            logger.error(f"Could not open identity store {self.config.identity_db_path}: {e}")
+            return
+        self.identities.metrics = self.metrics
+
+    def recognize(self, image_bytes: bytes, metadata: Dict[str, Any]) -> Dict[str, Any]:
+        """Recognize faces in a single image.
+
+        Args:
+            image_bytes: Encoded image (JPEG/PNG)
+            metadata: Request metadata (camera, source, ...)
+
+        Returns:
+            Recognition response dictionary
+        """
+        return self.recognize_batch([(image_bytes, metadata)])[0]
+
+    def recognize_batch(self, items: Sequence[RecognitionItem], reuse_results: bool = True,
+                        decoded: Optional[Sequence[DecodedFrame]] = None) -> List[Dict[str, Any]]:
+        """Recognize faces in several images at once.
+
+        Images recognized recently with the active model are answered from
+        the result cache (marked ``cached``), and near-duplicates of a
+        camera's recent frames reuse their result (``near_duplicate``);
+        both skip the pipeline.
+
+        Args:
+            items: (image bytes, metadata) pairs
+            reuse_results: Use the result cache and near-duplicate suppression
+            decoded: Frames already decoded and detected (e.g. clip frames),
+                one per item; decoding and detection are skipped
+
+        Returns:
+            One recognition response dictionary per item, in order
+        """
+        start = time.perf_counter()
+        timer = self.metrics.stage_timer()
+        self.metrics.images.inc(len(items))
+
+        if self.detector is None:
+            results = [self._bootstrap_result(image_bytes, metadata) for image_bytes, metadata in items]
+            return self._finish(results, start, timer)
+
+        cache = self.result_cache if reuse_results else None
+        results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+        keys = []
+        if cache is not None:
+            models = self.models.active
+            version = models.version if models is not None else None
+            with timer.stage("cache"):
+                keys = [cache.key(image_bytes, version, self._camera_scope(metadata))
+                        for image_bytes, metadata in items]
+                for i, ((image_bytes, metadata), key) in enumerate(zip(items, keys)):
+                    cached = cache.get(key)
+                    if cached is not None:
+                        results[i] = {**self._base_result(image_bytes, metadata), **cached, "cached": True}
+
+        pending = [i for i, result in enumerate(results) if result is None]
+        if pending:
+            dedupe = self.deduplicator if reuse_results else None
+            processed, model_version = self._process(
+                [items[i] for i in pending], timer, dedupe,
+                [decoded[i] for i in pending] if decoded is not None else None,
+            )
+            for i, result in zip(pending, processed):
+                results[i] = result
+                # Reused near-duplicate results are not cached: they would outlive dedupe_max_age_seconds.
+                # A result from a model swapped in since the lookup is not stored under the old key.
+                if cache is not None and result["status"] == "processed" and "near_duplicate" not in result \
+                        and model_version in (None, keys[i][0]):
+                    cache.put(keys[i], result)
+
+        return self._finish(results, start, timer)
+
+    def _process(self, items: Sequence[RecognitionItem], timer: StageTimer,
+                 dedupe: Optional["FrameDeduplicator"] = None,
+                 decoded: Optional[Sequence[DecodedFrame]] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Run images through the pipeline stages.
+
+        Args:
+            items: (image bytes, metadata) pairs
+            timer: Stage timer of the batch
+            dedupe: Answers near-duplicates of a camera's recent frames with
+                their result right after decoding
+            decoded: Decoded frames and their detections, one per item
+
+        Returns:
+            One result per item, and the model version that embedded the
+            faces (None if no face was embedded)
+        """
+        # 1. Decode, per image (undecodable images get an error result).
+        # This is the only full-resolution copy of a frame: detection works on
+        # a downscaled copy and faces are cropped from the full frame as views.
+        frames = []
+        if decoded is not None:
+            frames = [frame for frame, _ in decoded]
+        else:
+            with timer.stage("decode"):
+                for image_bytes, _ in items:
+                    try:
+                        frames.append(decode_image(image_bytes))
+                    except ValueError:
+                        frames.append(None)
+
+        # Near-duplicates of a camera's recent frames reuse that result
+        hashes: List[Optional[int]] = [None] * len(items)
+        reused: List[Optional[Dict[str, Any]]] = [None] * len(items)
+        if dedupe is not None:
+            with timer.stage("dedupe"):
+                for i, ((_, metadata), frame) in enumerate(zip(items, frames)):
+                    if frame is not None and metadata.get("camera"):
+                        hashes[i], reused[i] = dedupe.lookup(metadata["camera"], frame)
+        cpu_start = time.thread_time()
+
+        # 2. Detect and crop (crops are views into the decoded frames)
+        if decoded is not None:
+            detections_per_image = [list(detections) for _, detections in decoded]
+        else:
+            with timer.stage("detection"):
+                detections_per_image = [
+                    self.detector_for(metadata.get("camera")).detect(frame)
+                    if frame is not None and reuse is None else []
+                    for (_, metadata), frame, reuse in zip(items, frames, reused)
+                ]
+        crops = [d.crop for detections in detections_per_image for d in detections]
+        self.metrics.faces.inc(len(crops))
+
+        # 3-4. Embed and match every face in the batch with one call each
+        matches: List[Dict[str, Any]] = []
+        model_version = None
+        if crops:
+            with self.models.acquire() as models:
+                if models is not None:
+                    model_version = models.version
+                    with timer.stage("embedding"):
+                        embeddings = models.embedder.embed(crops)
+                    with timer.stage("matching"):
+                        matches = models.gallery.match(embeddings)
+                        self._resolve_identities(matches)
+
+        # 5-6. Split back per image and route decisions
+        results = []
+        offset = 0
+        for i, ((image_bytes, metadata), frame) in enumerate(zip(items, frames)):
+            detections, reuse = detections_per_image[i], reused[i]
+            if frame is None:
+                results.append(self._invalid_result(image_bytes, metadata))
+                continue
+            if reuse is not None:
+                results.append({**self._base_result(image_bytes, metadata), **reuse})
+                continue
+            image_matches = matches[offset:offset + len(detections)]
+            offset += len(detections)
+            results.append(self._build_result(image_bytes, metadata, detections, image_matches))
+
+        # Keep unknown and low-confidence faces for review
+        with timer.stage("review"):
+            for (image_bytes, _), detections, result in zip(items, detections_per_image, results):
+                if detections:
+                    self._save_review_faces(image_bytes, detections, result, model_version)
+
+        if dedupe is not None:
+            recognized = [i for i, reuse in enumerate(reused) if reuse is None and hashes[i] is not None]
+            if recognized:
+                cpu_per_image = (time.thread_time() - cpu_start) / len(recognized)
+                for i in recognized:
+                    dedupe.remember(items[i][1]["camera"], hashes[i], results[i], cpu_per_image)
+
+        return results, model_version
+
+    def recognize_clip(self, clip_bytes: bytes, metadata: Dict[str, Any]) -> Dict[str, Any]:
+        """Recognize faces in an event clip (MP4).
+
+        The clip is decoded in-process, `clip_sample_frames` frames are scored
+        for faces and sharpness, and only the best `clip_best_frames` are
+        recognized. The result of the most confident frame is returned, with
+        the clip's frame selection under ``clip``. The selected frames go on
+        to embedding as decoded, with the faces found while scoring them.
+
+        Args:
+            clip_bytes: Encoded clip
+            metadata: Request metadata (camera, source, ...)
+
+        Returns:
+            Recognition response dictionary
+        """
+        if self.detector is None:
+            return self.recognize(clip_bytes, metadata)
+
+        start = time.perf_counter()
+        decoder = ClipDecoder(self.detector_for(metadata.get("camera")),
+                              self.config.clip_sample_frames, self.config.clip_best_frames)
+        try:
+            frames, sampled = decoder.decode(clip_bytes)
+        except ClipDecodeError as e:
+            logger.warning(f"Invalid clip from camera {metadata.get('camera')}: {e}")
+            result = self._invalid_result(clip_bytes, metadata)
+            result["error"] = "Could not decode clip"
+            return result
+        decode_ms = round((time.perf_counter() - start) * 1000, 2)
+
+        # Item bytes only identify a frame (review face ids); its pixels are not re-encoded
+        clip_id = hashlib.blake2b(clip_bytes, digest_size=8).hexdigest()
+        items = [(f"{clip_id}@{frame.time:.3f}".encode(), metadata) for frame in frames]
+        results = self.recognize_batch(items, reuse_results=False,
+                                       decoded=[(frame.frame, frame.faces) for frame in frames])
+        best = max(range(len(results)), key=lambda i: results[i].get("confidence", 0.0))
+        result = results[best]
+        result["image_size"] = len(clip_bytes)
+        result["timings_ms"]["clip_decode"] = decode_ms
+        result["processing_time_ms"] = round((time.perf_counter() - start) * 1000, 2)
+        result["clip"] = {
+            "frames_sampled": sampled,
+            "frames_recognized": len(frames),
+            "frame": frames[best].to_dict(),
+        }
+        return result
+
+    def detector_for(self, camera: Optional[str]):
+        """The detector for a camera's frames, with its zones and face size if it has any."""
+        zones = self.config.zones.get(camera)
+        face_size = self.config.face_sizes.get(camera)
+        if zones or face_size:
+            return ZoneDetector(self.detector, zones, face_size)
+        return self.detector
+
+    def _camera_scope(self, metadata: Dict[str, Any]) -> Optional[str]:
+        """The camera if its detection settings shape results (the same image differs per camera), else None."""
+        camera = metadata.get("camera")
+        return camera if self.config.zones.get(camera) or camera in self.config.face_sizes else None
+
+    def _save_review_faces(self, image_bytes: bytes, detections: List["Detection"],
+                           result: Dict[str, Any], model_version: str = None):
+        """Assign face ids and store faces that need review in the review set."""
+        prefix = "img_{}_{}".format(
+            datetime.now().strftime("%Y%m%d_%H%M%S"),
+            hashlib.blake2b(image_bytes, digest_size=4).hexdigest(),
+        )
+        for i, (face, detection) in enumerate(zip(result["faces"], detections)):
+            face["face_id"] = f"{prefix}_face_{i}"
+            if not face.get("needs_review", True):
+                continue
+            ok, crop_jpeg = cv2.imencode(".jpg", detection.crop)
+            if not ok:
+                continue
+            crop_jpeg = crop_jpeg.tobytes()
+            record = {
+                "face_id": face["face_id"],
+                "camera": result["camera"],
+                "timestamp": result["timestamp"],
+                "box": face["box"],
+                "person_id": face.get("person_id", UNKNOWN_PERSON),
+                "display_name": face.get("display_name"),
+                "confidence": face.get("confidence", 0.0),
+                "needs_review": True,
+                "model_version": model_version,
+            }
+            try:
+                self.review_set.add(face["face_id"], crop_jpeg, record)
+                if self.uploads is not None:
+                    self.uploads.enqueue(face["face_id"], self.review_set.crop_path(face["face_id"]),
+                                         crop_jpeg, record)
+            except (OSError, sqlite3.Error) as e:
+                logger.error(f"Could not save review face {face['face_id']}: {e}")
+
+    def _resolve_identities(self, matches: List[Dict[str, Any]]):
+        """Fill in display names and avatars of matched people from the identity store."""
+        if self.identities is None:
+            return
+        person_ids = {m["person_id"] for m in matches if m["person_id"] != UNKNOWN_PERSON}
+        if not person_ids:
+            return
+        identities = self.identities.get_many(person_ids)
+        for match in matches:
+            identity = identities.get(match["person_id"])
+            if identity is not None:
+                match["display_name"] = identity.display_name
+                match["avatar"] = identity.avatar
+
+    def _build_result(self, image_bytes: bytes, metadata: Dict[str, Any],
+                      detections: List["Detection"], matches: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Build the response for one image from its detections and face matches."""
+        result = self._base_result(image_bytes, metadata)
+        result["face_count"] = len(detections)
+        result["faces"] = [
+            {**detection.to_dict(), **match}
+            for detection, match in zip_longest(detections, matches, fillvalue={})
+        ]
+
+        if matches:
+            best = max(matches, key=lambda m: m["confidence"])
+            result.update({
+                "person_id": best["person_id"],
+                "display_name": best.get("display_name") or best["person_id"],
+                "avatar": best.get("avatar"),
+                "confidence": best["confidence"],
+                "needs_review": best["needs_review"],
+            })
+        else:
+            result.update({
+                "person_id": "unknown",
+                "display_name": "Unknown Person",
+                "confidence": 0.0,
+                "needs_review": len(detections) > 0,
+            })
+        return result
+
+    def _invalid_result(self, image_bytes: bytes, metadata: Dict[str, Any]) -> Dict[str, Any]:
+        """Response for an image that could not be decoded."""
+        result = self._base_result(image_bytes, metadata)
+        result.update({
+            "status": "invalid_image",
+            "error": "Could not decode image",
+            "face_count": 0,
+        })
+        return result
+
+    def _bootstrap_result(self, image_bytes: bytes, metadata: Dict[str, Any]) -> Dict[str, Any]:
+        """Response used until a detector is loaded."""
+        result = self._base_result(image_bytes, metadata)
+        result.update({
+            "person_id": "unknown",
+            "display_name": "Unknown Person",
+            "confidence": 0.0,
+            "needs_review": True,
+            "face_count": 1,
+            "message": "Recognition request received (simulated response for testing)",
+        })
+        return result
+
+    @staticmethod
+    def _base_result(image_bytes: bytes, metadata: Dict[str, Any]) -> Dict[str, Any]:
+        """Fields common to every recognition response."""
+        return {
+            "camera": metadata.get("camera"),
+            "image_size": len(image_bytes),
+            "timestamp": metadata.get("timestamp") or datetime.now().isoformat(),
+            "status": "processed",
+        }
+
+    @staticmethod
+    def _finish(results: List[Dict[str, Any]], start: float,
+                timer: StageTimer) -> List[Dict[str, Any]]:
+        """Stamp processing and per-stage times on every result of a batch."""
+        elapsed_ms = round((time.perf_counter() - start) * 1000, 2)
+        for result in results:
+            result["processing_time_ms"] = elapsed_ms
+            result["timings_ms"] = dict(timer.timings_ms)
+            result["batch_size"] = len(results)
+        return results
@@ -0,0 +1,386 @@
+"""Background reprocessing of review faces after a model update (PRD section 11).
+
+When a new embedding model becomes active, faces still marked
+``needs_review`` are matched again with it. The review set can hold months
+of faces, so the job is built to run for a long time without hurting live
+recognitions:
+
+- faces are walked oldest first in chunks of ``reprocess_chunk_size``
+- chunks are embedded and matched in a process pool of
+  ``reprocess_workers`` processes running at ``reprocess_nice`` (each loads
+  the model with one intra-op thread and maps the versioned gallery)
+- before each chunk the job waits while the live inference queue has work
+- progress is checkpointed to disk after every chunk, so a restart resumes
+  where it stopped; only one server worker runs the job (file lock)
+- only faces whose decision changes get their record updated and an update
+  emitted
+"""
+
+import fcntl
+import json
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from face_recognition_addon.review import ReviewSet
+
+logger = logging.getLogger(__name__)
+
+# Job states
+STATE_IDLE = "idle"
+STATE_RUNNING = "running"
+STATE_DONE = "done"
+STATE_FAILED = "failed"
+STATE_STOPPED = "stopped"
+
+# Seconds between checks while live requests are being served
+YIELD_SECONDS = 0.2
+
+# Fields a reprocessed match overwrites in a face record
+DECISION_FIELDS = ("person_id", "display_name", "confidence", "needs_review")
+
+# Per-process state of pool workers (set by _init_worker)
+_worker: Dict[str, Any] = {}
+
+
+def _init_worker(config, version: str, nice: int):
+    """Pool worker initializer: lower priority, load the model and gallery."""
+    from face_recognition_addon.embedding import EmbeddingEngine
+    from face_recognition_addon.gallery import load_gallery
+
+    if nice:
+        os.nice(nice)
+    engine = EmbeddingEngine(config.embedding_model_path, config.embedding_precision,
+                             intra_op_threads=1)
+    if engine.version != version:
+        raise RuntimeError(f"Model changed on disk ({engine.version}, expected {version})")
+    _worker["engine"] = engine
+    _worker["gallery"] = load_gallery(config, version)
+
+
+def _match_chunk(crop_paths: List[str]) -> List[Optional[Dict[str, Any]]]:
+    """Embed and match a chunk of review crops (runs in a pool worker).
+
+    Returns:
+        One match dict per crop (None for unreadable crops)
+    """
+    return match_crops(_worker["engine"], _worker["gallery"], crop_paths)
+
+
+def match_crops(engine, gallery, crop_paths: List[str]) -> List[Optional[Dict[str, Any]]]:
+    """Embed and match face crop files with one model call.
+
+    Args:
+        engine: EmbeddingEngine
+        gallery: Gallery of the engine's model version
+        crop_paths: JPEG face crops
+
+    Returns:
+        One match dict per crop (None for unreadable crops)
+    """
+    import cv2
+
+    crops = [cv2.imread(path) for path in crop_paths]
+    readable = [i for i, crop in enumerate(crops) if crop is not None]
+    results: List[Optional[Dict[str, Any]]] = [None] * len(crops)
+    if readable:
+        matches = gallery.match(engine.embed([crops[i] for i in readable]))
+        for i, match in zip(readable, matches):
+            results[i] = match
+    return results
+
+
+class ReviewReprocessor:
+    """Resumable background job that re-matches review faces with a new model."""
+
+    def __init__(self, config, review_set: ReviewSet, checkpoint_path: Path,
+                 live_stats: Optional[Callable[[], dict]] = None,
+                 on_change: Optional[Callable[[Dict[str, Any], Dict[str, Any]], None]] = None):
+        """Initialize reprocessor.
+
+        Args:
+            config: Config object with model and reprocessing settings
+            review_set: Faces to reprocess
+            checkpoint_path: JSON progress file (a ``.lock`` file sits next to it)
+            live_stats: Returns live inference queue stats (depth, running)
+            on_change: Called with (new record, previous record) for changed decisions
+        """
+        self.config = config
+        self.review_set = review_set
+        self.checkpoint_path = Path(checkpoint_path)
+        self.live_stats = live_stats
+        self.on_change = on_change
+
+        self.state = STATE_IDLE
+        self.error: Optional[str] = None
+        self._checkpoint: Dict[str, Any] = self._load_checkpoint() or {}
+        self._run_started: Optional[float] = None
+        self._run_processed = 0
+        self._yielded_seconds = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        # Runs are started in the serving process (see ensure_running)
+        self._pid: Optional[int] = None
+        self._scheduled: Optional[str] = None
+
+    def schedule(self, version: str):
+        """Reprocess for a model version once this process is serving requests.
+
+        At startup models are loaded in the gunicorn master, whose queue never
+        sees live requests, so the run starts when a worker starts
+        (ensure_running, from post_worker_init); later reloads start right away.
+        """
+        self._scheduled = version
+        if self._pid == os.getpid():
+            self.start(version)
+
+    def ensure_running(self):
+        """Start the scheduled run once per process (when a server worker starts, via post_worker_init)."""
+        if self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        self._thread = None
+        if self._scheduled is not None:
+            self.start(self._scheduled)
+
+    def start(self, version: str) -> bool:
+        """Start (or resume) reprocessing for a model version in the background.
+
+        Returns:
+            False if a run is already in progress
+        """
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return False
+            self._stop.clear()
+            self.state = STATE_RUNNING
+            self.error = None
+            self._thread = threading.Thread(
+                target=self._run, args=(version,), name="review-reprocess", daemon=True
+            )
+            self._thread.start()
+        return True
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stop after the chunks in flight (progress up to them is kept)."""
+        self._stop.set()
+        self.wait(timeout)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait for the current run (True if none is running afterwards)."""
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+            return not thread.is_alive()
+        return True
+
+    def _run(self, version: str):
+        """Run one reprocessing pass, holding the cross-process lock."""
+        self.checkpoint_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.checkpoint_path.with_suffix(".lock"), "w") as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                logger.info("Review reprocessing is running in another worker")
+                self.state = STATE_IDLE
+                return
+            try:
+                self._reprocess(version)
+            except Exception as e:
+                logger.exception(f"Review reprocessing failed: {e}")
+                self.error = str(e)
+                self.state = STATE_FAILED
+
+    def _reprocess(self, version: str):
+        """Walk the review set from the checkpoint and re-match its faces."""
+        checkpoint = self._load_checkpoint() or {}
+        if checkpoint.get("model_version") != version:
+            checkpoint = {"model_version": version, "last_face_id": None,
+                          "processed": 0, "changed": 0, "completed": False}
+        elif checkpoint.get("completed"):
+            self._checkpoint = checkpoint
+            self.state = STATE_DONE
+            return
+        checkpoint["total"] = checkpoint["processed"] + len(
+            self.review_set.face_ids(after=checkpoint["last_face_id"])
+        )
+        self._checkpoint = checkpoint
+        self._run_started = time.monotonic()
+        self._run_processed = 0
+        self._yielded_seconds = 0.0
+        logger.info(
+            f"Reprocessing review faces with model {version}: "
+            f"{checkpoint['total'] - checkpoint['processed']} to go"
+            + (f" (resuming after {checkpoint['last_face_id']})" if checkpoint["last_face_id"] else "")
+        )
+
+        chunks = self._chunks(checkpoint["last_face_id"], version)
+        if self.config.reprocess_workers > 0:
+            self._run_pool(chunks, version)
+        else:
+            self._run_inline(chunks, version)
+
+        if self._stop.is_set():
+            self.state = STATE_STOPPED
+            return
+        checkpoint["completed"] = True
+        self._save_checkpoint()
+        self.state = STATE_DONE
+        logger.info(
+            f"Review reprocessing done: {checkpoint['processed']} faces, "
+            f"{checkpoint['changed']} changed decisions"
+        )
+
+    def _chunks(self, after: Optional[str], version: str):
+        """Yield (face ids, records) chunks of faces that still need review."""
+        face_ids, records = [], []
+        for face_id in self.review_set.face_ids(after=after):
+            record = self.review_set.load(face_id)
+            face_ids.append(face_id)
+            # Settled faces (and ones already matched by this model) are only checkpointed
+            records.append(
+                record if record and record.get("needs_review")
+                and record.get("model_version") != version else None
+            )
+            if len(face_ids) == self.config.reprocess_chunk_size:
+                yield face_ids, records
+                face_ids, records = [], []
+        if face_ids:
+            yield face_ids, records
+
+    def _run_inline(self, chunks, version: str):
+        """Process chunks in this thread (reprocess_workers = 0)."""
+        from face_recognition_addon.embedding import EmbeddingEngine
+        from face_recognition_addon.gallery import load_gallery
+
+        engine = EmbeddingEngine(self.config.embedding_model_path, self.config.embedding_precision,
+                                 intra_op_threads=1)
+        gallery = load_gallery(self.config, version)
+        for face_ids, records in chunks:
+            if not self._yield_to_live():
+                return
+            matches = match_crops(engine, gallery, self._crop_paths(face_ids, records))
+            self._apply(face_ids, records, matches, version)
+
+    def _run_pool(self, chunks, version: str):
+        """Process chunks in a niced process pool, in order, a few in flight."""
+        context = multiprocessing.get_context("spawn")
+        workers = self.config.reprocess_workers
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=context, initializer=_init_worker,
+            initargs=(self.config, version, self.config.reprocess_nice),
+        ) as pool:
+            pending: List[Tuple[Any, List[str], list]] = []
+            chunks = iter(chunks)
+            exhausted = False
+            while True:
+                while not exhausted and len(pending) < workers:
+                    if not self._yield_to_live():
+                        exhausted = True
+                        break
+                    chunk = next(chunks, None)
+                    if chunk is None:
+                        exhausted = True
+                        break
+                    face_ids, records = chunk
+                    future = pool.submit(_match_chunk, self._crop_paths(face_ids, records))
+                    pending.append((future, face_ids, records))
+                if not pending:
+                    return
+                # Apply in submission order so the checkpoint only moves forward
+                future, face_ids, records = pending.pop(0)
+                self._apply(face_ids, records, future.result(), version)
+
+    def _crop_paths(self, face_ids: List[str], records: list) -> List[str]:
+        """Crop files of the faces in a chunk that need reprocessing."""
+        return [str(self.review_set.crop_path(face_id))
+                for face_id, record in zip(face_ids, records) if record is not None]
+
+    def _apply(self, face_ids: List[str], records: list, matches: list, version: str):
+        """Update changed decisions of a chunk and checkpoint it."""
+        matches = iter(matches)
+        changed = 0
+        for face_id, record in zip(face_ids, records):
+            if record is None:
+                continue
+            match = next(matches)
+            if match is None:
+                continue
+            if (match["person_id"], match["needs_review"]) == \
+                    (record.get("person_id"), record.get("needs_review")):
+                continue
+            updated = {**record, **{k: match[k] for k in DECISION_FIELDS},
+                       "model_version": version, "reprocessed_at": time.time()}
+            self.review_set.update(face_id, updated)
+            changed += 1
+            if self.on_change is not None:
+                try:
+                    self.on_change(updated, record)
+                except Exception as e:
+                    logger.error(f"Reprocessing update callback failed for {face_id}: {e}")
+
+        checkpoint = self._checkpoint
+        checkpoint["last_face_id"] = face_ids[-1]
+        checkpoint["processed"] += len(face_ids)
+        checkpoint["changed"] += changed
+        self._run_processed += len(face_ids)
+        self._save_checkpoint()
+
+    def _yield_to_live(self) -> bool:
+        """Wait while live recognitions are queued or running.
+
+        Returns:
+            False if the job was stopped meanwhile
+        """
+        while not self._stop.is_set():
+            stats = self.live_stats() if self.live_stats else {}
+            if not stats.get("depth") and not stats.get("running"):
+                return True
+            self._yielded_seconds += YIELD_SECONDS
+            self._stop.wait(YIELD_SECONDS)
+        return False
+
+    def _load_checkpoint(self) -> Optional[Dict[str, Any]]:
+        """Read the checkpoint file (None if missing or unreadable)."""
+        try:
+            return json.loads(self.checkpoint_path.read_text())
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable reprocessing checkpoint: {e}")
+            return None
+
+    def _save_checkpoint(self):
+        """Write the checkpoint atomically."""
+        self._checkpoint["updated_at"] = time.time()
+        tmp = self.checkpoint_path.with_name(self.checkpoint_path.name + ".tmp")
+        tmp.write_text(json.dumps(self._checkpoint))
+        os.replace(tmp, self.checkpoint_path)
+
+    def progress(self) -> Dict[str, Any]:
+        """Progress and throughput for the HTTP API."""
+        checkpoint = self._checkpoint
+        if self.state != STATE_RUNNING:
+            # Another worker may hold the run; its checkpoint is on disk
+            checkpoint = self._load_checkpoint() or checkpoint
+        processed, total = checkpoint.get("processed", 0), checkpoint.get("total")
+        elapsed = time.monotonic() - self._run_started if self._run_started else 0.0
+        rate = self._run_processed / elapsed if elapsed > 0 else None
+        remaining = total - processed if total is not None else None
+        return {
+            "state": self.state,
+            "model_version": checkpoint.get("model_version"),
+            "processed": processed,
+            "total": total,
+            "changed": checkpoint.get("changed", 0),
+            "faces_per_second": round(rate, 1) if rate else None,
+            "eta_seconds": round(remaining / rate) if rate and remaining is not None else None,
+            "yielded_seconds": round(self._yielded_seconds, 1),
+            "error": self.error,
+        }
@@ -0,0 +1,112 @@
+"""Recognition result cache for the face recognition add-on.
+
+Automations often send the same snapshot several times (retries, several
+automations on one motion event, an unchanged ``entity_picture``). Results
+are cached in memory per server worker, keyed by a hash of the image bytes
+and the embedding-model version that produced them (and by the camera, for
+cameras whose detection zones change what is found in an image):
+
+- bounded LRU (``result_cache_size`` entries) with a TTL, so display names
+  changed in the identity database show up after at most
+  ``result_cache_ttl_seconds``
+- cleared when a reloaded model is swapped in (entries of the old version
+  could no longer be hit anyway, this just frees them)
+- hits and misses are counted for GET /status and /metrics
+"""
+
+import copy
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# (model version, image hash, camera with detection zones or "")
+CacheKey = Tuple[str, bytes, str]
+
+# Result fields that belong to the request, not to the image
+PER_REQUEST_FIELDS = ("camera", "timestamp", "processing_time_ms", "timings_ms", "batch_size")
+
+
+class ResultCache:
+    """Thread-safe LRU+TTL cache of recognition results."""
+
+    def __init__(self, max_entries: int = 256, ttl: float = 60.0):
+        """Initialize the cache.
+
+        Args:
+            max_entries: Results kept (least recently used are dropped)
+            ttl: Seconds a result stays valid
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[CacheKey, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.metrics = None  # Optional AddonMetrics
+
+    @staticmethod
+    def key(image_bytes: bytes, model_version: Optional[str], camera: Optional[str] = None) -> CacheKey:
+        """Cache key of an image for a model version.
+
+        Args:
+            image_bytes: Encoded image
+            model_version: Active embedding-model version
+            camera: Camera whose detection zones apply (None without zones)
+        """
+        return (model_version or "none", hashlib.blake2b(image_bytes, digest_size=16).digest(),
+                camera or "")
+
+    def get(self, key: CacheKey) -> Optional[Dict[str, Any]]:
+        """Look up a result.
+
+        Returns:
+            A copy of the cached result (without per-request fields), or None
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= now:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+        if self.metrics is not None:
+            self.metrics.record_cache("result", entry is not None)
+        return copy.deepcopy(entry[1]) if entry is not None else None
+
+    def put(self, key: CacheKey, result: Dict[str, Any]):
+        """Cache a result (per-request fields are not stored)."""
+        value = copy.deepcopy({k: v for k, v in result.items() if k not in PER_REQUEST_FIELDS})
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop every cached result."""
+        with self._lock:
+            dropped = len(self._entries)
+            self._entries.clear()
+        if dropped:
+            logger.info(f"Result cache cleared ({dropped} entries)")
+
+    def stats(self) -> Dict[str, Any]:
+        """Size and hit ratio for GET /status."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
@@ -0,0 +1,88 @@
+"""Local set of faces that need review (PRD sections 5 and 12).
+
+Every unknown or low-confidence face is kept as a JPEG crop with a sidecar
+JSON record of its decision::
+
+    <review_dir>/<face_id>.jpg
+    <review_dir>/<face_id>.json
+
+Face ids start with the capture time (``img_<YYYYmmdd_HHMMSS>_<hash>_face_<n>``),
+so sorting them walks the set oldest first. The set is what gets uploaded
+to Drive for labelling and what is reprocessed after a model update.
+"""
+
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+RECORD_SUFFIX = ".json"
+CROP_SUFFIX = ".jpg"
+
+
+class ReviewSet:
+    """Directory of review face crops and their decision records."""
+
+    def __init__(self, directory: Union[str, Path] = "/data/review"):
+        """Initialize review set (the directory is created on first write).
+
+        Args:
+            directory: Review directory
+        """
+        self.directory = Path(directory)
+
+    def crop_path(self, face_id: str) -> Path:
+        """Path of a face crop."""
+        return self.directory / f"{face_id}{CROP_SUFFIX}"
+
+    def record_path(self, face_id: str) -> Path:
+        """Path of a face's decision record."""
+        return self.directory / f"{face_id}{RECORD_SUFFIX}"
+
+    def add(self, face_id: str, crop_jpeg: bytes, record: Dict[str, Any]):
+        """Store a review face.
+
+        Args:
+            face_id: Face id (see module docstring)
+            crop_jpeg: JPEG-encoded face crop
+            record: Decision record (person_id, confidence, camera, ...)
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.crop_path(face_id).write_bytes(crop_jpeg)
+        self.update(face_id, record)
+
+    def face_ids(self, after: Optional[str] = None) -> List[str]:
+        """Face ids in capture order.
+
+        Args:
+            after: Only return ids sorting after this one (resume point)
+
+        Returns:
+            Sorted face ids that have a record
+        """
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        ids = sorted(n[:-len(RECORD_SUFFIX)] for n in names if n.endswith(RECORD_SUFFIX))
+        if after is not None:
+            ids = [face_id for face_id in ids if face_id > after]
+        return ids
+
+    def load(self, face_id: str) -> Optional[Dict[str, Any]]:
+        """Read a face's decision record (None if missing or unreadable)."""
+        try:
+            return json.loads(self.record_path(face_id).read_text())
+        except (OSError, ValueError) as e:
+            logger.warning(f"Skipping unreadable review record {face_id}: {e}")
+            return None
+
+    def update(self, face_id: str, record: Dict[str, Any]):
+        """Write a face's decision record atomically."""
+        path = self.record_path(face_id)
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(json.dumps(record))
+        os.replace(tmp, path)
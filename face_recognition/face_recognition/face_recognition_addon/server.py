@@ -0,0 +1,123 @@
+"""Production HTTP server (gunicorn) for the face recognition add-on."""
+
+import gc
+import logging
+import shutil
+import tempfile
+
+logger = logging.getLogger(__name__)
+
+try:
+    import gunicorn.app.base
+    GUNICORN_AVAILABLE = True
+except ImportError:
+    GUNICORN_AVAILABLE = False
+
+
+def build_gunicorn_options(config) -> dict:
+    """Build gunicorn settings from the add-on configuration.
+
+    Args:
+        config: Config object with server settings
+
+    Returns:
+        Dictionary of gunicorn settings
+    """
+    return {
+        'bind': f'0.0.0.0:{config.api_port}',
+        'workers': config.server_workers,
+        'worker_class': config.server_worker_class,
+        'threads': config.server_threads,
+        'timeout': config.server_timeout,
+        'keepalive': config.server_keepalive,
+        'graceful_timeout': config.server_graceful_timeout,
+        # The app (and any models it holds) is built once in the master and
+        # inherited copy-on-write by the forked workers
+        'preload_app': True,
+        'errorlog': '-',
+        'loglevel': 'info',
+        'forwarded_allow_ips': '*',  # Allow forwarded headers (for HA proxy)
+        'pre_fork': _pre_fork,
+        'post_fork': _post_fork,
+        'post_worker_init': _post_worker_init,
+        'child_exit': _child_exit,
+        'on_exit': _on_exit,
+    }
+
+
+def _pre_fork(server, worker):
+    """Move everything allocated so far out of the GC's reach before forking.
+
+    Without this, the first garbage collection in each worker touches the
+    headers of every preloaded object and un-shares their memory pages.
+    """
+    gc.freeze()
+
+
+def _post_fork(server, worker):
+    """Log worker start."""
+    logger.info(f"Gunicorn worker started (pid {worker.pid})")
+
+
+def _post_worker_init(worker):
+    """Start the worker's background threads without waiting for a first request."""
+    api = getattr(worker.app, "api", None)
+    if api is not None:
+        api.start_background_tasks()
+
+
+def _child_exit(server, worker):
+    """Drop the gauges of an exited worker from the shared metrics."""
+    api = getattr(server.app, "api", None)
+    if api is not None:
+        api.metrics.mark_worker_dead(worker.pid)
+
+
+def _on_exit(server):
+    """Remove the shared metrics snapshots when the server shuts down."""
+    api = getattr(server.app, "api", None)
+    if api is not None and api.metrics.shared_dir is not None:
+        shutil.rmtree(api.metrics.shared_dir, ignore_errors=True)
+
+
+if GUNICORN_AVAILABLE:
+
+    class StandaloneApplication(gunicorn.app.base.BaseApplication):
+        """Runs an already constructed FaceRecognitionAPI under gunicorn."""
+
+        def __init__(self, api, options=None):
+            self.options = options or {}
+            self.api = api
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                if key in self.cfg.settings:
+                    self.cfg.set(key.lower(), value)
+
+        def load(self):
+            return self.api.app
+
+
+def run_production_server(api, config):
+    """Serve the API with gunicorn.
+
+    Args:
+        api: FaceRecognitionAPI instance (models already loaded)
+        config: Config object with server settings
+
+    Raises:
+        ImportError: If gunicorn is not installed
+    """
+    if not GUNICORN_AVAILABLE:
+        raise ImportError("gunicorn is not installed")
+
+    options = build_gunicorn_options(config)
+    if options['workers'] > 1:
+        # /metrics sums the snapshots every worker writes here
+        api.metrics.share_across_workers(tempfile.mkdtemp(prefix="face_recognition_metrics_"))
+    logger.info(
+        f"Starting gunicorn on {options['bind']} with {options['workers']} "
+        f"{options['worker_class']} workers x {options['threads']} threads"
+    )
+    StandaloneApplication(api, options).run()
@@ -0,0 +1,88 @@
+"""Single-flight coalescing of concurrent recognitions per camera.
+
+A doorbell press, motion and person detection on one camera fire several
+automations at once, and each asks the add-on to recognize the same scene.
+A request that arrives while a run for its camera is still in flight, and
+less than ``coalesce_window_seconds`` after that run was started, waits for
+that run and gets its result (marked ``shared``) instead of queueing
+another one. During an event storm each camera costs at most one pipeline
+run per window.
+
+Coalescing is per server worker.
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+@dataclass
+class Flight:
+    """An in-flight call and the requests sharing it."""
+
+    value: Any
+    started: float
+    waiters: int = 1
+
+
+class SingleFlight:
+    """Coalesces calls with the same key onto one in-flight call."""
+
+    def __init__(self, window: float):
+        """Initialize coalescing.
+
+        Args:
+            window: Seconds after a call started during which others join it
+        """
+        self.window = window
+        self._flights: Dict[Hashable, Flight] = {}
+        self._lock = threading.Lock()
+        self.runs = 0
+        self.shared = 0
+
+    def join(self, key: Hashable, start: Callable[[], T], done: Callable[[T], bool]) -> Tuple[T, bool]:
+        """Join the in-flight call for `key`, or start one.
+
+        Args:
+            key: What makes calls interchangeable (e.g. camera)
+            start: Starts the call and returns its handle (exceptions propagate
+                and start no flight)
+            done: Whether a handle's call has finished
+
+        Returns:
+            (handle, shared): shared is True if an in-flight call was joined
+        """
+        now = time.monotonic()
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None and now - flight.started <= self.window and not done(flight.value):
+                flight.waiters += 1
+                self.shared += 1
+                shared = True
+                logger.debug(f"Request for {key} joins a run started {now - flight.started:.2f}s ago")
+            else:
+                flight = Flight(start(), now)
+                self._flights[key] = flight
+                self.runs += 1
+                shared = False
+            # Forget finished flights so the map only holds live ones
+            for other in [k for k, f in self._flights.items() if k != key and done(f.value)]:
+                del self._flights[other]
+        return flight.value, shared
+
+    def stats(self) -> Dict[str, Any]:
+        """Runs started and requests coalesced, for GET /status."""
+        requests = self.runs + self.shared
+        return {
+            "window_seconds": self.window,
+            "runs": self.runs,
+            "shared": self.shared,
+            "shared_ratio": round(self.shared / requests, 4) if requests else 0.0,
+            "in_flight": len(self._flights),
+        }
@@ -0,0 +1,231 @@
+"""Per-camera detection zones for the face recognition add-on.
+
+On a wide (e.g. 4K driveway) camera, faces only ever show up in a small part
+of the frame, near the door. ``camera_zones`` restricts detection on a
+camera to rectangles or polygons, given in fractions of the frame so they
+hold for snapshots and clips of any resolution:
+
+    camera_zones:
+      - camera: driveway
+        zone: "0.55,0.30,0.20,0.45"                   # x, y, width, height
+      - camera: driveway
+        zone: "0.10,0.60 0.30,0.55 0.35,0.95 0.10,0.95"  # polygon, >= 3 points
+
+Zones are parsed into a ZoneMap once, when the configuration is loaded.
+Per frame, the detector only sees zero-copy views of the zones' bounding
+rectangles (overlapping rectangles are merged), which its image pyramid
+then scales as usual. Boxes are mapped back to full-frame coordinates, so
+crops, review faces and responses are unchanged; faces whose centre lies
+outside every zone polygon are dropped.
+"""
+
+import logging
+import math
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# (x0, y0, x1, y1)
+Bounds = Tuple[float, float, float, float]
+
+
+@dataclass(frozen=True)
+class Zone:
+    """A detection zone in fractions of the frame."""
+
+    # Polygon vertices as (x, y) fractions
+    points: Tuple[Tuple[float, float], ...]
+    bounds: Bounds
+    rectangle: bool
+
+    def pixel_bounds(self, width: int, height: int) -> Tuple[int, int, int, int]:
+        """Bounding rectangle in pixels of a width x height frame (rounded outwards)."""
+        x0, y0, x1, y1 = self.bounds
+        return (math.floor(x0 * width), math.floor(y0 * height),
+                min(width, math.ceil(x1 * width)), min(height, math.ceil(y1 * height)))
+
+    def contains(self, x: float, y: float) -> bool:
+        """Whether a point (in fractions of the frame) lies inside the zone."""
+        x0, y0, x1, y1 = self.bounds
+        if not (x0 <= x <= x1 and y0 <= y <= y1):
+            return False
+        if self.rectangle:
+            return True
+        # Ray casting
+        inside = False
+        points = self.points
+        for (ax, ay), (bx, by) in zip(points, points[1:] + points[:1]):
+            if (ay > y) != (by > y) and x < ax + (y - ay) * (bx - ax) / (by - ay):
+                inside = not inside
+        return inside
+
+    @property
+    def area(self) -> float:
+        """Fraction of the frame covered by the zone's bounding rectangle."""
+        x0, y0, x1, y1 = self.bounds
+        return (x1 - x0) * (y1 - y0)
+
+
+def parse_zone(text: str) -> Zone:
+    """Parse a zone option.
+
+    Args:
+        text: ``"x,y,w,h"`` rectangle or ``"x,y x,y x,y ..."`` polygon, in
+            fractions (0-1) of the frame width and height
+
+    Returns:
+        Zone
+
+    Raises:
+        ValueError: If the zone is malformed or outside the frame
+    """
+    try:
+        groups = [[float(v) for v in group.split(",")] for group in str(text).split()]
+    except ValueError:
+        raise ValueError(f"Invalid zone '{text}': expected numbers") from None
+
+    if len(groups) == 1 and len(groups[0]) == 4:
+        x, y, w, h = groups[0]
+        if w <= 0 or h <= 0:
+            raise ValueError(f"Invalid zone '{text}': width and height must be positive")
+        points = ((x, y), (x + w, y), (x + w, y + h), (x, y + h))
+        rectangle = True
+    elif len(groups) >= 3 and all(len(group) == 2 for group in groups):
+        points = tuple((x, y) for x, y in groups)
+        rectangle = False
+    else:
+        raise ValueError(f"Invalid zone '{text}': expected 'x,y,w,h' or at least 3 'x,y' points")
+
+    if not all(0.0 <= v <= 1.0 for point in points for v in point):
+        raise ValueError(f"Invalid zone '{text}': coordinates must be fractions of the frame (0-1)")
+    xs = [x for x, _ in points]
+    ys = [y for _, y in points]
+    bounds = (min(xs), min(ys), max(xs), max(ys))
+    if bounds[2] <= bounds[0] or bounds[3] <= bounds[1]:
+        raise ValueError(f"Invalid zone '{text}': polygon has no area")
+    return Zone(points, bounds, rectangle)
+
+
+class ZoneMap:
+    """Detection zones per camera, compiled once from the add-on options."""
+
+    def __init__(self, zones: Optional[Dict[str, Tuple[Zone, ...]]] = None):
+        """Initialize the map.
+
+        Args:
+            zones: Zones per camera name
+        """
+        self._zones = dict(zones or {})
+
+    @classmethod
+    def from_options(cls, entries: Optional[Iterable[Dict[str, Any]]]) -> "ZoneMap":
+        """Compile ``camera_zones`` options.
+
+        Args:
+            entries: ``{"camera": ..., "zone": ...}`` dicts (a camera may
+                have several)
+
+        Returns:
+            ZoneMap
+
+        Raises:
+            ValueError: If an entry has no camera or an invalid zone
+        """
+        zones: Dict[str, List[Zone]] = {}
+        for entry in entries or []:
+            camera = entry.get("camera") if isinstance(entry, dict) else None
+            if not camera:
+                raise ValueError(f"camera_zones entries need a camera and a zone, got {entry}")
+            zones.setdefault(camera, []).append(parse_zone(entry.get("zone", "")))
+        return cls({camera: tuple(camera_zones) for camera, camera_zones in zones.items()})
+
+    def get(self, camera: Optional[str]) -> Tuple[Zone, ...]:
+        """Zones of a camera (empty: detect in the full frame)."""
+        return self._zones.get(camera, ()) if camera else ()
+
+    def __bool__(self) -> bool:
+        return bool(self._zones)
+
+    def stats(self) -> Dict[str, Any]:
+        """Zones and covered frame fraction per camera, for GET /status."""
+        return {
+            camera: {"zones": len(zones), "area": round(min(1.0, sum(z.area for z in zones)), 4)}
+            for camera, zones in self._zones.items()
+        }
+
+
+@lru_cache(maxsize=64)
+def region_rects(zones: Tuple[Zone, ...], width: int, height: int) -> Tuple[Tuple[int, int, int, int], ...]:
+    """Pixel rectangles to run detection on, with overlapping zones merged.
+
+    Cached per camera and frame size, so a stream of frames computes them once.
+
+    Args:
+        zones: Zones of the camera
+        width: Frame width
+        height: Frame height
+
+    Returns:
+        Disjoint (x0, y0, x1, y1) rectangles
+    """
+    rects = [zone.pixel_bounds(width, height) for zone in zones]
+    merged = True
+    while merged:
+        merged = False
+        for i in range(len(rects)):
+            for j in range(i + 1, len(rects)):
+                a, b = rects[i], rects[j]
+                if a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]:
+                    rects[i] = (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+                    del rects[j]
+                    merged = True
+                    break
+            if merged:
+                break
+    return tuple(rect for rect in rects if rect[2] > rect[0] and rect[3] > rect[1])
+
+
+class ZoneDetector:
+    """Runs a face detector with a camera's zones and expected face size."""
+
+    def __init__(self, detector, zones: Sequence[Zone], min_face_size: Optional[int] = None):
+        """Initialize the detector.
+
+        Args:
+            detector: Detector with ``detect(frame)`` returning Detections
+            zones: Zones of the camera (empty: the whole frame)
+            min_face_size: Smallest face on this camera, in frame pixels
+                (None: the detector's own); sets the detection scale
+        """
+        self.detector = detector
+        self.zones = tuple(zones)
+        self._detect_kwargs = {"min_face_size": min_face_size} if min_face_size else {}
+
+    def detect(self, frame) -> List[Any]:
+        """Detect faces in the zones of a frame.
+
+        Args:
+            frame: (H, W, 3) full frame
+
+        Returns:
+            Detections in full-frame coordinates (crops are views of the
+            frame), sorted by descending score
+        """
+        if not self.zones:
+            return self.detector.detect(frame, **self._detect_kwargs)
+        height, width = frame.shape[:2]
+        detections = []
+        for x0, y0, x1, y1 in region_rects(self.zones, width, height):
+            for detection in self.detector.detect(frame[y0:y1, x0:x1], **self._detect_kwargs):
+                detection.x += x0
+                detection.y += y0
+                if detection.landmarks is not None:
+                    detection.landmarks = detection.landmarks + (x0, y0)
+                cx = (detection.x + detection.w / 2) / width
+                cy = (detection.y + detection.h / 2) / height
+                if any(zone.contains(cx, cy) for zone in self.zones):
+                    detections.append(detection)
+        detections.sort(key=lambda d: -d.score)
+        return detections
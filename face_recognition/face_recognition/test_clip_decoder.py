@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""Tests for in-process event clip decoding and best-frame selection.
+
+Encodes small synthetic H.264 clips with PyAV and scores them with a stub
+detector, so no camera footage or detection model is required.
+
+Usage:
+    python test_clip_decoder.py
+"""
+
+import io
+import logging
+import sys
+import tempfile
+from pathlib import Path
+
+import av
+import cv2
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+
+from face_recognition_addon import api as api_module
+from face_recognition_addon.api import FaceRecognitionAPI
+from face_recognition_addon.clip_decoder import ClipDecodeError, ClipDecoder, sample_frames
+from face_recognition_addon.config import Config
+from face_recognition_addon.detection import Detection
+
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+FPS = 10
+# 2 s clip; a blurred face in frames 4-7, a sharp face in frames 13-16
+FRAMES = 20
+BLURRED_FACE = range(4, 8)
+SHARP_FACE = range(13, 17)
+FACE = (40, 30, 48, 48)  # x, y, w, h
+
+
+class BrightSquareDetector:
+    """Reports a face wherever the FACE square is bright."""
+
+    def detect(self, frame):
+        x, y, w, h = FACE
+        if frame[y:y + h, x:x + w].mean() < 170:
+            return []
+        return [Detection(x, y, w, h, 0.9, frame[y:y + h, x:x + w])]
+
+
+def build_clip(frame_count: int = FRAMES) -> bytes:
+    """Encode the synthetic test clip as MP4 bytes."""
+    rng = np.random.default_rng(0)
+    buffer = io.BytesIO()
+    with av.open(buffer, mode="w", format="mp4") as container:
+        stream = container.add_stream("libx264", rate=FPS)
+        stream.width, stream.height, stream.pix_fmt = 160, 120, "yuv420p"
+        stream.options = {"crf": "12"}
+        for i in range(frame_count):
+            frame = rng.integers(0, 120, (120, 160, 3), dtype=np.uint8)
+            if i in BLURRED_FACE or i in SHARP_FACE:
+                x, y, w, h = FACE
+                frame[y:y + h, x:x + w] = rng.integers(170, 255, (h, w, 3), dtype=np.uint8)
+            if i not in SHARP_FACE:
+                frame = cv2.GaussianBlur(frame, (0, 0), 3)
+            video_frame = av.VideoFrame.from_ndarray(frame, format="bgr24")
+            for packet in stream.encode(video_frame):
+                container.mux(packet)
+        for packet in stream.encode():
+            container.mux(packet)
+    return buffer.getvalue()
+
+
+def test_samples_spread_over_clip():
+    """Sampled frames are spread evenly over the clip, in order."""
+    frames = sample_frames(build_clip(), samples=6)
+    times = [f.time for f in frames]
+    assert len(frames) == 6, times
+    assert times == sorted(times) and 0.0 < times[0] < 0.4 and times[-1] >= 1.7, times
+    assert all(f.frame.shape == (120, 160, 3) for f in frames)
+
+    # More samples than frames gives every frame once
+    assert len(sample_frames(build_clip(4), samples=10)) == 4
+
+
+def test_best_frames_prefer_sharp_faces():
+    """Frames with faces win, the sharp face before the blurred one."""
+    best, sampled = ClipDecoder(BrightSquareDetector(), samples=6, best_frames=2).decode(build_clip())
+    assert sampled == 6
+    assert len(best) == 2, [f.to_dict() for f in best]
+    assert round(best[0].time * FPS) in SHARP_FACE and round(best[1].time * FPS) in BLURRED_FACE
+    assert best[0].face_score > best[1].face_score > 0
+    assert best[0].to_jpeg()[:2] == b"\xff\xd8"
+
+    # Without a detector the single sharpest frame is returned
+    best, _ = ClipDecoder(samples=6).decode(build_clip())
+    assert len(best) == 1 and round(best[0].time * FPS) in SHARP_FACE
+
+
+def test_invalid_clip():
+    """Bytes that are not a clip raise ClipDecodeError."""
+    try:
+        sample_frames(b"not an mp4 clip")
+    except ClipDecodeError:
+        pass
+    else:
+        raise AssertionError("expected ClipDecodeError")
+
+
+def test_recognize_endpoint_accepts_clips():
+    """POST /recognize with video/mp4 recognizes the best frames only."""
+    with tempfile.TemporaryDirectory() as tmp:
+        config = Config(
+            detector_backend="none",
+            embedding_model_path=str(Path(tmp) / "embedding.onnx"),
+            embeddings_dir=str(Path(tmp) / "embeddings"),
+            identity_db_path=str(Path(tmp) / "identities.db"),
+            review_dir=str(Path(tmp) / "review"),
+        )
+        api = FaceRecognitionAPI(config)
+        api.pipeline.detector = BrightSquareDetector()
+        client = api.app.test_client()
+        clip = build_clip()
+
+        response = client.post("/recognize", data=clip,
+                               headers={"Content-Type": "video/mp4", "X-Camera": "door"})
+        assert response.status_code == 200, response.get_json()
+        data = response.get_json()
+        assert data["camera"] == "door" and data["image_size"] == len(clip)
+        assert data["face_count"] == 1 and data["faces"][0]["box"] == list(FACE)
+        assert data["clip"]["frames_sampled"] == 6 and data["clip"]["frames_recognized"] == 2
+        assert "clip_decode" in data["timings_ms"]
+
+        response = client.post("/recognize", data=b"not an mp4 clip",
+                               headers={"Content-Type": "video/mp4", "X-Camera": "door"})
+        assert response.status_code == 422
+
+        # Without PyAV clips are rejected up front instead of failing in the job
+        api_module.PYAV_AVAILABLE = False
+        try:
+            response = client.post("/recognize", data=clip,
+                                   headers={"Content-Type": "video/mp4", "X-Camera": "door"})
+        finally:
+            api_module.PYAV_AVAILABLE = True
+        assert response.status_code == 415
+        assert "PyAV" in response.get_json()["error"]
+
+
+def test_clip_frames_recognized_as_decoded():
+    """Selected clip frames are embedded as decoded, with their scoring detections."""
+    calls = []
+
+    class CountingDetector(BrightSquareDetector):
+        def detect(self, frame):
+            calls.append(frame.shape)
+            return super().detect(frame)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        config = Config(
+            detector_backend="none",
+            embedding_model_path=str(Path(tmp) / "embedding.onnx"),
+            embeddings_dir=str(Path(tmp) / "embeddings"),
+            identity_db_path=str(Path(tmp) / "identities.db"),
+            review_dir=str(Path(tmp) / "review"),
+        )
+        api = FaceRecognitionAPI(config)
+        api.pipeline.detector = CountingDetector()
+
+        result = api.pipeline.recognize_clip(build_clip(), {"camera": "door"})
+        assert result["face_count"] == 1 and result["faces"][0]["box"] == list(FACE)
+        # Only the scoring pass detected; frames were neither re-encoded nor detected again
+        assert 2 <= len(calls) <= result["clip"]["frames_sampled"]
+        assert "decode" not in result["timings_ms"] and "detection" not in result["timings_ms"]
+        # Both recognized frames keep their own review faces
+        assert len(list((Path(tmp) / "review").rglob("*.jpg"))) == 2
+
+
+def main():
+    """Run all tests."""
+    tests = [
+        test_samples_spread_over_clip,
+        test_best_frames_prefer_sharp_faces,
+        test_invalid_clip,
+        test_recognize_endpoint_accepts_clips,
+        test_clip_frames_recognized_as_decoded,
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"[OK] {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"[FAIL] {test.__name__}: {e}")
+
+    print(f"Results: {len(tests) - failed}/{len(tests)} tests passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
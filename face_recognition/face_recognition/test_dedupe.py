@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""Tests for per-camera near-duplicate frame suppression.
+
+Usage:
+    python test_dedupe.py
+"""
+
+import logging
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+
+from conftest import make_api
+from face_recognition_addon.dedupe import frame_hash, hamming
+from face_recognition_addon.detection import Detection, decode_image
+
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+
+class CountingDetector:
+    """Reports one face per frame and counts the frames it was given."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def detect(self, frame):
+        self.calls += 1
+        return [Detection(40, 40, 64, 64, 0.9, frame[40:104, 40:104])]
+
+
+def scene(seed: int) -> np.ndarray:
+    """A smooth synthetic camera view, different per seed."""
+    coarse = np.random.default_rng(seed).integers(0, 255, (6, 8, 3), dtype=np.uint8)
+    return cv2.resize(coarse, (640, 480), interpolation=cv2.INTER_CUBIC)
+
+
+def frame(seed: int, noise_seed: int = 0, quality: int = 90) -> bytes:
+    """A JPEG of the scene with a little sensor noise (distinct bytes per noise_seed)."""
+    noise = np.random.default_rng(1000 + noise_seed).normal(0, 3, (480, 640, 3))
+    image = np.clip(scene(seed) + noise, 0, 255).astype(np.uint8)
+    return cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, quality])[1].tobytes()
+
+
+def test_frame_hash():
+    """Re-encoded noisy copies hash close together, other scenes far apart."""
+    base = frame_hash(decode_image(frame(0)))
+    assert hamming(base, frame_hash(decode_image(frame(0, noise_seed=1, quality=60)))) <= 4
+    assert all(hamming(base, frame_hash(decode_image(frame(seed)))) > 12 for seed in range(1, 6))
+    # Frames too small to subsample are hashed in full
+    assert 0 <= frame_hash(scene(0)[:40, :60]) < 2 ** 64
+
+
+def test_near_duplicates_reuse_result():
+    """A near-duplicate from the same camera reuses the result and is not reviewed again."""
+    with tempfile.TemporaryDirectory() as tmp:
+        pipeline = make_api(tmp, CountingDetector(), result_cache_size=0).pipeline
+        review = Path(tmp) / "review"
+
+        first = pipeline.recognize(frame(0), {"camera": "door"})
+        reviewed = len(list(review.rglob("*.jpg")))
+        second = pipeline.recognize(frame(0, noise_seed=1), {"camera": "door", "timestamp": "t2"})
+        assert pipeline.detector.calls == 1
+        assert second["near_duplicate"]["distance"] <= 6 and "near_duplicate" not in first
+        assert second["faces"] == first["faces"] and second["timestamp"] == "t2"
+        assert reviewed == 1 and len(list(review.rglob("*.jpg"))) == reviewed
+
+        # Other cameras and other scenes run the pipeline
+        assert "near_duplicate" not in pipeline.recognize(frame(0, noise_seed=2), {"camera": "garden"})
+        assert "near_duplicate" not in pipeline.recognize(frame(1), {"camera": "door"})
+        assert pipeline.detector.calls == 3
+
+
+def test_stale_results_recomputed():
+    """A result is reused only until it is max_age seconds old."""
+    with tempfile.TemporaryDirectory() as tmp:
+        pipeline = make_api(tmp, CountingDetector(), result_cache_size=0, dedupe_max_age_seconds=0.3).pipeline
+        pipeline.recognize(frame(0), {"camera": "door"})
+        assert "near_duplicate" in pipeline.recognize(frame(0, noise_seed=1), {"camera": "door"})
+        time.sleep(0.4)
+        assert "near_duplicate" not in pipeline.recognize(frame(0, noise_seed=2), {"camera": "door"})
+        assert pipeline.detector.calls == 2
+
+
+def test_ring_buffer_keeps_recent_frames():
+    """Only the last dedupe_ring_size frames of a camera are compared."""
+    with tempfile.TemporaryDirectory() as tmp:
+        pipeline = make_api(tmp, CountingDetector(), result_cache_size=0, dedupe_ring_size=2).pipeline
+        for seed in range(3):
+            pipeline.recognize(frame(seed), {"camera": "door"})
+        assert "near_duplicate" not in pipeline.recognize(frame(0, noise_seed=1), {"camera": "door"})
+        assert "near_duplicate" in pipeline.recognize(frame(2, noise_seed=1), {"camera": "door"})
+        assert pipeline.detector.calls == 4
+
+
+def test_suppression_exported():
+    """Suppression counts and CPU saved are on /status and /metrics."""
+    with tempfile.TemporaryDirectory() as tmp:
+        api = make_api(tmp, CountingDetector(), result_cache_size=0)
+        client = api.app.test_client()
+        for noise_seed in range(3):
+            response = client.post("/recognize", data=frame(0, noise_seed),
+                                   headers={"Content-Type": "image/jpeg", "X-Camera": "door"})
+            assert response.status_code == 200
+
+        status = client.get("/status").get_json()["dedupe"]
+        assert status["frames"] == 3 and status["suppressed"] == 2
+        assert status["per_camera"]["door"] == {"frames": 3, "suppressed": 2}
+        assert status["cpu_saved_seconds"] >= 0
+        metrics = client.get("/metrics").get_data(as_text=True)
+        assert 'face_recognition_frames_suppressed_total{camera="door"} 2' in metrics
+        assert "face_recognition_suppression_cpu_saved_seconds_total" in metrics
+
+        disabled = make_api(tmp, CountingDetector(), result_cache_size=0, dedupe_ring_size=0)
+        assert disabled.app.test_client().get("/status").get_json()["dedupe"] == {"enabled": False}
+
+
+def main():
+    """Run all tests."""
+    tests = [
+        test_frame_hash,
+        test_near_duplicates_reuse_result,
+        test_stale_results_recomputed,
+        test_ring_buffer_keeps_recent_frames,
+        test_suppression_exported,
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"[OK] {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"[FAIL] {test.__name__}: {e}")
+
+    print(f"Results: {len(tests) - failed}/{len(tests)} tests passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""Tests for the face detection package and its pipeline integration.
+
+Real-face accuracy is measured by benchmarks/bench_detection.py on local
+fixtures; these tests cover decoding, the pyramid, box mapping and the API.
+
+Usage:
+    python test_detection.py
+"""
+
+import logging
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+
+from face_recognition_addon.api import FaceRecognitionAPI
+from face_recognition_addon.config import Config
+from face_recognition_addon.detection import (
+    FaceDetector,
+    HaarCascadeDetector,
+    create_detector,
+    decode_image,
+)
+from face_recognition_addon.detection import yunet
+from face_recognition_addon.detection.pyramid import ImagePyramid
+
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+RAW_HEADERS = {"Content-Type": "image/jpeg", "X-Camera": "front_door"}
+
+
+class FixedBoxDetector(FaceDetector):
+    """Reports one face at a fixed box in every pyramid level."""
+
+    name = "fixed"
+    min_window = 20
+
+    def __init__(self, box, **kwargs):
+        super().__init__(**kwargs)
+        self.box = box
+        self.level_shapes = []
+
+    def _detect_level(self, image):
+        self.level_shapes.append(image.shape[:2])
+        return np.array([self.box], dtype=np.float32), np.array([0.9]), None
+
+
+def make_frame(width: int = 640, height: int = 360) -> np.ndarray:
+    """Create a BGR test frame with a gradient."""
+    frame = np.zeros((height, width, 3), dtype=np.uint8)
+    frame[:, :, 1] = np.linspace(0, 255, width, dtype=np.uint8)
+    return frame
+
+
+def test_decode_image():
+    """Encoded JPEGs decode to BGR arrays; garbage raises ValueError."""
+    ok, encoded = cv2.imencode(".jpg", make_frame())
+    assert ok
+    assert decode_image(encoded.tobytes()).shape == (360, 640, 3)
+
+    for data in (b"", b"\xff\xd8\xff\xe0" + b"\x00" * 64):
+        try:
+            decode_image(data)
+            raise AssertionError("Expected ValueError")
+        except ValueError:
+            pass
+
+
+def test_pyramid_starts_at_min_face_scale():
+    """The first level maps min_face_size onto the detector window."""
+    pyramid = ImagePyramid(min_window=24, levels=3, scale_factor=0.5)
+    frame = make_frame(3840, 2160)
+
+    levels = list(pyramid.levels(frame, min_face_size=96))
+    assert [round(scale, 4) for _, scale in levels] == [0.25, 0.125, 0.0625]
+    assert levels[0][0].shape[:2] == (540, 960)
+
+    # Small minimum faces never upscale the frame
+    level, scale = next(pyramid.levels(frame, min_face_size=12))
+    assert scale == 1.0 and level is frame
+
+
+def test_boxes_mapped_to_full_frame_with_crop_views():
+    """Level boxes are mapped back to frame pixels and crops share memory."""
+    frame = make_frame(1920, 1080)
+    detector = FixedBoxDetector(box=(100, 50, 40, 40), min_face_size=80)
+
+    detections = detector.detect(frame)
+    assert detector.level_shapes == [(270, 480)]
+    assert len(detections) == 1
+    detection = detections[0]
+    assert detection.box == (400, 200, 160, 160)
+    assert detection.crop.shape == (160, 160, 3)
+    assert np.shares_memory(detection.crop, frame)
+    assert detection.to_dict() == {"box": [400, 200, 160, 160], "score": 0.9}
+
+
+def test_pyramid_duplicates_merged():
+    """The same face found on several levels is reported once."""
+    frame = make_frame(1920, 1080)
+    detector = FixedBoxDetector(box=(100, 50, 40, 40), min_face_size=80,
+                                pyramid_levels=2, pyramid_scale_factor=0.5)
+    # Level 2 reports the box at half the level-1 coordinates - a new region
+    assert len(detector.detect(frame)) == 2
+
+    class ScaledBoxDetector(FixedBoxDetector):
+        def _detect_level(self, image):
+            factor = image.shape[1] / 480
+            boxes, scores, landmarks = super()._detect_level(image)
+            return boxes * factor, scores, landmarks
+
+    detector = ScaledBoxDetector(box=(100, 50, 40, 40), min_face_size=80,
+                                 pyramid_levels=2, pyramid_scale_factor=0.5)
+    assert len(detector.detect(frame)) == 1
+
+
+def test_haar_detector_on_blank_frame():
+    """The Haar backend loads and finds nothing in an empty frame."""
+    detector = HaarCascadeDetector(min_face_size=40)
+    assert detector.detect(np.zeros((1080, 1920, 3), dtype=np.uint8)) == []
+
+
+def test_create_detector():
+    """create_detector builds the configured backend and rejects unknown ones."""
+    assert isinstance(create_detector(Config(detector_backend="haar")), HaarCascadeDetector)
+    try:
+        create_detector(Config(detector_backend="nope"))
+        raise AssertionError("Expected ValueError")
+    except ValueError:
+        pass
+
+
+def test_missing_yunet_model_falls_back_to_haar():
+    """A missing YuNet model falls back to the Haar backend."""
+    api = FaceRecognitionAPI(Config(
+        api_token="", detector_backend="yunet", detector_model_path="/nonexistent/yunet.onnx"
+    ))
+    assert isinstance(api.pipeline.detector, HaarCascadeDetector)
+
+
+class SizedFaceDetectorYN:
+    """Stands in for cv2.FaceDetectorYN: fails if an image doesn't match its input size."""
+
+    def __init__(self, size):
+        self.size = size
+
+    @classmethod
+    def create(cls, model, config, size, **kwargs):
+        return cls(size)
+
+    def setInputSize(self, size):
+        self.size = size
+
+    def detect(self, image):
+        size = self.size
+        time.sleep(0.001)
+        assert (image.shape[1], image.shape[0]) == size == self.size, "input size changed mid-detect"
+        return 1, None
+
+
+def test_yunet_input_size_is_per_thread():
+    """Inference workers detecting different image sizes don't reset each other's input size."""
+    errors = []
+
+    def run(shape):
+        try:
+            for _ in range(20):
+                detector._detect_level(np.zeros(shape, dtype=np.uint8))
+        except AssertionError as e:
+            errors.append(e)
+
+    original = yunet.cv2.FaceDetectorYN
+    yunet.cv2.FaceDetectorYN = SizedFaceDetectorYN
+    try:
+        with tempfile.NamedTemporaryFile(suffix=".onnx") as model:
+            detector = yunet.YuNetDetector(model.name)
+            threads = [threading.Thread(target=run, args=(shape,))
+                       for shape in ((120, 160, 3), (240, 320, 3), (90, 90, 3))]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+    finally:
+        yunet.cv2.FaceDetectorYN = original
+    assert not errors, errors
+
+
+def test_haar_classifier_is_per_thread():
+    """Each thread detects with its own cascade classifier and gets the same faces."""
+    detector = HaarCascadeDetector()
+    frame = make_frame()
+    expected = [d.box for d in detector.detect(frame)]
+    classifiers, boxes = [], []
+
+    def run():
+        classifiers.append(detector._thread_classifier())
+        for _ in range(3):
+            boxes.append([d.box for d in detector.detect(frame)])
+
+    threads = [threading.Thread(target=run) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len({id(c) for c in classifiers}) == 3
+    assert detector._thread_classifier() not in classifiers
+    assert boxes == [expected] * 9
+
+
+def test_camera_face_size_sets_detection_scale():
+    """A camera's expected face size picks its detection scale; crops stay full resolution."""
+    with tempfile.TemporaryDirectory() as tmp:
+        config = Config(
+            api_token="",
+            detector_backend="none",
+            embedding_model_path=str(Path(tmp) / "embedding.onnx"),
+            embeddings_dir=str(Path(tmp) / "embeddings"),
+            identity_db_path=str(Path(tmp) / "identities.db"),
+            review_dir=str(Path(tmp) / "review"),
+            image_dir=str(Path(tmp) / "images"),
+            camera_face_sizes=[{"camera": "driveway", "min_face_size": 160}],
+        )
+        api = FaceRecognitionAPI(config)
+        detector = FixedBoxDetector(box=(100, 50, 40, 40), min_face_size=40)
+        api.pipeline.detector = detector
+        _, encoded = cv2.imencode(".jpg", make_frame(1920, 1080))
+
+        result = api.pipeline.recognize(encoded.tobytes(), {"camera": "driveway"})
+        assert detector.level_shapes == [(135, 240)]
+        assert result["faces"][0]["box"] == [800, 400, 320, 320]
+        crops = list((Path(tmp) / "review").rglob("*.jpg"))
+        assert len(crops) == 1 and cv2.imread(str(crops[0])).shape == (320, 320, 3)
+
+        result = api.pipeline.recognize(encoded.tobytes(), {"camera": "garden"})
+        assert detector.level_shapes[1] == (540, 960)
+        assert result["faces"][0]["box"] == [200, 100, 80, 80]
+
+    try:
+        Config(camera_face_sizes=[{"camera": "driveway", "min_face_size": 0}])
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("min_face_size 0 accepted")
+
+
+def test_recognize_with_detector():
+    """A decodable frame is processed; an undecodable one returns 422."""
+    client = FaceRecognitionAPI(Config(api_token="")).app.test_client()
+
+    _, encoded = cv2.imencode(".jpg", make_frame())
+    response = client.post("/recognize", data=encoded.tobytes(), headers=RAW_HEADERS)
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data["status"] == "processed"
+    assert data["face_count"] == 0 and data["faces"] == []
+    assert "decode" in data["timings_ms"] and "detection" in data["timings_ms"]
+
+    response = client.post("/recognize", data=b"not an image", headers=RAW_HEADERS)
+    assert response.status_code == 422
+    assert response.get_json()["status"] == "invalid_image"
+
+
+def main():
+    """Run all tests."""
+    tests = [
+        test_decode_image,
+        test_pyramid_starts_at_min_face_scale,
+        test_boxes_mapped_to_full_frame_with_crop_views,
+        test_pyramid_duplicates_merged,
+        test_haar_detector_on_blank_frame,
+        test_create_detector,
+        test_missing_yunet_model_falls_back_to_haar,
+        test_yunet_input_size_is_per_thread,
+        test_haar_classifier_is_per_thread,
+        test_camera_face_size_sets_detection_scale,
+        test_recognize_with_detector,
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"[OK] {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"[FAIL] {test.__name__}: {e}")
+
+    print(f"Results: {len(tests) - failed}/{len(tests)} tests passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""Tests for the persistent Drive upload queue.
+
+Runs the Drive client against a local stand-in server implementing the
+token, files.list, files.create and multipart upload endpoints, so no
+Google account is required.
+
+Usage:
+    python test_drive_upload.py
+"""
+
+import json
+import logging
+import re
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+
+from face_recognition_addon.drive_upload import (
+    UPLOAD_UPLOADING,
+    DriveClient,
+    UploadQueue,
+    parse_credentials,
+)
+
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+CREDENTIALS = {"client_id": "id", "client_secret": "secret", "refresh_token": "refresh"}
+ROOT_FOLDER = "faces-root"
+
+
+class FakeDriveHandler(BaseHTTPRequestHandler):
+    """Stand-in for the Drive v3 REST API (keep-alive, like Google's servers)."""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status: int, body: dict, headers: dict = None):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _body(self) -> bytes:
+        return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+    def do_GET(self):
+        drive = self.server.drive
+        drive.connections.add(self.client_address)
+        query = parse_qs(urlparse(self.path).query).get("q", [""])[0]
+        name = re.search(r"name = '([^']+)'", query)
+        parent = re.search(r"'([^']+)' in parents", query)
+        content_hash = re.search(r"value='([^']+)'", query)
+        found = [
+            {"id": file_id} for file_id, f in drive.files.items()
+            if (not name or f["name"] == name.group(1))
+            and (not parent or parent.group(1) in f.get("parents", []))
+            and (not content_hash
+                 or f.get("appProperties", {}).get("content_hash") == content_hash.group(1))
+        ]
+        self._reply(200, {"files": found})
+
+    def do_POST(self):
+        drive = self.server.drive
+        drive.connections.add(self.client_address)
+        path = urlparse(self.path).path
+        body = self._body()
+        if path == "/token":
+            drive.token_requests += 1
+            self._reply(200, {"access_token": "token", "expires_in": 3600})
+            return
+        if self.headers.get("Authorization") != "Bearer token":
+            self._reply(401, {"error": {"errors": [{"reason": "authError"}]}})
+            return
+        if path == "/drive/v3/files":
+            self._reply(200, {"id": drive.add(json.loads(body), b"")})
+            return
+        if drive.failures:
+            status, headers, reason = drive.failures.pop(0)
+            self._reply(status, {"error": {"errors": [{"reason": reason}]}}, headers)
+            return
+        boundary = self.headers["Content-Type"].split("boundary=")[1].encode()
+        parts = [p for p in body.split(b"--" + boundary) if p.strip() not in (b"", b"--")]
+        metadata = json.loads(parts[0].split(b"\r\n\r\n", 1)[1].strip())
+        data = parts[1].split(b"\r\n\r\n", 1)[1][:-2]
+        self._reply(200, {"id": drive.add(metadata, data)})
+
+
+class FakeDrive:
+    """A running stand-in Drive server and what was uploaded to it."""
+
+    def __init__(self):
+        self.files = {}
+        self.connections = set()
+        self.token_requests = 0
+        self.failures = []  # (status, headers, reason) returned by the next uploads
+        self._next_id = 0
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), FakeDriveHandler)
+        self.server.drive = self
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def add(self, metadata: dict, data: bytes) -> str:
+        self._next_id += 1
+        file_id = f"file{self._next_id}"
+        self.files[file_id] = {**metadata, "data": data}
+        return file_id
+
+    def named(self, suffix: str):
+        return [f for f in self.files.values() if f["name"].endswith(suffix)]
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def make_queue(tmp: str, drive: FakeDrive, **kwargs) -> UploadQueue:
+    """Upload queue in tmp talking to the stand-in server."""
+    client = DriveClient(CREDENTIALS, ROOT_FOLDER, api_base=drive.url, token_url=f"{drive.url}/token")
+    return UploadQueue(Path(tmp) / "uploads.db", client, **kwargs)
+
+
+def add_face(tmp: str, queue: UploadQueue, index: int, data: bytes = None) -> bool:
+    """Write a crop file and queue it."""
+    face_id = f"img_20260101_000000_abcd_face_{index}"
+    crop = data or f"jpeg-bytes-{index}".encode()
+    path = Path(tmp) / f"{face_id}.jpg"
+    path.write_bytes(crop)
+    return queue.enqueue(face_id, path, crop, {"face_id": face_id, "needs_review": True})
+
+
+def test_batch_uploads_over_one_session():
+    """A batch of crops and sidecars goes up over one connection and token."""
+    drive = FakeDrive()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            queue = make_queue(tmp, drive, batch_size=8)
+            for i in range(5):
+                assert add_face(tmp, queue, i)
+            assert queue.stats()["depth"] == 5
+
+            assert queue.drain_batch() == 5
+            stats = queue.stats()
+            assert stats["depth"] == 0 and stats["done"] == 5 and stats["uploaded"] == 5
+            assert stats["faces_per_minute"] > 0
+
+            assert len(drive.named(".jpg")) == 5 and len(drive.named(".json")) == 5
+            review = [i for i, f in drive.files.items() if f["name"] == "review"]
+            assert len(review) == 1
+            assert all(f["parents"] == review for f in drive.named(".jpg"))
+            sidecar = drive.named("_face_0.json")[0]
+            assert json.loads(sidecar["data"])["needs_review"] is True
+            assert drive.named("_face_3.jpg")[0]["data"] == b"jpeg-bytes-3"
+            assert len(drive.connections) == 1 and drive.token_requests == 1
+    finally:
+        drive.close()
+
+
+def test_dedupe_survives_restart():
+    """The same crop is queued once, also after reopening the queue."""
+    drive = FakeDrive()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            queue = make_queue(tmp, drive)
+            assert add_face(tmp, queue, 0, b"same crop")
+            assert not add_face(tmp, queue, 1, b"same crop")
+            queue.drain_batch()
+
+            reopened = make_queue(tmp, drive)
+            assert not add_face(tmp, reopened, 2, b"same crop")
+            assert reopened.drain_batch() == 0
+            assert len(drive.named(".jpg")) == 1
+            assert reopened.stats()["deduplicated"] == 1
+    finally:
+        drive.close()
+
+
+def test_rate_limits_back_off():
+    """429 and rate-limit 403s pause the queue, then the batch is retried in order."""
+    drive = FakeDrive()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            queue = make_queue(tmp, drive, backoff_base=0.3)
+            for i in range(3):
+                add_face(tmp, queue, i)
+            drive.failures = [(403, {}, "userRateLimitExceeded"), (429, {}, "rateLimitExceeded")]
+
+            queue.drain_batch()
+            stats = queue.stats()
+            assert stats["depth"] == 3 and stats["backoff_seconds"] > 0
+            assert "userRateLimitExceeded" in stats["last_error"]
+            assert queue.drain_batch() == 0  # still backing off
+
+            deadline = time.time() + 5
+            while queue.stats()["done"] < 3 and time.time() < deadline:
+                queue.drain_batch()
+                time.sleep(0.02)
+            assert queue.stats()["done"] == 3 and not drive.failures
+            assert len(drive.named(".jpg")) == 3
+    finally:
+        drive.close()
+
+
+def test_interrupted_upload_is_not_repeated():
+    """A crop uploaded before a crash is found on Drive instead of re-uploaded."""
+    drive = FakeDrive()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            queue = make_queue(tmp, drive)
+            add_face(tmp, queue, 0)
+            content_hash, face_id = queue._connection().execute(
+                "SELECT content_hash, face_id FROM uploads").fetchone()
+            # Crash after the crop upload, before it was recorded
+            queue.client.upload(f"{face_id}.jpg", b"jpeg-bytes-0", "image/jpeg", content_hash)
+            with queue._connection() as conn:
+                conn.execute("UPDATE uploads SET state = ?", (UPLOAD_UPLOADING,))
+
+            restarted = make_queue(tmp, drive)
+            restarted.recover()
+            assert restarted.drain_batch() == 1
+            assert len(drive.named(".jpg")) == 1 and len(drive.named(".json")) == 1
+            assert restarted.stats()["done"] == 1
+    finally:
+        drive.close()
+
+
+def test_unexpected_errors_requeue_rows():
+    """A non-Drive error fails only its row's attempt; no row is left uploading."""
+    drive = FakeDrive()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            queue = make_queue(tmp, drive, backoff_base=0.05)
+            for i in range(3):
+                add_face(tmp, queue, i)
+            upload = queue.client.upload
+
+            def broken_upload(name, *args):
+                if name.endswith("_face_1.jpg"):
+                    raise KeyError("id")
+                return upload(name, *args)
+
+            queue.client.upload = broken_upload
+            assert queue.drain_batch() == 3
+            states = dict(queue._connection().execute("SELECT face_id, state FROM uploads").fetchall())
+            assert UPLOAD_UPLOADING not in states.values()
+            assert queue.stats()["done"] == 2 and queue.stats()["depth"] == 1
+            assert "KeyError" in queue.stats()["last_error"]
+
+            # An error escaping the batch (here: recording the failure) still requeues the rest
+            add_face(tmp, queue, 3)
+            queue._retry_later = None
+            time.sleep(0.2)
+            try:
+                queue.drain_batch()
+            except TypeError:
+                pass
+            else:
+                raise AssertionError("expected TypeError")
+            states = queue._connection().execute("SELECT state FROM uploads").fetchall()
+            assert (UPLOAD_UPLOADING,) not in states
+    finally:
+        drive.close()
+
+
+def test_background_worker_and_credentials():
+    """The worker thread drains new rows; secrets parse from JSON or YAML repr."""
+    assert parse_credentials(json.dumps(CREDENTIALS)) == CREDENTIALS
+    assert parse_credentials(str(CREDENTIALS)) == CREDENTIALS
+    assert parse_credentials("not credentials") is None
+
+    drive = FakeDrive()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            queue = make_queue(tmp, drive)
+            queue.ensure_running()
+            add_face(tmp, queue, 0)
+            deadline = time.time() + 5
+            while queue.stats()["done"] < 1 and time.time() < deadline:
+                time.sleep(0.02)
+            queue.stop(5)
+            assert queue.stats()["done"] == 1
+    finally:
+        drive.close()
+
+
+def main():
+    """Run all tests."""
+    tests = [
+        test_batch_uploads_over_one_session,
+        test_dedupe_survives_restart,
+        test_rate_limits_back_off,
+        test_interrupted_upload_is_not_repeated,
+        test_unexpected_errors_requeue_rows,
+        test_background_worker_and_credentials,
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"[OK] {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"[FAIL] {test.__name__}: {e}")
+
+    print(f"Results: {len(tests) - failed}/{len(tests)} tests passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""Tests for the batched ONNX embedding engine.
+
+Builds a tiny random ONNX model, so no trained model is required.
+
+Usage:
+    python test_embedding.py
+"""
+
+import logging
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import onnx
+from onnx import TensorProto, helper, numpy_helper
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+
+from face_recognition_addon.config import Config
+from face_recognition_addon.embedding import (
+    EmbeddingEngine,
+    quantize_model,
+    variant_path,
+)
+from face_recognition_addon.gallery import Gallery
+from face_recognition_addon.model_manager import STATE_EMPTY, ModelManager
+
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+DIMENSION = 16
+
+
+def build_model(path: Path, size: int = 112):
+    """Write a tiny conv -> pool -> dense ONNX model with a dynamic batch."""
+    rng = np.random.default_rng(0)
+    initializers = [
+        numpy_helper.from_array(rng.standard_normal((8, 3, 3, 3)).astype(np.float32), "conv_w"),
+        numpy_helper.from_array(rng.standard_normal((8, DIMENSION)).astype(np.float32), "fc_w"),
+        numpy_helper.from_array(np.zeros(DIMENSION, dtype=np.float32), "fc_b"),
+    ]
+    nodes = [
+        helper.make_node("Conv", ["input", "conv_w"], ["conv"], strides=[2, 2], pads=[1, 1, 1, 1]),
+        helper.make_node("Relu", ["conv"], ["relu"]),
+        helper.make_node("GlobalAveragePool", ["relu"], ["pool"]),
+        helper.make_node("Flatten", ["pool"], ["flat"]),
+        helper.make_node("Gemm", ["flat", "fc_w", "fc_b"], ["embedding"]),
+    ]
+    graph = helper.make_graph(
+        nodes, "tiny_embedding",
+        [helper.make_tensor_value_info("input", TensorProto.FLOAT, ["N", 3, size, size])],
+        [helper.make_tensor_value_info("embedding", TensorProto.FLOAT, ["N", DIMENSION])],
+        initializers,
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 13)])
+    model.ir_version = 8
+    onnx.save(model, str(path))
+
+
+def make_crops(count: int):
+    """Random BGR crops of different sizes (like real detections)."""
+    rng = np.random.default_rng(1)
+    return [rng.integers(0, 255, (80 + 7 * i, 64 + 5 * i, 3), dtype=np.uint8) for i in range(count)]
+
+
+def test_variant_path():
+    """Precision variants live next to the float32 model."""
+    assert variant_path("/m/embedding.onnx", "fp32") == Path("/m/embedding.onnx")
+    assert variant_path("/m/embedding.onnx", "int8") == Path("/m/embedding.int8.onnx")
+    assert variant_path("/m/embedding.onnx", "fp16") == Path("/m/embedding.fp16.onnx")
+
+
+def test_batch_embeddings_are_normalized():
+    """A batch of crops gives one unit vector per crop from a contiguous batch."""
+    with tempfile.TemporaryDirectory() as tmp:
+        model_path = Path(tmp) / "embedding.onnx"
+        build_model(model_path)
+        engine = EmbeddingEngine(model_path, intra_op_threads=1)
+
+        crops = make_crops(5)
+        batch = engine.preprocess(crops)
+        assert batch.shape == (5, 3, 112, 112)
+        assert batch.dtype == np.float32 and batch.flags["C_CONTIGUOUS"]
+
+        embeddings = engine.embed(crops)
+        assert embeddings.shape == (5, DIMENSION)
+        assert embeddings.dtype == np.float32
+        assert np.allclose(np.linalg.norm(embeddings, axis=1), 1.0, atol=1e-5)
+
+        # Batched and one-by-one results agree; prepared batches are accepted
+        single = np.concatenate([engine.embed([crop]) for crop in crops])
+        assert np.allclose(embeddings, single, atol=1e-5)
+        assert np.allclose(engine.embed(batch), embeddings, atol=1e-6)
+        assert engine.embed([]).shape == (0, DIMENSION)
+
+
+def test_quantized_variants_match_fp32():
+    """fp16 and int8 variants load by precision and stay close to fp32."""
+    with tempfile.TemporaryDirectory() as tmp:
+        model_path = Path(tmp) / "embedding.onnx"
+        build_model(model_path)
+        crops = make_crops(4)
+        engine = EmbeddingEngine(model_path)
+        reference = engine.embed(crops)
+        calibration = engine.preprocess(make_crops(8))
+
+        for precision in ("fp16", "int8"):
+            assert quantize_model(model_path, precision, calibration).exists()
+            engine = EmbeddingEngine(model_path, precision=precision)
+            embeddings = engine.embed(crops)
+            cosine = np.sum(embeddings * reference, axis=1)
+            assert np.all(cosine > 0.99), f"{precision}: {cosine}"
+
+        try:
+            quantize_model(model_path, "int8")
+            raise AssertionError("Expected ValueError without calibration data")
+        except ValueError:
+            pass
+
+
+def test_missing_model_is_bootstrap():
+    """Without an installed model no embedder is loaded."""
+    config = Config(embedding_model_path="/nonexistent/embedding.onnx")
+    manager = ModelManager(config, lambda version: Gallery())
+    assert not manager.load()
+    assert manager.active is None and manager.state == STATE_EMPTY
+    try:
+        EmbeddingEngine(config.embedding_model_path, precision="int8")
+        raise AssertionError("Expected FileNotFoundError")
+    except FileNotFoundError:
+        pass
+
+
+def main():
+    """Run all tests."""
+    tests = [
+        test_variant_path,
+        test_batch_embeddings_are_normalized,
+        test_quantized_variants_match_fp32,
+        test_missing_model_is_bootstrap,
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"[OK] {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"[FAIL] {test.__name__}: {e}")
+
+    print(f"Results: {len(tests) - failed}/{len(tests)} tests passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""Tests for the memory-mapped embedding store.
+
+Usage:
+    python test_embedding_store.py
+"""
+
+import logging
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+
+from face_recognition_addon.ann import fingerprint
+from face_recognition_addon.embedding_store import (
+    EmbeddingStore,
+    open_store,
+    save_gallery,
+    store_path,
+    write_store,
+)
+from face_recognition_addon.gallery import Gallery
+
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+DIMENSION = 16
+
+
+def make_gallery(rows: int = 30, seed: int = 0) -> Gallery:
+    """Gallery with a few embeddings per person (including a non-ASCII id)."""
+    rng = np.random.default_rng(seed)
+    embeddings = rng.standard_normal((rows, DIMENSION)).astype(np.float32)
+    person_ids = [f"person_{i % 7}" if i % 7 else "zoë" for i in range(rows)]
+    return Gallery.from_arrays(embeddings, person_ids)
+
+
+def test_roundtrip_is_memory_mapped():
+    """A saved gallery reopens as read-only views of the mapped file."""
+    gallery = make_gallery()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = save_gallery(gallery, tmp, "model-abc")
+        assert path == store_path(tmp, "model-abc")
+
+        store = EmbeddingStore(path)
+        assert len(store) == 30 and store.dimension == DIMENSION
+        assert store.model_version == "model-abc"
+        assert store.fingerprint == fingerprint(gallery.matrix)
+        assert store.person_ids == gallery.person_ids
+        assert np.array_equal(store.matrix, gallery.matrix)
+        assert np.array_equal(store.person_index, gallery.person_index)
+        assert not store.matrix.flags.writeable and not store.matrix.flags.owndata
+
+
+def test_gallery_from_store_copies_on_write():
+    """A gallery uses the mapped rows in place until it is modified."""
+    source = make_gallery()
+    with tempfile.TemporaryDirectory() as tmp:
+        store = EmbeddingStore(save_gallery(source, tmp, "v1"))
+        gallery = Gallery.from_store(store, {"zoë": "Zoë"})
+        assert gallery.stats()["memory_mapped"]
+        assert np.shares_memory(gallery.matrix, store.matrix)
+
+        query = source.matrix[:3]
+        assert [m["person_id"] for m in gallery.match(query)] == \
+            [m["person_id"] for m in source.match(query)]
+        assert gallery.match(source.matrix[:1])[0]["display_name"] == "Zoë"
+
+        gallery.add("newcomer", np.ones(DIMENSION, dtype=np.float32))
+        assert not gallery.stats()["memory_mapped"]
+        assert len(gallery) == 31 and len(store) == 30
+
+
+def test_versions_coexist_and_replace_is_atomic():
+    """Stores are per model version; rewriting keeps old mappings readable."""
+    with tempfile.TemporaryDirectory() as tmp:
+        old = EmbeddingStore(save_gallery(make_gallery(10, seed=1), tmp, "v1"))
+        new = EmbeddingStore(save_gallery(make_gallery(20, seed=2), tmp, "v2"))
+        assert (len(old), len(new)) == (10, 20)
+        assert open_store(tmp, "v3") is None
+
+        before = old.matrix.copy()
+        save_gallery(make_gallery(5, seed=3), tmp, "v1")
+        assert np.array_equal(old.matrix, before)
+        assert len(open_store(tmp, "v1")) == 5
+        assert not list(Path(tmp).glob("*.tmp"))
+
+
+def test_invalid_files_rejected():
+    """Truncated or foreign files are not mapped."""
+    with tempfile.TemporaryDirectory() as tmp:
+        bad = Path(tmp) / "bad.emb"
+        bad.write_bytes(b"not a store" * 20)
+        try:
+            EmbeddingStore(bad)
+            raise AssertionError("Expected ValueError")
+        except ValueError:
+            pass
+
+        path = write_store(store_path(tmp, "v1"), np.ones((4, DIMENSION)), np.zeros(4), ["a"], "v1")
+        path.write_bytes(path.read_bytes()[:200])
+        assert open_store(tmp, "v1") is None
+
+
+def main():
+    """Run all tests."""
+    tests = [
+        test_roundtrip_is_memory_mapped,
+        test_gallery_from_store_copies_on_write,
+        test_versions_coexist_and_replace_is_atomic,
+        test_invalid_files_rejected,
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"[OK] {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"[FAIL] {test.__name__}: {e}")
+
+    print(f"Results: {len(tests) - failed}/{len(tests)} tests passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""Tests for the camera_paths filesystem watcher.
+
+Usage:
+    python test_fs_watcher.py
+"""
+
+import logging
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+
+from face_recognition_addon.api import FaceRecognitionAPI
+from face_recognition_addon.config import Config
+from face_recognition_addon.fs_watcher import CameraPathWatcher, WorkItem, WorkQueue
+from face_recognition_addon.jobs import QueueFullError
+
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+
+class Recorder:
+    """Watcher callback that records the files (and their content) it was given."""
+
+    def __init__(self, fail_first: int = 0):
+        self.items = []
+        self.contents = {}
+        self.batches = 0
+        self.fail_first = fail_first
+        self.lock = threading.Lock()
+
+    def __call__(self, items):
+        if self.fail_first:
+            self.fail_first -= 1
+            raise QueueFullError(0)
+        with self.lock:
+            self.batches += 1
+            for item in items:
+                self.items.append(item)
+                self.contents[item.path.name] = item.path.read_bytes()
+
+    def names(self):
+        with self.lock:
+            return sorted(item.path.name for item in self.items)
+
+
+def wait_until(predicate, timeout: float = 5.0) -> bool:
+    """Poll predicate until it is true or timeout passes."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return predicate()
+
+
+def make_config(tmp: str, **options) -> Config:
+    """Config watching <tmp>/front_door with state in tmp."""
+    camera = Path(tmp) / "front_door"
+    camera.mkdir(exist_ok=True)
+    return Config(
+        camera_paths=[str(camera)],
+        watch_state_path=str(Path(tmp) / "watch_state.json"),
+        watch_debounce_seconds=0.2,
+        **options,
+    )
+
+
+def start(config: Config, recorder: Recorder) -> CameraPathWatcher:
+    """Start a watcher and wait until it is watching."""
+    watcher = CameraPathWatcher(config, recorder)
+    watcher.ensure_running()
+    assert wait_until(lambda: watcher.active and watcher.stats()["watched_directories"] >= 1)
+    return watcher
+
+
+def test_debounces_partially_written_files():
+    """A file written in several open/close rounds is processed once, complete."""
+    with tempfile.TemporaryDirectory() as tmp:
+        config = make_config(tmp)
+        recorder = Recorder()
+        watcher = start(config, recorder)
+        assert watcher.stats()["inotify"]
+
+        path = Path(config.camera_paths[0]) / "snap.jpg"
+        for chunk in (b"part1", b"part2", b"part3"):
+            with open(path, "ab") as f:
+                f.write(chunk)
+            time.sleep(0.1)
+
+        assert wait_until(lambda: recorder.names() == ["snap.jpg"])
+        time.sleep(0.4)
+        assert recorder.names() == ["snap.jpg"]
+        assert recorder.contents["snap.jpg"] == b"part1part2part3"
+        assert recorder.items[0].camera == "front_door"
+        watcher.stop(5)
+
+
+def test_filters_and_subdirectories():
+    """Only watched extensions are processed, including in new subdirectories and moved-in files."""
+    with tempfile.TemporaryDirectory() as tmp:
+        config = make_config(tmp)
+        recorder = Recorder()
+        watcher = start(config, recorder)
+        camera = Path(config.camera_paths[0])
+
+        (camera / "notes.txt").write_bytes(b"x")
+        (camera / ".hidden.jpg").write_bytes(b"x")
+        (camera / "upper.JPG").write_bytes(b"x")
+        staged = Path(tmp) / "staged.png"
+        staged.write_bytes(b"x")
+        staged.rename(camera / "moved.png")
+        (camera / "2024-06-01").mkdir()
+        (camera / "2024-06-01" / "nested.jpg").write_bytes(b"x")
+
+        assert wait_until(lambda: recorder.names() == ["moved.png", "nested.jpg", "upper.JPG"]), recorder.names()
+        assert watcher.stats()["watched_directories"] == 2
+        watcher.stop(5)
+
+
+def test_catches_up_from_high_water_mark():
+    """Files written while the watcher was stopped are processed on start, once."""
+    with tempfile.TemporaryDirectory() as tmp:
+        config = make_config(tmp)
+        camera = Path(config.camera_paths[0])
+        recorder = Recorder()
+        watcher = start(config, recorder)
+        (camera / "a.jpg").write_bytes(b"a")
+        assert wait_until(lambda: recorder.names() == ["a.jpg"])
+        watcher.stop(5)
+
+        for name in ("b.jpg", "c.jpg"):
+            (camera / name).write_bytes(name.encode())
+        time.sleep(0.3)
+
+        recorder = Recorder()
+        watcher = start(config, recorder)
+        assert wait_until(lambda: recorder.names() == ["b.jpg", "c.jpg"]), recorder.names()
+        assert watcher.stats()["caught_up"] == 2
+        watcher.stop(5)
+
+        # Nothing new: nothing is processed again
+        recorder = Recorder()
+        watcher = start(config, recorder)
+        time.sleep(0.5)
+        assert recorder.names() == []
+        watcher.stop(5)
+
+
+def test_failed_batch_is_retried_on_catch_up():
+    """A batch that fails does not advance the high-water mark, so the next start retries it."""
+    with tempfile.TemporaryDirectory() as tmp:
+        config = make_config(tmp)
+        camera = Path(config.camera_paths[0])
+
+        def broken(items):
+            raise RuntimeError("recognition failed")
+
+        watcher = start(config, broken)
+        (camera / "a.jpg").write_bytes(b"a")
+        assert wait_until(lambda: watcher.stats()["failed"] == 1)
+        watcher.stop(5)
+
+        recorder = Recorder()
+        watcher = start(config, recorder)
+        assert wait_until(lambda: recorder.names() == ["a.jpg"]), recorder.names()
+        watcher.stop(5)
+
+
+def test_burst_of_files():
+    """Hundreds of files written at once are all processed, in batches."""
+    with tempfile.TemporaryDirectory() as tmp:
+        config = make_config(tmp, max_batch_size=16)
+        camera = Path(config.camera_paths[0])
+        recorder = Recorder(fail_first=1)
+        watcher = start(config, recorder)
+
+        for i in range(300):
+            (camera / f"burst_{i:03d}.jpg").write_bytes(b"x")
+        assert wait_until(lambda: len(recorder.names()) == 300, timeout=10), len(recorder.names())
+        assert recorder.batches < 300 and watcher.stats()["dropped"] == 0
+        assert watcher.stats()["processed"] == 300
+        watcher.stop(5)
+
+
+def test_queue_drops_oldest():
+    """A full work queue drops its oldest item and ignores already queued paths."""
+    queue = WorkQueue(3)
+    items = [WorkItem(Path(f"/cam/{i}.jpg"), "cam", "/cam", i, 1) for i in range(5)]
+    for item in items[:3]:
+        assert queue.put(item) is None
+    assert queue.put(items[0]) is None and len(queue) == 3
+    assert queue.put(items[3]).path == items[0].path
+    assert queue.put(items[4]).path == items[1].path
+    assert [item.path.name for item in queue.get_batch(10)] == ["2.jpg", "3.jpg", "4.jpg"]
+    assert queue.dropped == 2 and queue.get_batch(10, timeout=0.01) == []
+
+
+def test_api_recognizes_watched_files():
+    """The API recognizes watched snapshots and emits file_recognition events."""
+    with tempfile.TemporaryDirectory() as tmp:
+        events = []
+        config = make_config(
+            tmp,
+            detector_backend="haar",
+            embedding_model_path=str(Path(tmp) / "embedding.onnx"),
+            embeddings_dir=str(Path(tmp) / "embeddings"),
+            identity_db_path=str(Path(tmp) / "identities.db"),
+            review_dir=str(Path(tmp) / "review"),
+            image_dir=str(Path(tmp) / "images"),
+        )
+        api = FaceRecognitionAPI(config, event_callback=events.append)
+        client = api.app.test_client()
+        assert client.get("/status").get_json()["watcher"]["paths"] == config.camera_paths
+        assert wait_until(lambda: api.watcher.active)
+
+        frame = np.random.default_rng(0).integers(0, 255, (120, 160, 3), dtype=np.uint8)
+        path = Path(config.camera_paths[0]) / "snapshot.jpg"
+        path.write_bytes(cv2.imencode(".jpg", frame)[1].tobytes())
+
+        assert wait_until(lambda: len(events) == 1)
+        assert events[0]["type"] == "file_recognition" and events[0]["path"] == str(path)
+        assert events[0]["camera"] == "front_door" and events[0]["status"] == "processed"
+        assert client.get("/status").get_json()["watcher"]["processed"] == 1
+        api.watcher.stop(5)
+
+
+def test_failing_file_does_not_fail_batch():
+    """A clip or image that fails to recognize is skipped; the other files still get results."""
+    with tempfile.TemporaryDirectory() as tmp:
+        events = []
+        config = make_config(
+            tmp,
+            detector_backend="none",
+            embedding_model_path=str(Path(tmp) / "embedding.onnx"),
+            embeddings_dir=str(Path(tmp) / "embeddings"),
+            identity_db_path=str(Path(tmp) / "identities.db"),
+            review_dir=str(Path(tmp) / "review"),
+            image_dir=str(Path(tmp) / "images"),
+        )
+        api = FaceRecognitionAPI(config, event_callback=events.append)
+        recognize_batch = api.pipeline.recognize_batch
+
+        def broken_clip(data, metadata):
+            raise RuntimeError("PyAV is not installed")
+
+        def picky_batch(images, **kwargs):
+            if any(data == b"bad" for data, _ in images):
+                raise ValueError("bad image")
+            return recognize_batch(images, **kwargs)
+
+        api.pipeline.recognize_clip = broken_clip
+        api.pipeline.recognize_batch = picky_batch
+        folder = Path(config.camera_paths[0])
+        items = []
+        for name, data in (("event.mp4", b"clip"), ("bad.jpg", b"bad"), ("good.jpg", b"good")):
+            (folder / name).write_bytes(data)
+            items.append(WorkItem(folder / name, "front_door", str(folder), time.time_ns(), len(data)))
+
+        results = api._recognize_files(items)
+        assert len(results) == 1
+        assert [event["path"] for event in events] == [str(folder / "good.jpg")]
+
+
+def test_failed_recognition_job_counts_as_failed():
+    """A recognition job that fails makes the watcher count its batch as failed."""
+    with tempfile.TemporaryDirectory() as tmp:
+        config = make_config(
+            tmp,
+            detector_backend="none",
+            embedding_model_path=str(Path(tmp) / "embedding.onnx"),
+            embeddings_dir=str(Path(tmp) / "embeddings"),
+            identity_db_path=str(Path(tmp) / "identities.db"),
+            review_dir=str(Path(tmp) / "review"),
+            image_dir=str(Path(tmp) / "images"),
+        )
+        api = FaceRecognitionAPI(config)
+
+        def broken(items):
+            raise OSError("disk gone")
+
+        api._recognize_files = broken
+        api.start_background_tasks()
+        assert wait_until(lambda: api.watcher.active)
+        (Path(config.camera_paths[0]) / "snapshot.jpg").write_bytes(b"jpeg")
+
+        assert wait_until(lambda: api.watcher.stats()["failed"] == 1)
+        assert api.watcher.stats()["processed"] == 0
+        api.watcher.stop(5)
+
+
+def main():
+    """Run all tests."""
+    tests = [
+        test_debounces_partially_written_files,
+        test_filters_and_subdirectories,
+        test_catches_up_from_high_water_mark,
+        test_failed_batch_is_retried_on_catch_up,
+        test_burst_of_files,
+        test_queue_drops_oldest,
+        test_api_recognizes_watched_files,
+        test_failing_file_does_not_fail_batch,
+        test_failed_recognition_job_counts_as_failed,
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"[OK] {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"[FAIL] {test.__name__}: {e}")
+
+    print(f"Results: {len(tests) - failed}/{len(tests)} tests passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""Tests for the vectorized identity gallery.
+
+Usage:
+    python test_gallery.py
+"""
+
+import logging
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+
+from face_recognition_addon.ann import IVFIndex
+from face_recognition_addon.gallery import UNKNOWN_PERSON, Gallery
+
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+DIMENSION = 32
+
+
+def unit(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalize rows."""
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def make_gallery(people: int = 20, per_person: int = 3):
+    """Gallery of random identities with a few noisy embeddings each."""
+    rng = np.random.default_rng(0)
+    centers = unit(rng.standard_normal((people, DIMENSION)).astype(np.float32))
+    embeddings = np.repeat(centers, per_person, axis=0)
+    embeddings += 0.05 * rng.standard_normal(embeddings.shape).astype(np.float32)
+    person_ids = [f"person_{i}" for i in range(people) for _ in range(per_person)]
+    gallery = Gallery.from_arrays(embeddings, person_ids, {"person_3": "Alice"})
+    return gallery, centers
+
+
+def test_matrix_is_contiguous_and_normalized():
+    """Enrolled embeddings are stored as one normalized float32 matrix."""
+    gallery, _ = make_gallery()
+    matrix = gallery.matrix
+    assert matrix.shape == (60, DIMENSION) and matrix.dtype == np.float32
+    assert matrix.flags["C_CONTIGUOUS"]
+    assert np.allclose(np.linalg.norm(matrix, axis=1), 1.0, atol=1e-5)
+    assert gallery.person_index.shape == (60,)
+    assert gallery.person_count == 20
+
+
+def test_match_batch_and_thresholds():
+    """A batch is matched in one call and thresholds route decisions."""
+    gallery, centers = make_gallery()
+    rng = np.random.default_rng(1)
+    stranger = unit(rng.standard_normal((1, DIMENSION)).astype(np.float32))
+    # Halfway between person 5 and a stranger: similarity in the review band
+    borderline = unit(centers[5:6] + 0.9 * stranger)
+    queries = np.concatenate([centers[3:4], centers[7:8], stranger, borderline])
+
+    results = gallery.match(queries)
+    assert len(results) == 4
+
+    assert results[0]["person_id"] == "person_3"
+    assert results[0]["display_name"] == "Alice"
+    assert results[0]["confidence"] >= 0.75 and not results[0]["needs_review"]
+    assert results[1]["person_id"] == "person_7"
+    assert results[1]["display_name"] == "person_7"
+
+    assert results[2]["person_id"] == UNKNOWN_PERSON and results[2]["needs_review"]
+
+    assert 0.60 <= results[3]["confidence"] < 0.75, results[3]
+    assert results[3]["person_id"] == "person_5" and results[3]["needs_review"]
+
+
+def test_top_k_matches_brute_force():
+    """argpartition top-k agrees with a full sort."""
+    gallery, centers = make_gallery()
+    queries = unit(centers[:4] + 0.3)
+    rows, scores = gallery.search(queries, k=5)
+    expected = np.argsort(-(queries @ gallery.matrix.T), axis=1)[:, :5]
+    assert np.array_equal(rows, expected)
+    assert np.all(np.diff(scores, axis=1) <= 0)
+
+    candidates = gallery.match(queries[:1], k=6)[0]["candidates"]
+    assert len({c["person_id"] for c in candidates}) == len(candidates)
+
+
+def test_add_remove_and_empty():
+    """Enrolment grows the gallery; removal drops every row of a person."""
+    gallery = Gallery()
+    assert gallery.match(np.ones((2, DIMENSION), dtype=np.float32)) == [
+        {"person_id": UNKNOWN_PERSON, "display_name": "Unknown Person",
+         "confidence": 0.0, "needs_review": True}
+    ] * 2
+
+    rng = np.random.default_rng(2)
+    for i in range(100):
+        gallery.add(f"p{i % 10}", rng.standard_normal((2, DIMENSION)))
+    assert len(gallery) == 200 and gallery.person_count == 10
+
+    snapshot = gallery.matrix
+    assert gallery.remove("p3") == 20
+    assert gallery.remove("missing") == 0
+    assert len(gallery) == 180 and "p3" not in {
+        gallery.person_ids[i] for i in gallery.person_index
+    }
+    # Readers holding the old snapshot are unaffected
+    assert snapshot.shape == (200, DIMENSION)
+
+    try:
+        gallery.add("p0", np.ones(DIMENSION + 1))
+        raise AssertionError("Expected ValueError")
+    except ValueError:
+        pass
+
+
+def make_clustered(people: int, per_person: int, seed: int = 0):
+    """Embeddings with low intrinsic dimension, like real face embeddings."""
+    rng = np.random.default_rng(seed)
+    basis = rng.standard_normal((16, DIMENSION)).astype(np.float32)
+    centers = unit(rng.standard_normal((people, 16)).astype(np.float32) @ basis)
+    embeddings = np.repeat(centers, per_person, axis=0)
+    embeddings += 0.05 * rng.standard_normal(embeddings.shape).astype(np.float32)
+    return unit(embeddings), centers
+
+
+def test_ivf_index_agrees_with_exact_search():
+    """Above ann_min_size the IVF index is used and finds the exact best match."""
+    embeddings, centers = make_clustered(400, 5)
+    person_ids = [f"p{i // 5}" for i in range(len(embeddings))]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        index_path = Path(tmp) / "model-v1.ivf.npz"
+        gallery = Gallery(ann_min_size=1000, ann_nprobe=8, index_path=index_path)
+        gallery.add_many(embeddings, person_ids)
+        assert gallery.wait_for_index(30)
+        assert gallery.stats()["index"]["type"] == "ivf"
+        assert index_path.exists()
+
+        exact = Gallery.from_arrays(embeddings, person_ids)
+        assert exact.stats()["index"] == {"type": "flat"}
+        queries = centers[::7]
+        approx_rows, _ = gallery.search(queries, k=1)
+        exact_rows, _ = exact.search(queries, k=1)
+        assert np.mean(approx_rows[:, 0] == exact_rows[:, 0]) >= 0.95
+
+        # Rows added after the build are searched exactly until the rebuild
+        new_face = unit(np.random.default_rng(9).standard_normal((1, DIMENSION)).astype(np.float32))
+        gallery.add("newcomer", new_face)
+        assert gallery.match(new_face)[0]["person_id"] == "newcomer"
+
+        # A restart with the same embeddings reuses the saved index
+        saved = IVFIndex.load(index_path)
+        assert saved is not None and saved.size == len(embeddings)
+        assert IVFIndex.load(index_path, expected_fingerprint="other") is None
+
+        # Removal voids the index until it is rebuilt
+        gallery.remove("p0")
+        assert gallery.wait_for_index(30)
+        assert gallery.stats()["index"]["indexed"] == len(gallery)
+
+
+def test_padded_rows_are_unknown():
+    """Rows the IVF index pads with -1 (no candidate) are unknown, even with review_threshold 0."""
+    embeddings, _ = make_clustered(2, 2)
+    gallery = Gallery.from_arrays(embeddings, ["a", "a", "b", "b"], review_threshold=0.0)
+
+    def padded_search(queries, k=1, snapshot=None):
+        rows = np.array([[2, -1], [-1, -1]], dtype=np.int64)
+        scores = np.array([[0.9, -np.inf], [-np.inf, -np.inf]], dtype=np.float32)
+        return rows[:, :k], scores[:, :k]
+
+    gallery.search = padded_search
+    results = gallery.match(embeddings[:2], k=2)
+    assert results[0]["person_id"] == "b" and [c["person_id"] for c in results[0]["candidates"]] == ["b"]
+    assert results[1]["person_id"] == UNKNOWN_PERSON and results[1]["candidates"] == []
+    assert results[1]["confidence"] == 0.0
+
+
+def main():
+    """Run all tests."""
+    tests = [
+        test_matrix_is_contiguous_and_normalized,
+        test_match_batch_and_thresholds,
+        test_top_k_matches_brute_force,
+        test_add_remove_and_empty,
+        test_ivf_index_agrees_with_exact_search,
+        test_padded_rows_are_unknown,
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"[OK] {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"[FAIL] {test.__name__}: {e}")
+
+    print(f"Results: {len(tests) - failed}/{len(tests)} tests passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""Tests for the SQLite identity store.
+
+Usage:
+    python test_identity_store.py
+"""
+
+import logging
+import sqlite3
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+
+from face_recognition_addon import identity_store
+from face_recognition_addon.identity_store import Identity, IdentityStore
+
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+
+def test_bulk_upsert_and_delete():
+    """Bulk writes create, update and delete identities in one transaction."""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = IdentityStore(Path(tmp) / "identities.db")
+        assert store.upsert_many([Identity("p1", "Alice"), Identity("p2", "Bob", "bob.jpg")]) == 2
+        store.upsert("p1", "Alice B.", "alice.jpg")
+
+        assert store.get("p1") == Identity("p1", "Alice B.", "alice.jpg")
+        assert [i.person_id for i in store.all()] == ["p1", "p2"]
+        assert store.delete_many(["p2", "missing"]) == 1
+        assert store.get("p2") is None and store.count() == 1
+
+        mode = sqlite3.connect(store.path).execute("PRAGMA journal_mode").fetchone()[0]
+        assert mode == "wal"
+
+
+def test_cache_is_read_through_and_invalidated_on_write():
+    """Repeated lookups hit the cache; a write is visible immediately."""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = IdentityStore(Path(tmp) / "identities.db")
+        store.upsert("p1", "Alice")
+
+        assert store.get_many(["p1", "ghost"]) == {"p1": Identity("p1", "Alice")}
+        assert store.get_many(["p1", "ghost"]) == {"p1": Identity("p1", "Alice")}
+        assert (store.hits, store.misses) == (2, 2)  # unknown ids are cached too
+
+        store.upsert_many([Identity("p1", "Alice B."), Identity("ghost", "Casper")])
+        assert store.get("p1").display_name == "Alice B."
+        assert store.get("ghost").display_name == "Casper"
+
+
+def test_external_writes_invalidate_cache():
+    """A write through another connection (e.g. another worker) is noticed."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "identities.db"
+        store = IdentityStore(path)
+        store.upsert("p1", "Alice")
+        assert store.get("p1").display_name == "Alice"
+
+        other = IdentityStore(path)
+        other.upsert("p1", "Alice B.")
+
+        original = identity_store.EXTERNAL_CHECK_INTERVAL
+        identity_store.EXTERNAL_CHECK_INTERVAL = 0
+        try:
+            assert store.get("p1").display_name == "Alice B."
+        finally:
+            identity_store.EXTERNAL_CHECK_INTERVAL = original
+
+
+def test_threads_use_their_own_connections():
+    """Concurrent readers and a writer share one store safely."""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = IdentityStore(Path(tmp) / "identities.db")
+        store.upsert_many([Identity(f"p{i}", f"Person {i}") for i in range(50)])
+        connections = set()
+        errors = []
+
+        def reader():
+            try:
+                for i in range(500):
+                    assert store.get(f"p{i % 50}") is not None
+                connections.add(id(store._connection()))
+            except Exception as e:  # noqa: BLE001 - surfaced below
+                errors.append(e)
+
+        def writer():
+            for round_ in range(20):
+                store.upsert_many([Identity(f"p{i}", f"Person {i} v{round_}") for i in range(50)])
+
+        threads = [threading.Thread(target=reader) for _ in range(4)]
+        threads.append(threading.Thread(target=writer))
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert not errors, errors
+        assert len(connections) == 4
+        assert store.get("p7").display_name == "Person 7 v19"
+
+
+def main():
+    """Run all tests."""
+    tests = [
+        test_bulk_upsert_and_delete,
+        test_cache_is_read_through_and_invalidated_on_write,
+        test_external_writes_invalidate_cache,
+        test_threads_use_their_own_connections,
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"[OK] {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"[FAIL] {test.__name__}: {e}")
+
+    print(f"Results: {len(tests) - failed}/{len(tests)} tests passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""Tests for the content-addressed image store and its eviction.
+
+Usage:
+    python test_image_store.py
+"""
+
+import logging
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+
+from face_recognition_addon import image_store
+from face_recognition_addon.image_store import ImageStore
+
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+
+def image(n: int, size: int = 1000) -> bytes:
+    """Distinct fake image content of `size` bytes."""
+    return (b"\xff\xd8" + n.to_bytes(4, "big") * size)[:size]
+
+
+def age(store: ImageStore, content_hash: str, seconds: float):
+    """Pretend a blob was last stored or read `seconds` ago."""
+    conn = store._connection()
+    with conn:
+        conn.execute("UPDATE blobs SET last_access = ? WHERE hash = ?", (time.time() - seconds, content_hash))
+
+
+def test_same_content_stored_once():
+    """Identical images share one blob and keep every reference."""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ImageStore(tmp)
+        first = store.put(image(1), camera="door", ref="nest:a")
+        again = store.put(image(1), camera="garden", ref="nest:b")
+        other = store.put(image(2), camera="door", ref="nest:c")
+
+        assert first.new and not again.new and other.new
+        assert first.hash == again.hash and first.path == again.path
+        assert first.path.parent.parent == Path(tmp) / "blobs"
+        assert store.get(first.hash) == image(1) and store.get("0" * 32) is None
+        assert [r["camera"] for r in store.refs(first.hash)] == ["door", "garden"]
+        assert len(list((Path(tmp) / "blobs").rglob("*.jpg"))) == 2
+        assert store.stats()["deduplicated"] == 1
+        store.close()
+
+
+def test_usage_per_camera():
+    """Usage is reported in total and per camera from the index."""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ImageStore(tmp)
+        store.put(image(1, 1000), camera="door", ref="nest:a")
+        store.put(image(1, 1000), camera="door", ref="nest:b")
+        store.put(image(2, 500), camera="door", ref="nest:c")
+        store.put(image(1, 1000), camera="garden", ref="nest:d")
+
+        usage = store.usage()
+        assert usage["images"] == 2 and usage["bytes"] == 1500
+        assert usage["per_camera"]["door"] == {"images": 2, "bytes": 1500, "events": 3}
+        assert usage["per_camera"]["garden"] == {"images": 1, "bytes": 1000, "events": 1}
+        store.close()
+
+        # The index survives a restart
+        assert ImageStore(tmp).usage() == usage
+
+
+def test_evicts_least_recently_used_to_low_water():
+    """Over the byte quota the least recently used blobs go first."""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ImageStore(tmp, max_bytes=10_000)
+        stored = [store.put(image(n), camera="door", ref=f"nest:{n}") for n in range(12)]
+        for n, item in enumerate(stored):
+            age(store, item.hash, 1000 - n)
+        # Reading a blob keeps it
+        age(store, stored[0].hash, 0)
+
+        assert store.evict() == 3
+        usage = store.usage()
+        assert usage["bytes"] <= 10_000 * image_store.LOW_WATER
+        assert store.get(stored[0].hash) is not None
+        assert all(store.get(item.hash) is None and not item.path.exists() for item in stored[1:4])
+        assert all(store.get(item.hash) is not None for item in stored[4:])
+        # Refs of evicted blobs are gone with them
+        assert usage["per_camera"]["door"]["events"] == 9
+        assert store.evict() == 0
+        store.close()
+
+
+def test_evicts_by_age():
+    """Blobs not stored or read within max_age are removed; storing again revives one."""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ImageStore(tmp, max_age=3600)
+        old = store.put(image(1), camera="door", ref="nest:a")
+        fresh = store.put(image(2), camera="door", ref="nest:b")
+        age(store, old.hash, 7200)
+
+        assert store.evict() == 1
+        assert store.get(old.hash) is None and store.get(fresh.hash) == image(2)
+
+        again = store.put(image(1), camera="door", ref="nest:c")
+        assert again.new and again.path.read_bytes() == image(1)
+        store.close()
+
+
+def test_evictor_runs_in_background():
+    """A put over the quota wakes the evictor thread; put itself never evicts."""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ImageStore(tmp, max_bytes=5_000)
+        for n in range(5):
+            store.put(image(n), camera="door", ref=f"nest:{n}")
+        store.put(image(5), camera="door", ref="nest:5")
+        assert store.usage()["bytes"] == 6000 and store.evicted == 0
+
+        store.ensure_running()
+        deadline = time.time() + 5
+        while store.evicted == 0 and time.time() < deadline:
+            time.sleep(0.05)
+        assert store.evicted == 2, store.stats()
+        assert store.usage()["bytes"] == 4000
+
+        store.put(image(6), camera="door", ref="nest:6")
+        store.put(image(7), camera="door", ref="nest:7")
+        deadline = time.time() + 5
+        while store.evicted == 2 and time.time() < deadline:
+            time.sleep(0.05)
+        assert store.usage()["bytes"] <= 5_000 * image_store.LOW_WATER
+        store.close()
+        assert not store._thread.is_alive()
+
+
+def main():
+    """Run all tests."""
+    tests = [
+        test_same_content_stored_once,
+        test_usage_per_camera,
+        test_evicts_least_recently_used_to_low_water,
+        test_evicts_by_age,
+        test_evictor_runs_in_background,
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"[OK] {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"[FAIL] {test.__name__}: {e}")
+
+    print(f"Results: {len(tests) - failed}/{len(tests)} tests passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
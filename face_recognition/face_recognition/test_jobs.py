@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""Tests for the bounded inference queue and the 202/poll/429 API behaviour.
+
+Usage:
+    python test_jobs.py
+"""
+
+import json
+import logging
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+
+from face_recognition_addon.api import FaceRecognitionAPI
+from face_recognition_addon.config import Config, ConfigLoader
+from face_recognition_addon.jobs import InferenceQueue, QueueFullError, JOB_DONE, JOB_FAILED
+
+logging.basicConfig(level=logging.WARNING)
+
+IMAGE = b"\xff\xd8\xff\xe0" + b"\x00" * 256
+RAW_HEADERS = {"Content-Type": "image/jpeg", "X-Camera": "front_door"}
+
+
+def fill_queue(jobs: InferenceQueue) -> threading.Event:
+    """Occupy the worker and every queue slot until the returned event is set."""
+    release = threading.Event()
+    started = threading.Event()
+
+    def block():
+        started.set()
+        release.wait(10)
+
+    jobs.submit(block)
+    started.wait(5)
+    for _ in range(jobs.max_depth):
+        jobs.submit(release.wait, 10)
+    return release
+
+
+def test_job_runs_and_records_timings():
+    """Jobs run on the worker thread and expose wait/service times."""
+    jobs = InferenceQueue(max_depth=2)
+    job = jobs.submit(lambda x: x * 2, 21)
+    assert job.wait(5)
+    assert job.status == JOB_DONE
+    assert job.result == 42
+    assert job.to_dict()["service_time_ms"] is not None
+    assert jobs.stats()["completed"] == 1
+
+
+def test_failed_job():
+    """Exceptions are captured on the job instead of killing the worker."""
+    jobs = InferenceQueue(max_depth=2)
+    job = jobs.submit(lambda: 1 / 0)
+    assert job.wait(5)
+    assert job.status == JOB_FAILED
+    assert "division" in job.error
+    assert jobs.submit(lambda: "ok").wait(5)
+
+
+def test_concurrent_first_submits_start_once():
+    """Threads racing on the first submit share one set of workers and lose no job."""
+    jobs = InferenceQueue(max_depth=64, workers=2)
+    barrier = threading.Barrier(16)
+    submitted, errors = [], []
+
+    def submit(i):
+        barrier.wait(5)
+        try:
+            submitted.append(jobs.submit(lambda: i))
+        except Exception as e:
+            errors.append(e)
+
+    before = {t for t in threading.enumerate() if t.name.startswith("inference-")}
+    threads = [threading.Thread(target=submit, args=(i,)) for i in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+
+    assert not errors, errors
+    assert all(job.wait(5) and job.status == JOB_DONE for job in submitted) and len(submitted) == 16
+    started = {t for t in threading.enumerate() if t.name.startswith("inference-")} - before
+    assert len(started) == 2
+    assert jobs.stats()["completed"] == 16
+
+
+def test_queue_full_raises():
+    """Submitting beyond max_depth raises QueueFullError with a retry hint."""
+    jobs = InferenceQueue(max_depth=2)
+    release = fill_queue(jobs)
+    try:
+        jobs.submit(lambda: None)
+        raise AssertionError("Expected QueueFullError")
+    except QueueFullError as e:
+        assert e.retry_after >= 1
+    finally:
+        release.set()
+    assert jobs.stats()["rejected"] == 1
+
+
+def test_config_rejects_invalid_job_settings():
+    """job_ttl_seconds and max_batch_size below 1 fail loading."""
+    with tempfile.TemporaryDirectory() as tmp:
+        options = Path(tmp) / "options.json"
+        for key in ("job_ttl_seconds", "max_batch_size"):
+            options.write_text(json.dumps({key: 0}))
+            try:
+                ConfigLoader(str(options)).load()
+            except ValueError:
+                pass
+            else:
+                raise AssertionError(f"{key}=0 accepted")
+
+
+def test_async_request_returns_202_and_polls():
+    """?async=1 returns 202 with a job id that can be polled to completion."""
+    api = FaceRecognitionAPI(Config(api_token="", detector_backend="none"))
+    client = api.app.test_client()
+
+    response = client.post("/recognize?async=1", data=IMAGE, headers=RAW_HEADERS)
+    assert response.status_code == 202
+    body = response.get_json()
+    assert response.headers["Location"] == body["status_url"]
+
+    assert api.jobs.get(body["job_id"]).wait(5)
+    response = client.get(body["status_url"])
+    assert response.status_code == 200
+    assert response.get_json()["status"] == JOB_DONE
+    assert response.get_json()["result"]["camera"] == "front_door"
+
+    assert client.get("/jobs/does-not-exist").status_code == 404
+
+
+def test_full_queue_returns_429():
+    """A full queue is reported as 429 with Retry-After."""
+    api = FaceRecognitionAPI(Config(api_token="", queue_max_depth=1, detector_backend="none"))
+    client = api.app.test_client()
+    release = fill_queue(api.jobs)
+    try:
+        response = client.post("/recognize", data=IMAGE, headers=RAW_HEADERS)
+        assert response.status_code == 429
+        assert int(response.headers["Retry-After"]) >= 1
+        assert client.get("/status").get_json()["queue"]["rejected"] == 1
+    finally:
+        release.set()
+
+
+def test_deadline_exceeded_returns_202():
+    """A synchronous request that misses its deadline gets a pollable 202."""
+    api = FaceRecognitionAPI(
+        Config(api_token="", request_deadline_seconds=0.2, detector_backend="none")
+    )
+    client = api.app.test_client()
+    release = threading.Event()
+    api.jobs.submit(release.wait, 10)
+    try:
+        response = client.post("/recognize", data=IMAGE, headers=RAW_HEADERS)
+        assert response.status_code == 202
+        assert response.get_json()["status"] == "queued"
+    finally:
+        release.set()
+
+
+def main():
+    """Run all tests."""
+    tests = [
+        test_job_runs_and_records_timings,
+        test_failed_job,
+        test_concurrent_first_submits_start_once,
+        test_queue_full_raises,
+        test_config_rejects_invalid_job_settings,
+        test_async_request_returns_202_and_polls,
+        test_full_queue_returns_429,
+        test_deadline_exceeded_returns_202,
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"[OK] {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"[FAIL] {test.__name__}: {e}")
+
+    print(f"Results: {len(tests) - failed}/{len(tests)} tests passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
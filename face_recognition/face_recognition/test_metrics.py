@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""Tests for the metrics subsystem and GET /metrics.
+
+Usage:
+    python test_metrics.py
+"""
+
+import logging
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+
+from face_recognition_addon.api import FaceRecognitionAPI
+from face_recognition_addon.config import Config
+from face_recognition_addon.metrics import (
+    EXITED_SNAPSHOT,
+    MAX_CAMERA_LABELS,
+    AddonMetrics,
+    Gauge,
+    Histogram,
+    MetricsRegistry,
+)
+
+logging.basicConfig(level=logging.WARNING)
+
+
+def test_histogram_buckets_are_cumulative():
+    """Rendered buckets are cumulative and end with +Inf, _sum and _count."""
+    registry = MetricsRegistry()
+    histogram = registry.register(Histogram("h", "Test.", buckets=(0.1, 1.0)))
+    for value in (0.05, 0.5, 0.5, 5.0):
+        histogram.observe(value)
+
+    text = registry.render()
+    assert 'h_bucket{le="0.1"} 1' in text
+    assert 'h_bucket{le="1"} 3' in text
+    assert 'h_bucket{le="+Inf"} 4' in text
+    assert "h_count 4" in text
+    assert "h_sum 6.05" in text
+
+
+def test_labels_and_model_version():
+    """Labelled counters render per label set; model version is replaced."""
+    metrics = AddonMetrics()
+    metrics.record_cache("result", True)
+    metrics.record_cache("result", False)
+    metrics.record_cache("result", True)
+    metrics.set_model_version("v004")
+
+    text = metrics.render()
+    assert 'face_recognition_cache_lookups_total{cache="result",result="hit"} 2' in text
+    assert 'face_recognition_cache_lookups_total{cache="result",result="miss"} 1' in text
+    assert 'face_recognition_model_info{version="v004"} 1' in text
+    assert 'version="none"' not in text
+
+
+def test_camera_labels_are_capped():
+    """Client-supplied camera names beyond MAX_CAMERA_LABELS are folded into "other"."""
+    metrics = AddonMetrics()
+    for i in range(MAX_CAMERA_LABELS + 5):
+        metrics.record_suppression(f"cam{i}", 0.01)
+    metrics.record_suppression("cam0", 0.01)
+    metrics.record_coalesced("cam1")
+    metrics.record_coalesced("unlisted")
+
+    text = metrics.render()
+    assert 'face_recognition_frames_suppressed_total{camera="cam0"} 2' in text
+    assert 'face_recognition_requests_coalesced_total{camera="cam1"} 1' in text
+    assert 'face_recognition_requests_coalesced_total{camera="other"} 1' in text
+    assert 'face_recognition_frames_suppressed_total{camera="other"} 5' in text
+    assert f'camera="cam{MAX_CAMERA_LABELS}"' not in text
+
+
+def test_metrics_endpoint_records_requests():
+    """Requests are counted per endpoint and exposed at GET /metrics."""
+    api = FaceRecognitionAPI(Config(api_token="", detector_backend="none"))
+    client = api.app.test_client()
+    response = client.post(
+        "/recognize",
+        data=b"\xff\xd8\xff" + b"\x00" * 100,
+        headers={"Content-Type": "image/jpeg", "X-Camera": "front_door"},
+    )
+    assert response.status_code == 200
+    assert "timings_ms" in response.get_json()
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.mimetype == "text/plain"
+    text = response.get_data(as_text=True)
+    assert 'face_recognition_http_requests_total{endpoint="/recognize",status="200"} 1' in text
+    assert 'face_recognition_http_request_bytes_total{endpoint="/recognize"} 103' in text
+    assert "face_recognition_queue_service_seconds_count 1" in text
+    assert "face_recognition_queue_depth 0" in text
+
+
+def test_metrics_are_summed_across_workers():
+    """With a shared directory /metrics sums every worker's snapshot; exited workers keep counters only."""
+    with tempfile.TemporaryDirectory() as tmp:
+        worker, other = AddonMetrics(queue_stats=lambda: {"depth": 2, "running": 1}), AddonMetrics()
+        worker.share_across_workers(tmp)
+        other.share_across_workers(tmp)
+        for metrics in (worker, other):
+            metrics.record_cache("result", True)
+            metrics.observe_job(0.002, 0.3)
+            metrics.set_model_version("v004")
+        other.registry.write_snapshot(tmp, pid=1)
+
+        text = worker.render()
+        assert 'face_recognition_cache_lookups_total{cache="result",result="hit"} 2' in text
+        assert "face_recognition_queue_service_seconds_count 2" in text
+        assert 'face_recognition_queue_service_seconds_bucket{le="0.5"} 2' in text
+        assert 'face_recognition_model_info{version="v004"} 1' in text
+        assert "face_recognition_queue_depth 2" in text
+
+        other.set_model_version("v005")
+        other.registry.write_snapshot(tmp, pid=1)
+        text = worker.render()
+        assert 'version="v004"} 1' in text and 'version="v005"} 1' in text
+
+        worker.mark_worker_dead(1)
+        text = worker.render()
+        assert 'face_recognition_cache_lookups_total{cache="result",result="hit"} 2' in text
+        assert 'version="v005"' not in text
+
+        # Exited workers are folded into one cumulative snapshot
+        for pid in (2, 3):
+            other.registry.write_snapshot(tmp, pid=pid)
+            worker.mark_worker_dead(pid)
+        assert sorted(path.name for path in Path(tmp).iterdir()) == sorted([EXITED_SNAPSHOT, f"{os.getpid()}.json"])
+        text = worker.render()
+        assert 'face_recognition_cache_lookups_total{cache="result",result="hit"} 4' in text
+        assert "face_recognition_queue_service_seconds_count 4" in text
+
+
+def test_non_finite_values():
+    """Infinite and NaN samples render as +Inf, -Inf and NaN."""
+    metrics = AddonMetrics()
+    metrics.suppression_cpu_saved.inc(float("inf"))
+    assert "face_recognition_suppression_cpu_saved_seconds_total +Inf" in metrics.render()
+    gauge = Gauge("test_gauge", "Test")
+    gauge.set(float("-inf"))
+    assert gauge.render()[-1] == "test_gauge -Inf"
+    gauge.set(float("nan"))
+    assert gauge.render()[-1] == "test_gauge NaN"
+
+
+def main():
+    """Run all tests."""
+    tests = [
+        test_histogram_buckets_are_cumulative,
+        test_labels_and_model_version,
+        test_camera_labels_are_capped,
+        test_metrics_endpoint_records_requests,
+        test_metrics_are_summed_across_workers,
+        test_non_finite_values,
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"[OK] {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"[FAIL] {test.__name__}: {e}")
+
+    print(f"Results: {len(tests) - failed}/{len(tests)} tests passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
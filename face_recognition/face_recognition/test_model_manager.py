@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""Tests for the double-buffered model hot reload.
+
+Builds tiny random ONNX models (see test_embedding.py), so no trained model
+is required.
+
+Usage:
+    python test_model_manager.py
+"""
+
+import logging
+import multiprocessing
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+
+from face_recognition_addon.api import FaceRecognitionAPI
+from face_recognition_addon.config import Config
+from face_recognition_addon.embedding import model_version
+from face_recognition_addon.embedding_store import save_gallery
+from face_recognition_addon.gallery import Gallery
+from face_recognition_addon.model_manager import STATE_ACTIVE, STATE_EMPTY, ModelManager
+from face_recognition_addon.pipeline import RecognitionPipeline
+from test_embedding import DIMENSION, build_model
+
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+TOKEN = "test_token_123"
+
+
+def make_config(tmp: str) -> Config:
+    """Config with the model, embeddings and identities under tmp."""
+    return Config(
+        api_token=TOKEN,
+        detector_backend="none",
+        embedding_model_path=str(Path(tmp) / "embedding.onnx"),
+        embeddings_dir=str(Path(tmp) / "embeddings"),
+        identity_db_path=str(Path(tmp) / "identities.db"),
+        review_dir=str(Path(tmp) / "review"),
+    )
+
+
+def test_missing_model_stays_in_bootstrap_mode():
+    """Without a model nothing is active and a reload reports the error."""
+    with tempfile.TemporaryDirectory() as tmp:
+        pipeline = RecognitionPipeline(make_config(tmp))
+        assert not pipeline.models.load()
+        assert pipeline.gallery_stats()["embeddings"] == 0
+        with pipeline.models.acquire() as models:
+            assert models is None
+
+        assert pipeline.reload_models()
+        assert pipeline.models.wait(10)
+        status = pipeline.models.status()
+        assert status["state"] == STATE_EMPTY
+        assert "not found" in status["error"]
+
+
+def test_reload_swaps_model_and_gallery():
+    """A reload activates the new version with its own gallery."""
+    with tempfile.TemporaryDirectory() as tmp:
+        config = make_config(tmp)
+        build_model(Path(config.embedding_model_path))
+        pipeline = RecognitionPipeline(config)
+        pipeline.models.load()
+        old_version = pipeline.models.status()["active_version"]
+        assert pipeline.models.state == STATE_ACTIVE
+        assert pipeline.identities is not None
+
+        # Install a different model with an enrolled gallery for its version
+        build_model(Path(config.embedding_model_path), size=96)
+        rng = np.random.default_rng(0)
+        enrolled = Gallery.from_arrays(rng.standard_normal((4, DIMENSION)).astype(np.float32),
+                                       ["a", "a", "b", "b"])
+        new_version = model_version(config.embedding_model_path)
+        save_gallery(enrolled, config.embeddings_dir, new_version)
+
+        assert pipeline.reload_models()
+        assert pipeline.models.wait(30)
+        status = pipeline.models.status()
+        assert status["state"] == STATE_ACTIVE and status["error"] is None
+        assert status["active_version"] == new_version != old_version
+        with pipeline.models.acquire() as models:
+            assert len(models.gallery) == 4 and models.embedder.input_size == (96, 96)
+
+
+def test_in_flight_requests_keep_old_model():
+    """A pinned set stays usable across a swap and is released afterwards."""
+    with tempfile.TemporaryDirectory() as tmp:
+        config = make_config(tmp)
+        build_model(Path(config.embedding_model_path))
+        manager = ModelManager(config, lambda version: Gallery())
+        assert manager.load()
+
+        with manager.acquire() as old:
+            build_model(Path(config.embedding_model_path), size=96)
+            assert manager.reload() and manager.wait(30)
+            assert manager.active is not old
+            # The request that started on the old model can still finish on it
+            assert old.embedder.embed(np.zeros((1, 3, 112, 112), dtype=np.float32)).shape == (1, DIMENSION)
+        assert old.embedder is None and old.gallery is None
+        assert manager.active.embedder is not None
+
+
+def test_reload_endpoint():
+    """POST /model/reload needs auth and reports the model state in /status."""
+    with tempfile.TemporaryDirectory() as tmp:
+        config = make_config(tmp)
+        build_model(Path(config.embedding_model_path))
+        api = FaceRecognitionAPI(config)
+        client = api.app.test_client()
+
+        assert client.post("/model/reload").status_code == 401
+        response = client.post("/model/reload", headers={"Authorization": f"Bearer {TOKEN}"})
+        assert response.status_code == 202
+        assert api.pipeline.models.wait(30)
+
+        model = client.get("/status").get_json()["model"]
+        assert model["state"] == STATE_ACTIVE
+        assert model["active_version"].startswith("embedding-")
+
+
+def run_other_worker(tmp: str, versions):
+    """A second server worker: reports its model version, then the one it reloads to."""
+    manager = ModelManager(make_config(tmp), lambda version: Gallery())
+    manager.load()
+    manager.ensure_running()
+    loaded = manager.active.version
+    versions.put(loaded)
+    deadline = time.monotonic() + 30
+    while manager.active.version == loaded and time.monotonic() < deadline:
+        time.sleep(0.1)
+    versions.put(manager.active.version)
+
+
+def test_reload_reaches_other_workers():
+    """A reload requested in one process makes another process reload too."""
+    with tempfile.TemporaryDirectory() as tmp:
+        config = make_config(tmp)
+        build_model(Path(config.embedding_model_path))
+        manager = ModelManager(config, lambda version: Gallery())
+        assert manager.load()
+
+        context = multiprocessing.get_context("spawn")
+        versions = context.Queue()
+        worker = context.Process(target=run_other_worker, args=(tmp, versions), daemon=True)
+        worker.start()
+        try:
+            assert versions.get(timeout=60) == manager.active.version
+
+            build_model(Path(config.embedding_model_path), size=96)
+            assert manager.request_reload() and manager.wait(30)
+            assert versions.get(timeout=60) == manager.active.version
+        finally:
+            worker.join(10)
+            if worker.is_alive():
+                worker.terminate()
+
+
+def main():
+    """Run all tests."""
+    tests = [
+        test_missing_model_stays_in_bootstrap_mode,
+        test_reload_swaps_model_and_gallery,
+        test_in_flight_requests_keep_old_model,
+        test_reload_endpoint,
+        test_reload_reaches_other_workers,
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"[OK] {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"[FAIL] {test.__name__}: {e}")
+
+    print(f"Results: {len(tests) - failed}/{len(tests)} tests passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
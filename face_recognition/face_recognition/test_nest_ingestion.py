@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""Tests for asynchronous Nest event media fetching.
+
+Runs the fetcher against a local stand-in for the Home Assistant
+``/api/nest/event_media/...`` endpoint that expires media after a delay.
+
+Usage:
+    python test_nest_ingestion.py
+"""
+
+import logging
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+
+from face_recognition_addon.config import Config
+from face_recognition_addon.nest_ingestion import NestEventIngestion, NestMediaFetcher
+
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+
+class FakeNestHandler(BaseHTTPRequestHandler):
+    """Serves /api/nest/event_media/<device>/<event>/thumbnail until it expires."""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        nest = self.server.nest
+        with nest.lock:
+            nest.connections.add(self.client_address)
+        time.sleep(nest.latency)
+        parts = self.path.strip("/").split("/")
+        published = nest.media.get((parts[3], parts[4])) if len(parts) == 6 else None
+        expired = published is None or time.monotonic() - published > nest.expiry
+        body = b"not found" if expired else f"jpeg {parts[3]} {parts[4]}".encode()
+        self.send_response(404 if expired else 200)
+        self.send_header("Content-Type", "text/plain" if expired else "image/jpeg")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class FakeNest:
+    """A running stand-in Nest media server."""
+
+    def __init__(self, latency: float = 0.0, expiry: float = 60.0):
+        self.latency = latency
+        self.expiry = expiry
+        self.media = {}
+        self.connections = set()
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), FakeNestHandler)
+        self.server.nest = self
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def publish(self, device_id: str, event_id: str):
+        self.media[(device_id, event_id)] = time.monotonic()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def make_ingestion(nest: FakeNest, tmp: str, deadline: float = 2.0, connections: int = 4):
+    """Ingestion fetching from the stand-in server into tmp."""
+    config = Config(nest_fetch_deadline_seconds=deadline, nest_fetch_connections=connections, image_dir=tmp)
+    fetcher = NestMediaFetcher(nest.url, token="token", deadline=deadline, max_connections=connections)
+    return NestEventIngestion(config, fetcher=fetcher)
+
+
+def test_fetches_devices_concurrently():
+    """Events on several devices are fetched in parallel over a bounded pool."""
+    nest = FakeNest(latency=0.3)
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            ingestion = make_ingestion(nest, tmp, connections=4)
+            for device in range(8):
+                nest.publish(f"dev{device}", "evt")
+
+            start = time.perf_counter()
+            futures = [ingestion.submit_nest_event({"type": "camera_person", "device_id": f"dev{d}",
+                                                    "nest_event_id": "evt"}) for d in range(8)]
+            images = [future.result(5) for future in futures]
+            elapsed = time.perf_counter() - start
+
+            assert all(images), images
+            assert images[5].data == b"jpeg dev5 evt" and images[5].path.read_bytes() == images[5].data
+            # 8 fetches over 4 connections take two round trips, not eight
+            assert elapsed < 0.3 * 4, elapsed
+            assert len(nest.connections) <= 4
+            assert ingestion.stats()["fetched"] == 8
+            ingestion.close()
+    finally:
+        nest.close()
+
+
+def test_connections_are_reused():
+    """Sequential fetches share one pooled keep-alive connection."""
+    nest = FakeNest()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            ingestion = make_ingestion(nest, tmp)
+            for event in range(5):
+                nest.publish("door", f"evt{event}")
+                assert ingestion.fetcher.fetch("door", f"evt{event}").result(5)
+            assert len(nest.connections) == 1
+            ingestion.close()
+    finally:
+        nest.close()
+
+
+def test_expired_and_slow_media():
+    """Expired media and fetches past the deadline give None and are counted."""
+    nest = FakeNest(expiry=0.1)
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            ingestion = make_ingestion(nest, tmp, deadline=0.3)
+            nest.publish("door", "old")
+            time.sleep(0.2)
+            assert ingestion.fetcher.fetch("door", "old").result(5) is None
+
+            nest.latency = 1.0
+            nest.publish("door", "slow")
+            start = time.perf_counter()
+            assert ingestion.fetcher.fetch("door", "slow").result(5) is None
+            assert time.perf_counter() - start < 0.8
+
+            stats = ingestion.stats()
+            assert stats["expired"] == 1 and stats["timeouts"] == 1 and stats["fetched"] == 0
+            ingestion.close()
+    finally:
+        nest.close()
+
+
+def test_process_nest_event():
+    """The blocking entry point saves the image; unusable events are skipped."""
+    nest = FakeNest()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            ingestion = make_ingestion(nest, tmp)
+            nest.publish("door", "evt")
+            path = ingestion.process_nest_event({"type": "person", "device_id": "door", "event_id": "evt"})
+            assert path and Path(path).is_relative_to(Path(tmp) / "blobs")
+            assert Path(path).read_bytes() == b"jpeg door evt"
+            assert ingestion.open_image_store().usage()["per_camera"]["door"]["events"] == 1
+
+            assert ingestion.process_nest_event({"type": "doorbell_chime", "device_id": "door",
+                                                 "event_id": "evt"}) is None
+            assert ingestion.process_nest_event({"type": "person", "device_id": "door"}) is None
+            assert ingestion.process_nest_event({"type": "person", "device_id": "door",
+                                                 "event_id": "missing"}) is None
+            ingestion.close()
+    finally:
+        nest.close()
+
+
+def main():
+    """Run all tests."""
+    tests = [
+        test_fetches_devices_concurrently,
+        test_connections_are_reused,
+        test_expired_and_slow_media,
+        test_process_nest_event,
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"[OK] {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"[FAIL] {test.__name__}: {e}")
+
+    print(f"Results: {len(tests) - failed}/{len(tests)} tests passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
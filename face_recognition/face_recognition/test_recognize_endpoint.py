@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""Tests for the raw-binary POST /recognize endpoint.
+
+Uses the Flask test client, so no server or Home Assistant is required.
+
+Usage:
+    python test_recognize_endpoint.py
+"""
+
+import base64
+import io
+import json
+import logging
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+
+from face_recognition_addon.api import FaceRecognitionAPI
+from face_recognition_addon.config import Config
+
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+TOKEN = "test_token_123"
+AUTH = {"Authorization": f"Bearer {TOKEN}"}
+IMAGE = b"\xff\xd8\xff\xe0" + b"\x00" * 1024
+
+
+# Detection is disabled: these tests cover the HTTP layer, not decoding
+def make_client(api_token: str = TOKEN):
+    """Create a Flask test client for the add-on API."""
+    config = Config(api_token=api_token, detector_backend="none")
+    return FaceRecognitionAPI(config).app.test_client()
+
+
+def test_raw_jpeg_body():
+    """Raw image/jpeg body with metadata headers is recognized."""
+    client = make_client()
+    response = client.post(
+        "/recognize",
+        data=IMAGE,
+        headers={**AUTH, "Content-Type": "image/jpeg", "X-Camera": "front_door"},
+    )
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data["camera"] == "front_door"
+    assert data["image_size"] == len(IMAGE)
+
+
+def test_multipart_body():
+    """Multipart body with image part and metadata JSON field is recognized."""
+    client = make_client()
+    response = client.post(
+        "/recognize",
+        data={
+            "image": (io.BytesIO(IMAGE), "frame.jpg"),
+            "metadata": json.dumps({"camera": "driveway", "source": "test"}),
+        },
+        headers=AUTH,
+        content_type="multipart/form-data",
+    )
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data["camera"] == "driveway"
+    assert data["image_size"] == len(IMAGE)
+
+
+def test_missing_camera():
+    """Raw body without X-Camera is rejected."""
+    client = make_client()
+    response = client.post(
+        "/recognize", data=IMAGE, headers={**AUTH, "Content-Type": "image/jpeg"}
+    )
+    assert response.status_code == 400
+    assert response.get_json()["missing"] == ["camera"]
+
+
+def test_unsupported_content_type():
+    """JSON bodies are not accepted by /recognize."""
+    client = make_client()
+    response = client.post("/recognize", json={"camera": "x"}, headers=AUTH)
+    assert response.status_code == 415
+
+
+def test_requires_auth():
+    """Requests without a valid token are rejected."""
+    client = make_client()
+    response = client.post(
+        "/recognize", data=IMAGE, headers={"Content-Type": "image/jpeg", "X-Camera": "x"}
+    )
+    assert response.status_code == 401
+
+
+def test_legacy_json_event_decodes_base64():
+    """POST /event recognition_request still works and decodes image_data."""
+    client = make_client()
+    response = client.post(
+        "/event",
+        json={
+            "event_type": "recognition_request",
+            "camera": "front_door",
+            "image_data": base64.b64encode(IMAGE).decode("utf-8"),
+        },
+        headers=AUTH,
+    )
+    assert response.status_code == 200
+    assert response.get_json()["image_size"] == len(IMAGE)
+
+    response = client.post(
+        "/event",
+        json={"event_type": "recognition_request", "camera": "x", "image_data": "abc"},
+        headers=AUTH,
+    )
+    assert response.status_code == 400
+
+
+def test_batch_multipart():
+    """POST /event/batch returns one result per image part, in order."""
+    client = make_client()
+    response = client.post(
+        "/event/batch",
+        data={
+            "image": [(io.BytesIO(IMAGE), "a.jpg"), (io.BytesIO(IMAGE + IMAGE), "b.jpg")],
+            "camera": ["doorbell", "driveway"],
+        },
+        headers=AUTH,
+        content_type="multipart/form-data",
+    )
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data["count"] == 2
+    assert [r["camera"] for r in data["results"]] == ["doorbell", "driveway"]
+    assert data["results"][1]["image_size"] == 2 * len(IMAGE)
+
+
+def test_batch_json():
+    """POST /event/batch accepts base64 images in JSON."""
+    client = make_client()
+    encoded = base64.b64encode(IMAGE).decode("utf-8")
+    response = client.post(
+        "/event/batch",
+        json={"images": [{"image_data": encoded, "camera": "a"},
+                         {"image_data": encoded, "camera": "b"}]},
+        headers=AUTH,
+    )
+    assert response.status_code == 200
+    assert response.get_json()["count"] == 2
+
+    response = client.post(
+        "/event/batch",
+        json={"images": [{"image_data": encoded}]},
+        headers=AUTH,
+    )
+    assert response.status_code == 400
+
+
+def test_batch_too_large():
+    """Batches above max_batch_size are rejected."""
+    config = Config(api_token=TOKEN, max_batch_size=1, detector_backend="none")
+    client = FaceRecognitionAPI(config).app.test_client()
+    encoded = base64.b64encode(IMAGE).decode("utf-8")
+    response = client.post(
+        "/event/batch",
+        json={"images": [{"image_data": encoded, "camera": "a"}] * 2},
+        headers=AUTH,
+    )
+    assert response.status_code == 413
+
+
+def main():
+    """Run all tests."""
+    tests = [
+        test_raw_jpeg_body,
+        test_multipart_body,
+        test_missing_camera,
+        test_unsupported_content_type,
+        test_requires_auth,
+        test_legacy_json_event_decodes_base64,
+        test_batch_multipart,
+        test_batch_json,
+        test_batch_too_large,
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"[OK] {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"[FAIL] {test.__name__}: {e}")
+
+    print(f"Results: {len(tests) - failed}/{len(tests)} tests passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""Tests for the review set and review face reprocessing.
+
+Builds tiny random ONNX models (see test_embedding.py), so no trained model
+is required.
+
+Usage:
+    python test_reprocess.py
+"""
+
+import json
+import logging
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+
+from face_recognition_addon.config import Config
+from face_recognition_addon.detection import Detection
+from face_recognition_addon.embedding import EmbeddingEngine
+from face_recognition_addon.embedding_store import save_gallery
+from face_recognition_addon.gallery import Gallery, load_gallery
+from face_recognition_addon.pipeline import RecognitionPipeline
+from face_recognition_addon.reprocess import (
+    STATE_DONE,
+    STATE_STOPPED,
+    ReviewReprocessor,
+    match_crops,
+)
+from face_recognition_addon.review import ReviewSet
+from test_embedding import build_model
+
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+FACES = 6
+ENROLLED = 3
+
+
+def make_config(tmp: str, **overrides) -> Config:
+    """Config with the model, embeddings and review set under tmp."""
+    options = {
+        "detector_backend": "none",
+        "embedding_model_path": str(Path(tmp) / "embedding.onnx"),
+        "embeddings_dir": str(Path(tmp) / "embeddings"),
+        "identity_db_path": str(Path(tmp) / "identities.db"),
+        "review_dir": str(Path(tmp) / "review"),
+        "reprocess_workers": 0,
+        "reprocess_chunk_size": 2,
+    }
+    options.update(overrides)
+    return Config(**options)
+
+
+def make_review_set(config: Config):
+    """Review faces (all Unknown) and a gallery enrolling the first few of them.
+
+    Returns:
+        (review set, model version, {face_id: expected match})
+    """
+    build_model(Path(config.embedding_model_path))
+    review_set = ReviewSet(config.review_dir)
+    rng = np.random.default_rng(3)
+    for i in range(FACES):
+        crop = rng.integers(0, 255, (112, 112, 3), dtype=np.uint8)
+        face_id = f"img_20260101_00000{i}_abcd_face_0"
+        review_set.add(face_id, cv2.imencode(".jpg", crop)[1].tobytes(), {
+            "face_id": face_id, "camera": "door", "person_id": "unknown",
+            "confidence": 0.1, "needs_review": True, "model_version": None,
+        })
+
+    engine = EmbeddingEngine(config.embedding_model_path)
+    face_ids = review_set.face_ids()
+    paths = [str(review_set.crop_path(face_id)) for face_id in face_ids]
+    enrolled = engine.embed([cv2.imread(path) for path in paths[:ENROLLED]])
+    gallery = Gallery.from_arrays(enrolled, [f"person_{i}" for i in range(ENROLLED)])
+    save_gallery(gallery, config.embeddings_dir, engine.version)
+
+    matches = match_crops(engine, load_gallery(config, engine.version), paths)
+    return review_set, engine.version, dict(zip(face_ids, matches))
+
+
+def expected_changes(expected):
+    """Face ids whose decision differs from the stored Unknown/needs_review one."""
+    return {face_id for face_id, match in expected.items()
+            if (match["person_id"], match["needs_review"]) != ("unknown", True)}
+
+
+def run_reprocessor(config, review_set, version, **kwargs):
+    """Run a reprocessor to completion and collect emitted updates."""
+    changes = []
+    reprocessor = ReviewReprocessor(
+        config, review_set, Path(config.review_dir).with_name("checkpoint.json"),
+        on_change=lambda record, previous: changes.append(record["face_id"]), **kwargs,
+    )
+    assert reprocessor.start(version)
+    assert reprocessor.wait(60)
+    return reprocessor, changes
+
+
+def test_only_changed_decisions_are_emitted():
+    """Enrolled faces are re-decided; unchanged faces are left alone."""
+    with tempfile.TemporaryDirectory() as tmp:
+        config = make_config(tmp)
+        review_set, version, expected = make_review_set(config)
+        changed = expected_changes(expected)
+        assert set(list(expected)[:ENROLLED]) <= changed
+
+        reprocessor, changes = run_reprocessor(config, review_set, version)
+        progress = reprocessor.progress()
+        assert progress["state"] == STATE_DONE, progress
+        assert progress["processed"] == progress["total"] == FACES
+        assert set(changes) == changed and progress["changed"] == len(changed)
+
+        record = review_set.load(list(expected)[0])
+        assert record["person_id"] == "person_0" and not record["needs_review"]
+        assert record["model_version"] == version and record["camera"] == "door"
+
+        # A finished version is not reprocessed again
+        _, changes = run_reprocessor(config, review_set, version)
+        assert changes == []
+
+
+def test_resumes_from_checkpoint():
+    """A restart continues after the last checkpointed face."""
+    with tempfile.TemporaryDirectory() as tmp:
+        config = make_config(tmp)
+        review_set, version, expected = make_review_set(config)
+        face_ids = list(expected)
+        Path(config.review_dir).with_name("checkpoint.json").write_text(json.dumps({
+            "model_version": version, "last_face_id": face_ids[3],
+            "processed": 4, "changed": 0, "completed": False,
+        }))
+
+        reprocessor, changes = run_reprocessor(config, review_set, version)
+        assert set(changes) == expected_changes(expected) & set(face_ids[4:])
+        assert reprocessor.progress()["processed"] == FACES
+
+
+def test_process_pool_matches_inline():
+    """The niced process pool gives the same decisions as the inline path."""
+    with tempfile.TemporaryDirectory() as tmp:
+        config = make_config(tmp, reprocess_workers=1, reprocess_nice=5)
+        review_set, version, expected = make_review_set(config)
+        reprocessor, changes = run_reprocessor(config, review_set, version)
+        assert reprocessor.progress()["state"] == STATE_DONE, reprocessor.progress()
+        assert set(changes) == expected_changes(expected)
+
+
+def test_yields_to_live_requests():
+    """Nothing is processed while the live queue is busy."""
+    with tempfile.TemporaryDirectory() as tmp:
+        config = make_config(tmp)
+        review_set, version, _ = make_review_set(config)
+        reprocessor = ReviewReprocessor(
+            config, review_set, Path(tmp) / "checkpoint.json",
+            live_stats=lambda: {"depth": 1, "running": 1},
+        )
+        assert reprocessor.start(version)
+        time.sleep(0.5)
+        reprocessor.stop(10)
+        progress = reprocessor.progress()
+        assert progress["state"] == STATE_STOPPED
+        assert progress["processed"] == 0 and progress["yielded_seconds"] > 0
+
+
+def test_pipeline_saves_review_faces():
+    """Faces that need review are stored with a face id and their decision."""
+
+    class FixedDetector:
+        def detect(self, frame):
+            return [Detection(10, 10, 40, 40, 0.9, frame[10:50, 10:50])]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        config = make_config(tmp)
+        pipeline = RecognitionPipeline(config)
+        pipeline.detector = FixedDetector()
+        frame = np.random.default_rng(0).integers(0, 255, (120, 160, 3), dtype=np.uint8)
+        image = cv2.imencode(".jpg", frame)[1].tobytes()
+
+        result = pipeline.recognize(image, {"camera": "door"})
+        face_id = result["faces"][0]["face_id"]
+        assert face_id.startswith("img_") and face_id.endswith("_face_0")
+        assert pipeline.review_set.face_ids() == [face_id]
+        record = pipeline.review_set.load(face_id)
+        assert record["needs_review"] and record["camera"] == "door"
+        assert record["box"] == [10, 10, 40, 40] and record["model_version"] is None
+        assert cv2.imread(str(pipeline.review_set.crop_path(face_id))).shape == (40, 40, 3)
+
+
+def main():
+    """Run all tests."""
+    tests = [
+        test_only_changed_decisions_are_emitted,
+        test_resumes_from_checkpoint,
+        test_process_pool_matches_inline,
+        test_yields_to_live_requests,
+        test_pipeline_saves_review_faces,
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"[OK] {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"[FAIL] {test.__name__}: {e}")
+
+    print(f"Results: {len(tests) - failed}/{len(tests)} tests passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
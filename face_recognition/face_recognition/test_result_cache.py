@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""Tests for the recognition result cache.
+
+Usage:
+    python test_result_cache.py
+"""
+
+import logging
+import sys
+import tempfile
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import cv2
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+
+from conftest import make_api
+from face_recognition_addon.detection import Detection
+from face_recognition_addon.result_cache import ResultCache
+
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+
+class CountingDetector:
+    """Reports one face per frame and counts the frames it was given."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def detect(self, frame):
+        self.calls += 1
+        return [Detection(10, 10, 40, 40, 0.9, frame[10:50, 10:50])]
+
+
+def snapshot(seed: int) -> bytes:
+    """A distinct JPEG snapshot."""
+    frame = np.random.default_rng(seed).integers(0, 255, (120, 160, 3), dtype=np.uint8)
+    return cv2.imencode(".jpg", frame)[1].tobytes()
+
+
+def test_repeated_snapshot_served_from_cache():
+    """The same image is recognized once; repeats are answered from the cache."""
+    with tempfile.TemporaryDirectory() as tmp:
+        api = make_api(tmp, CountingDetector())
+        client = api.app.test_client()
+        image = snapshot(0)
+
+        first = client.post("/recognize", data=image, headers={"Content-Type": "image/jpeg", "X-Camera": "door"})
+        second = client.post("/recognize", data=image, headers={"Content-Type": "image/jpeg", "X-Camera": "hall"})
+        other = client.post("/recognize", data=snapshot(1), headers={"Content-Type": "image/jpeg", "X-Camera": "door"})
+        assert first.status_code == second.status_code == other.status_code == 200
+
+        first, second = first.get_json(), second.get_json()
+        assert api.pipeline.detector.calls == 2
+        assert "cached" not in first and second["cached"] is True
+        assert second["faces"] == first["faces"] and second["person_id"] == first["person_id"]
+        # Per-request fields come from the new request
+        assert second["camera"] == "hall" and set(second["timings_ms"]) == {"cache"}
+
+        status = client.get("/status").get_json()["result_cache"]
+        assert status["hits"] == 1 and status["misses"] == 2 and status["entries"] == 2
+        assert status["hit_ratio"] == round(1 / 3, 4)
+        metrics = client.get("/metrics").get_data(as_text=True)
+        assert 'face_recognition_cache_lookups_total{cache="result",result="hit"} 1' in metrics
+
+
+def test_hits_are_fast():
+    """A cache hit through the pipeline takes well under a millisecond."""
+    with tempfile.TemporaryDirectory() as tmp:
+        pipeline = make_api(tmp, CountingDetector()).pipeline
+        image = snapshot(0)
+        pipeline.recognize(image, {"camera": "door"})
+        timings = []
+        for _ in range(200):
+            start = time.perf_counter()
+            result = pipeline.recognize(image, {"camera": "door"})
+            timings.append(time.perf_counter() - start)
+        assert result["cached"] and pipeline.detector.calls == 1
+        assert np.median(timings) < 0.001, f"median hit {np.median(timings) * 1000:.3f} ms"
+
+
+def test_lru_bound_and_ttl():
+    """Least recently used entries are dropped first; entries expire after the TTL."""
+    cache = ResultCache(max_entries=2, ttl=0.2)
+    keys = [cache.key(snapshot(n), "v1") for n in range(3)]
+    for key in keys[:2]:
+        cache.put(key, {"person_id": key[1].hex()})
+    assert cache.get(keys[0]) is not None
+    cache.put(keys[2], {"person_id": "c"})
+    assert cache.get(keys[1]) is None and cache.get(keys[0]) and cache.get(keys[2])
+
+    # Returned results are copies
+    cache.get(keys[2])["person_id"] = "changed"
+    assert cache.get(keys[2])["person_id"] == "c"
+
+    time.sleep(0.3)
+    assert cache.get(keys[0]) is None and cache.stats()["entries"] == 1
+
+
+def test_model_swap_invalidates():
+    """Results are keyed by model version and dropped when a new model is swapped in."""
+    with tempfile.TemporaryDirectory() as tmp:
+        pipeline = make_api(tmp, CountingDetector()).pipeline
+        image = snapshot(0)
+        pipeline.recognize(image, {"camera": "door"})
+        assert pipeline.recognize(image, {"camera": "door"})["cached"]
+
+        pipeline._on_models_swapped(SimpleNamespace(version="v2"))
+        assert pipeline.result_cache.stats()["entries"] == 0
+        assert "cached" not in pipeline.recognize(image, {"camera": "door"})
+        assert pipeline.detector.calls == 2
+        assert ResultCache.key(image, "v1") != ResultCache.key(image, "v2")
+
+
+def test_cache_disabled():
+    """result_cache_size 0 disables the cache."""
+    with tempfile.TemporaryDirectory() as tmp:
+        api = make_api(tmp, CountingDetector(), result_cache_size=0, dedupe_ring_size=0)
+        image = snapshot(0)
+        for _ in range(2):
+            assert "cached" not in api.pipeline.recognize(image, {"camera": "door"})
+        assert api.pipeline.detector.calls == 2
+        assert api.app.test_client().get("/status").get_json()["result_cache"] == {"enabled": False}
+
+
+def main():
+    """Run all tests."""
+    tests = [
+        test_repeated_snapshot_served_from_cache,
+        test_hits_are_fast,
+        test_lru_bound_and_ttl,
+        test_model_swap_invalidates,
+        test_cache_disabled,
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"[OK] {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"[FAIL] {test.__name__}: {e}")
+
+    print(f"Results: {len(tests) - failed}/{len(tests)} tests passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
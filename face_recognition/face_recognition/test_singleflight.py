@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""Tests for coalescing concurrent recognitions per camera.
+
+Usage:
+    python test_singleflight.py
+"""
+
+import logging
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+
+from conftest import make_api
+from face_recognition_addon.api import FaceRecognitionAPI
+from face_recognition_addon.detection import Detection
+from face_recognition_addon.singleflight import SingleFlight
+
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+# Result cache and dedupe off, so only coalescing shares work
+NO_SHARING = {"result_cache_size": 0, "dedupe_ring_size": 0}
+
+
+class SlowDetector:
+    """Takes `delay` seconds per frame and reports one face."""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.calls = 0
+
+    def detect(self, frame):
+        self.calls += 1
+        time.sleep(self.delay)
+        return [Detection(10, 10, 40, 40, 0.9, frame[10:50, 10:50])]
+
+
+def snapshot(seed: int) -> bytes:
+    """A distinct JPEG snapshot."""
+    frame = np.random.default_rng(seed).integers(0, 255, (120, 160, 3), dtype=np.uint8)
+    return cv2.imencode(".jpg", frame)[1].tobytes()
+
+
+def post_concurrently(api: FaceRecognitionAPI, requests, stagger: float = 0.02):
+    """POST (camera, image) pairs from one thread each; returns (status, json) in order."""
+    responses = [None] * len(requests)
+
+    def post(i, camera, image):
+        response = api.app.test_client().post(
+            "/recognize", data=image, headers={"Content-Type": "image/jpeg", "X-Camera": camera})
+        responses[i] = (response.status_code, response.get_json())
+
+    threads = [threading.Thread(target=post, args=(i, camera, image))
+               for i, (camera, image) in enumerate(requests)]
+    for thread in threads:
+        thread.start()
+        time.sleep(stagger)
+    for thread in threads:
+        thread.join(10)
+    return responses
+
+
+def test_concurrent_requests_share_one_run():
+    """Requests for a camera while its run is in flight get that run's result."""
+    with tempfile.TemporaryDirectory() as tmp:
+        api = make_api(tmp, SlowDetector(0.5), **NO_SHARING)
+        responses = post_concurrently(api, [("door", snapshot(i)) for i in range(4)] + [("garden", snapshot(9))])
+
+        assert all(status == 200 for status, _ in responses), responses
+        door = [body for _, body in responses[:4]]
+        assert [body["shared"] for body in door] == [False, True, True, True]
+        assert all(body["faces"] == door[0]["faces"] and body["image_size"] == door[0]["image_size"]
+                   for body in door)
+        assert responses[4][1]["shared"] is False and responses[4][1]["camera"] == "garden"
+        assert api.pipeline.detector.calls == 2
+
+        client = api.app.test_client()
+        status = client.get("/status").get_json()["coalescing"]
+        assert status["runs"] == 2 and status["shared"] == 3 and status["shared_ratio"] == 0.6
+        metrics = client.get("/metrics").get_data(as_text=True)
+        assert 'face_recognition_requests_coalesced_total{camera="door"} 3' in metrics
+
+
+def test_window_limits_sharing():
+    """A request arriving after the window starts its own run, even if one is in flight."""
+    with tempfile.TemporaryDirectory() as tmp:
+        api = make_api(tmp, SlowDetector(0.6), coalesce_window_seconds=0.2, **NO_SHARING)
+        responses = post_concurrently(api, [("door", snapshot(0)), ("door", snapshot(1))], stagger=0.35)
+        assert [body["shared"] for _, body in responses] == [False, False]
+        assert api.pipeline.detector.calls == 2
+
+        # Once a run finished, the next request starts a new one
+        api.pipeline.detector.delay = 0.0
+        responses = post_concurrently(api, [("door", snapshot(2))])
+        assert responses[0][1]["shared"] is False and api.pipeline.detector.calls == 3
+
+
+def test_coalescing_disabled():
+    """coalesce_window_seconds 0 runs every request."""
+    with tempfile.TemporaryDirectory() as tmp:
+        api = make_api(tmp, SlowDetector(0.2), coalesce_window_seconds=0, **NO_SHARING)
+        responses = post_concurrently(api, [("door", snapshot(i)) for i in range(3)])
+        assert all(status == 200 and "shared" not in body for status, body in responses)
+        assert api.pipeline.detector.calls == 3
+        assert api.app.test_client().get("/status").get_json()["coalescing"] == {"enabled": False}
+
+
+def test_single_flight_join():
+    """Calls join an unfinished flight; a failed start or a finished call starts a new one."""
+    flights = SingleFlight(window=5.0)
+
+    def fail():
+        raise RuntimeError("queue full")
+
+    try:
+        flights.join("door", fail, lambda value: False)
+    except RuntimeError:
+        pass
+    else:
+        raise AssertionError("expected RuntimeError")
+    assert flights.join("door", lambda: "run", lambda value: False) == ("run", False)
+    assert flights.join("door", lambda: "other", lambda value: False) == ("run", True)
+    assert flights.join("door", lambda: "next", lambda value: True) == ("next", False)
+    assert flights.stats()["runs"] == 2 and flights.stats()["in_flight"] == 1
+
+
+def main():
+    """Run all tests."""
+    tests = [
+        test_concurrent_requests_share_one_run,
+        test_window_limits_sharing,
+        test_coalescing_disabled,
+        test_single_flight_join,
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"[OK] {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"[FAIL] {test.__name__}: {e}")
+
+    print(f"Results: {len(tests) - failed}/{len(tests)} tests passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
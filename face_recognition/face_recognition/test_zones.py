@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""Tests for per-camera detection zones.
+
+Usage:
+    python test_zones.py
+"""
+
+import json
+import logging
+import sys
+import tempfile
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+
+from conftest import make_api
+from face_recognition_addon.config import Config, ConfigLoader
+from face_recognition_addon.detection import Detection
+from face_recognition_addon.zones import ZoneDetector, ZoneMap, parse_zone, region_rects
+
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+
+class GridDetector:
+    """Reports a 40x40 face at every (x, y) of `faces` inside the frame it is given."""
+
+    def __init__(self, faces=((10, 10),)):
+        self.faces = faces
+        self.shapes = []
+
+    def detect(self, frame):
+        self.shapes.append(frame.shape[:2])
+        return [Detection(x, y, 40, 40, 0.9 - i * 0.1, frame[y:y + 40, x:x + 40])
+                for i, (x, y) in enumerate(self.faces)
+                if x + 40 <= frame.shape[1] and y + 40 <= frame.shape[0]]
+
+
+def snapshot(width: int = 400, height: int = 200) -> bytes:
+    """A noise JPEG snapshot."""
+    frame = np.random.default_rng(0).integers(0, 255, (height, width, 3), dtype=np.uint8)
+    return cv2.imencode(".jpg", frame)[1].tobytes()
+
+
+def test_parse_zones():
+    """Rectangles and polygons are parsed; malformed zones are rejected."""
+    rect = parse_zone("0.5,0.25,0.25,0.5")
+    assert rect.rectangle and rect.bounds == (0.5, 0.25, 0.75, 0.75)
+    assert rect.pixel_bounds(400, 200) == (200, 50, 300, 150)
+
+    triangle = parse_zone("0,0 1,0 0,1")
+    assert not triangle.rectangle and triangle.bounds == (0, 0, 1, 1)
+    assert triangle.contains(0.2, 0.2) and not triangle.contains(0.8, 0.8)
+
+    for bad in ("", "0.1,0.1,0.5", "0.5,0.5,0.6,0.6", "0,0 1,1", "a,b,c,d", "0,0 1,0 1,0", "0.1,0.1,0,0.2"):
+        try:
+            parse_zone(bad)
+        except ValueError:
+            continue
+        raise AssertionError(f"zone {bad!r} accepted")
+
+    zones = ZoneMap.from_options([
+        {"camera": "driveway", "zone": "0.5,0.25,0.25,0.5"},
+        {"camera": "driveway", "zone": "0,0 0.1,0 0,0.1"},
+    ])
+    assert len(zones.get("driveway")) == 2 and zones.get("door") == () and zones.get(None) == ()
+    try:
+        ZoneMap.from_options([{"zone": "0,0,1,1"}])
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("zone without camera accepted")
+
+
+def test_config_loader_compiles_zones():
+    """camera_zones from options.json are compiled into config.zones; invalid ones fail loading."""
+    with tempfile.TemporaryDirectory() as tmp:
+        options = Path(tmp) / "options.json"
+        options.write_text(json.dumps({"camera_zones": [{"camera": "driveway", "zone": "0.5,0.25,0.25,0.5"}]}))
+        config = ConfigLoader(str(options)).load()
+        assert config.zones.stats() == {"driveway": {"zones": 1, "area": 0.125}}
+
+        options.write_text(json.dumps({"camera_zones": [{"camera": "driveway", "zone": "0.5,0.5,0.9,0.2"}]}))
+        try:
+            ConfigLoader(str(options)).load()
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("invalid zone accepted")
+        assert not Config().zones
+
+
+def test_detects_only_inside_zones():
+    """The detector sees only the zone, boxes come back in frame coordinates as frame views."""
+    frame = np.zeros((200, 400, 3), dtype=np.uint8)
+    detector = GridDetector(faces=((10, 10), (50, 60)))
+    zones = ZoneMap.from_options([{"camera": "driveway", "zone": "0.5,0.25,0.25,0.5"}]).get("driveway")
+
+    detections = ZoneDetector(detector, zones).detect(frame)
+    assert detector.shapes == [(100, 100)]
+    assert [d.box for d in detections] == [(210, 60, 40, 40), (250, 110, 40, 40)]
+    assert all(np.shares_memory(d.crop, frame) for d in detections)
+
+
+def test_polygon_and_overlapping_zones():
+    """Overlapping zones are detected once; faces centred outside the polygons are dropped."""
+    frame = np.zeros((200, 400, 3), dtype=np.uint8)
+    detector = GridDetector(faces=((0, 0), (100, 0)))
+    zones = ZoneMap.from_options([
+        {"camera": "cam", "zone": "0,0,0.25,0.5"},
+        {"camera": "cam", "zone": "0.2,0 0.5,0 0.2,0.5"},
+    ]).get("cam")
+    assert region_rects(zones, 400, 200) == ((0, 0, 200, 100),)
+
+    detections = ZoneDetector(detector, zones).detect(frame)
+    assert detector.shapes == [(100, 200)]
+    # (0, 0) is inside the rectangle, (100, 0) has its centre (120, 20) inside the triangle
+    assert [d.box for d in detections] == [(0, 0, 40, 40), (100, 0, 40, 40)]
+
+    detector = GridDetector(faces=((150, 60),))
+    assert ZoneDetector(detector, zones).detect(frame) == []
+
+
+def test_pipeline_uses_camera_zones():
+    """Zoned cameras are detected in their zones, others in full; results are cached per zoned camera."""
+    with tempfile.TemporaryDirectory() as tmp:
+        api = make_api(tmp, GridDetector(), dedupe_ring_size=0,
+                       camera_zones=[{"camera": "driveway", "zone": "0.5,0.25,0.25,0.5"}])
+        client = api.app.test_client()
+        image = snapshot()
+
+        def post(camera):
+            response = client.post("/recognize", data=image,
+                                   headers={"Content-Type": "image/jpeg", "X-Camera": camera})
+            assert response.status_code == 200
+            return response.get_json()
+
+        driveway = post("driveway")
+        assert driveway["faces"][0]["box"] == [210, 60, 40, 40]
+        door = post("door")
+        assert door["faces"][0]["box"] == [10, 10, 40, 40] and "cached" not in door
+        assert api.pipeline.detector.shapes == [(100, 100), (200, 400)]
+        assert post("driveway")["cached"] and post("garden")["cached"]
+
+        assert client.get("/status").get_json()["zones"] == {"driveway": {"zones": 1, "area": 0.125}}
+
+
+def main():
+    """Run all tests."""
+    tests = [
+        test_parse_zones,
+        test_config_loader_compiles_zones,
+        test_detects_only_inside_zones,
+        test_polygon_and_overlapping_zones,
+        test_pipeline_uses_camera_zones,
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"[OK] {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"[FAIL] {test.__name__}: {e}")
+
+    print(f"Results: {len(tests) - failed}/{len(tests)} tests passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,7 +5,9 @@ import asyncio
 
 from homeassistant.core import HomeAssistant
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
 
+from .client import AddonClient
 from .events import DOMAIN, EVENT_DETECTED
 
 _LOGGER = logging.getLogger(__name__)
@@ -43,6 +45,20 @@ async def async_setup(hass: HomeAssistant, config: dict) -> bool:
         integration_config = config.get(DOMAIN, {})
         hass.data.setdefault(DOMAIN, {})["config"] = integration_config
 
+        # One long-lived add-on client shared by every service
+        coordinator = FaceRecognitionCoordinator(
+            hass,
+            integration_config.get("api_host", "localhost"),
+            integration_config.get("api_port", 8080),
+            integration_config.get("api_token", ""),
+        )
+        hass.data[DOMAIN]["coordinator"] = coordinator
+
+        async def _async_shutdown(event):
+            await coordinator.async_shutdown()
+
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, _async_shutdown)
+
         # Chunk 2: Service-based recognition only (no automatic ingestion)
         _LOGGER.error("Face Recognition integration ready - use face_recognition.recognize_face service")
         
@@ -71,8 +87,7 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     api_token = entry.data.get("api_token", "")
     
     # Create coordinator to poll add-on API
-    from homeassistant.helpers import aiohttp_client as aiohttp_helper
-    coordinator = FaceRecognitionCoordinator(hass, api_host, api_port, api_token, aiohttp_helper)
+    coordinator = FaceRecognitionCoordinator(hass, api_host, api_port, api_token)
     
     # Store coordinator in hass data
     hass.data.setdefault(DOMAIN, {})[entry.entry_id] = coordinator
@@ -101,7 +116,7 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 class FaceRecognitionCoordinator:
     """Coordinates communication with face recognition add-on."""
     
-    def __init__(self, hass: HomeAssistant, api_host: str, api_port: int, api_token: str, aiohttp_helper):
+    def __init__(self, hass: HomeAssistant, api_host: str, api_port: int, api_token: str):
         """Initialize coordinator.
         
         Args:
@@ -109,30 +124,26 @@ class FaceRecognitionCoordinator:
             api_host: Add-on API host
             api_port: Add-on API port
             api_token: API authentication token
-            aiohttp_helper: aiohttp_client helper module
         """
         self.hass = hass
         self.api_host = api_host
         self.api_port = api_port
         self.api_token = api_token
         self.api_url = f"http://{api_host}:{api_port}"
-        self._session = None
-        self._aiohttp_helper = aiohttp_helper
+        self.client = AddonClient(self.api_url, api_token)
         
     async def async_config_entry_first_refresh(self):
         """Perform initial refresh."""
-        self._session = self._aiohttp_helper.async_get_clientsession(self.hass)
         await self._check_status()
         
     async def _check_status(self):
         """Check add-on API status."""
         try:
-            async with self._session.get(f"{self.api_url}/status", timeout=5) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    _LOGGER.info(f"Add-on status: {data.get('status')}")
-                else:
-                    _LOGGER.warning(f"Add-on status check failed: {response.status}")
+            response = await self.client.status()
+            if response["status"] == 200:
+                _LOGGER.info(f"Add-on status: {response['data'].get('status')}")
+            else:
+                _LOGGER.warning(f"Add-on status check failed: {response['status']}")
         except Exception as e:
             _LOGGER.error(f"Error checking add-on status: {e}")
     
@@ -147,5 +158,4 @@ class FaceRecognitionCoordinator:
     
     async def async_shutdown(self):
         """Shutdown coordinator."""
-        if self._session:
-            await self._session.close()
+        await self.client.async_close()
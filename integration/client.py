@@ -0,0 +1,345 @@
+"""Pooled HTTP client for the face recognition add-on API."""
+
+import asyncio
+import logging
+import random
+import time
+from typing import Any, Callable, Dict, Optional
+
+import aiohttp
+
+_LOGGER = logging.getLogger(__name__)
+
+# Connection pool
+DEFAULT_POOL_SIZE = 8
+KEEPALIVE_TIMEOUT = 60  # seconds an idle connection is kept open
+REQUEST_TIMEOUT = 30  # seconds per attempt
+
+# Retry once on external failures (PRD), after a short jittered pause
+RETRY_ATTEMPTS = 1
+RETRY_JITTER = (0.1, 0.5)  # seconds
+MAX_RETRY_AFTER = 2.0  # longest Retry-After we are willing to wait inline
+# Gateway/unavailable responses mean the add-on is down or restarting. Other
+# 5xx (e.g. a recognition job failing on bad input) come from an add-on that
+# is up, so they are neither retried nor counted against the breaker.
+TRANSIENT_STATUSES = (502, 503, 504)
+
+# Circuit breaker
+FAILURE_THRESHOLD = 3  # consecutive failures that open the circuit
+RESET_TIMEOUT = 30.0  # seconds before a trial request is let through
+
+# Weight of the newest sample in the latency moving average
+EWMA_ALPHA = 0.2
+
+# Polling of jobs the add-on answered with 202 (past request_deadline_seconds)
+JOB_POLL_INTERVAL = 0.5  # seconds between polls
+JOB_POLL_TIMEOUT = 60.0  # seconds before giving up on a job
+
+
+class AddonError(Exception):
+    """Base error for add-on API calls."""
+
+
+class AddonUnavailableError(AddonError):
+    """The add-on could not be reached or kept failing."""
+
+
+class CircuitOpenError(AddonUnavailableError):
+    """Calls are short-circuited because the add-on recently kept failing."""
+
+    def __init__(self, retry_in: float):
+        super().__init__(f"Add-on unavailable, circuit open for another {retry_in:.0f}s")
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """Fails fast after repeated add-on failures.
+
+    closed: requests flow normally. After ``failure_threshold`` consecutive
+    failures the circuit opens and requests fail immediately. After
+    ``reset_timeout`` seconds one trial request is let through (half-open);
+    success closes the circuit, failure opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = FAILURE_THRESHOLD,
+                 reset_timeout: float = RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+
+    def check(self):
+        """Raise CircuitOpenError if a request should not be attempted."""
+        if self.state != self.OPEN:
+            return
+        elapsed = time.monotonic() - self._opened_at
+        if elapsed >= self.reset_timeout:
+            self.state = self.HALF_OPEN
+            _LOGGER.info("Add-on circuit half-open, sending trial request")
+            return
+        raise CircuitOpenError(self.reset_timeout - elapsed)
+
+    def record_success(self):
+        """Record a successful call."""
+        if self.state != self.CLOSED:
+            _LOGGER.info("Add-on circuit closed")
+        self.state = self.CLOSED
+        self.failures = 0
+
+    def record_failure(self):
+        """Record a failed call."""
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                _LOGGER.warning(
+                    f"Add-on circuit open after {self.failures} failures, "
+                    f"failing fast for {self.reset_timeout:.0f}s"
+                )
+            self.state = self.OPEN
+            self._opened_at = time.monotonic()
+
+
+class AddonClient:
+    """Long-lived client for the add-on API shared by every service.
+
+    Owns one aiohttp session with a sized keep-alive connection pool, retries
+    once with jitter, trips a circuit breaker when the add-on is down and
+    records round-trip latency.
+    """
+
+    def __init__(self, api_url: str, api_token: str = "",
+                 pool_size: int = DEFAULT_POOL_SIZE):
+        """Initialize client.
+
+        Args:
+            api_url: Add-on base URL, e.g. http://localhost:8080
+            api_token: Add-on API token (empty for none)
+            pool_size: Maximum open connections to the add-on
+        """
+        self.api_url = api_url.rstrip("/")
+        self.api_token = api_token
+        self.pool_size = pool_size
+        self.breaker = CircuitBreaker()
+        self._session: Optional[aiohttp.ClientSession] = None
+
+        self.requests = 0
+        self.failures = 0
+        self.retries = 0
+        self.last_latency_ms: Optional[float] = None
+        self.avg_latency_ms: Optional[float] = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Create the pooled session on first use (inside the event loop)."""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_size,
+                limit_per_host=self.pool_size,
+                keepalive_timeout=KEEPALIVE_TIMEOUT,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT),
+            )
+        return self._session
+
+    async def async_close(self):
+        """Close the session and its pooled connections."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def recognize(self, image_bytes: bytes, headers: Dict[str, str]) -> Dict[str, Any]:
+        """POST a raw image to /recognize.
+
+        Args:
+            image_bytes: Encoded image
+            headers: Content-Type and X-* metadata headers
+
+        Returns:
+            Response dict with ``status`` and ``data`` (parsed JSON or text)
+        """
+        return await self.request("POST", "/recognize", headers=headers,
+                                  data=lambda: image_bytes)
+
+    async def recognize_batch(self, form_factory: Callable[[], aiohttp.FormData]) -> Dict[str, Any]:
+        """POST several images to /event/batch.
+
+        Args:
+            form_factory: Builds the multipart body (called once per attempt,
+                since FormData can only be sent once)
+
+        Returns:
+            Response dict with ``status`` and ``data``
+        """
+        return await self.request("POST", "/event/batch", data=form_factory)
+
+    async def wait_for_job(self, response: Dict[str, Any],
+                           timeout: float = JOB_POLL_TIMEOUT) -> Dict[str, Any]:
+        """Poll a job the add-on accepted with 202 until it finishes.
+
+        Args:
+            response: The 202 response dict (its ``data`` has ``status_url``)
+            timeout: Seconds to keep polling
+
+        Returns:
+            Response dict with status 200 and the job's result as ``data`` once
+            it is done, 500 if it failed, or the last poll response otherwise
+            (still 202 on timeout, 404 if the job expired)
+
+        Raises:
+            CircuitOpenError: If the circuit is open
+            AddonUnavailableError: If the add-on could not be reached
+        """
+        status_url = response["data"].get("status_url") if isinstance(response["data"], dict) else None
+        if status_url is None:
+            return response
+
+        deadline = time.monotonic() + timeout
+        latency_ms = response.get("latency_ms", 0.0)
+        while time.monotonic() < deadline:
+            await asyncio.sleep(JOB_POLL_INTERVAL)
+            poll = await self.request("GET", status_url)
+            latency_ms += poll["latency_ms"]
+            job = poll["data"]
+            if poll["status"] != 200 or not isinstance(job, dict):
+                return poll
+            if job.get("status") == "done":
+                return {**poll, "data": job.get("result", {}), "latency_ms": round(latency_ms, 1)}
+            if job.get("status") == "failed":
+                return {**poll, "status": 500, "data": job}
+        _LOGGER.warning(f"Add-on job {status_url} did not finish within {timeout:.0f}s")
+        return response
+
+    async def status(self) -> Dict[str, Any]:
+        """GET /status."""
+        return await self.request("GET", "/status")
+
+    async def request(self, method: str, path: str, *,
+                      headers: Optional[Dict[str, str]] = None,
+                      data: Optional[Callable[[], Any]] = None) -> Dict[str, Any]:
+        """Call the add-on API with retry and circuit breaking.
+
+        Connection errors, timeouts, 502/503/504 and 429 responses are
+        retried once after a jittered pause (honouring a short Retry-After).
+        Only the former three count as circuit-breaker failures. Other
+        responses are returned as-is.
+
+        Args:
+            method: HTTP method
+            path: API path, e.g. /recognize
+            headers: Extra request headers
+            data: Callable returning the request body for each attempt
+
+        Returns:
+            Dict with ``status`` (HTTP status), ``data`` (parsed JSON or
+            text), ``latency_ms`` and ``attempts``
+
+        Raises:
+            CircuitOpenError: If the circuit is open
+            AddonUnavailableError: If every attempt failed to connect
+        """
+        self.breaker.check()
+
+        request_headers = dict(headers or {})
+        if self.api_token:
+            request_headers["Authorization"] = f"Bearer {self.api_token}"
+
+        session = self._get_session()
+        last_error: Optional[Exception] = None
+
+        for attempt in range(RETRY_ATTEMPTS + 1):
+            if attempt:
+                self.retries += 1
+            self.requests += 1
+            start = time.monotonic()
+            retry_after = None
+            try:
+                async with session.request(
+                    method,
+                    f"{self.api_url}{path}",
+                    headers=request_headers,
+                    data=data() if data else None,
+                ) as response:
+                    if response.content_type == "application/json":
+                        body = await response.json()
+                    else:
+                        body = await response.text()
+                    latency_ms = self._record_latency(start)
+                    result = {
+                        "status": response.status,
+                        "data": body,
+                        "latency_ms": latency_ms,
+                        "attempts": attempt + 1,
+                    }
+
+                    if response.status not in TRANSIENT_STATUSES and response.status != 429:
+                        self.breaker.record_success()
+                        return result
+
+                    last_error = AddonError(f"Add-on returned {response.status}")
+                    retry_after = _parse_retry_after(response.headers.get("Retry-After"))
+                    if response.status == 429:
+                        # Overloaded but alive - doesn't count against the breaker
+                        if attempt == RETRY_ATTEMPTS or retry_after > MAX_RETRY_AFTER:
+                            return result
+                    else:
+                        self._record_failure()
+                        if attempt == RETRY_ATTEMPTS:
+                            return result
+
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                last_error = e
+                self._record_failure()
+                _LOGGER.warning(f"Add-on {method} {path} failed (attempt {attempt + 1}): {e}")
+
+            if attempt < RETRY_ATTEMPTS:
+                # The breaker may have opened on this failure - fail fast
+                self.breaker.check()
+                delay = random.uniform(*RETRY_JITTER)
+                if retry_after is not None:
+                    delay = max(delay, retry_after)
+                await asyncio.sleep(delay)
+
+        raise AddonUnavailableError(f"Add-on {method} {path} failed: {last_error}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Client statistics (latency, retries, circuit state)."""
+        return {
+            "requests": self.requests,
+            "failures": self.failures,
+            "retries": self.retries,
+            "circuit": self.breaker.state,
+            "last_latency_ms": self.last_latency_ms,
+            "avg_latency_ms": self.avg_latency_ms,
+        }
+
+    def _record_latency(self, start: float) -> float:
+        """Record round-trip latency of one attempt."""
+        latency_ms = round((time.monotonic() - start) * 1000, 1)
+        self.last_latency_ms = latency_ms
+        if self.avg_latency_ms is None:
+            self.avg_latency_ms = latency_ms
+        else:
+            self.avg_latency_ms = round(
+                self.avg_latency_ms + EWMA_ALPHA * (latency_ms - self.avg_latency_ms), 1
+            )
+        _LOGGER.debug(f"Add-on round trip: {latency_ms} ms (avg {self.avg_latency_ms} ms)")
+        return latency_ms
+
+    def _record_failure(self):
+        """Record a failed attempt."""
+        self.failures += 1
+        self.breaker.record_failure()
+
+
+def _parse_retry_after(value: Optional[str]) -> float:
+    """Parse a Retry-After header in seconds (0 if absent or invalid)."""
+    try:
+        return max(0.0, float(value)) if value else 0.0
+    except ValueError:
+        return 0.0
@@ -0,0 +1,57 @@
+"""Camera frame acquisition for face recognition services."""
+
+import logging
+from typing import Optional, Tuple
+
+from homeassistant.components.camera import async_get_image
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+
+_LOGGER = logging.getLogger(__name__)
+
+# Seconds to wait for a camera to produce a frame
+FRAME_TIMEOUT = 10
+
+
+async def async_get_camera_frame(
+    hass: HomeAssistant,
+    entity_id: str,
+    width: Optional[int] = None,
+    height: Optional[int] = None,
+) -> Tuple[bytes, str]:
+    """Get a still frame from a camera entity through the in-process camera API.
+
+    No HTTP request is made: the frame comes straight from the camera
+    entity, so there is no loopback request, auth round trip or second JPEG
+    transfer. Cameras that support server-side scaling use the width/height
+    hints to return a smaller frame; others ignore them and return full size.
+
+    Args:
+        hass: Home Assistant instance
+        entity_id: Camera entity ID
+        width: Optional requested frame width in pixels
+        height: Optional requested frame height in pixels
+
+    Returns:
+        (image bytes, content type) tuple
+
+    Raises:
+        ValueError: If the entity is not a camera or has no image
+    """
+    if not entity_id.startswith("camera."):
+        raise ValueError(f"Entity {entity_id} is not a camera")
+    if hass.states.get(entity_id) is None:
+        raise ValueError(f"Entity {entity_id} not found")
+
+    try:
+        image = await async_get_image(
+            hass, entity_id, timeout=FRAME_TIMEOUT, width=width, height=height
+        )
+    except HomeAssistantError as e:
+        raise ValueError(f"Camera {entity_id} has no accessible image: {e}") from e
+
+    _LOGGER.debug(
+        f"Got frame from {entity_id}: {len(image.content)} bytes, {image.content_type}"
+        + (f" (requested {width}x{height})" if width or height else "")
+    )
+    return image.content, image.content_type
@@ -1,15 +1,19 @@
 """Service definitions for face recognition integration."""
 
-from homeassistant.core import ServiceCall
+from homeassistant.core import ServiceCall, SupportsResponse
 from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
 from datetime import datetime
+import asyncio
 import logging
 import base64
 import aiohttp
 import voluptuous as vol
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Tuple
 
+from .client import AddonClient, AddonUnavailableError, CircuitOpenError
 from .events import DOMAIN, EVENT_DETECTED
+from .frames import async_get_camera_frame
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -42,120 +46,63 @@ async def async_setup_services(hass):
         - image_data: Base64 encoded image data
         - camera: Camera entity ID (optional)
         - entity_id: Camera entity to get image from
+        - width/height: Frame size hints for cameras that can scale
         """
         try:
             _LOGGER.error("=== RECOGNIZE_FACE SERVICE CALLED ===")
             _LOGGER.error(f"Service data: {call.data}")
 
-            # Get configuration
-            config = hass.data.get(DOMAIN, {}).get("config", {})
-            api_host = config.get("api_host", "localhost")
-            api_port = config.get("api_port", 8080)
-            api_token = config.get("api_token", "")
-            api_url = f"http://{api_host}:{api_port}"
-
-            _LOGGER.error(f"Connecting to add-on at: {api_url}")
+            client = _get_client(hass)
 
             # Get image data
             image_url = call.data.get("image_url")
-            image_data = call.data.get("image_data")
             camera = call.data.get("camera", "unknown")
             entity_id = call.data.get("entity_id")
 
-            image_bytes = None
-
-            # Method 1: Get image from entity_id (camera entity)
-            if entity_id:
-                _LOGGER.error(f"Getting image from entity: {entity_id}")
-                image_bytes = await _get_image_from_entity(hass, entity_id)
-
-            # Method 2: Get image from URL
-            elif image_url:
-                _LOGGER.error(f"Getting image from URL: {image_url}")
-                image_bytes = await _get_image_from_url(hass, image_url)
-
-            # Method 3: Use provided base64 data
-            elif image_data:
-                _LOGGER.error(f"Using provided base64 image data ({len(image_data)} chars)")
-                try:
-                    image_bytes = base64.b64decode(image_data)
-                except Exception as e:
-                    _LOGGER.error(f"Failed to decode base64 image data: {e}")
-                    raise ValueError(f"Invalid base64 image data: {e}")
-
-            else:
-                raise ValueError("No image source provided. Use image_url, image_data, or entity_id")
-
-            if not image_bytes:
-                raise ValueError("Failed to get image data")
+            image_bytes, content_type = await _get_image_bytes(hass, call.data)
 
             _LOGGER.error(f"Image size: {len(image_bytes)} bytes")
 
-            # Prepare payload for add-on
-            payload = {
-                "event_type": "recognition_request",
-                "camera": camera,
-                "image_data": base64.b64encode(image_bytes).decode('utf-8'),
-                "image_size": len(image_bytes),
-                "timestamp": datetime.now().isoformat(),
-                "source": "service_call"
+            # Send the raw image bytes to the add-on - metadata travels in
+            # headers so the image is never base64-encoded or JSON-wrapped
+            headers = {
+                "Content-Type": content_type,
+                "X-Camera": camera,
+                "X-Timestamp": datetime.now().isoformat(),
+                "X-Source": "service_call",
             }
-
             if entity_id:
-                payload["entity_id"] = entity_id
+                headers["X-Entity-Id"] = entity_id
             if image_url:
-                payload["image_url"] = image_url
+                headers["X-Image-Url"] = image_url
 
-            # Send to add-on
-            headers = {"Content-Type": "application/json"}
-            if api_token:
-                headers["Authorization"] = f"Bearer {api_token}"
+            _LOGGER.error(f"Sending to add-on: {client.api_url}/recognize")
 
-            _LOGGER.error(f"Sending to add-on: {api_url}/event")
-
-            session = aiohttp.ClientSession()
             try:
-                timeout = aiohttp.ClientTimeout(total=30)
-                async with session.post(
-                    f"{api_url}/event",
-                    json=payload,
-                    headers=headers,
-                    timeout=timeout
-                ) as response:
-
-                    if response.status == 200:
-                        result = await response.json()
-                        _LOGGER.error(f"Add-on response: {result}")
-
-                        # Return results to automation
-                        return {
-                            "success": True,
-                            "person_id": result.get("person_id"),
-                            "display_name": result.get("display_name"),
-                            "confidence": result.get("confidence"),
-                            "needs_review": result.get("needs_review", False),
-                            "face_count": result.get("face_count", 0),
-                            "processing_time_ms": result.get("processing_time_ms", 0),
-                            "raw_response": result
-                        }
-                    else:
-                        error_text = await response.text()
-                        _LOGGER.error(f"Add-on error: {response.status} - {error_text}")
-                        return {
-                            "success": False,
-                            "error": f"Add-on returned {response.status}",
-                            "error_details": error_text[:200]
-                        }
+                response = await client.recognize(image_bytes, headers)
+                if response["status"] == 202:
+                    response = await client.wait_for_job(response)
+            except AddonUnavailableError as e:
+                return _unavailable_response(e)
+
+            result = response["data"]
+            if response["status"] == 200:
+                _LOGGER.error(f"Add-on response: {result}")
 
-            except aiohttp.ClientError as e:
-                _LOGGER.error(f"Connection error to add-on: {e}")
+                # Return results to automation
                 return {
-                    "success": False,
-                    "error": f"Connection failed: {str(e)}",
-                    "suggestion": "Check if add-on is running and api_host is correct"
+                    "success": True,
+                    "person_id": result.get("person_id"),
+                    "display_name": result.get("display_name"),
+                    "confidence": result.get("confidence"),
+                    "needs_review": result.get("needs_review", False),
+                    "face_count": result.get("face_count", 0),
+                    "processing_time_ms": result.get("processing_time_ms", 0),
+                    "round_trip_ms": response["latency_ms"],
+                    "raw_response": result
                 }
-            finally:
-                await session.close()
+
+            return _error_response(response)
 
         except Exception as e:
             _LOGGER.exception(f"Error in recognize_face service: {e}")
@@ -164,34 +111,152 @@ async def async_setup_services(hass):
                 "error": str(e)
             }
 
-    async def _get_image_from_entity(hass, entity_id: str) -> Optional[bytes]:
-        """Get image from camera entity."""
+    async def recognize_faces_service(call: ServiceCall):
+        """Service to send several images for face recognition in one request.
+
+        Each entry of ``images`` takes the same fields as recognize_face
+        (camera plus one of entity_id, image_url or image_data). All images
+        are fetched concurrently and sent to the add-on's batch endpoint,
+        which returns one result per image.
+        """
         try:
-            state = hass.states.get(entity_id)
-            if not state:
-                raise ValueError(f"Entity {entity_id} not found")
-
-            # Check if it's a camera entity
-            if state.domain != "camera":
-                raise ValueError(f"Entity {entity_id} is not a camera")
-
-            # Get image URL from camera entity
-            image_url = state.attributes.get("entity_picture")
-            if not image_url:
-                # Try to get snapshot via camera service
-                from homeassistant.components.camera import async_get_image
-                try:
-                    image = await async_get_image(hass, entity_id)
-                    return image.content
-                except:
-                    raise ValueError(f"Camera {entity_id} has no accessible image")
+            images = call.data["images"]
+            _LOGGER.info(f"recognize_faces called with {len(images)} images")
+
+            client = _get_client(hass)
+
+            frames = await asyncio.gather(
+                *(_get_image_bytes(hass, image) for image in images)
+            )
+            timestamp = datetime.now().isoformat()
+
+            def build_form():
+                form = aiohttp.FormData()
+                for i, (image, (image_bytes, content_type)) in enumerate(zip(images, frames)):
+                    form.add_field(
+                        "image",
+                        image_bytes,
+                        filename=f"image_{i}",
+                        content_type=content_type,
+                    )
+                    form.add_field("camera", image.get("camera", "unknown"))
+                form.add_field("timestamp", timestamp)
+                form.add_field("source", "service_call")
+                return form
+
+            try:
+                response = await client.recognize_batch(build_form)
+                if response["status"] == 202:
+                    # Batch ran past request_deadline_seconds: poll its job
+                    response = await client.wait_for_job(response)
+            except AddonUnavailableError as e:
+                return _unavailable_response(e)
+
+            result = response["data"]
+            if response["status"] == 200:
+                return {
+                    "success": True,
+                    "count": result.get("count", 0),
+                    "processing_time_ms": result.get("processing_time_ms", 0),
+                    "round_trip_ms": response["latency_ms"],
+                    "results": [
+                        {
+                            "camera": r.get("camera"),
+                            "person_id": r.get("person_id"),
+                            "display_name": r.get("display_name"),
+                            "confidence": r.get("confidence"),
+                            "needs_review": r.get("needs_review", False),
+                            "face_count": r.get("face_count", 0),
+                        }
+                        for r in result.get("results", [])
+                    ],
+                }
 
-            # Fetch image from URL
-            return await _get_image_from_url(hass, image_url)
+            return _error_response(response)
 
         except Exception as e:
-            _LOGGER.error(f"Failed to get image from entity {entity_id}: {e}")
-            raise
+            _LOGGER.exception(f"Error in recognize_faces service: {e}")
+            return {
+                "success": False,
+                "error": str(e)
+            }
+
+    def _get_client(hass) -> AddonClient:
+        """Get the shared add-on client owned by the coordinator."""
+        coordinator = hass.data.get(DOMAIN, {}).get("coordinator")
+        if coordinator is None:
+            raise ValueError("Face Recognition integration is not set up")
+        return coordinator.client
+
+    def _error_response(response: Dict[str, Any]) -> Dict[str, Any]:
+        """Service result for a non-200 add-on response."""
+        error_text = response["data"] if isinstance(response["data"], str) else str(response["data"])
+        _LOGGER.error(f"Add-on error: {response['status']} - {error_text}")
+        return {
+            "success": False,
+            "error": f"Add-on returned {response['status']}",
+            "error_details": error_text[:200]
+        }
+
+    def _unavailable_response(error: AddonUnavailableError) -> Dict[str, Any]:
+        """Service result when the add-on can't be reached."""
+        _LOGGER.error(f"Add-on unavailable: {error}")
+        result = {
+            "success": False,
+            "error": str(error),
+            "suggestion": "Check if add-on is running and api_host is correct"
+        }
+        if isinstance(error, CircuitOpenError):
+            result["retry_in_s"] = round(error.retry_in)
+        return result
+
+    async def _get_image_bytes(hass, data) -> Tuple[bytes, str]:
+        """Get image bytes and content type from entity_id, image_url or image_data."""
+        image_url = data.get("image_url")
+        image_data = data.get("image_data")
+        entity_id = data.get("entity_id")
+
+        image_bytes = None
+        content_type = None
+
+        # Method 1: Get frame from camera entity (in-process, no HTTP)
+        if entity_id:
+            _LOGGER.error(f"Getting image from entity: {entity_id}")
+            image_bytes, content_type = await async_get_camera_frame(
+                hass, entity_id, width=data.get("width"), height=data.get("height")
+            )
+
+        # Method 2: Get image from URL
+        elif image_url:
+            _LOGGER.error(f"Getting image from URL: {image_url}")
+            image_bytes = await _get_image_from_url(hass, image_url)
+
+        # Method 3: Use provided base64 data
+        elif image_data:
+            _LOGGER.error(f"Using provided base64 image data ({len(image_data)} chars)")
+            try:
+                image_bytes = base64.b64decode(image_data)
+            except Exception as e:
+                _LOGGER.error(f"Failed to decode base64 image data: {e}")
+                raise ValueError(f"Invalid base64 image data: {e}")
+
+        else:
+            raise ValueError("No image source provided. Use image_url, image_data, or entity_id")
+
+        if not image_bytes:
+            raise ValueError("Failed to get image data")
+
+        return image_bytes, content_type or _guess_content_type(image_bytes)
+
+    def _guess_content_type(image_bytes: bytes) -> str:
+        """Guess the image content type from its magic bytes."""
+        if image_bytes[:3] == b"\xff\xd8\xff":
+            return "image/jpeg"
+        if image_bytes[:8] == b"\x89PNG\r\n\x1a\n":
+            return "image/png"
+        if image_bytes[:4] == b"RIFF" and image_bytes[8:12] == b"WEBP":
+            return "image/webp"
+        return "application/octet-stream"
 
     async def _get_image_from_url(hass, image_url: str) -> bytes:
         """Get image from URL."""
@@ -207,15 +272,13 @@ async def async_setup_services(hass):
 
             _LOGGER.error(f"Fetching image from: {image_url}")
 
-            session = aiohttp.ClientSession()
-            try:
-                async with session.get(image_url, timeout=10) as response:
-                    if response.status == 200:
-                        return await response.read()
-                    else:
-                        raise ValueError(f"Failed to fetch image: {response.status}")
-            finally:
-                await session.close()
+            # HA's shared, pooled session - no per-call session setup
+            session = async_get_clientsession(hass)
+            async with session.get(image_url, timeout=aiohttp.ClientTimeout(total=10)) as response:
+                if response.status == 200:
+                    return await response.read()
+                else:
+                    raise ValueError(f"Failed to fetch image: {response.status}")
 
         except Exception as e:
             _LOGGER.error(f"Failed to get image from URL {image_url}: {e}")
@@ -228,9 +291,23 @@ async def async_setup_services(hass):
         vol.Optional("image_data"): cv.string,
         vol.Optional("image_url"): cv.string,
         vol.Optional("entity_id"): cv.string,
+        vol.Optional("width"): cv.positive_int,
+        vol.Optional("height"): cv.positive_int,
         vol.Optional("display_name"): cv.string,
     })
 
+    # Schema for recognize_faces service: a list of recognize_face-style images
+    RECOGNIZE_FACES_SCHEMA = vol.Schema({
+        vol.Required("images"): vol.All(cv.ensure_list, [vol.Schema({
+            vol.Required("camera"): cv.string,
+            vol.Optional("image_data"): cv.string,
+            vol.Optional("image_url"): cv.string,
+            vol.Optional("entity_id"): cv.string,
+            vol.Optional("width"): cv.positive_int,
+            vol.Optional("height"): cv.positive_int,
+        })], vol.Length(min=1)),
+    })
+
     # Schema for fire_event service
     FIRE_EVENT_SCHEMA = vol.Schema({
         vol.Required("person_id"): cv.string,
@@ -256,7 +333,16 @@ async def async_setup_services(hass):
         DOMAIN,
         "recognize_face",
         recognize_face_service,
-        schema=RECOGNIZE_FACE_SCHEMA
+        schema=RECOGNIZE_FACE_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+    hass.services.async_register(
+        DOMAIN,
+        "recognize_faces",
+        recognize_faces_service,
+        schema=RECOGNIZE_FACES_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
     )
 
     _LOGGER.info("Face Recognition services registered")